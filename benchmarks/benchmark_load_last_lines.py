@@ -0,0 +1,76 @@
+"""Benchmarks command_util.load_last_lines_from_file() against a full read of the file.
+
+Usage:
+    python -m benchmarks.benchmark_load_last_lines [--sizes 1 16 256] [--lines 50]
+
+Sizes are given in megabytes. Log files of each size are generated in a temporary folder
+using lines shaped like those grimagents writes into its log.
+"""
+
+import argparse
+import collections
+import tempfile
+import timeit
+
+from pathlib import Path
+
+import grimagents.command_util as command_util
+
+
+LOG_LINE = '[2019-09-12 02:03:14,858][INFO] Final Mean Reward: 1.358\n'
+
+
+def load_last_lines_by_full_read(file_path: Path, line_count):
+    """The previous implementation, which reads every line of the file into a circular buffer."""
+
+    queue = collections.deque(maxlen=line_count)
+    with file_path.open('r') as f:
+        for line in f:
+            queue.append(line.rstrip())
+
+    return [line for line in queue]
+
+
+def create_log_file(file_path: Path, size_mb):
+
+    line_count = (size_mb * 1024 * 1024) // len(LOG_LINE)
+    with file_path.open('w') as f:
+        for _ in range(line_count // 1000):
+            f.write(LOG_LINE * 1000)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Benchmark reading the last lines of a log file')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 16, 64, 256])
+    parser.add_argument('--lines', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f'{"Size (MB)":>10} {"Full read (ms)":>16} {"Reverse seek (ms)":>18}')
+
+    with tempfile.TemporaryDirectory() as folder:
+        for size in args.sizes:
+            file_path = Path(folder) / f'grimagents_{size}.log'
+            create_log_file(file_path, size)
+
+            full_read = min(
+                timeit.repeat(
+                    lambda: load_last_lines_by_full_read(file_path, args.lines),
+                    number=1,
+                    repeat=args.repeat,
+                )
+            )
+            reverse_seek = min(
+                timeit.repeat(
+                    lambda: command_util.load_last_lines_from_file(file_path, args.lines),
+                    number=1,
+                    repeat=args.repeat,
+                )
+            )
+
+            print(f'{size:>10} {full_read * 1000:>16.2f} {reverse_seek * 1000:>18.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,8 @@ Features:
 - Load training arguments from a configuration file
 - Override loaded configuration arguments with command line arguments
 - Optionally time-stamp the training run-id
+- Train several configuration files in one batch, optionally in parallel
+- Run a job server that queues training and search jobs submitted with '--submit'
 
 See readme.md for more information.
 """
@@ -16,8 +18,11 @@ import logging
 import logging.config
 import sys
 
-import grimagents.settings as settings
 import grimagents.common as common
+import grimagents.job_server as job_server
+import grimagents.log_util as log_util
+import grimagents.search as search
+import grimagents.settings as settings
 
 from grimagents.training_commands import (
     ListTrainingOptions,
@@ -25,9 +30,9 @@ from grimagents.training_commands import (
     EditTrainerConfigFile,
     StartTensorboard,
     PerformTraining,
+    PerformBatchTraining,
 )
 
-
 main_log = logging.getLogger('grimagents.main')
 
 
@@ -35,27 +40,87 @@ def main():
 
     configure_logging()
 
+    argv = get_argvs()
+    args = parse_args(argv)
+
+    if args.submit or args.jobs:
+        perform_job_request(job_server.TRAINING_JOB, argv, args)
+        logging.shutdown()
+        return
+
     if not common.is_pipenv_present():
         main_log.error(
             'No virtual environment is accessible by Pipenv from this directory, unable to run mlagents-learn'
         )
         sys.exit(1)
 
-    argv = get_argvs()
-    args = parse_args(argv)
+    return_code = None
+    if args.serve:
+        try:
+            job_server.serve(get_job_types(), max_jobs=args.max_jobs, port=args.server_port)
+        except job_server.JobServerError as exception:
+            main_log.error(exception)
+            return_code = 1
+    else:
+        return_code = get_command(args).execute()
+
+    logging.shutdown()
+
+    # Training commands return the return code of the training they executed, batches the first that failed
+    if return_code:
+        sys.exit(return_code)
+
+
+def get_command(args):
+    """Returns the training command selected by the parsed command line arguments."""
 
     if args.list:
-        ListTrainingOptions(args).execute()
+        return ListTrainingOptions(args)
     elif args.edit_config:
-        EditGrimConfigFile(args).execute()
+        return EditGrimConfigFile(args)
     elif args.edit_trainer_config:
-        EditTrainerConfigFile(args).execute()
+        return EditTrainerConfigFile(args)
     elif args.tensorboard_start:
-        StartTensorboard(args).execute()
+        return StartTensorboard(args)
+    elif len(args.configuration_files) > 1:
+        return PerformBatchTraining(args)
     else:
-        PerformTraining(args).execute()
+        return PerformTraining(args)
 
-    logging.shutdown()
+
+def get_job_types():
+    """Returns the argument parser and the module that executes each kind of job the job server accepts."""
+
+    return {
+        job_server.TRAINING_JOB: (parse_args, 'grimagents'),
+        job_server.SEARCH_JOB: (search.parse_args, 'grimagents.search'),
+    }
+
+
+def perform_job_request(kind, argv, args):
+    """Submits a job to, or lists the jobs of, a job server started with '--serve'. Used by both grimagents and grimsearch.
+
+    Parameters:
+        kind: str: The kind of job the arguments describe
+        argv: list: The command line arguments the CLI application was started with
+        args: Namespace: The parsed command line arguments
+    """
+
+    try:
+        if args.submit:
+            job = job_server.submit_job(
+                kind, job_server.get_submitted_argv(argv), port=args.server_port
+            )
+            main_log.info(f'Submitted {kind} job {job["id"]}')
+        else:
+            jobs = job_server.get_jobs(port=args.server_port)
+            for job in jobs:
+                main_log.info(job_server.format_job(job))
+            if not jobs:
+                main_log.info('No jobs have been submitted')
+    except job_server.JobServerError as exception:
+        main_log.error(exception)
+        sys.exit(1)
 
 
 def get_argvs():
@@ -93,6 +158,45 @@ def parse_args(argv):
     options_parser.add_argument(
         '--dry-run', '-n', action='store_true', help='Print command without executing'
     )
+    options_parser.add_argument(
+        '--parallel',
+        metavar='<n>',
+        type=int,
+        default=1,
+        help='The number of training runs to execute at the same time when several configuration files are provided',
+    )
+    options_parser.add_argument(
+        '--auto-port',
+        action='store_true',
+        help='Lease free ports for training from a registry shared by grimagents processes, starting from --base-port if it is set',
+    )
+    options_parser.add_argument(
+        '--serve',
+        action='store_true',
+        help='Start a job server that runs training and search jobs submitted with --submit',
+    )
+    options_parser.add_argument(
+        '--max-jobs',
+        metavar='<n>',
+        type=int,
+        default=1,
+        help='The number of jobs the job server runs at the same time',
+    )
+    options_parser.add_argument(
+        '--submit',
+        action='store_true',
+        help='Submit this training run to a job server instead of executing it',
+    )
+    options_parser.add_argument(
+        '--jobs', action='store_true', help='List the status of jobs on a job server'
+    )
+    options_parser.add_argument(
+        '--server-port',
+        metavar='<port>',
+        type=int,
+        default=settings.JOB_SERVER_PORT,
+        help='The port of the job server',
+    )
 
     # Parser for arguments that may override configuration values
     overrides_parser = argparse.ArgumentParser(add_help=False)
@@ -103,6 +207,7 @@ def parse_args(argv):
     overrides_parser.add_argument('--run-id', type=str, help='Overrides configuration setting')
     overrides_parser.add_argument('--base-port', type=int, help='Overrides configuration setting')
     overrides_parser.add_argument('--num-envs', type=int, help='Overrides configuration setting')
+    overrides_parser.add_argument('--seed', type=int, help='Overrides configuration setting')
     overrides_parser.add_argument(
         '--inference',
         action='store_true',
@@ -149,7 +254,11 @@ def parse_args(argv):
     )
 
     parser.add_argument(
-        'configuration_file', type=str, help='Configuration file to extract training arguments from'
+        'configuration_files',
+        metavar='configuration_file',
+        type=str,
+        nargs='+',
+        help='Configuration files to extract training arguments from, each is trained in its own training run',
     )
     parser.add_argument(
         'additional_args',
@@ -167,6 +276,7 @@ def parse_args(argv):
 
     if len(unparsed_args) > 0:
         args = parser.parse_args(unparsed_args, args)
+        args.configuration_file = args.configuration_files[0]
 
     return args
 
@@ -187,22 +297,19 @@ def configure_logging():
                 'stream': 'ext://sys.stdout',
                 'formatter': 'display',
             },
-            'file': {'class': 'logging.FileHandler', 'filename': '', 'formatter': 'timestamp'},
+            'file': log_util.get_file_handler_config(),
         },
         'loggers': {
             'grimagents.main': {'handlers': ['console', 'file']},
             'grimagents.config': {'handlers': ['console', 'file']},
             'grimagents.command_util': {'handlers': ['console', 'file']},
+            'grimagents.job_server': {'handlers': ['console', 'file']},
+            'grimagents.training_commands': {'handlers': ['console', 'file']},
+            'grimagents.search': {'handlers': ['console', 'file']},
         },
         'root': {'level': 'INFO'},
     }
 
-    log_file = settings.get_log_file_path()
-
-    if not log_file.parent.exists():
-        log_file.parent.mkdir(parents=True, exist_ok=True)
-
-    log_config['handlers']['file']['filename'] = log_file
     logging.config.dictConfig(log_config)
 
 
@@ -1,6 +1,6 @@
 """Facilitates executing system commands and opening files."""
 
-import collections
+import contextlib
 import json
 import logging
 import os
@@ -9,10 +9,21 @@ import yaml
 
 from pathlib import Path
 
+import grimagents.constants as const
 import grimagents.settings as settings
 
+try:
+    import fcntl
 
-TRAINING_HISTORY_COUNT = 10
+    msvcrt = None
+except ImportError:
+    import msvcrt
+
+
+# The history file is append-only and compacted down to the most recent commands once it grows beyond HISTORY_COMPACT_BYTES
+TRAINING_HISTORY_COUNT = 1000
+HISTORY_COMPACT_BYTES = 1024 * 1024
+TAIL_BLOCK_SIZE = 8192
 
 
 command_log = logging.getLogger('grimagents.command_util')
@@ -23,7 +34,11 @@ class CommandUtilError(Exception):
 
 
 def execute_command(command: list, cwd=None, show_command=True, dry_run=False):
-    """Executes a command in terminal. Optionally echos the provided command."""
+    """Executes a command in terminal. Optionally echos the provided command.
+
+    Returns:
+      The command's return code, or None if dry_run is True.
+    """
 
     # Subprocess requires all elements of the command list to be strings
     command = [str(element) for element in command]
@@ -34,7 +49,24 @@ def execute_command(command: list, cwd=None, show_command=True, dry_run=False):
     if dry_run:
         return
 
-    subprocess.run(command, cwd=cwd)
+    return subprocess.run(command, cwd=cwd).returncode
+
+
+def get_command_value(command: list, key):
+    """Returns the value following an argument in a command, or None if the argument is not present."""
+
+    if key not in command:
+        return None
+
+    index = command.index(key)
+    return command[index + 1] if index + 1 < len(command) else None
+
+
+def insert_command_arguments(command: list, arguments: list):
+    """Inserts arguments into a training command, ahead of '--env-args' which must remain at the end."""
+
+    index = command.index(const.ML_ENV_ARGS) if const.ML_ENV_ARGS in command else len(command)
+    command[index:index] = arguments
 
 
 def open_file(file_path: Path):
@@ -122,48 +154,159 @@ def load_yaml_file(file_path: Path):
     return data
 
 
+@contextlib.contextmanager
+def lock_file(file):
+    """Holds an exclusive advisory lock on an open file for the duration of a with block.
+
+    Processes that do not lock the file are not prevented from accessing it.
+    """
+
+    if msvcrt:
+        # msvcrt locks a byte range, the first byte is used as the lock for the whole file
+        position = file.tell()
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+        file.seek(position)
+    else:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+
+    try:
+        yield file
+    finally:
+        if msvcrt:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+
 def create_history_file():
     """Creates or overwrites the training command history file."""
 
     history_file = settings.get_history_file_path()
-    history = {"history": []}
-    write_json_file(history, history_file)
+    if not history_file.parent.exists():
+        history_file.parent.mkdir(parents=True)
+
+    history_file.write_text('')
+
 
+def load_history(count=None):
+    """Loads training commands executed from the history file, most recent first.
 
-def load_history():
-    """Loads a list of training commands executed from the history file.
+    Parameters:
+      count: int: The number of commands to load, all commands are loaded if None
 
     Returns:
-      The training command history list.
+      The training command history list, which is empty if the history file can't be read.
     """
 
     history_file = settings.get_history_file_path()
 
-    if not history_file.exists():
-        create_history_file()
+    # Windows gives up waiting for a contended lock after about 10 seconds
+    try:
+        if not history_file.exists():
+            create_history_file()
+
+        with history_file.open('rb+') as f, lock_file(f):
+            if is_legacy_history(f):
+                migrate_legacy_history(f)
+
+            if count is None:
+                f.seek(0)
+                lines = f.read().decode('utf-8', errors='replace').splitlines()
+            else:
+                # The last line may be a command that was only partially written
+                lines = read_last_lines(f, count + 1)
+
+    except OSError as error:
+        command_log.warning(f'Unable to load training command history, {error}')
+        return []
+
+    history = []
+    for line in reversed(lines):
+        try:
+            history.append(json.loads(line))
+        except json.decoder.JSONDecodeError:
+            continue
+
+        if count is not None and len(history) >= count:
+            break
 
-    return load_json_file(history_file)
+    return history
 
 
 def save_to_history(command: list):
-    """Saves a training command to the history file."""
+    """Appends a training command to the history file.
 
+    The history file is compacted down to the last TRAINING_HISTORY_COUNT commands once it grows beyond HISTORY_COMPACT_BYTES.
+    """
+
+    history_file = settings.get_history_file_path()
+
+    # Windows gives up waiting for a contended lock after about 10 seconds
     try:
-        history_file = settings.get_history_file_path()
-        dict = load_history()
+        if not history_file.parent.exists():
+            history_file.parent.mkdir(parents=True)
 
-        while len(dict['history']) >= TRAINING_HISTORY_COUNT:
-            dict['history'].pop()
+        with history_file.open('ab+') as f, lock_file(f):
+            if is_legacy_history(f):
+                migrate_legacy_history(f)
 
-        dict['history'].insert(0, command)
+            line = json.dumps(command).encode('utf-8') + b'\n'
 
-        with history_file.open(mode='w') as file:
-            json.dump(dict, file, indent=4)
+            # Start a new line if a previous write was interrupted before its newline was written
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    line = b'\n' + line
 
-    except json.decoder.JSONDecodeError as error:
+            f.write(line)
+            f.flush()
+
+            if f.tell() > HISTORY_COMPACT_BYTES:
+                compact_history(f)
+
+    except OSError as error:
         command_log.warning(f'Unable to save training command to history, {error}')
 
 
+def compact_history(file):
+    """Rewrites a locked history file, keeping only the last TRAINING_HISTORY_COUNT commands."""
+
+    file.seek(0)
+    lines = file.read().splitlines()[-TRAINING_HISTORY_COUNT:]
+
+    file.seek(0)
+    file.truncate()
+    file.write(b''.join(line + b'\n' for line in lines))
+    file.flush()
+
+
+def is_legacy_history(file):
+    """Returns True if a history file holds the JSON dictionary written by grimagents 2.6 and earlier."""
+
+    file.seek(0)
+    return file.read(1) == b'{'
+
+
+def migrate_legacy_history(file):
+    """Rewrites a locked legacy history file as one command per line, oldest first."""
+
+    file.seek(0)
+    try:
+        history = json.loads(file.read().decode('utf-8')).get('history', [])
+    except (json.decoder.JSONDecodeError, UnicodeDecodeError) as error:
+        command_log.warning(f'Discarding unreadable history file, {error}')
+        history = []
+
+    file.seek(0)
+    file.truncate()
+    file.write(
+        b''.join(json.dumps(command).encode('utf-8') + b'\n' for command in reversed(history))
+    )
+    file.flush()
+
+
 def load_last_history():
     """Loads the last training command executed from the history file.
 
@@ -174,9 +317,9 @@ def load_last_history():
       CommandUtilError: The history file is empty.
     """
 
-    dict = load_history()
+    history = load_history(count=1)
     try:
-        return dict['history'][0]
+        return history[0]
     except IndexError:
         command_log.error('History file is empty')
         raise CommandUtilError('History file is empty')
@@ -185,12 +328,39 @@ def load_last_history():
 def load_last_lines_from_file(file_path: Path, line_count):
     """Returns the last <n> number of lines from a file.
 
-    While the entire file is read, lines are read into a circular buffer so as to not consume large amounts of memory.
+    The file is read backwards from its end in fixed size blocks until enough lines have been found, so the cost depends on the number of lines requested rather than the size of the file.
     """
 
-    queue = collections.deque(maxlen=line_count)
-    with file_path.open('r') as f:
-        for line in f:
-            queue.append(line.rstrip())
+    with file_path.open('rb') as f:
+        return read_last_lines(f, line_count)
+
+
+def read_last_lines(file, line_count):
+    """Returns the last <n> number of lines from a file opened in binary mode. See load_last_lines_from_file()."""
+
+    if line_count <= 0:
+        return []
+
+    blocks = []
+    newline_count = 0
+
+    position = file.seek(0, os.SEEK_END)
+
+    # One more newline than the number of lines requested guarantees the first line kept is complete.
+    while position > 0 and newline_count <= line_count:
+        read_size = min(TAIL_BLOCK_SIZE, position)
+        position -= read_size
+        file.seek(position)
+
+        block = file.read(read_size)
+        newline_count += block.count(b'\n')
+        blocks.append(block)
+
+    text = b''.join(reversed(blocks)).decode('utf-8', errors='replace')
+    lines = text.splitlines()
+
+    # The first line is only partially read if the start of the file was not reached.
+    if position > 0:
+        lines = lines[1:]
 
-    return [line for line in queue]
+    return [line.rstrip() for line in lines[-line_count:]]
@@ -74,3 +74,35 @@ def add_nested_dict_value(dictionary: dict, key, value, sep: chr = '.'):
         dictionary[key] = value
 
     return dictionary
+
+
+def get_nested_dict_value(dictionary: dict, key, default=None, sep: chr = '.'):
+    """Returns a value from a dictionary. If the key contains the separator character,
+    the value is looked up inside the series of nested dictionaries named by the key.
+    Returns 'default' if any of the keys are missing.
+    """
+
+    value = dictionary
+    for current_key in key.split(sep=sep):
+        if not isinstance(value, dict) or current_key not in value:
+            return default
+        value = value[current_key]
+
+    return value
+
+
+def flatten_dict(dictionary: dict, sep: chr = '.'):
+    """Returns a dictionary of the values inside a series of nested dictionaries, keyed by
+    the keys leading to each value joined by the separator character. The reverse of
+    add_nested_dict_value().
+    """
+
+    result = {}
+    for key, value in dictionary.items():
+        if isinstance(value, dict) and value:
+            for nested_key, nested_value in flatten_dict(value, sep=sep).items():
+                result[f'{key}{sep}{nested_key}'] = nested_value
+        else:
+            result[key] = value
+
+    return result
@@ -0,0 +1,188 @@
+"""Tunes how many search training runs execute at the same time, by hill climbing on the environment steps per second that every training run in progress achieves together.
+
+- Throughput is measured at a concurrency level once as many training runs as the level allows are reporting steps, and is averaged over a measurement window
+- The level is raised one training run at a time while each raise improves throughput by more than a tolerance and the host has idle cores
+- Once a raise does not pay off, the level steps back to the level before it and holds there, raising it again periodically in case the training runs have changed
+- The throughput measured at each level and the level settled on are saved, and the next search with the same run id starts from that level
+"""
+
+import json
+import os
+import statistics
+
+from pathlib import Path
+
+import grimagents.command_util as command_util
+import grimagents.common as common
+
+
+# Seconds of throughput measurements averaged at a concurrency level before deciding whether to change it
+MEASUREMENT_WINDOW = 120.0
+# The fraction by which a raise must improve throughput to be kept
+IMPROVEMENT_TOLERANCE = 0.05
+# The load average per core above which the level is not raised, as the host has no idle cores
+LOAD_LIMIT = 1.0
+# Seconds a settled level is held before raising it again
+REPROBE_INTERVAL = 1800.0
+
+
+class ConcurrencyController:
+    """Chooses the number of training runs a search executes at the same time from the throughput measured at each level."""
+
+    def __init__(
+        self,
+        maximum,
+        initial=1,
+        minimum=1,
+        window=None,
+        tolerance=IMPROVEMENT_TOLERANCE,
+        reprobe_interval=REPROBE_INTERVAL,
+    ):
+        """
+        Parameters:
+            maximum: int: The most training runs executed at the same time
+            initial: int: The level the search starts at
+            minimum: int: The fewest training runs executed at the same time
+            window: float: Seconds of measurements averaged at each level, defaults to MEASUREMENT_WINDOW
+            tolerance: float: The fraction by which a raise must improve throughput to be kept
+            reprobe_interval: float: Seconds a settled level is held before raising it again
+        """
+
+        self.minimum = max(minimum, 1)
+        self.maximum = max(maximum, self.minimum)
+        self.level = min(max(initial, self.minimum), self.maximum)
+
+        self.window = MEASUREMENT_WINDOW if window is None else window
+        self.tolerance = tolerance
+        self.reprobe_interval = reprobe_interval
+
+        # The throughput measured at each level, oldest first
+        self.curve = {}
+
+        self.samples = []
+        self.window_start = None
+        self.settled_time = None
+
+    def is_settled(self):
+
+        return self.settled_time is not None
+
+    def record(self, throughput, training, now, load=None):
+        """Records the aggregate steps per second of the training runs in progress, and changes the level once a measurement window is complete.
+
+        Parameters:
+            throughput: float: The steps per second of every training run in progress together
+            training: int: The number of training runs in progress that are training and reporting steps
+            now: float: A time.monotonic() value
+            load: float: The host's load average per core, or None if it is not known
+
+        Returns:
+          The new level if it changed, otherwise None.
+        """
+
+        # Training runs starting up or shutting down would be measured as slow, so the level is only
+        # measured while it is filled with training runs that are training.
+        if training != self.level:
+            self.samples = []
+            self.window_start = None
+            return None
+
+        if self.window_start is None:
+            self.window_start = now
+
+        self.samples.append(throughput)
+        if now - self.window_start < self.window:
+            return None
+
+        self.curve.setdefault(self.level, []).append(statistics.mean(self.samples))
+        self.samples = []
+        self.window_start = None
+
+        previous_level = self.level
+        self.decide(now, load)
+
+        return self.level if self.level != previous_level else None
+
+    def decide(self, now, load=None):
+        """Raises, lowers or holds the level after a measurement at the current level."""
+
+        can_raise = self.level < self.maximum and (load is None or load < LOAD_LIMIT)
+
+        if self.is_settled():
+            if now - self.settled_time >= self.reprobe_interval and can_raise:
+                self.settled_time = None
+                self.level += 1
+            return
+
+        current = self.get_throughput(self.level)
+        lower = self.get_throughput(self.level - 1)
+
+        if lower is not None and current <= lower * (1 + self.tolerance):
+            # The last raise did not pay off, fewer training runs each train faster for the same throughput
+            self.level -= 1
+            self.settled_time = now
+        elif can_raise:
+            self.level += 1
+        else:
+            self.settled_time = now
+
+    def get_throughput(self, level):
+        """Returns the most recent throughput measured at a level, or None if it has not been measured."""
+
+        measurements = self.curve.get(level)
+        if not measurements:
+            return None
+
+        return measurements[-1]
+
+    def get_best_level(self):
+        """Returns the fewest training runs whose recent throughput is within the tolerance of the highest measured, or the current level if none has been measured."""
+
+        levels = sorted(level for level in self.curve if self.curve[level])
+        if not levels:
+            return self.level
+
+        best = max(self.get_throughput(level) for level in levels)
+        return next(
+            level for level in levels if self.get_throughput(level) * (1 + self.tolerance) >= best
+        )
+
+    def get_record(self):
+        """Returns a dictionary of the level settled on and the most recent throughput measured at each level, for starting later searches from."""
+
+        return {
+            'timestamp': common.get_timestamp(),
+            'level': self.get_best_level(),
+            'curve': {str(level): self.get_throughput(level) for level in sorted(self.curve)},
+        }
+
+
+def get_host_load():
+    """Returns the host's one minute load average per core, or None on platforms that do not report one."""
+
+    try:
+        load = os.getloadavg()[0]
+    except (AttributeError, OSError):
+        return None
+
+    return load / (os.cpu_count() or 1)
+
+
+def load_level(file_path: Path):
+    """Returns the level an earlier search settled on from its concurrency record, or None if no record can be read."""
+
+    if not file_path.exists():
+        return None
+
+    try:
+        level = command_util.load_json_file(file_path).get('level')
+    except (json.decoder.JSONDecodeError, FileNotFoundError, AttributeError):
+        return None
+
+    return level if isinstance(level, int) and level > 0 else None
+
+
+def save_record(file_path: Path, controller: ConcurrencyController):
+    """Writes a controller's concurrency record (see ConcurrencyController.get_record())."""
+
+    command_util.write_json_file(controller.get_record(), file_path)
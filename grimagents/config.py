@@ -4,15 +4,25 @@ loaded configurations.
 Notes:
 - All path values should be a relative path from the MLAgents project root folder
 - The `--export-path` configuration value is consumed by training_wrapper.py
+- Trainer and search configurations are validated against the registry of mlagents-learn
+  trainer settings in trainer_parameters.py, so misspelled settings are reported before
+  any training run is launched. Unknown settings and trainer types are warned about rather
+  than rejected, as custom trainers and newer versions of mlagents-learn add their own.
 """
 
+import difflib
 import logging
 from pathlib import Path
 
 import yaml
 
 import grimagents.command_util as command_util
+import grimagents.common as common
 import grimagents.constants as const
+import grimagents.trainer_parameters as trainer_parameters
+
+from grimagents.parameter_search import InvalidSearchParameter, SearchParameter
+from grimagents.search_constraints import InvalidSearchConstraint, get_constraints
 
 
 _DEFAULT_GRIM_CONFIG = {
@@ -206,10 +216,28 @@ def validate_grim_configuration(configuration):
     # configuration, but it should not contain any keys that do not exist
     # in the full configuration.
     for key, value in configuration.items():
-        # 'search' is not defined in the default configuration but is still a valid key.
-        if key == const.GS_SEARCH:
+        # 'search' and 'additional-args' are not defined in the default configuration but are still valid keys.
+        if key in {const.GS_SEARCH, const.GA_ADDITIONAL_ARGS}:
+            continue
+
+        # Other command line arguments are passed on to training_wrapper and mlagents-learn
+        if key not in _DEFAULT_GRIM_CONFIG:
+            if not key.startswith('-'):
+                config_log.error(
+                    f'Configuration key \'{key}\' is not a command line argument{get_suggestion(key, _DEFAULT_GRIM_CONFIG)}'
+                )
+                is_valid_config = False
             continue
 
+        # Arguments that do not accept a value are enabled with true, other values are ignored
+        if (
+            isinstance(_DEFAULT_GRIM_CONFIG[key], bool)
+            and not isinstance(value, bool)
+            and value not in ('', None)
+        ):
+            config_log.error(f'Configuration value for \'{key}\' must be true or false.')
+            is_valid_config = False
+
     # The only required keys are 'trainer-config-path' and '--run-id'
     for key in {const.ML_TRAINER_CONFIG_PATH, const.ML_RUN_ID}:
         try:
@@ -232,6 +260,138 @@ def validate_grim_configuration(configuration):
     return is_valid_config
 
 
+def validate_trainer_configuration(configuration):
+    """Checks the settings of every behavior in a trainer configuration against the registry of
+    mlagents-learn trainer settings (see trainer_parameters.TRAINER_PARAMETERS).
+
+    Returns:
+      True if the configuration is valid and False if it is not.
+    """
+
+    behaviors = configuration.get(const.TC_BEHAVIORS) if isinstance(configuration, dict) else None
+    if not isinstance(behaviors, dict) or not behaviors:
+        config_log.error(f'Trainer configuration is missing \'{const.TC_BEHAVIORS}\'')
+        return False
+
+    sections = {f'{const.TC_BEHAVIORS}.{name}': settings for name, settings in behaviors.items()}
+    if const.TC_DEFAULT_SETTINGS in configuration:
+        sections[const.TC_DEFAULT_SETTINGS] = configuration[const.TC_DEFAULT_SETTINGS]
+
+    is_valid_config = True
+    for section, settings in sections.items():
+        if not isinstance(settings, dict):
+            config_log.error(f'Trainer configuration \'{section}\' must contain settings')
+            is_valid_config = False
+            continue
+
+        for key, value in common.flatten_dict(settings).items():
+            # Settings left empty use mlagents-learn's defaults
+            if value is None or value == {}:
+                continue
+
+            warning = get_setting_warning(key, value)
+            if warning:
+                config_log.warning(f'Trainer configuration \'{section}\': {warning}')
+
+            error = trainer_parameters.validate_value(key, value)
+            if error:
+                config_log.error(f'Trainer configuration \'{section}\': {error}')
+                is_valid_config = False
+
+    return is_valid_config
+
+
+def validate_search_configuration(search_config, trainer_config):
+    """Checks a search configuration's behavior, search parameters and constraints against a
+    trainer configuration and the registry of mlagents-learn trainer settings.
+
+    Returns:
+      True if the configuration is valid and False if it is not.
+    """
+
+    if not isinstance(search_config, dict):
+        config_log.error(f'Configuration is missing a \'{const.GS_SEARCH}\' entry')
+        return False
+
+    is_valid_config = True
+
+    behaviors = trainer_config.get(const.TC_BEHAVIORS) if isinstance(trainer_config, dict) else None
+    behaviors = behaviors if isinstance(behaviors, dict) else {}
+    behavior_name = search_config.get(const.GS_BEHAVIOR_NAME)
+    if behavior_name not in behaviors:
+        config_log.error(
+            f'Search \'{const.GS_BEHAVIOR_NAME}\' \'{behavior_name}\' is not a behavior in the trainer configuration{get_suggestion(str(behavior_name), behaviors)}'
+        )
+        is_valid_config = False
+
+    search_parameters = search_config.get(const.GS_SEARCH_PARAMETERS)
+    if not isinstance(search_parameters, dict) or not search_parameters:
+        config_log.error(f'Search is missing \'{const.GS_SEARCH_PARAMETERS}\'')
+        search_parameters = {}
+        is_valid_config = False
+
+    for key, definition in search_parameters.items():
+        if not trainer_parameters.is_known_setting(key):
+            config_log.warning(f'Search parameter {get_unknown_setting_warning(key)}')
+
+        try:
+            SearchParameter(key, definition)
+        except InvalidSearchParameter as exception:
+            config_log.error(f'Invalid search parameter, {exception}')
+            is_valid_config = False
+
+    try:
+        constraints = get_constraints(search_config.get(const.GS_CONSTRAINTS))
+    except InvalidSearchConstraint as exception:
+        config_log.error(f'Invalid search constraint, {exception}')
+        return False
+
+    for constraint in constraints:
+        for key in constraint.keys:
+            if not trainer_parameters.is_known_setting(key):
+                config_log.warning(
+                    f'Search constraint \'{constraint}\': {get_unknown_setting_warning(key)}'
+                )
+
+    return is_valid_config
+
+
+def get_setting_warning(key, value):
+    """Returns a description of why a trainer setting may not be what was intended, or None if it is a known setting."""
+
+    if not trainer_parameters.is_known_setting(key):
+        return get_unknown_setting_warning(key)
+
+    if key == const.TC_TRAINER_TYPE and value not in trainer_parameters.TRAINER_TYPES:
+        return f'\'{key}\' {value!r} is not one of mlagents-learn\'s trainer types {trainer_parameters.TRAINER_TYPES}, assuming it is a custom trainer'
+
+    return None
+
+
+def get_unknown_setting_warning(key):
+
+    suggestion = get_suggestion(key, trainer_parameters.get_similar_settings(key), similar=True)
+    return f'\'{key}\' is not a known mlagents-learn trainer setting{suggestion}'
+
+
+def get_suggestion(key, candidates, similar=False):
+    """Returns a ', did you mean ...' suffix naming the candidate most similar to 'key', or an empty string if none are similar.
+
+    Parameters:
+        similar: bool: The candidates have already been chosen and ordered by similarity
+    """
+
+    if not similar:
+        candidates = difflib.get_close_matches(
+            key, [str(candidate) for candidate in candidates], n=1
+        )
+
+    if not candidates:
+        return ''
+
+    return f', did you mean \'{candidates[0]}\'?'
+
+
 def load_trainer_configuration_file(file_path: Path):
     """Loads a MLAgents trainer configuration from a yaml file."""
 
@@ -30,6 +30,8 @@ HP_BUFFER_SIZE = 'buffer_size'
 # Trainer configuration
 TC_BEHAVIORS = 'behaviors'
 TC_HYPERPARAMETERS = 'hyperparameters'
+TC_DEFAULT_SETTINGS = 'default_settings'
+TC_TRAINER_TYPE = 'trainer_type'
 
 # Grimagents
 GA_EXPORT_PATH = '--export-path'
@@ -42,3 +44,4 @@ GS_SEARCH = 'search'
 GS_BEHAVIOR_NAME = 'behavior_name'
 GS_SEARCH_PARAMETERS = 'search_parameters'
 GS_BUFFER_SIZE_MULTIPLE = 'buffer_size_multiple'
+GS_CONSTRAINTS = 'constraints'
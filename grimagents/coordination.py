@@ -0,0 +1,233 @@
+"""Coordinates grimagents and grimsearch processes running on the same machine.
+
+- Port ranges are leased through a registry file in the user's runtime folder (see settings.get_runtime_folder()), so the user's concurrent training runs are given ranges that do not overlap
+- Ranges are probed before they are leased, so ports in use by other users' training runs and by processes outside of grimagents are skipped
+- The runtime folder is only accessible to its owner, so other users can't read, change or replace the registry
+- Leases are released by the process that took them, leases held by processes that are no longer running are discarded
+- Scratch files are given per-process names so processes only ever clean up their own files
+"""
+
+import collections
+import contextlib
+import json
+import logging
+import os
+import socket
+import stat
+import uuid
+
+from pathlib import Path
+
+import grimagents.command_util as command_util
+import grimagents.settings as settings
+
+
+# The port mlagents-learn uses when no '--base-port' is provided
+DEFAULT_BASE_PORT = 5005
+MAX_PORT = 65535
+
+PORT_REGISTRY_FILENAME = 'ports.json'
+
+
+coordination_log = logging.getLogger('grimagents.coordination')
+
+
+class CoordinationError(Exception):
+    pass
+
+
+PortLease = collections.namedtuple('PortLease', ['start', 'count', 'pid', 'token'])
+
+
+def get_port_registry_path():
+    """Returns the path to the port lease registry."""
+
+    return settings.get_runtime_folder() / PORT_REGISTRY_FILENAME
+
+
+def is_process_running(pid):
+    """Returns True if a process with the given id is running on this machine."""
+
+    if os.name == 'nt':
+        import ctypes
+
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        STILL_ACTIVE = 259
+
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return False
+
+        exit_code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        return exit_code.value == STILL_ACTIVE
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # The process exists but belongs to another user
+        return True
+
+    return True
+
+
+def is_port_available(port):
+    """Returns True if a TCP port can be bound on this machine."""
+
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        try:
+            probe.bind(('', port))
+        except OSError:
+            return False
+
+    return True
+
+
+def ranges_overlap(start, count, lease: PortLease):
+    return start < lease.start + lease.count and lease.start < start + count
+
+
+@contextlib.contextmanager
+def open_port_registry():
+    """Opens and locks the port lease registry for the duration of a with block.
+
+    Yields a list of active leases. Changes made to the list are written back into the registry.
+    """
+
+    registry_path = get_port_registry_path()
+    create_runtime_folder(registry_path.parent)
+
+    with registry_path.open('a+b') as f, command_util.lock_file(f):
+        f.seek(0)
+        try:
+            leases = [PortLease(**lease) for lease in json.loads(f.read() or b'[]')]
+        except (ValueError, TypeError):
+            coordination_log.warning(f'Discarding unreadable port registry \'{registry_path}\'')
+            leases = []
+
+        leases = [lease for lease in leases if is_process_running(lease.pid)]
+        yield leases
+
+        f.seek(0)
+        f.truncate()
+        f.write(json.dumps([lease._asdict() for lease in leases]).encode('utf-8'))
+        f.flush()
+
+
+def create_runtime_folder(folder: Path):
+    """Creates the runtime folder, accessible only to the current user.
+
+    Raises:
+        CoordinationError: The runtime folder exists but is a symbolic link, belongs to another user, or can be written to by other users
+    """
+
+    if not folder.exists():
+        folder.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+    # Windows has no user ids, its temporary folders are already private to each user
+    if not hasattr(os, 'getuid'):
+        return
+
+    status = folder.lstat()
+    if (
+        stat.S_ISLNK(status.st_mode)
+        or status.st_uid != os.getuid()
+        or status.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+    ):
+        raise CoordinationError(
+            f'Runtime folder \'{folder}\' must be a folder owned by the current user that other users can\'t write to'
+        )
+
+
+def lease_ports(count, start=DEFAULT_BASE_PORT, exact=False):
+    """Leases a range of consecutive ports for the current process.
+
+    Parameters:
+        count: int: The number of consecutive ports to lease
+        start: int: The first port to consider
+        exact: bool: Lease the range beginning at 'start' even if it overlaps another lease, for ports that were requested explicitly
+
+    Returns:
+        A PortLease, which should be returned with release_ports() once the ports are no longer used.
+
+    Raises:
+        CoordinationError: No free range of ports is available
+    """
+
+    count = max(1, int(count))
+
+    with open_port_registry() as leases:
+        if exact:
+            for lease in leases:
+                if ranges_overlap(start, count, lease):
+                    coordination_log.warning(
+                        f'Ports {start}-{start + count - 1} overlap ports leased by process {lease.pid}'
+                    )
+                    break
+        else:
+            start = find_free_range(count, start, leases, probe=True)
+
+        lease = PortLease(start=start, count=count, pid=os.getpid(), token=uuid.uuid4().hex)
+        leases.append(lease)
+
+    return lease
+
+
+def find_free_range(count, start, leases: list, probe=False):
+    """Returns the first port of the lowest range of 'count' ports at or after 'start' that does not overlap a lease.
+
+    Parameters:
+        probe: bool: Also skip ranges containing a port that can't be bound
+
+    Raises:
+        CoordinationError: No free range of ports is available
+    """
+
+    while start + count - 1 <= MAX_PORT:
+        overlapping = [lease for lease in leases if ranges_overlap(start, count, lease)]
+        if overlapping:
+            start = max(lease.start + lease.count for lease in overlapping)
+            continue
+
+        in_use = None
+        if probe:
+            in_use = next(
+                (port for port in range(start, start + count) if not is_port_available(port)), None
+            )
+
+        if in_use is None:
+            return start
+
+        start = in_use + 1
+
+    raise CoordinationError(f'No range of {count} free ports is available')
+
+
+def release_ports(lease: PortLease):
+    """Returns leased ports to the registry."""
+
+    with open_port_registry() as leases:
+        leases[:] = [existing for existing in leases if existing.token != lease.token]
+
+
+@contextlib.contextmanager
+def leased_ports(count, start=DEFAULT_BASE_PORT, exact=False):
+    """Leases a range of ports for the duration of a with block. See lease_ports()."""
+
+    lease = lease_ports(count, start=start, exact=exact)
+    try:
+        yield lease
+    finally:
+        release_ports(lease)
+
+
+def get_scratch_path(file_path: Path):
+    """Returns a path next to 'file_path' that is unique to the caller, for temporary files that would otherwise be shared by concurrent processes or threads."""
+
+    return file_path.with_name(
+        f'{file_path.stem}_{os.getpid()}_{uuid.uuid4().hex[:8]}{file_path.suffix}'
+    )
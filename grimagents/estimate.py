@@ -0,0 +1,246 @@
+"""Estimates how long training runs and searches take, using the step rates recorded in the summaries of earlier training runs.
+
+- A training run is expected to take a fixed startup time plus its 'max_steps' divided by the step rate
+- Step rates and startup times are the medians of earlier training runs, preferably those that used the same environment
+- Once a search has recorded training runs, step rates are predicted from the search parameters of each training run (such as 'hidden_units' or 'time_horizon'), using a ridge regression of the logarithm of the step rate on the logarithms of the parameters
+- Searches running several training runs at a time are estimated by assigning each training run to the first worker to become free
+"""
+
+import heapq
+import math
+import numpy
+import statistics
+
+import grimagents.command_util as command_util
+import grimagents.constants as const
+import grimagents.results as results
+
+
+# Regularization of the step rate regression, which is fitted from a handful of training runs
+RIDGE_PENALTY = 0.1
+
+
+class DurationModel:
+    """Predicts the duration of training runs from the step rates of earlier training runs."""
+
+    def __init__(self, summaries=()):
+        """
+        Parameters:
+            summaries: list: Summaries of earlier training runs, as written by the training wrapper
+        """
+
+        self.step_rates = []
+        self.startup_times = []
+
+        # (parameter features, log step rate) pairs of search training runs
+        self.parameter_rates = []
+
+        for summary in summaries:
+            self.record(summary)
+
+    def record(self, summary: dict, search_config=None):
+        """Adds a training run's summary to the history the model predicts from. Training runs that never reported a step are ignored.
+
+        Parameters:
+            search_config: dict: The search parameters the training run was performed with, if it was part of a search
+        """
+
+        steps_per_second = get_summary_steps_per_second(summary)
+        if steps_per_second is None:
+            return
+
+        self.step_rates.append(steps_per_second)
+        self.startup_times.append(
+            max((summary.get('duration') or 0) - summary['time_elapsed'], 0.0)
+        )
+
+        if search_config is not None:
+            self.record_parameters(summary, search_config)
+
+    def record_parameters(self, summary: dict, search_config: dict):
+        """Adds a search training run's step rate to the history step rates are predicted from, without adding it to the medians."""
+
+        steps_per_second = get_summary_steps_per_second(summary)
+        if steps_per_second is None:
+            return
+
+        self.parameter_rates.append(
+            (get_parameter_features(search_config), math.log(steps_per_second))
+        )
+
+    def has_history(self):
+
+        return len(self.step_rates) > 0
+
+    def get_steps_per_second(self, search_config=None):
+        """Returns the expected step rate of a training run, or 0 if no training runs were recorded.
+
+        Parameters:
+            search_config: dict: The search parameters of the training run. The step rate is predicted from the parameters if at least two search training runs were recorded, otherwise the median step rate is returned.
+        """
+
+        if search_config is not None:
+            prediction = self.predict_steps_per_second(get_parameter_features(search_config))
+            if prediction is not None:
+                return prediction
+
+        if not self.step_rates:
+            return 0.0
+
+        return statistics.median(self.step_rates)
+
+    def predict_steps_per_second(self, features: dict):
+        """Returns the step rate predicted for a set of parameter features by a ridge regression over the recorded search training runs with the same parameters, or None if fewer than two were recorded."""
+
+        names = sorted(features)
+        records = [
+            (record_features, log_rate)
+            for record_features, log_rate in self.parameter_rates
+            if all(name in record_features for name in names)
+        ]
+        if len(records) < 2:
+            return None
+
+        x = numpy.array(
+            [[record_features[name] for name in names] for record_features, _ in records]
+        )
+        y = numpy.array([log_rate for _, log_rate in records])
+
+        x_mean = x.mean(axis=0)
+        y_mean = y.mean()
+        x_centered = x - x_mean
+
+        coefficients = numpy.linalg.solve(
+            x_centered.T @ x_centered + RIDGE_PENALTY * numpy.eye(len(names)),
+            x_centered.T @ (y - y_mean),
+        )
+
+        prediction = (
+            y_mean + (numpy.array([features[name] for name in names]) - x_mean) @ coefficients
+        )
+        return float(numpy.exp(prediction))
+
+    def get_startup_time(self):
+        """Returns the median seconds recorded training runs spent outside of training, starting environments and exporting models."""
+
+        if not self.startup_times:
+            return 0.0
+
+        return statistics.median(self.startup_times)
+
+    def estimate(self, trainer_config: dict, search_config=None):
+        """Returns the expected seconds a training run with the given trainer configuration takes, or None if no history has been recorded.
+
+        Parameters:
+            search_config: dict: The search parameters of the training run, see get_steps_per_second()
+        """
+
+        steps_per_second = self.get_steps_per_second(search_config)
+        if not steps_per_second:
+            return None
+
+        return self.get_startup_time() + get_trainer_max_steps(trainer_config) / steps_per_second
+
+
+def create_duration_model(env=None, search_records=()):
+    """Returns a DurationModel built from the summaries in the summaries folder.
+
+    Parameters:
+        env: str: Prefer training runs that used this environment. Every training run is used if none did.
+        search_records: list: Search result records (see results.load_search_results()) to predict step rates from search parameters with
+    """
+
+    summaries = results.load_run_summaries()
+
+    if env:
+        environment_summaries = [
+            summary for summary in summaries if get_summary_environment(summary) == env
+        ]
+        if environment_summaries:
+            summaries = environment_summaries
+
+    model = DurationModel(summaries)
+    for record in search_records:
+        if record.get('summary'):
+            model.record_parameters(record['summary'], record['search_config'])
+
+    return model
+
+
+def get_summary_steps_per_second(summary: dict):
+    """Returns the step rate of a training run from its summary, or None if it never reported a step."""
+
+    step = summary.get('step') or 0
+    time_elapsed = summary.get('time_elapsed') or 0
+
+    if step <= 0 or time_elapsed <= 0:
+        return None
+
+    return step / time_elapsed
+
+
+def get_parameter_features(search_config: dict):
+    """Returns the logarithms of a search configuration's positive numeric parameters, which step rates are predicted from. 'max_steps' changes how long training takes but not its step rate, so it is left out."""
+
+    features = {}
+    for key, value in search_config.items():
+        if key.rsplit('.', maxsplit=1)[-1] == 'max_steps':
+            continue
+
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+            continue
+
+        features[key] = math.log(value)
+
+    return features
+
+
+def get_summary_environment(summary: dict):
+    """Returns the environment a training run used, or None if it was trained in the Editor."""
+
+    return command_util.get_command_value(summary.get('arguments') or [], const.ML_ENV)
+
+
+def get_trainer_max_steps(trainer_config: dict):
+    """Returns the largest 'max_steps' value configured for any behavior in a trainer configuration, or 0 if none is configured."""
+
+    behaviors = trainer_config.get(const.TC_BEHAVIORS) or {}
+    return max(
+        [int(float(behavior.get('max_steps', 0))) for behavior in behaviors.values()], default=0
+    )
+
+
+def order_longest_first(trials: list, model: DurationModel):
+    """Returns (index, search_config, trainer_config) tuples ordered by their expected duration, longest first. Training runs are ordered by 'max_steps' until the model has history to estimate from.
+
+    Starting the longest training runs first keeps long training runs from finishing alone after every other training run has, when several run at the same time.
+    """
+
+    def get_expected_duration(trial):
+        _, search_config, trainer_config = trial
+        duration = model.estimate(trainer_config, search_config)
+        if duration is None:
+            return get_trainer_max_steps(trainer_config)
+
+        return duration
+
+    return sorted(trials, key=get_expected_duration, reverse=True)
+
+
+def estimate_makespan(durations: list, workers=1, busy=()):
+    """Returns the seconds until every training run finishes, when training runs are started in order on the first worker to become free.
+
+    Parameters:
+        durations: list: The expected seconds each training run takes, in the order they are started
+        workers: int: The number of training runs executed at the same time
+        busy: list: The seconds remaining for training runs already in progress, each occupying a worker
+    """
+
+    finish_times = list(busy)
+    finish_times += [0.0] * max(workers - len(finish_times), 0)
+    heapq.heapify(finish_times)
+
+    for duration in durations:
+        heapq.heappush(finish_times, heapq.heappop(finish_times) + duration)
+
+    return max(finish_times, default=0.0)
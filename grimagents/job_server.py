@@ -0,0 +1,500 @@
+"""A long-running job server that accepts grimagents training and grimsearch search jobs over localhost HTTP.
+
+The server is started with 'grimagents --serve'. Jobs are submitted with the '--submit' argument of
+either CLI application, which forwards the remaining command line arguments to the server instead of
+executing them. The server parses submitted arguments with the same parsers as the CLI applications
+and executes each job as a CLI process in the folder it was submitted from, so relative paths in its
+arguments and configuration files resolve as they would have for the submitter. Jobs are queued so no
+more than '--max-jobs' run at once.
+
+Endpoints:
+- POST /jobs    {"kind": "training" | "search", "argv": [...], "cwd": "..."}, responds with the queued job
+- GET  /jobs    responds with a list of all jobs
+- GET  /jobs/<id>   responds with a single job
+
+Notes:
+- Every request must carry the token the server writes into a file in the user's runtime folder (see settings.get_runtime_folder()), which only the user can read. Other local users, and web pages the user visits, can't submit jobs without it.
+- Job submissions must be sent as 'application/json', which browsers can't send across sites without the server's consent
+"""
+
+import hmac
+import http.server
+import json
+import logging
+import os
+import queue
+import secrets
+import socketserver
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from pathlib import Path
+
+import grimagents.command_util as command_util
+import grimagents.coordination as coordination
+import grimagents.settings as settings
+
+TRAINING_JOB = 'training'
+SEARCH_JOB = 'search'
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_FINISHED = 'finished'
+JOB_FAILED = 'failed'
+
+# The file a job server listening on a port writes its token into, in the user's runtime folder
+TOKEN_FILENAME = 'job_server_{port}.token'
+
+
+server_log = logging.getLogger('grimagents.job_server')
+
+
+class JobServerError(Exception):
+    pass
+
+
+class Job:
+    """A training or search job along with its status."""
+
+    def __init__(self, job_id, kind, argv: list, args, cwd):
+        """
+        Parameters:
+            job_id: int: A unique id assigned by the JobQueue
+            kind: str: The type of job, TRAINING_JOB or SEARCH_JOB
+            argv: list: The command line arguments submitted for the job
+            args: Namespace: The parsed command line arguments
+            cwd: str: The absolute path of the folder the job was submitted from, which it is executed in
+        """
+
+        self.job_id = job_id
+        self.kind = kind
+        self.argv = argv
+        self.args = args
+        self.cwd = cwd
+
+        self.status = JOB_QUEUED
+        self.return_code = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+    def to_dict(self):
+        return {
+            'id': self.job_id,
+            'kind': self.kind,
+            'argv': self.argv,
+            'cwd': self.cwd,
+            'status': self.status,
+            'return_code': self.return_code,
+            'error': self.error,
+            'submitted': self.submitted,
+            'started': self.started,
+            'finished': self.finished,
+        }
+
+
+class JobQueue:
+    """Executes submitted jobs in order on a fixed number of worker threads."""
+
+    def __init__(self, job_types: dict, max_jobs=1):
+        """
+        Parameters:
+            job_types: dict: Maps each job kind to a tuple of (parse_args, module). parse_args() converts a list of command line arguments into a Namespace, rejecting arguments the CLI application would, and the module is run with 'python -m' to execute the job.
+            max_jobs: int: The number of jobs that may run at the same time
+        """
+
+        if max_jobs < 1:
+            raise JobServerError('At least one job must be allowed to run at a time')
+
+        self.job_types = job_types
+        self.max_jobs = max_jobs
+
+        self.jobs = {}
+        self.pending = queue.Queue()
+        self.lock = threading.Lock()
+        self.next_id = 1
+        self.workers = []
+
+    def start(self):
+        """Starts the worker threads."""
+
+        for i in range(self.max_jobs):
+            worker = threading.Thread(
+                target=self.process_queue, name=f'grimagents-job-worker-{i}', daemon=True
+            )
+            worker.start()
+            self.workers.append(worker)
+
+    def stop(self, cancel_queued=True):
+        """Waits for running jobs to finish and stops the worker threads.
+
+        Parameters:
+            cancel_queued: bool: Leave queued jobs that have not started unexecuted, otherwise wait for them to finish as well
+        """
+
+        while cancel_queued:
+            try:
+                self.pending.get_nowait()
+            except queue.Empty:
+                break
+
+        for _ in self.workers:
+            self.pending.put(None)
+
+        for worker in self.workers:
+            worker.join()
+
+        self.workers = []
+
+    def submit(self, kind, argv: list, cwd=None):
+        """Queues a job and returns it.
+
+        Parameters:
+            cwd: str: The absolute path of the folder to execute the job in, the server's working folder if None
+
+        Raises:
+          JobServerError: The job kind is unknown, its arguments can't be parsed or its folder does not exist
+        """
+
+        if kind not in self.job_types:
+            raise JobServerError(f'Unknown job kind \'{kind}\'')
+
+        if cwd is None:
+            cwd = os.getcwd()
+        elif not Path(cwd).is_absolute() or not Path(cwd).is_dir():
+            raise JobServerError(f'Job folder \'{cwd}\' is not an absolute path to a folder')
+
+        parse_args, _ = self.job_types[kind]
+
+        # argparse exits when arguments can't be parsed
+        try:
+            args = parse_args([str(argument) for argument in argv])
+        except SystemExit:
+            raise JobServerError(f'Unable to parse arguments {argv}')
+
+        with self.lock:
+            job = Job(self.next_id, kind, argv, args, str(cwd))
+            self.jobs[job.job_id] = job
+            self.next_id += 1
+
+        server_log.info(f'Queued {kind} job {job.job_id}: {" ".join(job.argv)}')
+        self.pending.put(job)
+
+        return job
+
+    def get_job(self, job_id):
+        """Returns a job, or None if no job has the given id."""
+
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def get_jobs(self):
+        """Returns a list of all jobs in the order they were submitted."""
+
+        with self.lock:
+            return list(self.jobs.values())
+
+    def process_queue(self):
+        """Executes jobs until a None sentinel is received."""
+
+        while True:
+            job = self.pending.get()
+            if job is None:
+                return
+
+            self.execute_job(job)
+
+    def execute_job(self, job: Job):
+        """Executes a job's CLI application in the folder the job was submitted from. Jobs run in processes of their own because the server's threads share a single working folder."""
+
+        _, module = self.job_types[job.kind]
+
+        job.status = JOB_RUNNING
+        job.started = time.time()
+        server_log.info(f'Starting {job.kind} job {job.job_id} in \'{job.cwd}\'')
+
+        try:
+            job.return_code = command_util.execute_command(
+                [sys.executable, '-m', module] + job.argv, cwd=job.cwd, show_command=False
+            )
+        except Exception as exception:
+            job.error = str(exception)
+            server_log.exception(f'{job.kind.capitalize()} job {job.job_id} failed')
+
+        job.finished = time.time()
+        job.status = JOB_FAILED if job.error or job.return_code else JOB_FINISHED
+        server_log.info(f'{job.kind.capitalize()} job {job.job_id} {job.status}')
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """Handles each request on its own thread, so a client waiting on a slow response does not hold up others. Python 3.7 provides this as http.server.ThreadingHTTPServer."""
+
+    daemon_threads = True
+
+
+class JobRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Translates HTTP requests carrying the server's token into JobQueue calls."""
+
+    def do_GET(self):
+        if not self.is_authorized():
+            return
+
+        job_queue = self.server.job_queue
+
+        if self.path.rstrip('/') == '/jobs':
+            self.send_json(200, [job.to_dict() for job in job_queue.get_jobs()])
+            return
+
+        job_id = self.get_job_id()
+        job = job_queue.get_job(job_id) if job_id is not None else None
+        if job is None:
+            self.send_json(404, {'error': f'No job found at \'{self.path}\''})
+            return
+
+        self.send_json(200, job.to_dict())
+
+    def do_POST(self):
+        if not self.is_authorized():
+            return
+
+        if self.path.rstrip('/') != '/jobs':
+            self.send_json(404, {'error': f'Unknown endpoint \'{self.path}\''})
+            return
+
+        if self.headers.get_content_type() != 'application/json':
+            self.send_json(415, {'error': 'Job requests must be sent as application/json'})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length))
+            job = self.server.job_queue.submit(
+                request['kind'], request['argv'], cwd=request.get('cwd')
+            )
+        except (ValueError, KeyError, TypeError) as exception:
+            self.send_json(400, {'error': f'Malformed job request, {exception}'})
+            return
+        except JobServerError as exception:
+            self.send_json(400, {'error': str(exception)})
+            return
+
+        self.send_json(202, job.to_dict())
+
+    def is_authorized(self):
+        """Returns True if the request carries the server's token, otherwise responds with an error and returns False."""
+
+        authorization = self.headers.get('Authorization', '')
+        if hmac.compare_digest(authorization.encode('utf-8'), get_authorization(self.server.token)):
+            return True
+
+        self.send_json(401, {'error': 'Missing or invalid job server token'})
+        return False
+
+    def get_job_id(self):
+        """Returns the job id from a '/jobs/<id>' path, or None if the path does not contain one."""
+
+        parts = self.path.strip('/').split('/')
+        if len(parts) != 2 or parts[0] != 'jobs':
+            return None
+
+        try:
+            return int(parts[1])
+        except ValueError:
+            return None
+
+    def send_json(self, status, data):
+        body = json.dumps(data).encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        server_log.debug(f'{self.address_string()} {format % args}')
+
+
+def get_token_file_path(port):
+    """Returns the path to the token file of a job server listening on a port."""
+
+    return settings.get_runtime_folder() / TOKEN_FILENAME.format(port=port)
+
+
+def get_authorization(token):
+    """Returns the Authorization header value of requests carrying a token, as bytes."""
+
+    return f'Bearer {token}'.encode('utf-8')
+
+
+def create_token_file(port):
+    """Writes a new random token into the token file of a job server listening on a port, readable only by the current user, and returns the token.
+
+    Raises:
+      JobServerError: The runtime folder isn't private to the current user or the token file can't be written
+    """
+
+    token_file = get_token_file_path(port)
+    token = secrets.token_urlsafe(32)
+
+    try:
+        coordination.create_runtime_folder(token_file.parent)
+
+        descriptor = os.open(str(token_file), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, 'w') as file:
+            # The mode passed to os.open() does not apply to files that already exist
+            os.chmod(str(token_file), 0o600)
+            file.write(token)
+    except (coordination.CoordinationError, OSError) as exception:
+        raise JobServerError(f'Unable to write job server token file \'{token_file}\', {exception}')
+
+    return token
+
+
+def load_token(port):
+    """Returns the token of a job server listening on a port.
+
+    Raises:
+      JobServerError: No job server has written a token file for the port
+    """
+
+    token_file = get_token_file_path(port)
+
+    try:
+        return token_file.read_text().strip()
+    except OSError:
+        raise JobServerError(
+            f'No job server token found for port {port} at \'{token_file}\', is a job server started with \'grimagents --serve\' running as the current user?'
+        )
+
+
+def create_server(job_queue: JobQueue, port=settings.JOB_SERVER_PORT):
+    """Returns an HTTP server bound to localhost that submits jobs into a JobQueue, with a new token written into its token file (see create_token_file()). Port 0 binds to any free port.
+
+    Raises:
+      JobServerError: The token file can't be written
+    """
+
+    server = ThreadingHTTPServer((settings.JOB_SERVER_HOST, port), JobRequestHandler)
+    server.job_queue = job_queue
+
+    try:
+        server.token = create_token_file(server.server_address[1])
+    except JobServerError:
+        server.server_close()
+        raise
+
+    return server
+
+
+def remove_token_file(port):
+    """Removes the token file of a job server that has stopped listening on a port."""
+
+    try:
+        get_token_file_path(port).unlink()
+    except OSError:
+        pass
+
+
+def serve(job_types: dict, max_jobs=1, port=settings.JOB_SERVER_PORT):
+    """Runs a job server until interrupted. See JobQueue for a description of job_types.
+
+    Raises:
+      JobServerError: The server's token file can't be written
+    """
+
+    job_queue = JobQueue(job_types, max_jobs=max_jobs)
+    server = create_server(job_queue, port=port)
+
+    job_queue.start()
+    server_log.info(
+        f'Accepting jobs on http://{settings.JOB_SERVER_HOST}:{server.server_address[1]}/jobs, running up to {max_jobs} at a time'
+    )
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server_log.info('Waiting for running jobs to finish')
+    finally:
+        server.server_close()
+        remove_token_file(server.server_address[1])
+        job_queue.stop()
+
+
+def request(method, path, data=None, port=settings.JOB_SERVER_PORT):
+    """Sends a request carrying the job server's token to a job server and returns its decoded JSON response.
+
+    Raises:
+      JobServerError: The server's token can't be read, or the server can't be reached or rejected the request
+    """
+
+    url = f'http://{settings.JOB_SERVER_HOST}:{port}{path}'
+    body = json.dumps(data).encode('utf-8') if data is not None else None
+    headers = {
+        'Content-Type': 'application/json',
+        'Authorization': get_authorization(load_token(port)).decode('utf-8'),
+    }
+    http_request = urllib.request.Request(url, data=body, method=method, headers=headers)
+
+    try:
+        with urllib.request.urlopen(http_request) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as error:
+        try:
+            message = json.loads(error.read())['error']
+        except (ValueError, KeyError):
+            message = error.reason
+        raise JobServerError(message)
+    except urllib.error.URLError as error:
+        raise JobServerError(f'Unable to reach a job server at {url}, {error.reason}')
+
+
+def submit_job(kind, argv: list, port=settings.JOB_SERVER_PORT):
+    """Submits a job to a job server, to be executed in the current working folder, and returns the queued job's dictionary."""
+
+    return request('POST', '/jobs', {'kind': kind, 'argv': argv, 'cwd': os.getcwd()}, port=port)
+
+
+def get_jobs(port=settings.JOB_SERVER_PORT):
+    """Returns a list of job dictionaries from a job server."""
+
+    return request('GET', '/jobs', port=port)
+
+
+def get_submitted_argv(argv: list):
+    """Returns command line arguments with the arguments used to submit a job removed."""
+
+    result = []
+    skip_value = False
+    for argument in argv:
+        if skip_value:
+            skip_value = False
+            continue
+
+        if argument == '--submit':
+            continue
+
+        if argument == '--server-port':
+            skip_value = True
+            continue
+
+        if argument.startswith('--server-port='):
+            continue
+
+        result.append(argument)
+
+    return result
+
+
+def format_job(job: dict):
+    """Returns a single line description of a job dictionary."""
+
+    line = f'{job["id"]:>4} {job["kind"]:<8} {job["status"]:<8} {" ".join(job["argv"])}'
+    if job['error']:
+        line += f' ({job["error"]})'
+
+    return line
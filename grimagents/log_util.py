@@ -0,0 +1,185 @@
+"""Logging handlers shared by the grimagents, grimsearch and grimwrapper CLI applications.
+
+Log records are handed to a queue and written to disk by a background thread, so logging never
+blocks the thread relaying training output. Every application writes into a combined log file,
+and training runs and searches additionally write into a log file of their own. Both are rotated
+once they reach a size cap.
+
+Notes:
+- The combined log file is appended to by every concurrent grimagents, grimsearch and grimwrapper process. Each record is written while holding a lock on a companion '.lock' file, and the log file is only held open for that write, so whichever process finds the file full can rename it without another process writing into the renamed file. Renaming a file another process holds open also fails on Windows.
+"""
+
+import logging
+import logging.handlers
+import os
+import queue
+
+from pathlib import Path
+
+import grimagents.command_util as command_util
+import grimagents.settings as settings
+
+
+class SharedRotatingFileHandler(logging.FileHandler):
+    """Appends log records to a file shared with other processes, rotating it once it grows beyond a size cap. Rotated files are named like those of logging.handlers.RotatingFileHandler."""
+
+    def __init__(self, filename, max_bytes, backup_count, encoding='utf-8'):
+        """
+        Parameters:
+            max_bytes: int: The size the log file may grow to before it is rotated, it is never rotated if 0
+            backup_count: int: The number of rotated log files to keep
+        """
+
+        super().__init__(filename, encoding=encoding, delay=True)
+
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.lock_filename = f'{self.baseFilename}.lock'
+        self.lock_stream = None
+
+    def emit(self, record):
+        """Writes a record into the log file, first rotating the file if the record would take it beyond the size cap."""
+
+        try:
+            message = self.format(record) + self.terminator
+
+            if self.lock_stream is None:
+                self.lock_stream = open(self.lock_filename, 'a')
+
+            with command_util.lock_file(self.lock_stream):
+                if self.should_rollover(message):
+                    try:
+                        self.do_rollover()
+                    except OSError:
+                        # The file is held open by something other than grimagents, it is
+                        # rotated by a later record instead
+                        pass
+
+                with open(self.baseFilename, 'a', encoding=self.encoding) as stream:
+                    stream.write(message)
+        except Exception:
+            self.handleError(record)
+
+    def should_rollover(self, message):
+        """Returns True if writing 'message' would take the log file beyond the size cap. Empty log files are never rotated, so a record larger than the size cap is still written."""
+
+        if self.max_bytes <= 0:
+            return False
+
+        try:
+            size = os.path.getsize(self.baseFilename)
+        except OSError:
+            return False
+
+        return size > 0 and size + len(message.encode(self.encoding)) > self.max_bytes
+
+    def do_rollover(self):
+        """Renames the log file to '<filename>.1', shifting older rotated files up and removing those beyond backup_count. The log file is removed if backup_count is 0."""
+
+        if self.backup_count <= 0:
+            os.remove(self.baseFilename)
+            return
+
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f'{self.baseFilename}.{i}'
+            if os.path.exists(source):
+                os.replace(source, f'{self.baseFilename}.{i + 1}')
+
+        os.replace(self.baseFilename, f'{self.baseFilename}.1')
+
+    def close(self):
+        """Closes the lock file."""
+
+        self.acquire()
+        try:
+            if self.lock_stream is not None:
+                self.lock_stream.close()
+                self.lock_stream = None
+        finally:
+            self.release()
+
+        super().close()
+
+
+class QueuedFileHandler(logging.handlers.QueueHandler):
+    """Formats log records on the calling thread and writes them into the rotating combined log file, and optionally a rotating per-run log file, on a background thread."""
+
+    def __init__(
+        self,
+        filename,
+        run_filename=None,
+        max_bytes=settings.LOG_FILE_MAX_BYTES,
+        backup_count=settings.LOG_FILE_BACKUP_COUNT,
+    ):
+        """
+        Parameters:
+            filename: The combined log file, which is shared with other processes
+            run_filename: An optional log file that receives only this process' records
+            max_bytes: int: The size each log file may grow to before it is rotated
+            backup_count: int: The number of rotated files to keep for each log file
+        """
+
+        # File handlers are created before this handler so logging.shutdown(), which closes
+        # handlers in reverse order of creation, stops the listener before closing them.
+        self.file_handlers = [SharedRotatingFileHandler(filename, max_bytes, backup_count)]
+
+        if run_filename:
+            self.file_handlers.append(
+                logging.handlers.RotatingFileHandler(
+                    run_filename,
+                    maxBytes=max_bytes,
+                    backupCount=backup_count,
+                    encoding='utf-8',
+                    delay=True,
+                )
+            )
+
+        super().__init__(queue.Queue(-1))
+
+        self.listener = logging.handlers.QueueListener(self.queue, *self.file_handlers)
+        self.listener.start()
+
+    def close(self):
+        """Writes any queued records, then closes the file handlers."""
+
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+            for handler in self.file_handlers:
+                handler.close()
+
+        super().close()
+
+
+def get_file_handler_config(run_log_name=None):
+    """Returns a logging.config handler dictionary for a QueuedFileHandler.
+
+    Parameters:
+        run_log_name: str: The name of a per-run log file to write into, in addition to the combined log file
+    """
+
+    log_file = settings.get_log_file_path()
+    if not log_file.parent.exists():
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+
+    handler_config = {
+        'class': 'grimagents.log_util.QueuedFileHandler',
+        'formatter': 'timestamp',
+        'filename': str(log_file),
+    }
+
+    if run_log_name:
+        run_log_file = get_run_log_file_path(run_log_name)
+        if not run_log_file.parent.exists():
+            run_log_file.parent.mkdir(parents=True, exist_ok=True)
+
+        handler_config['run_filename'] = str(run_log_file)
+
+    return handler_config
+
+
+def get_run_log_file_path(run_log_name):
+    """Returns the path to a per-run log file."""
+
+    return settings.get_run_log_folder() / f'{Path(run_log_name).name}.log'
@@ -0,0 +1,232 @@
+"""Scores search training runs on their reward and on what they cost to train.
+
+- Every search training run is recorded with its final mean reward, read from the reward curve of the search's behavior in its event files where available, its step rate and the wall-clock seconds it took from launch to exit
+- The Pareto front holds the training runs no other training run beats on both reward and wall-clock time
+- The knee of the front is the training run that gives up the least reward for the time it saves, the point of the front furthest from the line between its fastest and its most rewarding training runs
+- Bayesian searches maximize a single score, which is either the reward or the reward scalarized with the wall-clock time (see get_score())
+- Search configurations trained as several replicates with different seeds are scored on the mean, median or lower confidence bound of their replicates (see get_replicate_score()), and the variance of that score is the observation noise of the Bayesian optimizer
+"""
+
+import collections
+import numpy
+
+# Scores a Bayesian search maximizes
+OBJECTIVE_REWARD = 'reward'
+OBJECTIVE_REWARD_PER_HOUR = 'reward_per_hour'
+OBJECTIVE_COST_WEIGHTED = 'cost_weighted'
+OBJECTIVES = [OBJECTIVE_REWARD, OBJECTIVE_REWARD_PER_HOUR, OBJECTIVE_COST_WEIGHTED]
+
+# Reward given up for each hour of wall-clock time by the 'cost_weighted' objective, unless another weight is provided
+DEFAULT_COST_WEIGHT = 1.0
+
+
+# Statistics a search configuration's replicates are scored on
+REPLICATE_MEAN = 'mean'
+REPLICATE_MEDIAN = 'median'
+REPLICATE_LCB = 'lcb'
+REPLICATE_SCORES = [REPLICATE_MEAN, REPLICATE_MEDIAN, REPLICATE_LCB]
+
+# The observation noise bayes_opt gives its Gaussian process by default, which keeps it numerically stable
+MIN_OBSERVATION_NOISE = 1e-6
+
+
+TrialObjectives = collections.namedtuple(
+    'TrialObjectives', ['reward', 'steps_per_second', 'wall_time']
+)
+
+
+def get_final_reward(summary: dict, behavior_name=None):
+    """Returns the last reward of a training run's reward curve, which mlagents-learn records unrounded in its event files, or the last mean reward it printed if no reward curve was recorded. Returns None if the training run never reported a reward.
+
+    Parameters:
+        behavior_name: str: The behavior whose reward curve is read. The only reward curve is read if no behavior name is given, and training runs with several behaviors fall back on the mean reward.
+    """
+
+    reward_curves = summary.get('reward_curves') or {}
+    if behavior_name is not None:
+        reward_curve = reward_curves.get(behavior_name)
+    elif len(reward_curves) == 1:
+        reward_curve = next(iter(reward_curves.values()))
+    else:
+        reward_curve = None
+
+    if reward_curve:
+        return reward_curve[-1][1]
+
+    return summary.get('mean_reward')
+
+
+def get_trial_objectives(summary: dict, behavior_name=None):
+    """Returns the TrialObjectives recorded in a training run's summary, or None if the training run never reported a reward. The reward is read from the reward curve of 'behavior_name', see get_final_reward()."""
+
+    if not summary:
+        return None
+
+    reward = get_final_reward(summary, behavior_name)
+    if reward is None:
+        return None
+
+    steps_per_second = summary.get('steps_per_second')
+    if steps_per_second is None:
+        time_elapsed = summary.get('time_elapsed') or 0
+        steps_per_second = (summary.get('step') or 0) / time_elapsed if time_elapsed > 0 else 0.0
+
+    return TrialObjectives(
+        reward=float(reward),
+        steps_per_second=float(steps_per_second),
+        wall_time=float(summary.get('duration') or summary.get('time_elapsed') or 0.0),
+    )
+
+
+def get_score(objectives: TrialObjectives, objective=OBJECTIVE_REWARD, cost_weight=None):
+    """Returns the score a Bayesian search maximizes for a training run.
+
+    - 'reward': The final mean reward
+    - 'reward_per_hour': The reward divided by the wall-clock hours the training run took. Negative rewards are multiplied instead, so slower training runs always score lower.
+    - 'cost_weighted': The reward less 'cost_weight' for every wall-clock hour the training run took
+
+    Raises:
+      ValueError: The objective is unknown
+    """
+
+    hours = objectives.wall_time / 3600
+
+    if objective == OBJECTIVE_REWARD:
+        return objectives.reward
+
+    if objective == OBJECTIVE_REWARD_PER_HOUR:
+        # Training runs that took no measurable time are scored as if they took a second
+        hours = max(hours, 1 / 3600)
+        if objectives.reward < 0:
+            return objectives.reward * hours
+        return objectives.reward / hours
+
+    if objective == OBJECTIVE_COST_WEIGHTED:
+        weight = DEFAULT_COST_WEIGHT if cost_weight is None else cost_weight
+        return objectives.reward - weight * hours
+
+    raise ValueError(f'Unknown search objective \'{objective}\', expected one of {OBJECTIVES}')
+
+
+def get_pareto_front(objectives: list):
+    """Returns the indices of the training runs on the Pareto front of reward against wall-clock time, fastest first.
+
+    A training run is on the front if no other training run has at least its reward in at most its wall-clock time, and is better on one of the two. Of training runs with identical objectives, only the first is on the front.
+    """
+
+    if not objectives:
+        return []
+
+    rewards = numpy.array([trial.reward for trial in objectives], dtype=float)
+    times = numpy.array([trial.wall_time for trial in objectives], dtype=float)
+
+    # dominates[i, j] is True if training run i dominates training run j
+    at_least_as_good = (rewards[:, numpy.newaxis] >= rewards) & (times[:, numpy.newaxis] <= times)
+    better = (rewards[:, numpy.newaxis] > rewards) | (times[:, numpy.newaxis] < times)
+    dominates = at_least_as_good & better
+
+    identical = (rewards[:, numpy.newaxis] == rewards) & (times[:, numpy.newaxis] == times)
+    duplicate = numpy.tril(identical, k=-1).any(axis=1)
+
+    front = numpy.flatnonzero(~dominates.any(axis=0) & ~duplicate)
+
+    return sorted(front.tolist(), key=lambda index: (times[index], -rewards[index]))
+
+
+def get_knee_point(objectives: list):
+    """Returns the index of the training run at the knee of the Pareto front (see get_pareto_front()), or None if no training runs were recorded.
+
+    Rewards and wall-clock times are normalized across the front, and the knee is the point furthest above the line between the front's fastest and most rewarding training runs. Fronts of one or two training runs have no knee, the training run closest to the ideal of the highest reward in the least time is returned instead.
+    """
+
+    front = get_pareto_front(objectives)
+    if not front:
+        return None
+
+    rewards = numpy.array([objectives[index].reward for index in front], dtype=float)
+    times = numpy.array([objectives[index].wall_time for index in front], dtype=float)
+
+    reward_range = rewards.max() - rewards.min()
+    time_range = times.max() - times.min()
+    rewards = (rewards - rewards.min()) / reward_range if reward_range > 0 else rewards * 0
+    times = (times - times.min()) / time_range if time_range > 0 else times * 0
+
+    if len(front) > 2:
+        # The front runs from its fastest (0, 0) to its most rewarding (1, 1) training run once normalized
+        distances = (rewards - times) / numpy.sqrt(2)
+        if distances.max() > 0:
+            return front[int(numpy.argmax(distances))]
+
+    # Ties are broken in favour of the higher reward
+    distances = numpy.hypot(1 - rewards, times)[::-1]
+    return front[len(front) - 1 - int(numpy.argmin(distances))]
+
+
+def get_standard_error(values: list):
+    """Returns the standard error of the mean of a list of values, or 0 if fewer than two values are provided."""
+
+    if len(values) < 2:
+        return 0.0
+
+    return float(numpy.std(values, ddof=1) / numpy.sqrt(len(values)))
+
+
+def get_replicate_score(scores: list, replicate_score=REPLICATE_MEAN):
+    """Returns the score of a search configuration from the scores of its replicates.
+
+    - 'mean': The mean score
+    - 'median': The median score, which a single diverging replicate does not move
+    - 'lcb': The mean score less its standard error, which favours search configurations that score well consistently
+
+    Raises:
+      ValueError: The replicate score is unknown
+    """
+
+    if replicate_score == REPLICATE_MEAN:
+        return float(numpy.mean(scores))
+
+    if replicate_score == REPLICATE_MEDIAN:
+        return float(numpy.median(scores))
+
+    if replicate_score == REPLICATE_LCB:
+        return float(numpy.mean(scores)) - get_standard_error(scores)
+
+    raise ValueError(
+        f'Unknown replicate score \'{replicate_score}\', expected one of {REPLICATE_SCORES}'
+    )
+
+
+def get_replicate_objectives(replicates: list, replicate_score=REPLICATE_MEAN):
+    """Returns the TrialObjectives of a search configuration from the TrialObjectives of its replicates, or None if no replicate reported a reward.
+
+    The reward is the replicate score of the replicates' rewards (see get_replicate_score()). Replicates run at the same time, so the wall-clock time is that of the slowest replicate.
+    """
+
+    replicates = [replicate for replicate in replicates if replicate is not None]
+    if not replicates:
+        return None
+
+    return TrialObjectives(
+        reward=get_replicate_score([replicate.reward for replicate in replicates], replicate_score),
+        steps_per_second=float(
+            numpy.mean([replicate.steps_per_second for replicate in replicates])
+        ),
+        wall_time=max(replicate.wall_time for replicate in replicates),
+    )
+
+
+def get_observation_noise(scores: list, variances: list):
+    """Returns the observation noise of each of a Bayesian optimizer's observations, for its Gaussian process's 'alpha'.
+
+    The optimizer normalizes the scores it observes by their standard deviation, so the variance of each observation's score is divided by the variance of the observed scores. Observations without replicates have a variance of 0 and are given the optimizer's default noise.
+
+    Parameters:
+        scores: list: The scores of the optimizer's observations
+        variances: list: The variance of each observation's score, the square of its replicates' standard error
+    """
+
+    spread = numpy.var(scores) if len(scores) > 1 else 0.0
+    if spread <= 0:
+        spread = 1.0
+
+    return numpy.maximum(numpy.asarray(variances, dtype=float) / spread, MIN_OBSERVATION_NOISE)
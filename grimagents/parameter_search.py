@@ -1,9 +1,65 @@
+import copy
 import itertools
 import numpy
-import random
 
 import grimagents.common as common
 import grimagents.constants as const
+import grimagents.search_constraints as search_constraints
+import grimagents.trainer_parameters as trainer_parameters
+
+
+# Space-filling designs that spread a fixed number of search configurations evenly over the search space
+DESIGN_LHS = 'lhs'
+DESIGN_SOBOL = 'sobol'
+DESIGN_HALTON = 'halton'
+DESIGN_ORTHOGONAL = 'orthogonal'
+DESIGNS = [DESIGN_LHS, DESIGN_SOBOL, DESIGN_HALTON, DESIGN_ORTHOGONAL]
+
+# Bits of precision in Sobol points
+SOBOL_BITS = 30
+
+# Primitive polynomials and initial direction numbers for Sobol dimensions after the first, from
+# Joe and Kuo's 'new-joe-kuo-6.21201' table, as (degree, coefficients, initial direction numbers)
+SOBOL_DIRECTIONS = [
+    (1, 0, [1]),
+    (2, 1, [1, 3]),
+    (3, 1, [1, 3, 1]),
+    (3, 2, [1, 1, 1]),
+    (4, 1, [1, 1, 3, 3]),
+    (4, 4, [1, 3, 5, 13]),
+    (5, 2, [1, 1, 5, 5, 17]),
+    (5, 4, [1, 1, 5, 5, 5]),
+    (5, 7, [1, 1, 7, 11, 19]),
+    (5, 11, [1, 1, 5, 1, 1]),
+    (5, 13, [1, 1, 1, 3, 11]),
+    (5, 14, [1, 3, 5, 5, 31]),
+    (6, 1, [1, 3, 3, 9, 7, 49]),
+    (6, 13, [1, 1, 1, 15, 21, 21]),
+    (6, 16, [1, 3, 1, 13, 27, 49]),
+    (6, 19, [1, 1, 1, 15, 7, 5]),
+    (6, 22, [1, 3, 1, 15, 13, 25]),
+    (6, 25, [1, 1, 5, 5, 19, 61]),
+    (7, 1, [1, 3, 7, 11, 23, 15, 103]),
+    (7, 4, [1, 3, 7, 13, 13, 15, 69]),
+]
+
+
+# Distributions search parameter values are drawn from, see SearchParameter
+DISTRIBUTION_UNIFORM = 'uniform'
+DISTRIBUTION_LOG = 'log'
+DISTRIBUTION_INT = 'int'
+DISTRIBUTION_QUANTIZED = 'quantized'
+DISTRIBUTION_CHOICE = 'choice'
+DISTRIBUTIONS = [
+    DISTRIBUTION_UNIFORM,
+    DISTRIBUTION_LOG,
+    DISTRIBUTION_INT,
+    DISTRIBUTION_QUANTIZED,
+    DISTRIBUTION_CHOICE,
+]
+
+# Rounds of redrawing random search configurations that violate the search's constraints
+MAX_CONSTRAINT_RESAMPLES = 100
 
 
 class InvalidTrainerConfig(Exception):
@@ -18,6 +74,196 @@ class InvalidGridSearchIndex(Exception):
     pass
 
 
+class InvalidSearchDesign(Exception):
+    """A space-filling design can't be generated for the search."""
+
+    pass
+
+
+class InvalidSearchParameter(Exception):
+    """A search parameter's definition is invalid."""
+
+    pass
+
+
+class SearchParameter:
+    """A hyperparameter to search and the distribution its values are drawn from.
+
+    Parameters are defined in the search configuration either as a list of values, or as a dictionary with a 'distribution' and 'values':
+    - 'uniform': Floats drawn evenly between the smallest and largest value
+    - 'log': Values drawn evenly between the logarithms of the smallest and largest value, for parameters such as 'learning_rate' that span orders of magnitude. Ints are returned if both values are ints.
+    - 'int': Ints drawn evenly between the smallest and largest value (inclusive)
+    - 'quantized': Values drawn evenly from the smallest value to the largest in increments of 'step'
+    - 'choice': One of the listed values, which need not be numbers
+
+    A list of values is treated as 'uniform' if it contains a float, 'int' if it contains only ints and 'choice' otherwise.
+
+    Values are drawn from positions between 0 and 1, so random searches, space-filling designs, Bayesian searches and grid searches all share the same distribution.
+    """
+
+    def __init__(self, name, definition):
+        """
+        Parameters:
+            name: str: The period-separated name of the hyperparameter
+            definition: list or dict: The hyperparameter's values from the search configuration
+
+        Raises:
+          InvalidSearchParameter: The definition is malformed
+        """
+
+        self.name = name
+        self.definition = definition
+        self.step = None
+        self.count = None
+
+        if isinstance(definition, dict):
+            self.distribution = definition.get('distribution', DISTRIBUTION_UNIFORM)
+            self.values = definition.get('values')
+            self.step = definition.get('step')
+            self.count = definition.get('count')
+        else:
+            self.values = definition if isinstance(definition, list) else [definition]
+            self.distribution = self.get_list_distribution(self.values)
+
+        self.validate()
+        self.validate_trainer_values()
+
+    @staticmethod
+    def get_list_distribution(values):
+        """Returns the distribution of a parameter defined as a list of values."""
+
+        if any(isinstance(value, bool) or not isinstance(value, (int, float)) for value in values):
+            return DISTRIBUTION_CHOICE
+
+        if any(isinstance(value, float) for value in values):
+            return DISTRIBUTION_UNIFORM
+
+        return DISTRIBUTION_INT
+
+    def validate(self):
+
+        if self.distribution not in DISTRIBUTIONS:
+            raise InvalidSearchParameter(
+                f'\'{self.name}\' has unknown distribution \'{self.distribution}\', expected one of {DISTRIBUTIONS}'
+            )
+
+        if not isinstance(self.values, list) or not self.values:
+            raise InvalidSearchParameter(f'\'{self.name}\' requires a list of \'values\'')
+
+        if self.distribution == DISTRIBUTION_CHOICE:
+            return
+
+        if self.get_list_distribution(self.values) == DISTRIBUTION_CHOICE:
+            raise InvalidSearchParameter(
+                f'\'{self.name}\' values must be numbers for a \'{self.distribution}\' distribution'
+            )
+
+        if self.distribution == DISTRIBUTION_LOG and min(self.values) <= 0:
+            raise InvalidSearchParameter(
+                f'\'{self.name}\' values must be greater than zero for a \'log\' distribution'
+            )
+
+        if self.distribution == DISTRIBUTION_QUANTIZED and (
+            not isinstance(self.step, (int, float)) or self.step <= 0
+        ):
+            raise InvalidSearchParameter(
+                f'\'{self.name}\' requires a positive \'step\' for a \'quantized\' distribution'
+            )
+
+    def validate_trainer_values(self):
+        """Checks the parameter's values against the setting's type and valid range in the trainer parameter registry.
+
+        Raises:
+          InvalidSearchParameter: A value is not valid for the setting
+        """
+
+        errors = [trainer_parameters.validate_value(self.name, value) for value in self.values]
+        errors = [error for error in errors if error is not None]
+        if errors:
+            raise InvalidSearchParameter(', '.join(errors))
+
+    def is_integer(self):
+        """Returns True if the parameter's values are ints."""
+
+        values = self.values + ([self.step] if self.step is not None else [])
+        return all(isinstance(value, int) and not isinstance(value, bool) for value in values)
+
+    def get_values(self, positions):
+        """Returns a list of the parameter's values at positions between 0 and 1 (an array-like of any length), as native Python types. Values are converted to the type of the trainer setting (see trainer_parameters.convert_values())."""
+
+        return trainer_parameters.convert_values(self.name, self.get_distribution_values(positions))
+
+    def get_distribution_values(self, positions):
+        """Returns a list of the distribution's values at positions between 0 and 1."""
+
+        positions = numpy.asarray(positions, dtype=float)
+
+        if self.distribution == DISTRIBUTION_CHOICE:
+            indices = numpy.minimum(
+                (positions * len(self.values)).astype(int), len(self.values) - 1
+            )
+            return [self.values[index] for index in indices]
+
+        low, high = min(self.values), max(self.values)
+
+        if self.distribution == DISTRIBUTION_LOG:
+            values = numpy.exp(numpy.log(low) + positions * (numpy.log(high) - numpy.log(low)))
+            if self.is_integer():
+                return numpy.clip(numpy.rint(values), low, high).astype(int).tolist()
+            return values.tolist()
+
+        if self.distribution == DISTRIBUTION_INT:
+            values = numpy.floor(low + positions * (high - low + 1))
+            return numpy.minimum(values, high).astype(int).tolist()
+
+        if self.distribution == DISTRIBUTION_QUANTIZED:
+            steps = int((high - low) // self.step)
+            indices = numpy.minimum((positions * (steps + 1)).astype(int), steps)
+            if self.is_integer():
+                return (low + indices * self.step).tolist()
+            # Rounding removes floating point error from multiples of steps such as 0.1
+            return numpy.round(low + indices * self.step, 12).tolist()
+
+        return (low + positions * (high - low)).tolist()
+
+    def get_grid_values(self):
+        """Returns the values a grid search tries. 'count' values spread across the distribution are tried if a count is defined, otherwise the listed values are."""
+
+        if self.distribution == DISTRIBUTION_CHOICE:
+            return list(self.values)
+
+        if not self.count:
+            return trainer_parameters.convert_values(self.name, list(self.values))
+
+        values = self.get_values(numpy.linspace(0, 1, int(self.count)))
+
+        # Duplicates are possible when there are fewer ints or steps than the count
+        return list(dict.fromkeys(values))
+
+    def get_optimizer_bounds(self):
+        """Returns the [minimum, maximum] bounds a Bayesian optimizer searches between for this parameter. Bounds are in the logarithm of the value for 'log' distributions and an index for 'choice' distributions, see get_optimizer_value()."""
+
+        if self.distribution == DISTRIBUTION_CHOICE:
+            return [0, len(self.values)]
+
+        low, high = min(self.values), max(self.values)
+        if self.distribution == DISTRIBUTION_LOG:
+            return [float(numpy.log(low)), float(numpy.log(high))]
+
+        return [low, high]
+
+    def get_optimizer_value(self, value):
+        """Returns the parameter value for a point chosen by a Bayesian optimizer within get_optimizer_bounds()."""
+
+        low, high = self.get_optimizer_bounds()
+        if high == low:
+            position = 0.0
+        else:
+            position = (float(value) - low) / (high - low)
+
+        return self.get_values([min(max(position, 0.0), 1.0)])[0]
+
+
 class ParameterSearch:
     """Object that facilitates performing hyperparameter searches."""
 
@@ -32,6 +278,8 @@ class ParameterSearch:
 
         self.hyperparameters = []
         self.hyperparameter_sets = []
+        self.search_parameters = []
+        self.constraints = []
 
         # 'search_config' contains hyperparameters to search, as well as a range of values to search through for each parameter
         self.set_search_config(search_config)
@@ -44,6 +292,13 @@ class ParameterSearch:
         self.behavior_name = self.search_config[const.GS_BEHAVIOR_NAME]
         self.hyperparameters = self.get_search_hyperparameter_names(self.search_config)
         self.hyperparameter_sets = self.get_hyperparameter_sets(self.search_config)
+        self.search_parameters = [
+            SearchParameter(name, definition)
+            for name, definition in zip(self.hyperparameters, self.hyperparameter_sets)
+        ]
+        self.constraints = search_constraints.get_constraints(
+            self.search_config.get(const.GS_CONSTRAINTS)
+        )
 
     @staticmethod
     def get_search_hyperparameter_names(search_config):
@@ -73,7 +328,8 @@ class ParameterSearch:
             overrides: dict: A dictionary containing hyperparameter names paired with override values
         """
 
-        result = self.trainer_config.copy()
+        # Overrides are written into nested dictionaries, so the copy must not share them with the original
+        result = copy.deepcopy(self.trainer_config)
         for key, value in overrides.items():
             common.add_nested_dict_value(result[const.TC_BEHAVIORS][self.behavior_name], key, value)
 
@@ -98,6 +354,57 @@ class ParameterSearch:
 
         return result
 
+    def get_setting_columns(self, search_configs, keys):
+        """Returns float arrays (see search_constraints.get_float_column()) of the values each search configuration's trainer configuration would have for the given settings, without building the trainer configurations."""
+
+        behavior_config = self.trainer_config.get(const.TC_BEHAVIORS, {}).get(
+            self.behavior_name, {}
+        )
+
+        def get_column(key):
+            if key in self.hyperparameters:
+                values = [search_config[key] for search_config in search_configs]
+            else:
+                values = [common.get_nested_dict_value(behavior_config, key)] * len(search_configs)
+            return search_constraints.get_float_column(values)
+
+        columns = {key: get_column(key) for key in keys}
+
+        # 'buffer_size' is set from 'buffer_size_multiple', if present (see get_trainer_config_with_overrides())
+        buffer_size_key = f'{const.TC_HYPERPARAMETERS}.{const.HP_BUFFER_SIZE}'
+        if buffer_size_key in columns:
+            multiple = get_column(f'{const.TC_HYPERPARAMETERS}.{const.GS_BUFFER_SIZE_MULTIPLE}')
+            batch_size = get_column(f'{const.TC_HYPERPARAMETERS}.{const.HP_BATCH_SIZE}')
+            columns[buffer_size_key] = numpy.where(
+                numpy.isnan(multiple), columns[buffer_size_key], batch_size * multiple
+            )
+
+        return columns
+
+    def get_constraint_mask(self, search_configs):
+        """Returns a bool array of whether each search configuration satisfies every one of the search's constraints."""
+
+        if not self.constraints:
+            return numpy.ones(len(search_configs), dtype=bool)
+
+        keys = {key for constraint in self.constraints for key in constraint.keys}
+        columns = self.get_setting_columns(search_configs, keys)
+
+        return search_constraints.get_satisfied(self.constraints, columns, len(search_configs))
+
+    def get_violated_constraints(self, search_config):
+        """Returns a list of the search constraints a search configuration violates."""
+
+        if not self.constraints:
+            return []
+
+        keys = {key for constraint in self.constraints for key in constraint.keys}
+        columns = self.get_setting_columns([search_config], keys)
+
+        return [
+            constraint for constraint in self.constraints if not constraint.evaluate(columns)[0]
+        ]
+
     @staticmethod
     def get_batch_size_value(training_config, behavior_name):
         """Returns the 'batch_size' value from a trainer configuration for the given behavior name."""
@@ -113,7 +420,14 @@ class GridSearch(ParameterSearch):
     def __init__(self, search_config, trainer_config):
 
         super().__init__(search_config, trainer_config)
-        self.search_permutations = self.get_search_permutations(self.hyperparameter_sets)
+        self.search_permutations = self.get_search_permutations(
+            [parameter.get_grid_values() for parameter in self.search_parameters]
+        )
+
+        # Indexes remain those of the full grid, indexes that violate the search's constraints are skipped
+        self.constraint_mask = self.get_constraint_mask(
+            [dict(zip(self.hyperparameters, values)) for values in self.search_permutations]
+        )
 
     @staticmethod
     def get_search_permutations(hyperparameter_sets):
@@ -142,97 +456,260 @@ class GridSearch(ParameterSearch):
 
         return len(self.search_permutations)
 
+    def get_valid_search_count(self):
+        """Returns the count of search permutations that satisfy the search's constraints."""
+
+        return int(numpy.count_nonzero(self.constraint_mask))
+
+    def is_valid_index(self, index):
+        """Returns True if the search permutation at 'index' satisfies the search's constraints."""
+
+        return 0 <= index < len(self.constraint_mask) and bool(self.constraint_mask[index])
+
 
 class RandomSearch(ParameterSearch):
     """Object that facilitates performing hyperparameter random searches."""
 
-    @staticmethod
-    def get_random_value(values, seed=None):
-        """Determines the minimum and maximum values in a range of values and picks a random value inside that range (inclusive). Returns a float if any of the values are floats and returns an int value otherwise."""
+    def get_randomized_search_configuration(self, seed=None):
+        """Returns a search configuration with randomized values, drawn from each hyperparameter's distribution (see SearchParameter).
+
+        Raises:
+          InvalidSearchConstraint: No search configuration satisfying the search's constraints was drawn
+        """
 
-        if seed is not None:
-            random.seed(seed)
+        search_configs = self.get_search_configurations(1, seed=seed)
+        if not search_configs:
+            raise search_constraints.InvalidSearchConstraint(
+                f'No search configuration satisfying the search constraints was drawn in {MAX_CONSTRAINT_RESAMPLES} redraws'
+            )
 
-        for element in values:
-            # If values contain one or more floats, return a random float
-            if isinstance(element, float):
-                return random.uniform(min(values), max(values))
+        return search_configs[0]
 
-        return random.randint(min(values), max(values))
+    def get_search_configurations(self, count, design=None, seed=None):
+        """Returns 'count' randomized search configurations, spread over the search space by a space-filling design if one is provided (see get_design_samples()).
 
-    def get_randomized_search_configuration(self, seed=None):
-        """Returns a search configuration with randomized values. Values are chosen between the minimum and maximum values that exist for each hyperparameter."""
+        Search configurations that violate the search's constraints are redrawn at random, outside of the design. Search configurations still violating them after MAX_CONSTRAINT_RESAMPLES redraws are left out, so fewer than 'count' may be returned.
+        """
+
+        dimensions = len(self.search_parameters)
+        random_state = numpy.random.RandomState(seed)
+        if design:
+            positions = get_design_samples(design, count, dimensions, seed=seed)
+        else:
+            positions = random_state.random_sample((count, dimensions))
+
+        search_configs = self.get_position_configurations(positions)
+        valid = self.get_constraint_mask(search_configs)
 
-        randomized_hyperparameters = []
-        for i in range(len(self.hyperparameters)):
-            randomized_hyperparameters.append(
-                self.get_random_value(self.hyperparameter_sets[i], seed=seed)
+        for _ in range(MAX_CONSTRAINT_RESAMPLES):
+            invalid = numpy.flatnonzero(~valid)
+            if not len(invalid):
+                break
+
+            redrawn = self.get_position_configurations(
+                random_state.random_sample((len(invalid), dimensions))
             )
+            valid[invalid] = self.get_constraint_mask(redrawn)
+            for row, search_config in zip(invalid, redrawn):
+                search_configs[row] = search_config
 
-        result = dict(zip(self.hyperparameters, randomized_hyperparameters))
-        return result
+        return [search_config for search_config, is_valid in zip(search_configs, valid) if is_valid]
+
+    def get_position_configurations(self, positions):
+        """Returns a search configuration for each row of a (count, parameters) array of positions between 0 and 1."""
+
+        columns = [
+            parameter.get_values(positions[:, i])
+            for i, parameter in enumerate(self.search_parameters)
+        ]
+
+        return [dict(zip(self.hyperparameters, values)) for values in zip(*columns)]
 
 
 class BayesianSearch(ParameterSearch):
     """Object that facilitates performing hyperparameter bayesian searches."""
 
-    @staticmethod
-    def get_parameter_bounds(parameter_names, parameter_values):
-        """Returns a parameter bounds dictionary for consumption by a BayesianOptimization object.
+    def get_optimizer_bounds(self):
+        """Returns a parameter bounds dictionary for consumption by a BayesianOptimization object, in the space of each parameter's distribution (see SearchParameter.get_optimizer_bounds())."""
 
-        Parameters:
-            parameter_names: list: A list of hyperparameter names
-            parameter_values: list: A list of hyperparameter values
-        """
+        return {
+            parameter.name: parameter.get_optimizer_bounds() for parameter in self.search_parameters
+        }
 
-        bounds = {}
-        for i in range(len(parameter_names)):
+    def get_search_config_from_point(self, point: dict):
+        """Returns the search configuration for a point chosen by a BayesianOptimization object within get_optimizer_bounds()."""
 
-            # The BayesianOptimization object requires two values for every parameter
-            # so we duplicate an existing element if only one is present.
-            if len(parameter_values[i]) < 2:
-                parameter_values[i].append(parameter_values[i][0])
+        values = {}
+        for parameter in self.search_parameters:
+            values[parameter.name] = parameter.get_optimizer_value(point[parameter.name])
 
-            bounds[parameter_names[i]] = parameter_values[i]
+        return self.get_search_config_from_bounds(values)
 
-        return bounds
+    @staticmethod
+    def get_design_points(design, count, bounds: dict, seed=None):
+        """Returns 'count' points spread evenly within parameter bounds by a space-filling design (see get_design_samples()), for probing before the optimizer suggests points of its own."""
+
+        names = list(bounds)
+        low = numpy.array([min(bounds[name]) for name in names], dtype=float)
+        high = numpy.array([max(bounds[name]) for name in names], dtype=float)
+
+        points = low + get_design_samples(design, count, len(names), seed=seed) * (high - low)
+        return [dict(zip(names, point.tolist())) for point in points]
 
     @staticmethod
     def get_search_config_from_bounds(bounds: dict):
-        """Enforces int type on parameters that should be int and ensures native value types are used for the rest.
+        """Converts values to the type of their trainer setting, such as int for 'batch_size' or a multiple of 4 for 'memory_size' (see trainer_parameters.TRAINER_PARAMETERS), and ensures native value types are used for the rest.
 
         Converts values to standard Python value types. BayesianOptimization objects return numpy floats and numpy floats cause problems with yaml serialization.
         """
 
         for key, value in bounds.items():
-
-            # Convert bound items that must be ints into int
-            if (
-                key == 'hyperparameters.batch_size'
-                # 'buffer_size' should never be used for searches. Use 'buffer_size_multiple' instead.
-                or key == 'hyperparameters.buffer_size_multiple'
-                or key == 'network_settings.hidden_units'
-                or key == 'max_steps'
-                or key == 'hyperparameters.num_epoch'
-                or key == 'network_settings.num_layers'
-                or key == 'time_horizon'
-                or key == 'network_settings.memory.sequence_length'
-            ):
-                bounds[key] = int(round(value))
-                continue
-
-            # Ensure 'memory_size' is a multiple of 4 and an int
-            if key == 'network_settings.memory.memory_size':
-                bounds[key] = int(round(bounds[key] - bounds[key] % 4))
-                continue
-
-            # Ensure all 'encoding_size' values are rounded to int
-            splitKey = key.rsplit('.', maxsplit=1)
-            if (len(splitKey) > 1) and (splitKey[-1] == 'encoding_size'):
-                bounds[key] = int(round(value))
-                continue
+            value = trainer_parameters.convert_values(key, value)
 
             if isinstance(value, numpy.generic):
-                bounds[key] = value.item()
+                value = value.item()
+
+            bounds[key] = value
 
         return bounds
+
+
+def get_design_samples(design, count, dimensions, seed=None):
+    """Returns a (count, dimensions) array of points in the unit hypercube [0, 1), spread evenly by a space-filling design.
+
+    - 'lhs': A Latin hypercube, every dimension is divided into 'count' equal intervals and each interval holds exactly one point
+    - 'sobol' and 'halton': Low-discrepancy sequences, randomized so repeated searches do not sample the same points
+    - 'orthogonal': A Latin hypercube built on a strength 2 orthogonal array, so every pair of dimensions is also evenly covered
+
+    Raises:
+      InvalidSearchDesign: The design is unknown or can't be generated for this many dimensions
+    """
+
+    random_state = numpy.random.RandomState(seed)
+
+    if design == DESIGN_LHS:
+        return get_latin_hypercube_samples(count, dimensions, random_state)
+    if design == DESIGN_SOBOL:
+        return get_sobol_samples(count, dimensions, random_state)
+    if design == DESIGN_HALTON:
+        return get_halton_samples(count, dimensions, random_state)
+    if design == DESIGN_ORTHOGONAL:
+        return get_orthogonal_samples(count, dimensions, random_state)
+
+    raise InvalidSearchDesign(f'Unknown search design \'{design}\', expected one of {DESIGNS}')
+
+
+def get_latin_hypercube_samples(count, dimensions, random_state):
+    """Returns a Latin hypercube of 'count' points, placing each point randomly within its interval."""
+
+    # Sorting random values gives an independent permutation of intervals for each dimension
+    intervals = numpy.argsort(random_state.random_sample((count, dimensions)), axis=0)
+    return (intervals + random_state.random_sample((count, dimensions))) / count
+
+
+def get_sobol_samples(count, dimensions, random_state):
+    """Returns the first 'count' points of a Sobol sequence, randomized with a digital shift."""
+
+    if dimensions > len(SOBOL_DIRECTIONS) + 1:
+        raise InvalidSearchDesign(
+            f'Sobol designs support up to {len(SOBOL_DIRECTIONS) + 1} search parameters, {dimensions} were provided'
+        )
+
+    shift = random_state.randint(0, 2**SOBOL_BITS, size=dimensions, dtype=numpy.int64)
+    return (get_sobol_points(count, dimensions) ^ shift) / float(2**SOBOL_BITS)
+
+
+def get_sobol_points(count, dimensions):
+    """Returns the first 'count' points of a Sobol sequence as integers with SOBOL_BITS bits of precision."""
+
+    directions = get_sobol_direction_numbers(dimensions)
+
+    # Each point is the exclusive or of the direction numbers of the bits set in its index
+    indices = numpy.arange(count, dtype=numpy.int64)
+    points = numpy.zeros((count, dimensions), dtype=numpy.int64)
+    for bit in range(SOBOL_BITS):
+        points ^= ((indices >> bit) & 1)[:, numpy.newaxis] * directions[bit]
+
+    return points
+
+
+def get_sobol_direction_numbers(dimensions):
+    """Returns a (SOBOL_BITS, dimensions) array of Sobol direction numbers."""
+
+    directions = numpy.zeros((SOBOL_BITS, dimensions), dtype=numpy.int64)
+    directions[:, 0] = [1 << (SOBOL_BITS - 1 - bit) for bit in range(SOBOL_BITS)]
+
+    for dimension in range(1, dimensions):
+        degree, coefficients, initial = SOBOL_DIRECTIONS[dimension - 1]
+
+        m = list(initial)
+        for k in range(degree, SOBOL_BITS):
+            value = m[k - degree] ^ (m[k - degree] << degree)
+            for j in range(1, degree):
+                if (coefficients >> (degree - 1 - j)) & 1:
+                    value ^= m[k - j] << j
+            m.append(value)
+
+        directions[:, dimension] = [m[bit] << (SOBOL_BITS - 1 - bit) for bit in range(SOBOL_BITS)]
+
+    return directions
+
+
+def get_halton_samples(count, dimensions, random_state):
+    """Returns the first 'count' points of a Halton sequence, skipping the origin and randomized with a random shift."""
+
+    indices = numpy.arange(1, count + 1)
+    points = numpy.zeros((count, dimensions))
+
+    for dimension, base in enumerate(get_primes(dimensions)):
+        remaining = indices.copy()
+        fraction = 1.0
+        while numpy.any(remaining > 0):
+            fraction /= base
+            points[:, dimension] += fraction * (remaining % base)
+            remaining //= base
+
+    return (points + random_state.random_sample(dimensions)) % 1.0
+
+
+def get_orthogonal_samples(count, dimensions, random_state):
+    """Returns an orthogonal array-based Latin hypercube of 'count' points.
+
+    A Bose orthogonal array of q * q rows is built for the smallest prime q with q * q >= count and q + 1 >= dimensions, so every pair of levels appears together in exactly one row. Rows are drawn from it in random order, and a count of exactly q * q (4, 9, 25, 49 ...) uses the complete array.
+    """
+
+    levels = next(
+        prime
+        for prime in get_primes(count + dimensions + 1)
+        if prime * prime >= count and prime + 1 >= dimensions
+    )
+
+    i, j = numpy.divmod(numpy.arange(levels * levels), levels)
+    columns = [j] + [(i + k * j) % levels for k in range(levels)]
+    array = numpy.stack(columns[:dimensions], axis=1)
+    array = array[random_state.permutation(len(array))[:count]]
+
+    # Each level is divided into 'levels' intervals, and the rows sharing a level are given different intervals
+    points = numpy.zeros((count, dimensions))
+    for dimension in range(dimensions):
+        for level in range(levels):
+            rows = numpy.flatnonzero(array[:, dimension] == level)
+            intervals = random_state.permutation(levels)[: len(rows)]
+            points[rows, dimension] = (
+                level + (intervals + random_state.random_sample(len(rows))) / levels
+            ) / levels
+
+    return points
+
+
+def get_primes(count):
+    """Returns a list of the first 'count' prime numbers."""
+
+    primes = []
+    candidate = 2
+    while len(primes) < count:
+        if all(candidate % prime for prime in primes if prime * prime <= candidate):
+            primes.append(candidate)
+        candidate += 1
+
+    return primes
@@ -0,0 +1,189 @@
+"""Reads and writes the result records grimagents keeps for training runs and searches.
+
+- Run summaries are written by training_wrapper.py into each training run's 'run_logs' folder
+- Run progress is written by training_wrapper.py into the same folder while a training run is in progress
+- Resource samples of each training run's process tree are appended by training_wrapper.py into the same folder (see telemetry.py)
+- Search results are appended by grimsearch, one JSON record per line, next to the trainer config
+"""
+
+import json
+import logging
+import os
+import re
+
+from pathlib import Path
+
+import grimagents.command_util as command_util
+import grimagents.settings as settings
+
+
+RUN_SUMMARY_FILENAME = 'grimagents_summary.json'
+RUN_PROGRESS_FILENAME = 'grimagents_progress.json'
+RUN_TELEMETRY_FILENAME = 'grimagents_telemetry.jsonl'
+
+# The phase a training run's progress reports. A finishing training run has stopped training and is exporting its model and shutting down its environment.
+RUN_PHASE_TRAINING = 'training'
+RUN_PHASE_FINISHING = 'finishing'
+
+# Run ids may have a timestamp appended by grimagents (see common.get_timestamp())
+_timestamp_suffix_regex = re.compile(r'^-\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}$')
+
+
+results_log = logging.getLogger('grimagents.results')
+
+
+def get_run_summary_path(run_id):
+    """Returns the path to a training run's summary file."""
+
+    return settings.get_run_logs_folder(run_id) / RUN_SUMMARY_FILENAME
+
+
+def write_run_summary(run_id, summary: dict):
+    """Writes a training run's summary into its 'run_logs' folder."""
+
+    command_util.write_json_file(summary, get_run_summary_path(run_id))
+
+
+def load_run_summary(run_id):
+    """Returns the summary of a training run, or None if one has not been written."""
+
+    return load_run_file(get_run_summary_path(run_id))
+
+
+def load_run_file(file_path: Path):
+    """Returns the contents of a JSON file written for a training run, or None if it does not exist or can't be read."""
+
+    if not file_path.exists():
+        return None
+
+    try:
+        return command_util.load_json_file(file_path)
+    except (json.decoder.JSONDecodeError, FileNotFoundError):
+        return None
+
+
+def find_run_summary(run_id):
+    """Returns the most recently written summary for a run id, also considering run ids that had a timestamp appended, or None if no summary exists."""
+
+    run_folder_name = find_run_folder_name(run_id, RUN_SUMMARY_FILENAME)
+    if run_folder_name is None:
+        return None
+
+    return load_run_summary(run_folder_name)
+
+
+def find_run_folder_name(run_id, filename):
+    """Returns the name of the run folder holding the most recently written 'filename' file for a run id, also considering run ids that had a timestamp appended, or None if no such file exists."""
+
+    summaries_folder = settings.get_summaries_folder()
+    if not summaries_folder.exists():
+        return None
+
+    candidates = []
+    for run_folder in summaries_folder.glob(f'{glob_escape(run_id)}*'):
+        suffix = run_folder.name[len(run_id) :]
+        if suffix and not _timestamp_suffix_regex.match(suffix):
+            continue
+
+        file_path = settings.get_run_logs_folder(run_folder.name) / filename
+        if file_path.exists():
+            candidates.append((file_path.stat().st_mtime, run_folder.name))
+
+    if not candidates:
+        return None
+
+    return max(candidates)[1]
+
+
+def load_run_summaries():
+    """Returns a list of the summaries of every training run in the summaries folder."""
+
+    summaries_folder = settings.get_summaries_folder()
+    if not summaries_folder.exists():
+        return []
+
+    summaries = []
+    for summary_path in summaries_folder.glob(f'*/run_logs/{RUN_SUMMARY_FILENAME}'):
+        summary = load_run_file(summary_path)
+        if summary is not None:
+            summaries.append(summary)
+
+    return summaries
+
+
+def get_run_progress_path(run_id):
+    """Returns the path to a training run's progress file."""
+
+    return settings.get_run_logs_folder(run_id) / RUN_PROGRESS_FILENAME
+
+
+def write_run_progress(run_id, progress: dict):
+    """Writes a training run's progress into its 'run_logs' folder. The file is replaced in one step, so readers never see a partially written file."""
+
+    progress_path = get_run_progress_path(run_id)
+    if not progress_path.parent.exists():
+        progress_path.parent.mkdir(parents=True, exist_ok=True)
+
+    temporary_path = progress_path.with_name(f'{progress_path.name}.{os.getpid()}')
+    temporary_path.write_text(json.dumps(progress))
+    os.replace(temporary_path, progress_path)
+
+
+def get_run_telemetry_path(run_id):
+    """Returns the path to the file a training run's resource samples are appended to."""
+
+    return settings.get_run_logs_folder(run_id) / RUN_TELEMETRY_FILENAME
+
+
+def find_run_progress(run_id):
+    """Returns the most recently written progress for a run id, also considering run ids that had a timestamp appended, or None if no progress exists."""
+
+    run_folder_name = find_run_folder_name(run_id, RUN_PROGRESS_FILENAME)
+    if run_folder_name is None:
+        return None
+
+    return load_run_file(get_run_progress_path(run_folder_name))
+
+
+def is_run_finishing(progress: dict):
+    """Returns True if a training run's progress reports that it has stopped training and is shutting down."""
+
+    return progress.get('phase') == RUN_PHASE_FINISHING
+
+
+def glob_escape(pattern: str):
+    """Escapes glob special characters in a string."""
+
+    return re.sub(r'([*?[])', r'[\1]', pattern)
+
+
+def append_search_result(file_path: Path, record: dict):
+    """Appends a search result record to a search results file."""
+
+    if not file_path.parent.exists():
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Concurrent searches may share a results file
+    with file_path.open(mode='ab') as f, command_util.lock_file(f):
+        f.write((json.dumps(record) + '\n').encode('utf-8'))
+
+
+def load_search_results(file_path: Path):
+    """Returns a list of the search result records stored in a search results file. Lines that can't be parsed are skipped."""
+
+    if not file_path.exists():
+        return []
+
+    records = []
+    with file_path.open('r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                records.append(json.loads(line))
+            except json.decoder.JSONDecodeError:
+                results_log.warning(f'Skipping unreadable search result in \'{file_path}\'')
+
+    return records
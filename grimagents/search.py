@@ -4,9 +4,16 @@ CLI application that performs hyperparameter searches using a grimagents configu
 Features:
 - Grid Search for hyperparameters
 - Random Search for hyperparameters
+- Space-filling designs (Latin hypercube, Sobol, Halton and orthogonal arrays) for random searches and Bayesian search exploration
 - Bayesian Search for hyperparameters
 - Resume Grid Search
 - Save and load Bayesian search progress
+- Limit searches to a time or step budget, and training runs to a timeout
+- Compare trainer profiles across search training runs
+- Estimate how long a search will take from earlier training runs, and report its progress while it runs
+- Execute several grid or random search training runs at the same time
+- Report the Pareto front of reward against wall-clock time, and optimize Bayesian searches for reward per hour of training
+- Submit searches to a job server started with 'grimagents --serve'
 
 See readme.md for more information.
 """
@@ -16,12 +23,21 @@ import logging
 import logging.config
 import sys
 
+from pathlib import Path
+
 import grimagents.common as common
+import grimagents.config as config_util
+import grimagents.job_server as job_server
+import grimagents.log_util as log_util
 import grimagents.settings as settings
 
+from grimagents.parameter_search import InvalidSearchParameter
+from grimagents.search_constraints import InvalidSearchConstraint
 from grimagents.search_commands import (
     EditGrimConfigFile,
     OutputGridSearchCount,
+    OutputSearchEstimate,
+    OutputSearchProfile,
     PerformGridSearch,
     ExportGridSearchConfiguration,
     PerformRandomSearch,
@@ -34,7 +50,15 @@ search_log = logging.getLogger('grimagents.search')
 
 def main():
 
-    configure_logging()
+    argv = get_argvs()
+    args = parse_args(argv)
+
+    configure_logging(get_run_log_name(args))
+
+    if args.submit:
+        submit_job(argv, args)
+        logging.shutdown()
+        return
 
     if not common.is_pipenv_present():
         search_log.error(
@@ -42,23 +66,59 @@ def main():
         )
         sys.exit(1)
 
-    argv = get_argvs()
-    args = parse_args(argv)
+    # Configurations, search parameters and constraints are validated when the command is created, before any training run is launched
+    try:
+        command = get_command(args)
+    except config_util.InvalidConfigurationError:
+        logging.shutdown()
+        sys.exit(1)
+    except InvalidSearchParameter as exception:
+        search_log.error(f'Invalid search parameter, {exception}')
+        logging.shutdown()
+        sys.exit(1)
+    except InvalidSearchConstraint as exception:
+        search_log.error(f'Invalid search constraint, {exception}')
+        logging.shutdown()
+        sys.exit(1)
+
+    command.execute()
+
+    logging.shutdown()
+
+
+def get_command(args):
+    """Returns the search command selected by the parsed command line arguments."""
 
     if args.edit_config:
-        EditGrimConfigFile(args).execute()
+        return EditGrimConfigFile(args)
     elif args.search_count:
-        OutputGridSearchCount(args).execute()
+        return OutputGridSearchCount(args)
+    elif args.profile_report:
+        return OutputSearchProfile(args)
     elif args.export_index:
-        ExportGridSearchConfiguration(args).execute()
+        return ExportGridSearchConfiguration(args)
+    elif args.estimate:
+        return OutputSearchEstimate(args)
     elif args.random:
-        PerformRandomSearch(args).execute()
+        return PerformRandomSearch(args)
     elif args.bayesian:
-        PerformBayesianSearch(args).execute()
+        return PerformBayesianSearch(args)
     else:
-        PerformGridSearch(args).execute()
+        return PerformGridSearch(args)
 
-    logging.shutdown()
+
+def submit_job(argv, args):
+    """Submits a search to a job server started with 'grimagents --serve'."""
+
+    try:
+        job = job_server.submit_job(
+            job_server.SEARCH_JOB, job_server.get_submitted_argv(argv), port=args.server_port
+        )
+    except job_server.JobServerError as exception:
+        search_log.error(exception)
+        sys.exit(1)
+
+    search_log.info(f'Submitted search job {job["id"]}')
 
 
 def get_argvs():
@@ -81,6 +141,16 @@ def parse_args(argv):
         action='store_true',
         help='Output the total number of grid searches a grimagents configuration file will attempt',
     )
+    options_parser.add_argument(
+        '--profile-report',
+        action='store_true',
+        help='Compare where each recorded search training run spent its time',
+    )
+    options_parser.add_argument(
+        '--estimate',
+        action='store_true',
+        help='Output the expected duration of the search, based on the step rates of earlier training runs',
+    )
     options_parser.add_argument(
         '--resume',
         metavar='<search index>',
@@ -108,6 +178,36 @@ def parse_args(argv):
         nargs=2,
         help='Execute Bayesian Search using a number of exploration steps and optimization steps',
     )
+    options_parser.add_argument(
+        '--design',
+        choices=['lhs', 'sobol', 'halton', 'orthogonal'],
+        help='Spread random search training runs, or the exploration steps of a Bayesian search, evenly over the search space with a Latin hypercube, Sobol sequence, Halton sequence or orthogonal array instead of choosing each value independently',
+    )
+    options_parser.add_argument(
+        '--objective',
+        choices=['reward', 'reward_per_hour', 'cost_weighted'],
+        default='reward',
+        help='The score a Bayesian search maximizes: the final mean reward, the reward per wall-clock hour of training, or the reward less \'--cost-weight\' per wall-clock hour of training',
+    )
+    options_parser.add_argument(
+        '--cost-weight',
+        metavar='<reward>',
+        type=float,
+        help='The reward a \'cost_weighted\' Bayesian search gives up for each wall-clock hour of training (default 1.0)',
+    )
+    options_parser.add_argument(
+        '--replicates',
+        metavar='<count>',
+        type=int,
+        default=1,
+        help='Train each search configuration this many times at the same time, seeded from the configuration\'s \'--seed\' (or 0) upwards, and rank it on the aggregate of its replicates',
+    )
+    options_parser.add_argument(
+        '--replicate-score',
+        choices=['mean', 'median', 'lcb'],
+        default='mean',
+        help='How the rewards of a search configuration\'s replicates are aggregated: their mean, their median, or their mean less its standard error',
+    )
     options_parser.add_argument(
         '--bayes-save',
         '-s',
@@ -120,6 +220,60 @@ def parse_args(argv):
         action='store_true',
         help='Loads Bayesian optimization progress logs from folder',
     )
+    options_parser.add_argument(
+        '--parallel',
+        metavar='<n>',
+        type=int,
+        default=1,
+        help='The number of grid or random search training runs to execute at the same time',
+    )
+    options_parser.add_argument(
+        '--adaptive-parallel',
+        action='store_true',
+        help='Tune the number of grid or random search training runs executed at the same time to the one with the highest total steps per second, starting at the number the last search settled on or at \'--parallel\'',
+    )
+    options_parser.add_argument(
+        '--schedule',
+        choices=['longest', 'index'],
+        default='longest',
+        help='The order training runs are launched in when several run at the same time, longest expected duration first or by search index',
+    )
+    options_parser.add_argument(
+        '--no-pipeline',
+        dest='pipeline',
+        action='store_false',
+        help='Wait for each training run to exit before launching the next, instead of launching it once the last one finishes training',
+    )
+    options_parser.add_argument(
+        '--time-budget',
+        metavar='<seconds>',
+        type=float,
+        help='Stop launching training runs that are not expected to finish within <seconds> of the search starting',
+    )
+    options_parser.add_argument(
+        '--step-budget',
+        metavar='<steps>',
+        type=int,
+        help='Stop launching training runs that are not expected to finish within <steps> training steps across the search',
+    )
+    options_parser.add_argument(
+        '--trial-timeout',
+        metavar='<seconds>',
+        type=float,
+        help='Stop each training run after <seconds> and score it on the mean reward it reached',
+    )
+    options_parser.add_argument(
+        '--submit',
+        action='store_true',
+        help='Submit this search to a job server started with \'grimagents --serve\' instead of executing it',
+    )
+    options_parser.add_argument(
+        '--server-port',
+        metavar='<port>',
+        type=int,
+        default=settings.JOB_SERVER_PORT,
+        help='The port of the job server',
+    )
 
     parser = argparse.ArgumentParser(
         prog='grimsearch',
@@ -144,7 +298,29 @@ def parse_args(argv):
     return args
 
 
-def configure_logging():
+def get_run_log_name(args):
+    """Returns the name of the per-search log file, or None if the arguments do not perform a search."""
+
+    if (
+        args.edit_config
+        or args.search_count
+        or args.profile_report
+        or args.estimate
+        or args.export_index
+        or args.submit
+    ):
+        return None
+
+    return f'{Path(args.configuration_file).stem}_search-{common.get_timestamp()}'
+
+
+def configure_logging(run_log_name=None):
+    """Configures logging for a search. Searches log into the combined log file and into a log file of their own.
+
+    Parameters:
+        run_log_name: str: The name of the search's log file
+    """
+
     log_config = {
         'version': 1,
         'disable_existing_loggers': False,
@@ -158,18 +334,12 @@ def configure_logging():
                 'stream': 'ext://sys.stdout',
                 'formatter': 'display',
             },
-            'file': {'class': 'logging.FileHandler', 'filename': '', 'formatter': 'timestamp'},
+            'file': log_util.get_file_handler_config(run_log_name),
         },
         'loggers': {'grimagents.search': {'handlers': ['console', 'file']}},
         'root': {'level': 'INFO'},
     }
 
-    log_file = settings.get_log_file_path()
-
-    if not log_file.parent.exists():
-        log_file.parent.mkdir(parents=True, exist_ok=True)
-
-    log_config['handlers']['file']['filename'] = log_file
     logging.config.dictConfig(log_config)
 
 
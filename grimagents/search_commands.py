@@ -1,26 +1,175 @@
+import collections
+import concurrent.futures
 import logging
+import os
 import re
 import subprocess
+import threading
+import time
 
 import bayes_opt.util
 from bayes_opt import BayesianOptimization
 from bayes_opt.logger import JSONLogger
 from bayes_opt.event import Events
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import grimagents.command_util as command_util
 import grimagents.common as common
+import grimagents.concurrency as concurrency
 import grimagents.config as config_util
 import grimagents.constants as const
+import grimagents.coordination as coordination
+import grimagents.estimate as estimate
+import grimagents.objectives as objectives
+import grimagents.results as results
 import grimagents.settings as settings
+import grimagents.tensorboard_events as tensorboard_events
 
 from grimagents.parameter_search import GridSearch, RandomSearch, BayesianSearch
 
-
 search_log = logging.getLogger('grimagents.search')
 reward_regex = re.compile(r'Final Mean Reward: (-?\d*[.,]?\d*)')
 
+# Seconds between reports of a search's expected time remaining while training runs are in progress
+ETA_INTERVAL = 60.0
+# Seconds between checks for training runs that have finished training and are shutting down
+PIPELINE_INTERVAL = 5.0
+# Seconds between measurements of the throughput of training runs in progress, when '--adaptive-parallel' is used
+THROUGHPUT_INTERVAL = 15.0
+
+
+# Orders in which a search launches its training runs when several run at the same time
+SCHEDULE_INDEX = 'index'
+SCHEDULE_LONGEST = 'longest'
+
+
+# A training run started by a search, 'start_time' is a time.time() value
+RunningTrial = collections.namedtuple(
+    'RunningTrial', ['run_id', 'search_config', 'trainer_config', 'start_time', 'time_limit']
+)
+
+
+class SearchBudgetExhausted(Exception):
+    """The next training run of a search would not fit within its remaining budget."""
+
+    pass
+
+
+class SearchBudget:
+    """Tracks the time and steps a search has used and estimates, from the step rate measured across its training runs, whether another training run fits within what remains."""
+
+    def __init__(self, time_budget=None, step_budget=None, trial_timeout=None):
+        """
+        Parameters:
+            time_budget: float: Seconds the whole search may take, or None for no limit
+            step_budget: int: Training steps the whole search may take, or None for no limit
+            trial_timeout: float: Seconds each training run may take, or None for no limit
+        """
+
+        self.time_budget = time_budget
+        self.step_budget = step_budget
+        self.trial_timeout = trial_timeout
+
+        self.start_time = time.monotonic()
+        self.steps_used = 0
+        self.seconds_measured = 0.0
+        self.steps_measured = 0
+
+    def record_trial(self, summary: dict):
+        """Records the steps and duration of a training run from its run summary."""
+
+        step = summary.get('step') or 0
+        duration = summary.get('duration') or 0
+
+        self.steps_used += step
+
+        # Runs that never reached a step say nothing about the step rate
+        if step and duration:
+            self.steps_measured += step
+            self.seconds_measured += duration
+
+    def get_steps_per_second(self):
+        """Returns the step rate measured across recorded training runs, including their startup time, or 0 if none were recorded."""
+
+        if self.seconds_measured == 0:
+            return 0.0
+
+        return self.steps_measured / self.seconds_measured
+
+    def get_time_remaining(self):
+        """Returns the seconds left in the time budget, or None if the search has no time budget."""
+
+        if self.time_budget is None:
+            return None
+
+        return max(self.time_budget - (time.monotonic() - self.start_time), 0.0)
+
+    def get_steps_remaining(self):
+        """Returns the steps left in the step budget, or None if the search has no step budget."""
+
+        if self.step_budget is None:
+            return None
+
+        return max(self.step_budget - self.steps_used, 0)
+
+    def get_trial_time_limit(self):
+        """Returns the seconds the next training run may take, the smaller of the trial timeout and the time remaining, or None if neither is set."""
+
+        limits = [
+            limit for limit in [self.trial_timeout, self.get_time_remaining()] if limit is not None
+        ]
+        if not limits:
+            return None
+
+        return min(limits)
+
+    def get_spent_reason(self):
+        """Returns a description of the budget that is spent, or None if neither is."""
+
+        time_remaining = self.get_time_remaining()
+        if time_remaining is not None and time_remaining <= 0:
+            return 'the time budget is spent'
+
+        steps_remaining = self.get_steps_remaining()
+        if steps_remaining is not None and steps_remaining <= 0:
+            return 'the step budget is spent'
+
+        return None
+
+    def get_exhausted_reason(self, max_steps=0, replicates=1):
+        """Returns a description of why a training run of up to 'max_steps' steps would not fit in the remaining budget, or None if it fits.
+
+        Until a step rate has been measured, training runs are assumed to fit within the time budget. They are stopped by get_trial_time_limit() if they do not.
+
+        Parameters:
+            replicates: int: The number of replicates of the training run executed at the same time, each of which takes 'max_steps' steps
+        """
+
+        spent_reason = self.get_spent_reason()
+        if spent_reason is not None:
+            return spent_reason
+
+        time_remaining = self.get_time_remaining()
+        steps_remaining = self.get_steps_remaining()
+
+        steps_per_second = self.get_steps_per_second()
+
+        expected_steps = max_steps
+        if self.trial_timeout is not None and steps_per_second:
+            expected_steps = min(expected_steps, steps_per_second * self.trial_timeout)
+
+        if steps_remaining is not None and expected_steps * replicates > steps_remaining:
+            return f'the next training run is expected to take {expected_steps * replicates:.0f} steps, {steps_remaining} remain'
+
+        if time_remaining is not None and steps_per_second:
+            expected_time = expected_steps / steps_per_second
+            if expected_time > time_remaining:
+                return f'the next training run is expected to take {common.get_human_readable_duration(expected_time)}, {common.get_human_readable_duration(time_remaining)} remain'
+
+        return None
+
 
 class Command:
     def __init__(self, args):
@@ -51,27 +200,130 @@ class SearchCommand(Command):
         self.grim_config_path = Path(args.configuration_file)
         self.grim_config = config_util.load_grim_configuration_file(self.grim_config_path)
 
-        self.search_config = self.grim_config['search']
+        self.search_config = self.grim_config.get(const.GS_SEARCH)
 
         self.trainer_config_path = Path(self.grim_config[const.ML_TRAINER_CONFIG_PATH])
         self.trainer_config = config_util.load_trainer_configuration_file(self.trainer_config_path)
 
+        # Configurations are checked before any search is created or training run is launched
+        is_valid_trainer_config = config_util.validate_trainer_configuration(self.trainer_config)
+        is_valid_search_config = config_util.validate_search_configuration(
+            self.search_config, self.trainer_config
+        )
+        if not is_valid_trainer_config or not is_valid_search_config:
+            search_log.error(
+                f'Unable to search using \'{self.grim_config_path}\' and \'{self.trainer_config_path}\''
+            )
+            raise config_util.InvalidConfigurationError
+
         self.search_config_path = self.trainer_config_path.with_name('search_config.yaml')
 
+        # Training runs read their trainer configuration from a file unique to this search, as
+        # other searches using the same trainer configuration may be running at the same time.
+        self.scratch_config_path = coordination.get_scratch_path(self.search_config_path)
+        self.search_results_path = self.trainer_config_path.with_name(
+            f'{self.grim_config[const.ML_RUN_ID]}_search.jsonl'
+        )
+        self.concurrency_path = self.trainer_config_path.with_name(
+            f'{self.grim_config[const.ML_RUN_ID]}_concurrency.json'
+        )
+
         self.search_counter = 0
+        self.trials_finished = 0
+
+        # Each search configuration is trained this many times at once, with a different seed each time
+        self.replicates = max(args.replicates, 1)
+
+        self.budget = SearchBudget(
+            time_budget=args.time_budget,
+            step_budget=args.step_budget,
+            trial_timeout=args.trial_timeout,
+        )
+
+        # Built from earlier training runs' summaries when a search begins
+        self.duration_model = None
+
+        # (run_id, search_config, TrialObjectives) tuples of the search's training runs that reported a reward
+        self.trial_objectives = []
 
-    def perform_search_with_configuration(self, trainer_config):
+        # Training runs are recorded from worker threads when several run at the same time
+        self.lock = threading.Lock()
+
+        # The (step, updated) of the last progress read for each training run, and the step rate measured since the one before
+        self.run_progress = {}
+        self.run_rates = {}
+
+        # Set while several of the search's training runs may execute at the same time, and the
+        # PortLease of the ports given to each training run in progress (see get_trial_port_arguments())
+        self.concurrent_trials = False
+        self.trial_ports = {}
+
+    def perform_search_with_configuration(self, trainer_config, run_id=None, config_path=None):
         """Executes a search using the provided search configuration.
 
         Parameters:
             trainer_config: dict: The complete trainer configuration that will be used in the search. This will be written into a trainer config file for the search.
+            run_id: str: The run id of the training run, defaults to the current search's run id
+            config_path: Path: The file the trainer configuration is written into, defaults to the search's scratch configuration file
         """
 
+        run_id = run_id or self.get_search_run_id()
+        config_path = config_path or self.scratch_config_path
+
         # Write trainer configuration to file
-        command_util.write_yaml_file(trainer_config, self.search_config_path)
+        command_util.write_yaml_file(trainer_config, config_path)
+
+        try:
+            # Execute training with the 'trainer_config' and 'run_id'
+            if self.replicates == 1:
+                command = self.get_training_command(run_id, config_path)
+                subprocess.run(command)
+                return
+
+            # Replicates read the same trainer config file and train at the same time
+            processes = [
+                subprocess.Popen(self.get_training_command(replicate_run_id, config_path, seed))
+                for replicate_run_id, seed in self.get_replicates(run_id)
+            ]
+            for process in processes:
+                process.wait()
+
+        finally:
+            self.release_trial_ports(self.get_trial_run_ids(run_id))
+
+    def get_replicates(self, run_id):
+        """Returns a (run_id, seed) tuple for each replicate of a search training run.
+
+        Replicates are seeded from the grimagents configuration's '--seed', or from 0 if it is not set. Replicate n of every search configuration uses the same seed, so search configurations are compared on the same random numbers.
+        """
+
+        try:
+            base_seed = max(int(self.grim_config.get(const.ML_SEED)), 0)
+        except (TypeError, ValueError):
+            base_seed = 0
+
+        return [(f'{run_id}_r{n}', base_seed + n) for n in range(self.replicates)]
+
+    def get_trial_run_ids(self, run_id):
+        """Returns the run ids of the training runs a search training run executes, its replicates' run ids if it has replicates."""
+
+        if self.replicates == 1:
+            return [run_id]
+
+        return [replicate_run_id for replicate_run_id, _ in self.get_replicates(run_id)]
+
+    def get_behavior_name(self):
+        """Returns the name of the behavior the search trains, whose reward curve search training runs are scored on."""
+
+        return self.search_config.get(const.GS_BEHAVIOR_NAME)
+
+    def get_training_command(self, run_id, config_path=None, seed=None):
+        """Returns the grimagents command that executes a search training run. Training runs are given a time limit when the search has a trial timeout or a time budget.
+
+        Parameters:
+            seed: int: Overrides the grimagents configuration's '--seed', used by replicates
+        """
 
-        # Execute training with the 'trainer_config' and 'run_id'
-        run_id = self.get_search_run_id()
         command = [
             'pipenv',
             'run',
@@ -80,18 +332,559 @@ class SearchCommand(Command):
             'grimagents',
             self.grim_config_path,
             '--trainer-config',
-            self.search_config_path,
+            config_path or self.scratch_config_path,
             '--run-id',
             run_id,
         ]
 
-        command = [str(element) for element in command]
-        subprocess.run(command)
+        if seed is not None:
+            command += ['--seed', seed]
+
+        command += self.get_trial_port_arguments(run_id)
+
+        # Unrecognized arguments are passed through grimagents to the training wrapper
+        time_limit = self.budget.get_trial_time_limit()
+        if time_limit is not None:
+            command += ['--time-limit', f'{time_limit:.0f}']
+
+        return [str(element) for element in command]
+
+    def get_trial_port_arguments(self, run_id):
+        """Returns the grimagents arguments that give a training run ports of its own while it may execute at the same time as the search's other training runs.
+
+        These training runs lease their ports with '--auto-port'. A '--base-port' set in the grimagents configuration would be shared by every one of them, so each is instead given the lowest free range of ports from that base port. The range does not overlap ports leased by other processes or given to the search's other training runs in progress, and is leased by the training run once it starts (see PerformTraining.lease_ports()).
+        """
+
+        if not (self.concurrent_trials or self.replicates > 1):
+            return []
+
+        base_port = self.grim_config.get(const.ML_BASE_PORT)
+        if not base_port:
+            return ['--auto-port']
+
+        num_envs = int(self.grim_config.get(const.ML_NUM_ENVS) or 1)
+
+        with self.lock:
+            reserved = list(self.trial_ports.values())
+            try:
+                with coordination.open_port_registry() as leases:
+                    reserved += leases
+            except (coordination.CoordinationError, OSError) as exception:
+                search_log.warning(
+                    f'Unable to read the port registry, only avoiding the search\'s own ports. {exception}'
+                )
+
+            start = coordination.find_free_range(num_envs, int(base_port), reserved, probe=True)
+            self.trial_ports[run_id] = coordination.PortLease(start, num_envs, os.getpid(), run_id)
+
+        return ['--base-port', start, '--auto-port']
+
+    def release_trial_ports(self, run_ids):
+        """Frees the ports given to training runs that have exited for the search's next training runs."""
+
+        with self.lock:
+            for run_id in run_ids:
+                self.trial_ports.pop(run_id, None)
+
+    def is_within_budget(self, trainer_config):
+        """Returns True if a training run with the given trainer configuration fits within the search's remaining budget, otherwise logs why it does not."""
+
+        reason = self.budget.get_exhausted_reason(
+            estimate.get_trainer_max_steps(trainer_config), self.replicates
+        )
+        if reason is None:
+            return True
+
+        search_log.info(f'Ending search early, {reason}')
+        return False
+
+    def run_trials(self, trials: list):
+        """Executes a training run for each (index, search_config, trainer_config) tuple, running up to '--parallel' training runs at the same time, and reports the search's expected time remaining as training runs progress.
+
+        When several training runs execute at the same time they are launched longest first (see estimate.order_longest_first()), re-estimating the order each time a training run finishes, unless '--schedule index' is used. Training runs that are not expected to fit in the search's remaining budget are skipped, and the search ends once its budget is spent.
+
+        Unless '--no-pipeline' is used, a training run that has finished training no longer occupies a worker while it exports its model and shuts down its environment, so the next training run's environment starts in the meantime.
+
+        With '--adaptive-parallel', the number of training runs executed at the same time is tuned by a concurrency.ConcurrencyController from the throughput of the training runs in progress, starting at the level an earlier search settled on or at '--parallel'.
+        """
+
+        controller = self.create_concurrency_controller() if self.args.adaptive_parallel else None
+        max_workers = controller.maximum if controller else max(self.args.parallel, 1)
+        workers = controller.level if controller else max_workers
+        pending = collections.deque(trials)
+        running = {}
+        total = len(pending)
+
+        self.duration_model = self.create_duration_model()
+        longest_first = max_workers > 1 and self.args.schedule == SCHEDULE_LONGEST
+        pipeline = self.args.pipeline
+        self.concurrent_trials = max_workers > 1 or pipeline
+
+        start_time = time.monotonic()
+        eta_time = start_time
+
+        wait_interval = PIPELINE_INTERVAL if pipeline else ETA_INTERVAL
+        if controller:
+            wait_interval = min(wait_interval, THROUGHPUT_INTERVAL)
+
+        # Each worker may have a training run that is shutting down as well as one that is training
+        with ThreadPoolExecutor(
+            max_workers=max_workers * 2 if pipeline else max_workers
+        ) as executor:
+            while pending or running:
+                while pending and self.has_free_worker(list(running.values()), workers):
+                    spent_reason = self.budget.get_spent_reason()
+                    if spent_reason is not None:
+                        search_log.info(f'Ending search early, {spent_reason}')
+                        pending.clear()
+                        break
+
+                    if longest_first:
+                        with self.lock:
+                            pending = collections.deque(
+                                estimate.order_longest_first(pending, self.duration_model)
+                            )
+
+                    index, search_config, trainer_config = pending.popleft()
+                    run_id = self.get_search_run_id(index)
+
+                    reason = self.budget.get_exhausted_reason(
+                        estimate.get_trainer_max_steps(trainer_config), self.replicates
+                    )
+                    if reason is not None:
+                        search_log.info(f'Skipping search {run_id}, {reason}')
+                        continue
+
+                    self.search_counter = index
+
+                    self.output_search_configuration(run_id, search_config)
+
+                    # Training runs executing at the same time each need a trainer config file of their own
+                    config_path = (
+                        self.scratch_config_path
+                        if max_workers == 1 and not pipeline
+                        else coordination.get_scratch_path(self.search_config_path)
+                    )
+
+                    trial = RunningTrial(
+                        run_id,
+                        search_config,
+                        trainer_config,
+                        time.time(),
+                        self.budget.get_trial_time_limit(),
+                    )
+                    future = executor.submit(
+                        self.execute_trial, run_id, search_config, trainer_config, config_path
+                    )
+                    running[future] = trial
+
+                if not running:
+                    break
+
+                done, _ = concurrent.futures.wait(
+                    list(running),
+                    timeout=wait_interval if pending else ETA_INTERVAL,
+                    return_when=concurrent.futures.FIRST_COMPLETED,
+                )
+                for future in done:
+                    del running[future]
+                    future.result()
+
+                if controller and pending:
+                    self.update_concurrency(controller, list(running.values()))
+                    workers = controller.level
+
+                now = time.monotonic()
+                if (running or pending) and (done or now - eta_time >= ETA_INTERVAL):
+                    eta_time = now
+                    self.output_eta(list(running.values()), list(pending), workers, total)
+
+        if controller:
+            self.output_concurrency(controller)
+        elif workers > 1:
+            search_log.info(
+                f'{self.trials_finished} training runs finished in {common.get_human_readable_duration(time.monotonic() - start_time)}, running {workers} at a time'
+            )
+
+    def create_concurrency_controller(self):
+        """Returns a ConcurrencyController for tuning the number of training runs executed at the same time, up to the number of cores on the host. It starts at the level the last search with the same run id settled on, or at '--parallel'."""
+
+        maximum = os.cpu_count() or 1
+        initial = concurrency.load_level(self.concurrency_path) or self.args.parallel
+
+        search_log.info(
+            f'Tuning the number of training runs executed at the same time, starting at {min(max(initial, 1), maximum)} of at most {maximum}'
+        )
+        return concurrency.ConcurrencyController(maximum, initial=initial)
+
+    def update_concurrency(self, controller, running: list):
+        """Records the throughput of the training runs in progress with a ConcurrencyController, logging any change in the number of training runs executed at the same time."""
+
+        throughput, training = self.get_throughput(running)
+        load = concurrency.get_host_load()
+
+        previous_level = controller.level
+        level = controller.record(throughput, training, time.monotonic(), load)
+        if level is None:
+            return
+
+        measured = controller.get_throughput(previous_level)
+        load_description = f', load {load:.2f} per core' if load is not None else ''
+        search_log.info(
+            f'Measured {measured:.1f} steps per second running {previous_level} training runs at a time{load_description}, now running {level} at a time'
+        )
+
+    def get_throughput(self, running: list):
+        """Returns the steps per second of the training runs in progress together, measured from the steps in their progress files, and the number of those training runs that are training.
+
+        A training run counts as training once its progress has been read twice since it started, and stops counting once it is finishing. Training runs with replicates count once all of their replicates are training.
+        """
+
+        throughput = 0.0
+        training = 0
+        for trial in running:
+            rates = []
+            for run_id in self.get_trial_run_ids(trial.run_id):
+                rate = self.get_run_rate(run_id, trial.start_time)
+                if rate is None:
+                    break
+                rates.append(rate)
+            else:
+                throughput += sum(rates)
+                training += 1
+
+        return throughput, training
+
+    def get_run_rate(self, run_id, start_time):
+        """Returns the steps per second a training run made between its two latest progress updates, or None if it is not training or has not updated its progress twice since 'start_time'."""
+
+        # Progress files left behind by earlier training runs with the same run id are ignored
+        progress = results.find_run_progress(run_id)
+        if (
+            progress is None
+            or progress.get('updated', 0) < start_time
+            or results.is_run_finishing(progress)
+        ):
+            return None
+
+        step = progress.get('step') or 0
+        updated = progress['updated']
+
+        last = self.run_progress.get(run_id)
+        if last is None or last[1] < start_time:
+            self.run_progress[run_id] = (step, updated)
+            self.run_rates.pop(run_id, None)
+            return None
+
+        last_step, last_updated = last
+        if updated > last_updated:
+            self.run_progress[run_id] = (step, updated)
+            self.run_rates[run_id] = max(step - last_step, 0) / (updated - last_updated)
+
+        return self.run_rates.get(run_id)
+
+    def output_concurrency(self, controller):
+        """Logs the throughput measured at each number of training runs executed at the same time and the number settled on, and saves them for later searches (see concurrency.save_record())."""
+
+        record = controller.get_record()
+        if not record['curve']:
+            search_log.info(
+                'Not enough training runs were measured to tune the number executed at the same time'
+            )
+            return
+
+        search_log.info('-' * 63)
+        search_log.info('Throughput by training runs executed at the same time:')
+        for level, throughput in record['curve'].items():
+            marker = ' (chosen)' if int(level) == record['level'] else ''
+            search_log.info(f'    {level}: {throughput:.1f} steps per second{marker}')
+
+        search_log.info(f'Saving the chosen level to \'{self.concurrency_path}\'')
+        concurrency.save_record(self.concurrency_path, controller)
+        search_log.info('-' * 63)
+
+    def has_free_worker(self, running: list, workers):
+        """Returns True if another training run can be launched while the RunningTrial tuples in 'running' are in progress. When pipelining, training runs that are shutting down do not occupy a worker."""
+
+        if len(running) < workers:
+            return True
+
+        if not self.args.pipeline or len(running) >= workers * 2:
+            return False
+
+        training = [trial for trial in running if not self.is_trial_finishing(trial)]
+        return len(training) < workers
+
+    def is_trial_finishing(self, trial: RunningTrial):
+        """Returns True if a training run in progress, and every one of its replicates, has reported that it finished training and is shutting down."""
+
+        for run_id in self.get_trial_run_ids(trial.run_id):
+            # Progress files left behind by earlier training runs with the same run id are ignored
+            progress = results.find_run_progress(run_id)
+            if (
+                progress is None
+                or progress.get('updated', 0) < trial.start_time
+                or not results.is_run_finishing(progress)
+            ):
+                return False
+
+        return True
+
+    def create_duration_model(self):
+        """Returns a DurationModel built from earlier training runs of the search's environment and the search's recorded results."""
+
+        return estimate.create_duration_model(
+            self.grim_config.get(const.ML_ENV),
+            search_records=results.load_search_results(self.search_results_path),
+        )
+
+    def execute_trial(self, run_id, search_config, trainer_config, config_path):
+        """Executes and records a single training run. Trainer config files written for a single training run are deleted once it finishes."""
+
+        self.perform_search_with_configuration(
+            trainer_config, run_id=run_id, config_path=config_path
+        )
+        self.record_trial(run_id, search_config)
+
+        if config_path != self.scratch_config_path and config_path.exists():
+            config_path.unlink()
+
+    @staticmethod
+    def output_search_constraints(parameter_search):
+
+        if not parameter_search.constraints:
+            return
+
+        search_log.info('Search constraints:')
+        for constraint in parameter_search.constraints:
+            search_log.info(f'    {constraint}')
+
+    @staticmethod
+    def output_search_configuration(run_id, search_config):
+
+        search_log.info('-' * 63)
+        search_log.info(f'Search: {run_id}')
+        for key, value in search_config.items():
+            search_log.info(f'    {key}: {value}')
+        search_log.info('-' * 63)
+
+    def output_eta(self, running: list, pending: list, workers, total):
+        """Logs the search's expected time remaining, if it can be estimated.
+
+        Parameters:
+            running: list: RunningTrial tuples for training runs in progress
+            pending: list: (index, search_config, trainer_config) tuples for training runs that have not started
+            workers: int: The number of training runs executed at the same time
+            total: int: The number of training runs in the search
+        """
+
+        eta = self.get_search_eta(running, pending, workers)
+        if eta is None:
+            return
+
+        search_log.info(
+            f'Search ETA: {common.get_human_readable_duration(eta)} ({self.trials_finished} of {total} training runs finished, {len(running)} in progress)'
+        )
+
+    def get_search_eta(self, running: list, pending: list, workers=1):
+        """Returns the expected seconds until every running and pending training run has finished, or None if there is no history to estimate from.
+
+        Training runs in progress are estimated from the time remaining they last reported, pending training runs from the step rates of earlier training runs.
+        """
+
+        if self.duration_model is None:
+            return None
+
+        busy = []
+        for trial in running:
+            remaining = self.get_trial_time_remaining(trial)
+            if remaining is None:
+                return None
+            busy.append(remaining)
+
+        durations = []
+        for _, search_config, trainer_config in pending:
+            duration = self.duration_model.estimate(trainer_config, search_config)
+            if duration is None:
+                return None
+
+            trial_timeout = self.budget.trial_timeout
+            durations.append(min(duration, trial_timeout) if trial_timeout else duration)
+
+        return estimate.estimate_makespan(durations, workers, busy)
+
+    def get_trial_time_remaining(self, trial: RunningTrial):
+        """Returns the expected seconds until a training run in progress, and every one of its replicates, finishes, or None if it can't be estimated."""
+
+        elapsed = time.time() - trial.start_time
+
+        remaining = 0.0
+        for run_id in self.get_trial_run_ids(trial.run_id):
+            # Progress files left behind by earlier training runs with the same run id are ignored
+            progress = results.find_run_progress(run_id)
+            if progress and progress.get('step') and progress.get('updated', 0) >= trial.start_time:
+                run_remaining = progress['time_remaining'] - (time.time() - progress['updated'])
+            else:
+                duration = self.duration_model.estimate(trial.trainer_config, trial.search_config)
+                if duration is None:
+                    return None
+                run_remaining = duration - elapsed
+
+            remaining = max(remaining, run_remaining)
+
+        if trial.time_limit is not None:
+            remaining = min(remaining, max(trial.time_limit - elapsed, 0.0))
+
+        return remaining
+
+    def remove_scratch_config(self):
+        """Deletes the trainer configuration file written for this search's training runs."""
+
+        if self.scratch_config_path.exists():
+            self.scratch_config_path.unlink()
 
-    def get_search_run_id(self):
-        """Returns a run_id string for the current search."""
+    def get_search_run_id(self, index=None):
+        """Returns a run_id string for the current search, or the search at 'index'."""
 
-        return self.grim_config[const.ML_RUN_ID] + f'_{self.search_counter:02d}'
+        if index is None:
+            index = self.search_counter
+
+        return self.grim_config[const.ML_RUN_ID] + f'_{index:02d}'
+
+    def get_knee_trial(self):
+        """Returns the (run_id, search_config, TrialObjectives) tuple of the training run at the knee of the search's Pareto front of reward against wall-clock time, or None if no training run reported a reward (see objectives.get_knee_point())."""
+
+        with self.lock:
+            trials = list(self.trial_objectives)
+
+        knee = objectives.get_knee_point([trial for _, _, trial in trials])
+        if knee is None:
+            return None
+
+        return trials[knee]
+
+    def output_pareto_front(self):
+        """Logs the training runs on the search's Pareto front of reward against wall-clock time, fastest first, marking the knee."""
+
+        with self.lock:
+            trials = list(self.trial_objectives)
+
+        if not trials:
+            return
+
+        trial_objectives = [trial for _, _, trial in trials]
+        knee = objectives.get_knee_point(trial_objectives)
+
+        search_log.info('-' * 63)
+        search_log.info('Pareto front of reward and wall-clock time:')
+        for index in objectives.get_pareto_front(trial_objectives):
+            run_id, _, trial = trials[index]
+            marker = ' (knee)' if index == knee else ''
+            search_log.info(
+                f'    {run_id}: reward {trial.reward}, {common.get_human_readable_duration(trial.wall_time)}, {trial.steps_per_second:.1f} steps/s{marker}'
+            )
+        search_log.info('-' * 63)
+
+    def record_trial(self, run_id, search_config):
+        """Records a search training run, or each of its replicates and their aggregate if it has replicates.
+
+        Returns:
+          A list of the summary dictionaries of the training run's replicates, or of the training run alone, with None for those that did not write one.
+        """
+
+        if self.replicates == 1:
+            return [self.record_search_result(run_id, search_config)]
+
+        return self.record_replicate_results(run_id, search_config)
+
+    def record_search_result(self, run_id, search_config, replicate_of=None):
+        """Appends the search configuration and the training run's summary to the search results file.
+
+        Parameters:
+            replicate_of: str: The run id of the search training run this training run is a replicate of. Replicates count towards the search's budget but are ranked by their aggregate (see record_replicate_results()).
+
+        Returns:
+          The training run's summary dictionary, or None if the training run did not write one.
+        """
+
+        summary = results.find_run_summary(run_id)
+        if summary is None:
+            search_log.warning(f'No training summary found for \'{run_id}\'')
+
+        trial_objectives = objectives.get_trial_objectives(summary, self.get_behavior_name())
+
+        with self.lock:
+            if replicate_of is None:
+                self.trials_finished += 1
+            if summary is not None:
+                self.budget.record_trial(summary)
+                if self.duration_model is not None:
+                    self.duration_model.record(summary, search_config)
+            if trial_objectives is not None and replicate_of is None:
+                self.trial_objectives.append((run_id, search_config, trial_objectives))
+
+        record = {
+            'timestamp': common.get_timestamp(),
+            'run_id': run_id,
+            'search_config': search_config,
+            'summary': summary,
+            'objectives': trial_objectives._asdict() if trial_objectives is not None else None,
+        }
+        if replicate_of is not None:
+            record['replicate_of'] = replicate_of
+        results.append_search_result(self.search_results_path, record)
+
+        return summary
+
+    def record_replicate_results(self, run_id, search_config):
+        """Records each replicate of a search training run, followed by the replicates' aggregate, which is scored by '--replicate-score' and ranked in place of the replicates.
+
+        Returns:
+          A list of the replicates' summary dictionaries, with None for replicates that did not write one.
+        """
+
+        replicates = self.get_replicates(run_id)
+        summaries = [
+            self.record_search_result(replicate_run_id, search_config, replicate_of=run_id)
+            for replicate_run_id, _ in replicates
+        ]
+
+        replicate_objectives = [
+            objectives.get_trial_objectives(summary, self.get_behavior_name())
+            for summary in summaries
+        ]
+        rewards = [trial.reward for trial in replicate_objectives if trial is not None]
+        trial_objectives = objectives.get_replicate_objectives(
+            replicate_objectives, self.args.replicate_score
+        )
+
+        with self.lock:
+            self.trials_finished += 1
+            if trial_objectives is not None:
+                self.trial_objectives.append((run_id, search_config, trial_objectives))
+
+        if trial_objectives is not None:
+            search_log.info(
+                f'Replicates of {run_id}: rewards {rewards}, {self.args.replicate_score} {trial_objectives.reward:.3f} (standard error {objectives.get_standard_error(rewards):.3f})'
+            )
+
+        record = {
+            'timestamp': common.get_timestamp(),
+            'run_id': run_id,
+            'search_config': search_config,
+            'summary': None,
+            'objectives': trial_objectives._asdict() if trial_objectives is not None else None,
+            'replicates': {
+                'run_ids': [replicate_run_id for replicate_run_id, _ in replicates],
+                'seeds': [seed for _, seed in replicates],
+                'rewards': rewards,
+                'replicate_score': self.args.replicate_score,
+                'standard_error': objectives.get_standard_error(rewards),
+            },
+        }
+        results.append_search_result(self.search_results_path, record)
+
+        return summaries
 
 
 class GridSearchCommand(SearchCommand):
@@ -100,6 +893,20 @@ class GridSearchCommand(SearchCommand):
         super().__init__(args)
         self.grid_search = GridSearch(self.search_config, self.trainer_config)
 
+    def get_trials(self, start_index=0):
+        """Returns a list of (index, search_config, trainer_config) tuples for each grid search index from 'start_index'."""
+
+        trials = []
+        for i in range(start_index, self.grid_search.get_grid_search_count()):
+            if not self.grid_search.is_valid_index(i):
+                continue
+
+            search_config = self.grid_search.get_search_configuration(i)
+            trainer_config = self.grid_search.get_trainer_config_with_overrides(search_config)
+            trials.append((i, search_config, trainer_config))
+
+        return trials
+
 
 class OutputGridSearchCount(GridSearchCommand):
     """Prints out the total number of training runs a grimagents configuration file will attempt."""
@@ -107,9 +914,93 @@ class OutputGridSearchCount(GridSearchCommand):
     def execute(self):
 
         search_log.info(
-            f'\'{self.grim_config_path}\' will perform {self.grid_search.get_grid_search_count()} training runs'
+            f'\'{self.grim_config_path}\' will perform {self.grid_search.get_valid_search_count()} training runs'
+        )
+
+        skipped = (
+            self.grid_search.get_grid_search_count() - self.grid_search.get_valid_search_count()
+        )
+        if skipped:
+            search_log.info(
+                f'{skipped} of {self.grid_search.get_grid_search_count()} grid search indexes violate the search constraints and will be skipped'
+            )
+
+
+class OutputSearchEstimate(SearchCommand):
+    """Prints the expected duration of a grid, random or Bayesian search, using the step rates recorded by earlier training runs and the 'max_steps' of each of the search's training runs."""
+
+    def execute(self):
+
+        trials = self.get_trials()
+        workers = max(self.args.parallel, 1)
+
+        search_log.info('-' * 63)
+        search_log.info(f'\'{self.grim_config_path}\' will perform {len(trials)} training runs')
+
+        env = self.grim_config.get(const.ML_ENV)
+        self.duration_model = self.create_duration_model()
+        if not self.duration_model.has_history():
+            search_log.info('No training run summaries found to estimate the search duration from')
+            search_log.info('-' * 63)
+            return
+
+        search_log.info(
+            f'Estimating from {len(self.duration_model.step_rates)} earlier training runs{" of " + env if env else ""}: {self.duration_model.get_steps_per_second():.1f} steps per second, {common.get_human_readable_duration(self.duration_model.get_startup_time())} startup'
+        )
+
+        if workers > 1 and self.args.schedule == SCHEDULE_LONGEST:
+            trials = estimate.order_longest_first(trials, self.duration_model)
+
+        durations = [
+            self.duration_model.estimate(trainer_config, search_config)
+            for _, search_config, trainer_config in trials
+        ]
+        if self.budget.trial_timeout:
+            durations = [min(duration, self.budget.trial_timeout) for duration in durations]
+
+        if durations:
+            search_log.info(
+                f'Training runs take {common.get_human_readable_duration(min(durations))} to {common.get_human_readable_duration(max(durations))}, {common.get_human_readable_duration(sum(durations))} in total'
+            )
+
+        makespan = estimate.estimate_makespan(durations, workers)
+        search_log.info(
+            f'Estimated search duration: {common.get_human_readable_duration(makespan)} running {workers} training run{"s" if workers > 1 else ""} at a time'
         )
 
+        if self.budget.time_budget is not None and makespan > self.budget.time_budget:
+            search_log.info(
+                f'The search is expected to end early, its time budget is {common.get_human_readable_duration(self.budget.time_budget)}'
+            )
+
+        search_log.info('-' * 63)
+
+    def get_trials(self):
+        """Returns (index, search_config, trainer_config) tuples for the training runs the search will perform. Random and Bayesian searches are represented by randomized configurations."""
+
+        if self.args.random or self.args.bayesian:
+            count = self.args.random or sum(self.args.bayesian)
+            random_search = RandomSearch(self.search_config, self.trainer_config)
+            search_configs = random_search.get_search_configurations(count, self.args.design)
+            return [
+                (i, search_config, random_search.get_trainer_config_with_overrides(search_config))
+                for i, search_config in enumerate(search_configs)
+            ]
+
+        # Grid search indexes that violate the search constraints are skipped, as they are by the search
+        grid_search = GridSearch(self.search_config, self.trainer_config)
+        trials = []
+        for i in range(self.args.resume or 0, grid_search.get_grid_search_count()):
+            if not grid_search.is_valid_index(i):
+                continue
+
+            search_config = grid_search.get_search_configuration(i)
+            trials.append(
+                (i, search_config, grid_search.get_trainer_config_with_overrides(search_config))
+            )
+
+        return trials
+
 
 class PerformGridSearch(GridSearchCommand):
     """Perform a hyperparameter grid search using values from a grimagents configuration file.
@@ -136,26 +1027,54 @@ class PerformGridSearch(GridSearchCommand):
             search_log.info(
                 f'    {self.grid_search.hyperparameters[i]}: {self.grid_search.hyperparameter_sets[i]}'
             )
+        self.output_search_constraints(self.grid_search)
         search_log.info('-' * 63)
 
-        for i in range(start_index, self.grid_search.get_grid_search_count()):
+        self.run_trials(self.get_trials(start_index))
+        self.remove_scratch_config()
 
-            search_config = self.grid_search.get_search_configuration(i)
-            trainer_config = self.grid_search.get_trainer_config_with_overrides(search_config)
-            self.search_counter = i
+        self.output_pareto_front()
+        search_log.info('Grid search complete\n')
+
+
+class OutputSearchProfile(SearchCommand):
+    """Prints a comparison of where each recorded search training run spent its time, using the trainer profiles stored in the search results file."""
+
+    def execute(self):
+
+        records = results.load_search_results(self.search_results_path)
+        if not records:
+            search_log.info(f'No search results recorded in \'{self.search_results_path}\'')
+            return
+
+        search_log.info('-' * 63)
+        search_log.info(f'Trainer profiles for \'{self.search_results_path}\':')
+        for record in records:
+            # The aggregates of replicates have no profile of their own, each replicate is listed instead
+            if record.get('replicates'):
+                continue
+
+            summary = record.get('summary') or {}
+            profile = summary.get('profile')
 
             search_log.info('-' * 63)
-            search_log.info(f'Search: {self.get_search_run_id()}')
-            for key, value in search_config.items():
+            search_log.info(f'Search: {record["run_id"]} ({record["timestamp"]})')
+            for key, value in record['search_config'].items():
                 search_log.info(f'    {key}: {value}')
-            search_log.info('-' * 63)
 
-            self.perform_search_with_configuration(trainer_config)
+            if not profile:
+                search_log.info('    No trainer profile recorded')
+                continue
 
-        if self.search_config_path.exists():
-            self.search_config_path.unlink()
+            search_log.info(
+                f'    Environment step: {profile["env_step_share"]:.1%}, Policy update: {profile["update_share"]:.1%} ({profile["bound"]} bound)'
+            )
+            for block in profile['hot_path'][:3]:
+                search_log.info(
+                    f'    {block["block"]}: {block["self_share"]:.1%} self, {block["mean"]:.4f}s per call'
+                )
 
-        search_log.info('Grid search complete\n')
+        search_log.info('-' * 63)
 
 
 class ExportGridSearchConfiguration(GridSearchCommand):
@@ -168,6 +1087,11 @@ class ExportGridSearchConfiguration(GridSearchCommand):
         )
 
         search_config = self.grid_search.get_search_configuration(self.args.export_index)
+        for constraint in self.grid_search.get_violated_constraints(search_config):
+            search_log.warning(
+                f'GridSearch index \'{self.args.export_index}\' violates search constraint \'{constraint}\''
+            )
+
         trainer_config = self.grid_search.get_trainer_config_with_overrides(search_config)
         command_util.write_yaml_file(trainer_config, self.search_config_path)
 
@@ -182,6 +1106,18 @@ class PerformRandomSearch(SearchCommand):
         super().__init__(args)
         self.random_search = RandomSearch(self.search_config, self.trainer_config)
 
+    def get_trials(self, count):
+        """Returns a list of 'count' (index, search_config, trainer_config) tuples with randomized search configurations, spread over the search space by the '--design' space-filling design if one is used."""
+
+        trials = []
+        for i, search_config in enumerate(
+            self.random_search.get_search_configurations(count, self.args.design)
+        ):
+            trainer_config = self.random_search.get_trainer_config_with_overrides(search_config)
+            trials.append((i, search_config, trainer_config))
+
+        return trials
+
     def execute(self):
 
         search_log.info('-' * 63)
@@ -190,25 +1126,19 @@ class PerformRandomSearch(SearchCommand):
             search_log.info(
                 f'    {self.random_search.hyperparameters[i]}: {self.random_search.hyperparameter_sets[i]}'
             )
+        self.output_search_constraints(self.random_search)
         search_log.info('-' * 63)
 
-        for i in range(self.args.random):
-
-            search_config = self.random_search.get_randomized_search_configuration()
-            trainer_config = self.random_search.get_trainer_config_with_overrides(search_config)
-            self.search_counter = i
-
-            search_log.info('-' * 63)
-            search_log.info(f'Search: {self.get_search_run_id()}')
-            for key, value in search_config.items():
-                search_log.info(f'    {key}: {value}')
-            search_log.info('-' * 63)
-
-            self.perform_search_with_configuration(trainer_config)
+        trials = self.get_trials(self.args.random)
+        if len(trials) < self.args.random:
+            search_log.warning(
+                f'Only {len(trials)} of {self.args.random} random search configurations satisfy the search constraints'
+            )
 
-        if self.search_config_path.exists():
-            self.search_config_path.unlink()
+        self.run_trials(trials)
+        self.remove_scratch_config()
 
+        self.output_pareto_front()
         search_log.info('Random search complete\n')
 
 
@@ -224,6 +1154,16 @@ class PerformBayesianSearch(SearchCommand):
         self.output_config_path = self.trainer_config_path.with_name(
             f'{self.grim_config[const.ML_RUN_ID]}_bayes.yaml'
         )
+        self.knee_config_path = self.trainer_config_path.with_name(
+            f'{self.grim_config[const.ML_RUN_ID]}_bayes_knee.yaml'
+        )
+
+        # Scores of the optimizer's observations, which suggestions violating the search constraints are scored below
+        self.scores = []
+
+        # The variance of the score of each of the optimizer's observations, including suggestions that violate the search constraints, which is passed to the optimizer as observation noise when searching with replicates
+        self.variances = []
+        self.optimizer = None
 
     def execute(self):
 
@@ -233,16 +1173,16 @@ class PerformBayesianSearch(SearchCommand):
             search_log.info(
                 f'    {self.bayes_search.hyperparameters[i]}: {self.bayes_search.hyperparameter_sets[i]}'
             )
+        self.output_search_constraints(self.bayes_search)
         search_log.info('-' * 63)
 
         # Create bayes-opt bounds from configuration and create an optimization object
-        bounds = self.bayes_search.get_parameter_bounds(
-            self.bayes_search.hyperparameters, self.bayes_search.hyperparameter_sets
-        )
+        bounds = self.bayes_search.get_optimizer_bounds()
 
         optimizer = BayesianOptimization(
             f=self.perform_bayes_search, pbounds=bounds, random_state=1, verbose=0
         )
+        self.optimizer = optimizer
 
         # Load search observations from log files
         if self.args.bayes_load:
@@ -253,6 +1193,9 @@ class PerformBayesianSearch(SearchCommand):
 
             bayes_opt.util.load_logs(optimizer, logs=log_files_list)
 
+        self.scores = [float(observation['target']) for observation in optimizer.res]
+        self.variances = [0.0] * len(self.scores)
+
         # Save search observations to log file
         if self.args.bayes_save:
             bayes_log_path = self.get_save_log_path()
@@ -260,18 +1203,33 @@ class PerformBayesianSearch(SearchCommand):
             bayes_logger = JSONLogger(path=str(bayes_log_path))
             optimizer.subscribe(Events.OPTIMIZATION_STEP, bayes_logger)
 
+        # Exploration steps spread by a space-filling design are queued before the optimization steps
+        init_points = self.args.bayesian[0]
+        if self.args.design:
+            for point in self.bayes_search.get_design_points(self.args.design, init_points, bounds):
+                optimizer.probe(point, lazy=True)
+            init_points = 0
+
         # Perform Bayesian searches
-        optimizer.maximize(init_points=self.args.bayesian[0], n_iter=self.args.bayesian[1])
+        self.duration_model = self.create_duration_model()
+        try:
+            optimizer.maximize(init_points=init_points, n_iter=self.args.bayesian[1])
+        except SearchBudgetExhausted:
+            pass
 
         optimizer_max = self.get_optimizer_max(optimizer)
+        if not optimizer_max:
+            search_log.info('-' * 63)
+            search_log.info('Bayesian search ended without completing a training run')
+            search_log.info('-' * 63)
+            self.remove_scratch_config()
+            return
 
         search_log.info('-' * 63)
         search_log.info('Bayesian search complete')
         search_log.info(f'Best Configuration ({optimizer_max["target"]}):')
 
-        best_configuration = self.bayes_search.get_search_config_from_bounds(
-            optimizer_max["params"]
-        )
+        best_configuration = self.bayes_search.get_search_config_from_point(optimizer_max["params"])
         for key, value in best_configuration.items():
             search_log.info(f'    {key}: {value}')
 
@@ -279,52 +1237,146 @@ class PerformBayesianSearch(SearchCommand):
         self.save_max_to_file(optimizer_max)
         search_log.info('-' * 63)
 
-        if self.search_config_path.exists():
-            self.search_config_path.unlink()
+        self.output_pareto_front()
+
+        self.remove_scratch_config()
 
     def perform_bayes_search(self, **kwargs):
-        """Executes a training run using the provided arguments and returns the final mean reward.
+        """Executes a training run using the provided arguments and returns the final mean reward. Training runs stopped at their time limit are scored on the mean reward they had reached.
 
         Parameters:
             kwargs: Arguments containing hyperparameters to use in the search, provided by a BayesianSearch object.
+
+        Raises:
+            SearchBudgetExhausted: The training run would not fit within the search's remaining budget
         """
 
         # Construct search configuration using input from the BayesianSearch object.
-        search_config = self.bayes_search.get_search_config_from_bounds(kwargs)
+        search_config = self.bayes_search.get_search_config_from_point(kwargs)
+
+        # Suggestions that violate the search constraints are scored without training, steering the optimizer away from them
+        violated = self.bayes_search.get_violated_constraints(search_config)
+        if violated:
+            penalty = self.get_constraint_penalty(self.scores)
+            search_log.info(
+                f'Skipping {search_config}, violates search constraint \'{violated[0]}\' (scored {penalty})'
+            )
+            self.variances.append(0.0)
+            self.update_observation_noise(penalty)
+            return penalty
+
         trainer_config = self.bayes_search.get_trainer_config_with_overrides(search_config)
-        command_util.write_yaml_file(trainer_config, self.search_config_path)
+
+        # The optimizer has no way to end a search early other than an exception
+        if not self.is_within_budget(trainer_config):
+            raise SearchBudgetExhausted()
 
         # Execute training with the search config and run_id
-        run_id = self.grim_config[const.ML_RUN_ID] + f'_{self.search_counter:02d}'
-        command = [
-            'pipenv',
-            'run',
-            'python',
-            '-m',
-            'grimagents',
-            self.grim_config_path,
-            '--trainer-config',
-            self.search_config_path,
-            '--run-id',
-            run_id,
-        ]
+        run_id = self.get_search_run_id()
 
-        search_log.info('-' * 63)
-        search_log.info(f'Search: {run_id}')
-        for key, value in search_config.items():
-            search_log.info(f'    {key}: {value}')
-        search_log.info('-' * 63)
+        self.output_search_configuration(run_id, search_config)
 
-        command = [str(element) for element in command]
-        subprocess.run(command)
+        self.perform_search_with_configuration(trainer_config, run_id=run_id)
+        summaries = self.record_trial(run_id, search_config)
 
         self.search_counter += 1
-        return self.get_last_mean_reward_from_log()
+
+        # Training runs are suggested one at a time, so the remaining ones are assumed to resemble this one
+        total = sum(self.args.bayesian)
+        remaining = max(total - self.search_counter, 0)
+        if remaining:
+            self.output_eta([], [(None, search_config, trainer_config)] * remaining, 1, total)
+
+        # The training run's own summary is preferred over its event files, which record no
+        # wall-clock time, and both are preferred over the shared log file, which other training
+        # runs may be writing into at the same time.
+        behavior_name = self.get_behavior_name()
+        replicate_objectives = [
+            objectives.get_trial_objectives(summary, behavior_name) for summary in summaries
+        ]
+        replicate_scores = [
+            objectives.get_score(trial_objectives, self.args.objective, self.args.cost_weight)
+            for trial_objectives in replicate_objectives
+            if trial_objectives is not None
+        ]
+        if not replicate_scores:
+            replicate_scores = self.get_last_rewards_from_event_files(
+                self.get_trial_run_ids(run_id), behavior_name
+            )
+
+        if replicate_scores:
+            score = objectives.get_replicate_score(replicate_scores, self.args.replicate_score)
+            variance = objectives.get_standard_error(replicate_scores) ** 2
+        else:
+            score = self.get_last_mean_reward_from_log()
+            variance = 0.0
+
+        self.scores.append(score)
+        self.variances.append(variance)
+        self.update_observation_noise(score)
+        return score
+
+    def update_observation_noise(self, score):
+        """Passes the variance of each observation's score to the optimizer's Gaussian process as observation noise, so observations whose replicates disagree are trusted less than those whose replicates agree (see objectives.get_observation_noise()).
+
+        Parameters:
+            score: float: The score of the observation being made, which the optimizer registers once perform_bayes_search() returns
+        """
+
+        if self.optimizer is None or self.replicates == 1:
+            return
+
+        targets = list(self.optimizer.space.target) + [score]
+        if len(targets) != len(self.variances):
+            # Observations the noise is unknown for are given the optimizer's default noise
+            self.optimizer.set_gp_params(alpha=objectives.MIN_OBSERVATION_NOISE)
+            return
+
+        self.optimizer.set_gp_params(
+            alpha=objectives.get_observation_noise(targets, self.variances)
+        )
+
+    @staticmethod
+    def get_constraint_penalty(scores):
+        """Returns the score given to suggestions that violate the search constraints. The score is below the lowest observed score by the spread of the observed scores, and by at least 1. Returns -1 before any score has been observed."""
+
+        if not scores:
+            return -1.0
+
+        return min(scores) - max(max(scores) - min(scores), 1.0)
 
     @staticmethod
     def get_optimizer_max(optimizer):
+        """Returns the optimizer's best observation, or None if it has not made any."""
+
+        if not optimizer.res:
+            return None
+
         return optimizer.max
 
+    @staticmethod
+    def get_last_rewards_from_event_files(run_ids, behavior_name=None):
+        """Returns the last reward mlagents-learn wrote into the event files of each training run that has one, for scoring training runs that did not write a summary.
+
+        Parameters:
+            behavior_name: str: The behavior whose event files are read, so the rewards of other behaviors in the same training run are not mixed in
+        """
+
+        rewards = []
+        for run_id in run_ids:
+            try:
+                reward_curve = tensorboard_events.load_scalar_curve(
+                    settings.get_run_folder(run_id), behavior_name=behavior_name
+                )
+            except (tensorboard_events.EventFileError, OSError) as exception:
+                search_log.warning(f'Unable to read event files for \'{run_id}\', {exception}')
+                continue
+
+            if reward_curve:
+                rewards.append(reward_curve[-1][1])
+
+        return rewards
+
     @staticmethod
     def get_last_mean_reward_from_log():
         """Returns the last Final Mean Reward value recorded in the grimagents log file,
@@ -351,10 +1403,23 @@ class PerformBayesianSearch(SearchCommand):
 
         search_log.info(f'Saving best configuration to \'{self.output_config_path}\'')
 
-        search_config = self.bayes_search.get_search_config_from_bounds(max['params'])
+        search_config = self.bayes_search.get_search_config_from_point(max['params'])
         best_trainer_config = self.bayes_search.get_trainer_config_with_overrides(search_config)
         command_util.write_yaml_file(best_trainer_config, self.output_config_path)
 
+        # The knee trades the least reward for the most wall-clock time saved
+        knee = self.get_knee_trial()
+        if knee is None:
+            return
+
+        run_id, search_config, trial_objectives = knee
+        search_log.info(
+            f'Saving knee point configuration ({run_id}, reward {trial_objectives.reward} in {common.get_human_readable_duration(trial_objectives.wall_time)}) to \'{self.knee_config_path}\''
+        )
+
+        knee_trainer_config = self.bayes_search.get_trainer_config_with_overrides(search_config)
+        command_util.write_yaml_file(knee_trainer_config, self.knee_config_path)
+
     def get_save_log_path(self):
         """Generates a timestamped log file path for Bayesian optimization observations."""
 
@@ -0,0 +1,240 @@
+"""Constraints between the settings of a search's training runs, which prune search configurations that are invalid or wasteful before any training run is launched.
+
+- Constraints are listed in the 'constraints' of a grimsearch 'search' section as comparisons between settings, such as 'hyperparameters.batch_size <= hyperparameters.buffer_size' or 'network_settings.memory.memory_size % 4 == 0'
+- Settings are identified by period-separated paths relative to the behavior, as in 'search_parameters', and may be combined with numbers using +, -, *, /, %, comparisons, 'and', 'or' and 'not'
+- Settings are read from the trainer configuration each training run would use, so settings that are not searched and the 'buffer_size' set from 'buffer_size_multiple' can be constrained
+- Constraints are evaluated over a whole batch of search configurations at once. A constraint is considered satisfied by a search configuration that leaves one of its settings unset or non-numeric, as mlagents-learn's defaults are not known.
+"""
+
+import ast
+import numpy
+import operator
+
+
+COMPARISONS = {
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+}
+
+ARITHMETIC = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Mod: operator.mod,
+}
+
+
+class InvalidSearchConstraint(Exception):
+    """A search constraint can't be parsed."""
+
+    pass
+
+
+class SearchConstraint:
+    """A condition every search configuration must satisfy to be trained."""
+
+    def __init__(self, expression):
+        """
+        Parameters:
+            expression: str: The constraint as written in the search configuration
+
+        Raises:
+          InvalidSearchConstraint: The expression is not a supported comparison of settings
+        """
+
+        self.expression = expression
+
+        if not isinstance(expression, str):
+            raise InvalidSearchConstraint(f'Search constraints must be strings, not {expression!r}')
+
+        try:
+            self.tree = ast.parse(expression.strip(), mode='eval').body
+        except SyntaxError:
+            raise InvalidSearchConstraint(f'Unable to parse search constraint \'{expression}\'')
+
+        self.keys = []
+        self.validate(self.tree, boolean=True)
+
+    def __str__(self):
+        return self.expression
+
+    def validate(self, node, boolean=False):
+        """Checks that a node of the expression only uses supported operations, recording the settings it references.
+
+        Parameters:
+            boolean: bool: The node must evaluate to true or false
+        """
+
+        if isinstance(node, ast.BoolOp):
+            for value in node.values:
+                self.validate(value, boolean=True)
+            return
+
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            self.validate(node.operand, boolean=True)
+            return
+
+        if isinstance(node, ast.Compare):
+            if not all(type(comparison) in COMPARISONS for comparison in node.ops):
+                raise InvalidSearchConstraint(
+                    f'\'{self.expression}\' may only compare values with <, <=, >, >=, == and !='
+                )
+            for value in [node.left] + node.comparators:
+                self.validate(value)
+            return
+
+        if boolean:
+            raise InvalidSearchConstraint(f'\'{self.expression}\' is not a comparison')
+
+        if isinstance(node, ast.BinOp) and type(node.op) in ARITHMETIC:
+            self.validate(node.left)
+            self.validate(node.right)
+            return
+
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            self.validate(node.operand)
+            return
+
+        if get_number(node) is not None:
+            return
+
+        key = get_setting_key(node)
+        if key is None:
+            raise InvalidSearchConstraint(
+                f'\'{self.expression}\' may only contain settings, numbers and arithmetic'
+            )
+
+        if key not in self.keys:
+            self.keys.append(key)
+
+    def evaluate(self, columns: dict):
+        """Returns a bool array of whether each search configuration satisfies the constraint.
+
+        Parameters:
+            columns: dict: An array of float values for each of the constraint's settings, with one element per search configuration and NaN for settings that are not set
+        """
+
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            satisfied = numpy.asarray(self.evaluate_node(self.tree, columns), dtype=bool)
+
+        unknown = numpy.zeros(satisfied.shape, dtype=bool)
+        for key in self.keys:
+            unknown |= numpy.isnan(columns[key])
+
+        return satisfied | unknown
+
+    def evaluate_node(self, node, columns):
+
+        if isinstance(node, ast.BoolOp):
+            values = [self.evaluate_node(value, columns) for value in node.values]
+            combine = numpy.logical_and if isinstance(node.op, ast.And) else numpy.logical_or
+            result = values[0]
+            for value in values[1:]:
+                result = combine(result, value)
+            return result
+
+        if isinstance(node, ast.Compare):
+            result = True
+            left = self.evaluate_node(node.left, columns)
+            for comparison, comparator in zip(node.ops, node.comparators):
+                right = self.evaluate_node(comparator, columns)
+                result = numpy.logical_and(result, COMPARISONS[type(comparison)](left, right))
+                left = right
+            return result
+
+        if isinstance(node, ast.BinOp):
+            return ARITHMETIC[type(node.op)](
+                self.evaluate_node(node.left, columns), self.evaluate_node(node.right, columns)
+            )
+
+        if isinstance(node, ast.UnaryOp):
+            operand = self.evaluate_node(node.operand, columns)
+            if isinstance(node.op, ast.Not):
+                return numpy.logical_not(operand)
+            if isinstance(node.op, ast.USub):
+                return -operand
+            return operand
+
+        number = get_number(node)
+        if number is not None:
+            return float(number)
+
+        return columns[get_setting_key(node)]
+
+
+def get_number(node):
+    """Returns the value of a node that is a number, or None."""
+
+    # Python 3.6 and 3.7 parse numbers as ast.Num nodes
+    value = node.value if isinstance(node, ast.Constant) else getattr(node, 'n', None)
+
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+
+    return value
+
+
+def get_setting_key(node):
+    """Returns the period-separated setting path of a node that names a setting, or None."""
+
+    names = []
+    while isinstance(node, ast.Attribute):
+        names.append(node.attr)
+        node = node.value
+
+    if not isinstance(node, ast.Name):
+        return None
+
+    names.append(node.id)
+    return '.'.join(reversed(names))
+
+
+def get_constraints(expressions):
+    """Returns a list of SearchConstraints from the 'constraints' of a search configuration.
+
+    Raises:
+      InvalidSearchConstraint: A constraint can't be parsed
+    """
+
+    if expressions is None:
+        return []
+
+    if not isinstance(expressions, list):
+        expressions = [expressions]
+
+    return [SearchConstraint(expression) for expression in expressions]
+
+
+def get_float_column(values):
+    """Returns a float array of values, with NaN for values that are unset or non-numeric."""
+
+    return numpy.array(
+        [
+            (
+                float(value)
+                if isinstance(value, (int, float)) and not isinstance(value, bool)
+                else numpy.nan
+            )
+            for value in values
+        ],
+        dtype=float,
+    )
+
+
+def get_satisfied(constraints, columns: dict, count):
+    """Returns a bool array of whether each of 'count' search configurations satisfies every constraint.
+
+    Parameters:
+        columns: dict: Setting values as returned by get_float_column(), for every setting the constraints reference
+    """
+
+    satisfied = numpy.ones(count, dtype=bool)
+    for constraint in constraints:
+        satisfied &= constraint.evaluate(columns)
+
+    return satisfied
@@ -1,20 +1,74 @@
 """Holds grimagents path settings."""
 
+import getpass
+import os
+import tempfile
+
 from pathlib import Path
 
 
+# The combined and per-run log files are rotated once they grow beyond this size
+LOG_FILE_MAX_BYTES = 10 * 1024 * 1024
+LOG_FILE_BACKUP_COUNT = 5
+
+# The job server started by 'grimagents --serve' only accepts connections from this machine
+JOB_SERVER_HOST = '127.0.0.1'
+JOB_SERVER_PORT = 5080
+
+
 def get_summaries_folder():
     """Returns absolute path to the summaries folder."""
 
     return (Path(__file__).parent / '../../results').resolve()
 
 
+def get_run_folder(run_id):
+    """Returns absolute path to the folder mlagents-learn writes a training run's results into."""
+
+    return get_summaries_folder() / run_id
+
+
+def get_run_logs_folder(run_id):
+    """Returns absolute path to the folder mlagents-learn writes a training run's logs into."""
+
+    return get_run_folder(run_id) / 'run_logs'
+
+
 def get_log_file_path():
     """Returns absolute path to the log folder."""
 
     return (Path(__file__).parent / '../logs/grimagents.log').resolve()
 
 
+def get_run_log_folder():
+    """Returns absolute path to the folder per-run log files are written into."""
+
+    return (Path(__file__).parent / '../logs/runs').resolve()
+
+
+def get_runtime_folder():
+    """Returns absolute path to the folder the current user's grimagents processes use to coordinate with each other. The folder may be changed with the GRIMAGENTS_RUNTIME_DIR environment variable, otherwise it is placed in the user's runtime folder (XDG_RUNTIME_DIR), or in the system temporary folder under a name unique to the user."""
+
+    runtime_folder = os.environ.get('GRIMAGENTS_RUNTIME_DIR')
+    if runtime_folder:
+        return Path(runtime_folder).resolve()
+
+    user_runtime_folder = os.environ.get('XDG_RUNTIME_DIR')
+    if user_runtime_folder:
+        return Path(user_runtime_folder) / 'grimagents'
+
+    return Path(tempfile.gettempdir()) / f'grimagents-{get_user_id()}'
+
+
+def get_user_id():
+    """Returns the id of the current user, or their login name on platforms without user ids."""
+
+    if hasattr(os, 'getuid'):
+        return str(os.getuid())
+
+    return getpass.getuser()
+
+
 def get_training_wrapper_path():
     """Returns path to the training wrapper."""
 
@@ -0,0 +1,357 @@
+"""Samples the resources used by a training process and every process it starts, such as mlagents-learn's Unity environments, from Linux's /proc filesystem.
+
+- A sample totals the CPU usage, resident memory, thread count and disk I/O of the process tree rooted at the training process
+- CPU usage and I/O are measured between consecutive samples, and counted per process, so processes that exit between samples do not make either go negative. 100% CPU is one fully used core.
+- Samples are appended to a JSON lines file in the training run's 'run_logs' folder as they are taken, once mlagents-learn has created the folder, and summarized by their mean and peak values once training ends
+- Resources are not sampled on platforms without /proc, or for processes whose /proc files can't be read
+"""
+
+import collections
+import json
+import logging
+import os
+import threading
+import time
+
+from pathlib import Path
+
+
+PROC_PATH = Path('/proc')
+
+# Seconds between samples of a training run's resource usage
+SAMPLE_INTERVAL = 5.0
+
+
+telemetry_log = logging.getLogger('grimagents.telemetry')
+
+
+# The resources used by a single process. 'cpu_time' is in seconds, 'read_bytes' and 'write_bytes' are None when the process's I/O can't be read.
+ProcessResources = collections.namedtuple(
+    'ProcessResources', ['pid', 'ppid', 'cpu_time', 'threads', 'rss', 'read_bytes', 'write_bytes']
+)
+
+
+def get_system_value(name, default):
+    """Returns a value of os.sysconf(), or a default on platforms that do not provide it."""
+
+    try:
+        return os.sysconf(name)
+    except (AttributeError, ValueError, OSError):
+        return default
+
+
+CLOCK_TICKS = get_system_value('SC_CLK_TCK', 100)
+PAGE_SIZE = get_system_value('SC_PAGE_SIZE', 4096)
+
+
+def is_supported(proc_path: Path = PROC_PATH):
+    """Returns True if processes can be sampled on this platform."""
+
+    return (proc_path / 'self' / 'stat').exists()
+
+
+def read_process_resources(pid, proc_path: Path = PROC_PATH):
+    """Returns the ProcessResources of a process, or None if the process has exited or can't be read."""
+
+    process_path = proc_path / str(pid)
+
+    try:
+        stat = (process_path / 'stat').read_text()
+    except OSError:
+        return None
+
+    # The process name is enclosed in parentheses and may contain spaces, the fields that follow start with the process state
+    fields = stat[stat.rfind(')') + 2 :].split()
+    try:
+        ppid = int(fields[1])
+        cpu_time = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+        threads = int(fields[17])
+        rss = int(fields[21]) * PAGE_SIZE
+    except (IndexError, ValueError):
+        return None
+
+    read_bytes = None
+    write_bytes = None
+    try:
+        for line in (process_path / 'io').read_text().splitlines():
+            key, _, value = line.partition(':')
+            if key == 'read_bytes':
+                read_bytes = int(value)
+            elif key == 'write_bytes':
+                write_bytes = int(value)
+    except (OSError, ValueError):
+        # Reading another user's I/O counters requires privileges
+        pass
+
+    return ProcessResources(pid, ppid, cpu_time, threads, rss, read_bytes, write_bytes)
+
+
+def read_process_tree(root_pid, proc_path: Path = PROC_PATH):
+    """Returns a dictionary of the ProcessResources of a process and all of its descendants, keyed by process id."""
+
+    processes = {}
+    for process_path in proc_path.iterdir():
+        if not process_path.name.isdigit():
+            continue
+
+        resources = read_process_resources(int(process_path.name), proc_path)
+        if resources is not None:
+            processes[resources.pid] = resources
+
+    if root_pid not in processes:
+        return {}
+
+    children = collections.defaultdict(list)
+    for resources in processes.values():
+        children[resources.ppid].append(resources.pid)
+
+    tree = {}
+    pending = [root_pid]
+    while pending:
+        pid = pending.pop()
+        if pid in tree:
+            continue
+
+        tree[pid] = processes[pid]
+        pending += children[pid]
+
+    return tree
+
+
+def get_counter_delta(current: dict, previous: dict, field):
+    """Returns the total increase of a cumulative counter across a process tree since the previous sample. Processes that started since the previous sample count their whole counter, and processes that exited are left out."""
+
+    delta = 0
+    for pid, resources in current.items():
+        value = getattr(resources, field)
+        if value is None:
+            continue
+
+        earlier = previous.get(pid)
+        earlier_value = getattr(earlier, field) if earlier is not None else None
+        delta += value - earlier_value if earlier_value is not None else value
+
+    return max(delta, 0)
+
+
+def create_sample(current: dict, previous: dict, elapsed):
+    """Returns a dictionary describing the resources used by a process tree.
+
+    Parameters:
+        current: dict: The ProcessResources of the process tree, as returned by read_process_tree()
+        previous: dict: The ProcessResources of the process tree at the previous sample, or None if this is the first sample
+        elapsed: float: The seconds since the previous sample
+    """
+
+    sample = {
+        'time': time.time(),
+        'processes': len(current),
+        'rss_bytes': sum(resources.rss for resources in current.values()),
+        'threads': sum(resources.threads for resources in current.values()),
+        'cpu_percent': None,
+        'read_bytes': None,
+        'write_bytes': None,
+    }
+
+    # CPU usage and I/O are only known once there is an earlier sample to measure from
+    if previous is not None and elapsed > 0:
+        sample['cpu_percent'] = get_counter_delta(current, previous, 'cpu_time') / elapsed * 100
+        sample['read_bytes'] = get_counter_delta(current, previous, 'read_bytes')
+        sample['write_bytes'] = get_counter_delta(current, previous, 'write_bytes')
+
+    return sample
+
+
+def summarize_samples(samples: list, interval=None):
+    """Returns a dictionary of the mean and peak values of resource samples, or None if there are none.
+
+    Parameters:
+        interval: float: The seconds between samples, recorded with the summary
+    """
+
+    if not samples:
+        return None
+
+    def get_statistics(key):
+        values = [sample[key] for sample in samples if sample.get(key) is not None]
+        if not values:
+            return None
+
+        return {'mean': sum(values) / len(values), 'peak': max(values)}
+
+    return {
+        'samples': len(samples),
+        'interval': interval,
+        'cpu_percent': get_statistics('cpu_percent'),
+        'rss_bytes': get_statistics('rss_bytes'),
+        'threads': get_statistics('threads'),
+        'processes': get_statistics('processes'),
+        'read_bytes': sum(sample.get('read_bytes') or 0 for sample in samples),
+        'write_bytes': sum(sample.get('write_bytes') or 0 for sample in samples),
+    }
+
+
+def get_human_readable_size(size):
+    """Parses a number of bytes into a human readable string."""
+
+    for unit in ['bytes', 'KB', 'MB', 'GB']:
+        if abs(size) < 1024:
+            break
+        size /= 1024
+    else:
+        unit = 'TB'
+
+    if unit == 'bytes':
+        return f'{int(size)} bytes'
+
+    return f'{size:.1f} {unit}'
+
+
+def get_summary_description(summary: dict):
+    """Returns a single line describing the mean and peak resource usage in a summary from summarize_samples()."""
+
+    parts = []
+
+    cpu = summary.get('cpu_percent')
+    if cpu:
+        parts.append(f'CPU: {cpu["mean"]:.0f}% mean, {cpu["peak"]:.0f}% peak')
+
+    rss = summary.get('rss_bytes')
+    if rss:
+        parts.append(
+            f'Memory: {get_human_readable_size(rss["mean"])} mean, {get_human_readable_size(rss["peak"])} peak'
+        )
+
+    threads = summary.get('threads')
+    if threads:
+        parts.append(f'Threads: {threads["peak"]} peak')
+
+    parts.append(
+        f'Disk: {get_human_readable_size(summary["read_bytes"])} read, {get_human_readable_size(summary["write_bytes"])} written'
+    )
+
+    return ', '.join(parts)
+
+
+class ResourceMonitor:
+    """Samples the resources used by a training process tree on a background thread, while a process is being watched."""
+
+    def __init__(self, interval=SAMPLE_INTERVAL, samples_path=None, proc_path: Path = PROC_PATH):
+        """
+        Parameters:
+            interval: float: Seconds between samples
+            samples_path: Path: A JSON lines file each sample is appended to, or None
+            proc_path: Path: The /proc filesystem to read processes from
+        """
+
+        self.interval = interval
+        self.samples_path = samples_path
+        self.proc_path = proc_path
+
+        self.samples = []
+        self.root_pid = None
+
+        # Samples not yet appended to the samples file
+        self.unwritten = []
+        self.previous = None
+        self.previous_time = None
+
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """Starts sampling on a background thread. Nothing is sampled on platforms without /proc."""
+
+        if not is_supported(self.proc_path):
+            telemetry_log.debug('Resource usage is not sampled on this platform')
+            return
+
+        self.thread = threading.Thread(target=self.run, name='grimagents-telemetry', daemon=True)
+        self.thread.start()
+
+    def watch(self, pid):
+        """Samples the process tree rooted at 'pid' until unwatch() is called, such as while mlagents-learn is relaunched."""
+
+        with self.lock:
+            self.root_pid = pid
+            self.previous = None
+            self.previous_time = None
+
+    def unwatch(self):
+
+        with self.lock:
+            self.root_pid = None
+
+    def close(self):
+        """Stops sampling and waits for the sampling thread to exit."""
+
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+
+        self.write_unwritten_samples()
+
+    def run(self):
+
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        """Takes a sample of the watched process tree, if a process is being watched and is still running, and returns it. Returns None otherwise."""
+
+        with self.lock:
+            if self.root_pid is None:
+                return None
+
+            current = read_process_tree(self.root_pid, self.proc_path)
+            if not current:
+                return None
+
+            now = time.monotonic()
+            elapsed = now - self.previous_time if self.previous_time is not None else 0.0
+            sample = create_sample(current, self.previous, elapsed)
+
+            self.previous = current
+            self.previous_time = now
+            self.samples.append(sample)
+
+        self.write_sample(sample)
+        return sample
+
+    def write_sample(self, sample: dict):
+        """Appends a sample to the samples file, along with any samples taken before the file's folder existed."""
+
+        if self.samples_path is None:
+            return
+
+        self.unwritten.append(sample)
+        self.write_unwritten_samples()
+
+    def write_unwritten_samples(self):
+        """Appends the samples not yet written to the samples file. Failing to write samples does not interrupt training.
+
+        mlagents-learn refuses to start a training run whose results folder already exists, so the samples file's folder is never created here. Samples are kept until mlagents-learn has created it.
+        """
+
+        if not self.unwritten or not self.samples_path.parent.exists():
+            return
+
+        try:
+            with self.samples_path.open('a') as f:
+                f.write(''.join(json.dumps(sample) + '\n' for sample in self.unwritten))
+        except OSError as exception:
+            telemetry_log.debug(
+                f'Unable to write resource samples to \'{self.samples_path}\', {exception}'
+            )
+            return
+
+        self.unwritten = []
+
+    def get_summary(self):
+        """Returns the mean and peak values of the samples taken (see summarize_samples()), or None if no samples were taken."""
+
+        with self.lock:
+            samples = list(self.samples)
+
+        return summarize_samples(samples, self.interval)
@@ -0,0 +1,370 @@
+"""Reads scalar summaries from the tfevents files mlagents-learn writes into the results folder.
+
+Event files are parsed directly from their TFRecord framing so TensorFlow does not need to be
+importable by grimagents. Readers remember the byte offset of the last complete record they
+consumed, which allows them to be polled repeatedly while a training run is still writing.
+
+Notes:
+- Only the protobuf fields required to recover scalar summaries are decoded
+- An incomplete record at the end of a file is treated as 'not yet written' rather than an error
+"""
+
+import collections
+import struct
+
+from pathlib import Path, PurePosixPath
+
+REWARD_TAG = 'Environment/Cumulative Reward'
+EVENT_FILE_GLOB = '*tfevents*'
+
+# TFRecord framing: uint64 length, uint32 masked crc of length, data, uint32 masked crc of data.
+_HEADER_SIZE = 12
+_FOOTER_SIZE = 4
+
+# Protobuf wire types
+_WIRE_VARINT = 0
+_WIRE_FIXED64 = 1
+_WIRE_LENGTH_DELIMITED = 2
+_WIRE_FIXED32 = 5
+
+# TensorFlow DataType enum values for scalar tensor summaries
+_DT_FLOAT = 1
+_DT_DOUBLE = 2
+
+_CRC32C_POLYNOMIAL = 0x82F63B78
+_CRC_MASK_DELTA = 0xA282EAD8
+
+
+ScalarEvent = collections.namedtuple('ScalarEvent', ['wall_time', 'step', 'tag', 'value'])
+
+
+class EventFileError(Exception):
+    """Base error for tfevents reading exceptions."""
+
+
+class CorruptRecordError(EventFileError):
+    """A complete record failed its checksum or could not be decoded."""
+
+
+def _create_crc32c_table():
+
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ _CRC32C_POLYNOMIAL if crc & 1 else crc >> 1
+        table.append(crc)
+
+    return table
+
+
+_CRC32C_TABLE = _create_crc32c_table()
+
+
+def crc32c(data: bytes):
+    """Returns the CRC32C (Castagnoli) checksum of data."""
+
+    crc = 0xFFFFFFFF
+    for byte in data:
+        crc = _CRC32C_TABLE[(crc ^ byte) & 0xFF] ^ (crc >> 8)
+
+    return crc ^ 0xFFFFFFFF
+
+
+def masked_crc32c(data: bytes):
+    """Returns the masked CRC32C checksum TFRecord files store alongside each record."""
+
+    crc = crc32c(data)
+    return (((crc >> 15) | (crc << 17)) + _CRC_MASK_DELTA) & 0xFFFFFFFF
+
+
+def _read_varint(buffer: bytes, position: int):
+    """Decodes a protobuf varint starting at position and returns the value and the next position."""
+
+    result = 0
+    shift = 0
+    while True:
+        if position >= len(buffer):
+            raise CorruptRecordError('Truncated varint')
+
+        byte = buffer[position]
+        position += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, position
+
+        shift += 7
+
+
+def _iterate_fields(buffer: bytes):
+    """Yields (field_number, wire_type, value) tuples for every field in a protobuf message.
+
+    Length delimited values are returned as bytes, fixed width values are returned as raw bytes and varints are returned as ints.
+    """
+
+    position = 0
+    while position < len(buffer):
+        key, position = _read_varint(buffer, position)
+        field_number = key >> 3
+        wire_type = key & 0x07
+
+        if wire_type == _WIRE_VARINT:
+            value, position = _read_varint(buffer, position)
+        elif wire_type == _WIRE_FIXED64:
+            value = buffer[position : position + 8]
+            position += 8
+        elif wire_type == _WIRE_LENGTH_DELIMITED:
+            length, position = _read_varint(buffer, position)
+            value = buffer[position : position + length]
+            position += length
+        elif wire_type == _WIRE_FIXED32:
+            value = buffer[position : position + 4]
+            position += 4
+        else:
+            raise CorruptRecordError(f'Unsupported protobuf wire type {wire_type}')
+
+        if position > len(buffer):
+            raise CorruptRecordError('Truncated protobuf field')
+
+        yield field_number, wire_type, value
+
+
+def _parse_tensor_value(buffer: bytes):
+    """Returns the first value of a float or double TensorProto, or None if the tensor holds another type."""
+
+    dtype = None
+    content = None
+    float_values = []
+    double_values = []
+
+    for field_number, wire_type, value in _iterate_fields(buffer):
+        if field_number == 1 and wire_type == _WIRE_VARINT:
+            dtype = value
+        elif field_number == 4 and wire_type == _WIRE_LENGTH_DELIMITED:
+            content = value
+        elif field_number == 5:
+            # 'float_val' may be packed or unpacked
+            if wire_type == _WIRE_LENGTH_DELIMITED:
+                float_values += struct.unpack(f'<{len(value) // 4}f', value)
+            elif wire_type == _WIRE_FIXED32:
+                float_values.append(struct.unpack('<f', value)[0])
+        elif field_number == 6:
+            if wire_type == _WIRE_LENGTH_DELIMITED:
+                double_values += struct.unpack(f'<{len(value) // 8}d', value)
+            elif wire_type == _WIRE_FIXED64:
+                double_values.append(struct.unpack('<d', value)[0])
+
+    if dtype == _DT_FLOAT:
+        if float_values:
+            return float_values[0]
+        if content and len(content) >= 4:
+            return struct.unpack('<f', content[:4])[0]
+
+    if dtype == _DT_DOUBLE:
+        if double_values:
+            return double_values[0]
+        if content and len(content) >= 8:
+            return struct.unpack('<d', content[:8])[0]
+
+    return None
+
+
+def _parse_summary_value(buffer: bytes):
+    """Returns a (tag, value) tuple for a Summary.Value message, or None if it is not a scalar."""
+
+    tag = None
+    value = None
+
+    for field_number, wire_type, field_value in _iterate_fields(buffer):
+        if field_number == 1 and wire_type == _WIRE_LENGTH_DELIMITED:
+            tag = field_value.decode('utf-8', errors='replace')
+        elif field_number == 2 and wire_type == _WIRE_FIXED32:
+            value = struct.unpack('<f', field_value)[0]
+        elif field_number == 8 and wire_type == _WIRE_LENGTH_DELIMITED:
+            value = _parse_tensor_value(field_value)
+
+    if tag is None or value is None:
+        return None
+
+    return tag, value
+
+
+def parse_scalar_events(record: bytes):
+    """Returns a list of ScalarEvent tuples decoded from a serialized Event message."""
+
+    wall_time = 0.0
+    step = 0
+    summaries = []
+
+    for field_number, wire_type, value in _iterate_fields(record):
+        if field_number == 1 and wire_type == _WIRE_FIXED64:
+            wall_time = struct.unpack('<d', value)[0]
+        elif field_number == 2 and wire_type == _WIRE_VARINT:
+            step = value
+        elif field_number == 5 and wire_type == _WIRE_LENGTH_DELIMITED:
+            summaries.append(value)
+
+    events = []
+    for summary in summaries:
+        for field_number, wire_type, value in _iterate_fields(summary):
+            if field_number != 1 or wire_type != _WIRE_LENGTH_DELIMITED:
+                continue
+
+            scalar = _parse_summary_value(value)
+            if scalar is not None:
+                events.append(ScalarEvent(wall_time, step, scalar[0], scalar[1]))
+
+    return events
+
+
+class EventFileReader:
+    """Incrementally reads records from a single tfevents file, starting at a stored byte offset."""
+
+    def __init__(self, file_path: Path, offset=0, verify_checksums=True):
+        """
+        Parameters:
+            file_path: Path: The tfevents file to read
+            offset: int: The byte offset to resume reading from
+            verify_checksums: bool: Validate the CRC32C checksums stored with each record
+        """
+
+        self.file_path = Path(file_path)
+        self.offset = offset
+        self.verify_checksums = verify_checksums
+
+    def read_records(self):
+        """Yields the data of every complete record written since the last read.
+
+        Raises:
+          CorruptRecordError: A complete record failed checksum validation.
+        """
+
+        if not self.file_path.exists():
+            return
+
+        with self.file_path.open('rb') as f:
+            f.seek(self.offset)
+
+            while True:
+                header = f.read(_HEADER_SIZE)
+                if len(header) < _HEADER_SIZE:
+                    return
+
+                length_bytes = header[:8]
+                length = struct.unpack('<Q', length_bytes)[0]
+
+                if self.verify_checksums and struct.unpack('<I', header[8:])[0] != masked_crc32c(
+                    length_bytes
+                ):
+                    raise CorruptRecordError(
+                        f'Corrupt record length in \'{self.file_path}\' at offset {self.offset}'
+                    )
+
+                data = f.read(length)
+                footer = f.read(_FOOTER_SIZE)
+                if len(data) < length or len(footer) < _FOOTER_SIZE:
+                    # The record is still being written, try again on the next read.
+                    return
+
+                if self.verify_checksums and struct.unpack('<I', footer)[0] != masked_crc32c(data):
+                    raise CorruptRecordError(
+                        f'Corrupt record data in \'{self.file_path}\' at offset {self.offset}'
+                    )
+
+                self.offset += _HEADER_SIZE + length + _FOOTER_SIZE
+                yield data
+
+    def read_scalars(self, tags=None):
+        """Yields ScalarEvent tuples for every scalar summary written since the last read.
+
+        Parameters:
+            tags: A collection of tags to filter by. All scalars are returned when None.
+        """
+
+        for record in self.read_records():
+            for event in parse_scalar_events(record):
+                if tags is None or event.tag in tags:
+                    yield event
+
+
+class RunEventReader:
+    """Incrementally reads scalar summaries from every tfevents file beneath a training run folder.
+
+    mlagents-learn writes one event file per behavior, so new files are discovered on every read.
+    Offsets are keyed by each file's path relative to the run folder and can be stored with
+    get_offsets() and passed back in to continue reading in another process.
+    """
+
+    def __init__(self, run_folder: Path, offsets=None, verify_checksums=True):
+
+        self.run_folder = Path(run_folder)
+        self.verify_checksums = verify_checksums
+        self.readers = {}
+
+        for key, offset in (offsets or {}).items():
+            self.readers[key] = EventFileReader(
+                self.run_folder / key, offset=offset, verify_checksums=verify_checksums
+            )
+
+    def discover_event_files(self):
+        """Creates readers for any event files that have appeared since the last read."""
+
+        if not self.run_folder.exists():
+            return
+
+        for file_path in sorted(self.run_folder.rglob(EVENT_FILE_GLOB)):
+            key = file_path.relative_to(self.run_folder).as_posix()
+            if key not in self.readers:
+                self.readers[key] = EventFileReader(
+                    file_path, verify_checksums=self.verify_checksums
+                )
+
+    def read_scalars(self, tags=None):
+        """Returns a list of ScalarEvent tuples written to any event file since the last read."""
+
+        self.discover_event_files()
+
+        events = []
+        for key in sorted(self.readers):
+            events += self.readers[key].read_scalars(tags=tags)
+
+        return events
+
+    def get_offsets(self):
+        """Returns a dictionary of byte offsets that can be used to resume reading later."""
+
+        return {key: reader.offset for key, reader in self.readers.items()}
+
+
+def load_scalar_curve(run_folder: Path, tag=REWARD_TAG, behavior_name=None):
+    """Returns a list of (step, value) tuples for a scalar tag, sorted by step.
+
+    When several records report the same step (for example after a resumed run) the last value read is kept.
+
+    Parameters:
+        behavior_name: str: Reads only the event files mlagents-learn writes for this behavior, in the run folder's subfolder of the same name. Every event file in the run folder is read otherwise, which mixes the curves of training runs with several behaviors.
+    """
+
+    if behavior_name is not None:
+        run_folder = Path(run_folder) / behavior_name
+
+    curve = {}
+    for event in RunEventReader(run_folder).read_scalars(tags={tag}):
+        curve[event.step] = event.value
+
+    return sorted(curve.items())
+
+
+def load_scalar_curves(run_folder: Path, tag=REWARD_TAG):
+    """Returns a dictionary of (step, value) tuple lists for a scalar tag, sorted by step and keyed by the subfolder of the run folder the event files were written into, which mlagents-learn names after each behavior. Event files in the run folder itself are keyed by '.'."""
+
+    reader = RunEventReader(run_folder)
+    reader.discover_event_files()
+
+    curves = {}
+    for key in sorted(reader.readers):
+        curve = curves.setdefault(PurePosixPath(key).parent.as_posix(), {})
+        for event in reader.readers[key].read_scalars(tags={tag}):
+            curve[event.step] = event.value
+
+    return {subfolder: sorted(curve.items()) for subfolder, curve in curves.items() if curve}
@@ -1,3 +1,4 @@
+import concurrent.futures
 import json
 import pytest
 import yaml
@@ -190,26 +191,26 @@ def test_create_history_file(test_file, patch_get_history_file, fixture_cleanup_
     command_util.create_history_file()
 
     assert test_file.exists()
-
-    with test_file.open(mode='r') as f:
-        content = json.load(f)
-
-    assert content['history'] == []
+    assert test_file.read_text() == ''
 
 
 def test_load_history(test_file, patch_get_history_file, fixture_cleanup_test_file):
     """Tests loading history from file. Ensures:
 
     - If history file doesn't exist, it is created
-    - The history dictionary is loaded from file
+    - Commands are loaded most recent first
+    - Lines that can't be parsed are skipped
     """
 
     assert not test_file.exists()
 
-    content = command_util.load_history()
-
+    assert command_util.load_history() == []
     assert test_file.exists()
-    assert content == {'history': []}
+
+    test_file.write_text('["first", "command"]\n["second", "command"]\n["third", "com\n')
+
+    assert command_util.load_history() == [['second', 'command'], ['first', 'command']]
+    assert command_util.load_history(count=1) == [['second', 'command']]
 
 
 def test_load_last_history(test_file, patch_get_history_file, fixture_cleanup_test_file):
@@ -224,12 +225,69 @@ def test_load_last_history(test_file, patch_get_history_file, fixture_cleanup_te
         command_util.load_last_history()
 
     # The last command is loaded
+    command_util.save_to_history(['first', 'command'])
+    command_util.save_to_history(['second', 'command'])
+
+    assert command_util.load_last_history() == ['second', 'command']
+
+
+def test_load_legacy_history(test_file, patch_get_history_file, fixture_cleanup_test_file):
+    """Tests that a history file written by earlier versions of grimagents is migrated to one command per line, oldest first."""
+
     history = {'history': [['second', 'command'], ['first', 'command']]}
 
     with test_file.open(mode='w') as f:
         json.dump(history, f, indent=4)
 
     assert command_util.load_last_history() == ['second', 'command']
+    assert test_file.read_text().splitlines() == ['["first", "command"]', '["second", "command"]']
+
+
+def test_save_to_history(monkeypatch, test_file, patch_get_history_file, fixture_cleanup_test_file):
+    """Tests appending commands to history. Ensures:
+
+    - Commands are appended to the end of the file
+    - A command interrupted mid-write does not corrupt the next command
+    - The file is compacted once it grows beyond its size cap
+    """
+
+    monkeypatch.setattr(command_util, 'TRAINING_HISTORY_COUNT', 3)
+    monkeypatch.setattr(command_util, 'HISTORY_COMPACT_BYTES', 100)
+
+    test_file.write_text('["interrupted", "com')
+
+    command_util.save_to_history(['first', 'command'])
+    assert command_util.load_history() == [['first', 'command']]
+
+    for i in range(10):
+        command_util.save_to_history(['command', str(i)])
+        assert test_file.stat().st_size <= 100
+
+    assert command_util.load_history() == [['command', '9'], ['command', '8'], ['command', '7']]
+
+
+def test_save_to_history_concurrently(test_file, patch_get_history_file, fixture_cleanup_test_file):
+    """Tests that commands saved from several threads at once are all written intact."""
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda i: command_util.save_to_history(['command', str(i)]), range(200)))
+
+    history = command_util.load_history()
+    assert sorted(int(command[1]) for command in history) == list(range(200))
+
+
+def test_history_lock_failure(
+    monkeypatch, test_file, patch_get_history_file, fixture_cleanup_test_file
+):
+    """Tests that failing to lock the history file, as Windows does once a contended lock has been waited on for about 10 seconds, does not fail the command."""
+
+    def mock_lock_file(file):
+        raise OSError('Resource deadlock avoided')
+
+    monkeypatch.setattr(command_util, 'lock_file', mock_lock_file)
+
+    command_util.save_to_history(['first', 'command'])
+    assert command_util.load_history() == []
 
 
 def test_load_last_lines_from_file(test_file, fixture_cleanup_test_file):
@@ -249,3 +307,29 @@ def test_load_last_lines_from_file(test_file, fixture_cleanup_test_file):
         'third line',
         'fourth line',
     ]
+
+
+@pytest.mark.parametrize('block_size', [1, 3, 7, 8192])
+def test_load_last_lines_from_file_blocks(
+    monkeypatch, test_file, fixture_cleanup_test_file, block_size
+):
+    """Tests that lines are read correctly regardless of where block boundaries fall. Ensures:
+
+    - Windows line endings and trailing newlines are handled
+    - Empty lines are preserved
+    - Requesting zero lines returns an empty list
+    """
+
+    monkeypatch.setattr(command_util, 'TAIL_BLOCK_SIZE', block_size)
+
+    lines = [f'line {i}' for i in range(20)] + ['', 'last line']
+    with test_file.open(mode='wb') as f:
+        f.write('\r\n'.join(lines).encode('utf-8') + b'\r\n')
+
+    for count in [1, 2, 5, 22, 30]:
+        assert command_util.load_last_lines_from_file(test_file, count) == lines[-count:]
+
+    assert command_util.load_last_lines_from_file(test_file, 0) == []
+
+    test_file.write_text('')
+    assert command_util.load_last_lines_from_file(test_file, 5) == []
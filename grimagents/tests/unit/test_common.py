@@ -106,3 +106,26 @@ def test_add_nested_dict_value():
         common.add_nested_dict_value(dictionary, key, 1.0)
 
     assert dictionary == expectedDict
+
+
+def test_get_nested_dict_value():
+    """Tests looking up period separated keys in nested dictionaries."""
+
+    dictionary = {'hyperparameters': {'batch_size': 64}, 'max_steps': 1000}
+
+    assert common.get_nested_dict_value(dictionary, 'hyperparameters.batch_size') == 64
+    assert common.get_nested_dict_value(dictionary, 'max_steps') == 1000
+    assert common.get_nested_dict_value(dictionary, 'hyperparameters.beta') is None
+    assert common.get_nested_dict_value(dictionary, 'max_steps.value', default=0) == 0
+
+
+def test_flatten_dict():
+    """Tests flattening nested dictionaries into period separated keys."""
+
+    dictionary = {'hyperparameters': {'batch_size': 64}, 'memory': {}, 'max_steps': 1000}
+
+    assert common.flatten_dict(dictionary) == {
+        'hyperparameters.batch_size': 64,
+        'memory': {},
+        'max_steps': 1000,
+    }
@@ -0,0 +1,75 @@
+import grimagents.concurrency as concurrency
+
+from grimagents.concurrency import ConcurrencyController
+
+
+def measure(controller, throughput, now, load=None):
+    """Records a full measurement window at the controller's current level and returns the controller's response."""
+
+    controller.record(throughput, controller.level, now, load)
+    return controller.record(throughput, controller.level, now + controller.window, load)
+
+
+def test_concurrency_controller_climbs_to_peak():
+    """Tests that the level is raised while throughput improves, and steps back and holds once a raise does not pay off."""
+
+    controller = ConcurrencyController(maximum=8, window=10.0, reprobe_interval=100.0)
+
+    assert measure(controller, 100.0, 0.0) == 2
+    assert measure(controller, 190.0, 20.0) == 3
+    assert measure(controller, 195.0, 40.0) == 2
+    assert controller.is_settled()
+
+    # Held until the reprobe interval has passed
+    assert measure(controller, 190.0, 60.0) is None
+    assert measure(controller, 190.0, 200.0) == 3
+    assert not controller.is_settled()
+
+    # Three training runs at a time are no faster than two
+    assert controller.get_best_level() == 2
+    assert controller.get_record()['curve'] == {'1': 100.0, '2': 190.0, '3': 195.0}
+
+
+def test_concurrency_controller_measurements():
+    """Tests that a level is only measured while it is filled with training runs that are training, over a whole measurement window."""
+
+    controller = ConcurrencyController(maximum=4, window=10.0)
+
+    assert controller.record(100.0, 1, 0.0) is None
+    assert controller.record(100.0, 1, 5.0) is None
+
+    # A training run shutting down restarts the measurement window
+    assert controller.record(0.0, 0, 6.0) is None
+    assert controller.record(100.0, 1, 7.0) is None
+    assert controller.record(120.0, 1, 12.0) is None
+    assert controller.record(140.0, 1, 17.0) == 2
+    assert controller.get_throughput(1) == 120.0
+
+
+def test_concurrency_controller_limits():
+    """Tests that the level is not raised past its maximum or while the host has no idle cores."""
+
+    controller = ConcurrencyController(maximum=2, initial=5)
+    assert controller.level == 2
+
+    controller = ConcurrencyController(maximum=4, window=10.0)
+    assert measure(controller, 100.0, 0.0, load=1.5) is None
+    assert controller.is_settled()
+    assert controller.level == 1
+
+
+def test_concurrency_record(tmp_path):
+    """Tests that the level a search settled on is saved and read back for the next search."""
+
+    record_path = tmp_path / '3DBall_concurrency.json'
+    assert concurrency.load_level(record_path) is None
+
+    controller = ConcurrencyController(maximum=8, window=10.0)
+    measure(controller, 100.0, 0.0)
+    measure(controller, 190.0, 20.0)
+    concurrency.save_record(record_path, controller)
+
+    assert concurrency.load_level(record_path) == 2
+
+    record_path.write_text('{"level": "many"}')
+    assert concurrency.load_level(record_path) is None
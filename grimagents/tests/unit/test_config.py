@@ -121,10 +121,108 @@ def test_configuration_validation():
     assert config.validate_grim_configuration(configuration) is True
 
 
+def test_configuration_validation_keys():
+    """Tests that configuration keys that aren't command line arguments and non-boolean values for arguments that do not accept a value are rejected."""
+
+    configuration = {'trainer-config-path': 'config/3DBall.yaml', '--run-id': '3DBall'}
+
+    configuration['--time-limit'] = 3600
+    configuration['--no-graphics'] = ''
+    assert config.validate_grim_configuration(configuration) is True
+
+    configuration['--no-graphics'] = 'true'
+    assert config.validate_grim_configuration(configuration) is False
+
+    del configuration['--no-graphics']
+    configuration['run-id'] = '3DBall'
+    assert config.validate_grim_configuration(configuration) is False
+
+
+@pytest.fixture
+def search_trainer_config():
+    return {
+        'behaviors': {
+            '3DBall': {
+                'trainer_type': 'ppo',
+                'hyperparameters': {'batch_size': 64, 'buffer_size': 12000, 'beta': 0.001},
+                'network_settings': {'hidden_units': 128, 'memory': None},
+                'reward_signals': {'extrinsic': {'gamma': 0.99, 'strength': 1.0}},
+                'max_steps': 5.0e5,
+            }
+        }
+    }
+
+
+def test_validate_trainer_configuration(search_trainer_config, caplog):
+    """Tests that trainer configurations with invalid values are rejected, while unknown settings and trainer types are only warned about, suggesting similar settings for unknown ones."""
+
+    assert config.validate_trainer_configuration(search_trainer_config) is True
+    assert config.validate_trainer_configuration({'behaviors': {}}) is False
+
+    behavior = search_trainer_config['behaviors']['3DBall']
+    behavior['trainer_type'] = 'custom_ppo'
+    behavior['hyperparameters']['bach_size'] = 64
+
+    with caplog.at_level('WARNING', logger='grimagents.config'):
+        assert config.validate_trainer_configuration(search_trainer_config) is True
+
+    assert 'did you mean \'hyperparameters.batch_size\'?' in caplog.text
+    assert 'assuming it is a custom trainer' in caplog.text
+
+    behavior['reward_signals']['extrinsic']['gamma'] = 1.5
+
+    with caplog.at_level('ERROR', logger='grimagents.config'):
+        assert config.validate_trainer_configuration(search_trainer_config) is False
+
+    assert '\'reward_signals.extrinsic.gamma\' must be at most 1.0' in caplog.text
+
+
+def test_validate_search_configuration(search_trainer_config, caplog):
+    """Tests that search configurations are checked against the trainer configuration. Ensures:
+
+    - The behavior must be in the trainer configuration
+    - Search parameters and constraint settings that are not known trainer settings are warned about
+    - Search parameters must be valid and constraints must parse
+    """
+
+    search_config = {
+        'behavior_name': '3DBall',
+        'search_parameters': {
+            'hyperparameters.batch_size': [64, 256],
+            'reward_signals.extrinsic.gamma': [0.98, 0.99],
+        },
+        'constraints': ['hyperparameters.batch_size <= hyperparameters.buffer_size'],
+    }
+    assert config.validate_search_configuration(search_config, search_trainer_config) is True
+
+    with caplog.at_level('WARNING', logger='grimagents.config'):
+        invalid_config = dict(search_config, behavior_name='3DBal')
+        assert config.validate_search_configuration(invalid_config, search_trainer_config) is False
+        assert 'did you mean \'3DBall\'?' in caplog.text
+
+        unknown_config = dict(
+            search_config, search_parameters={'hyperparameter.batch_size': [64, 256]}
+        )
+        assert config.validate_search_configuration(unknown_config, search_trainer_config) is True
+        assert 'did you mean \'hyperparameters.batch_size\'?' in caplog.text
+
+        invalid_config = dict(search_config, search_parameters={'time_horizon': [0, 64]})
+        assert config.validate_search_configuration(invalid_config, search_trainer_config) is False
+
+        unknown_config = dict(search_config, constraints=['time_horizn >= 32'])
+        assert config.validate_search_configuration(unknown_config, search_trainer_config) is True
+        assert 'did you mean \'time_horizon\'?' in caplog.text
+
+        invalid_config = dict(search_config, constraints=['time_horizon'])
+        assert config.validate_search_configuration(invalid_config, search_trainer_config) is False
+
+    assert config.validate_search_configuration(None, search_trainer_config) is False
+
+
 def test_load_trainer_configuration(
     trainer_config_path, trainer_config, fixture_cleanup_trainer_config
 ):
-    """Tests for the correct loading of a trainer configuration dictionary from file. """
+    """Tests for the correct loading of a trainer configuration dictionary from file."""
 
     with trainer_config_path.open(mode='w') as f:
         yaml.dump(trainer_config, f, indent=4)
@@ -0,0 +1,154 @@
+import os
+import pytest
+import shutil
+import socket
+
+from pathlib import Path
+
+import grimagents.coordination as coordination
+import grimagents.settings
+
+from grimagents.coordination import CoordinationError, PortLease
+
+
+@pytest.fixture
+def runtime_folder():
+    return Path(__file__).parent / 'test_runtime'
+
+
+@pytest.fixture
+def patch_runtime_folder(monkeypatch, runtime_folder):
+    def mock_get_runtime_folder():
+        return runtime_folder
+
+    def mock_is_port_available(port):
+        return True
+
+    monkeypatch.setattr(grimagents.settings, 'get_runtime_folder', mock_get_runtime_folder)
+    monkeypatch.setattr(coordination, 'is_port_available', mock_is_port_available)
+
+    if runtime_folder.exists():
+        shutil.rmtree(runtime_folder)
+    yield 'patch_runtime_folder'
+    if runtime_folder.exists():
+        shutil.rmtree(runtime_folder)
+
+
+def test_lease_ports(patch_runtime_folder):
+    """Tests leasing port ranges from the port registry. Ensures:
+
+    - Leased ranges do not overlap
+    - Released ranges are reused
+    - Explicitly requested ranges are leased even if they overlap another lease
+    """
+
+    first = coordination.lease_ports(4)
+    second = coordination.lease_ports(2)
+
+    assert (first.start, first.count, first.pid) == (5005, 4, os.getpid())
+    assert (second.start, second.count) == (5009, 2)
+
+    coordination.release_ports(first)
+    third = coordination.lease_ports(3)
+    assert third.start == 5005
+
+    fourth = coordination.lease_ports(2, start=5005, exact=True)
+    assert fourth.start == 5005
+
+    with coordination.leased_ports(1) as lease:
+        assert lease.start == 5008
+        assert len(get_registered_leases()) == 4
+
+    assert len(get_registered_leases()) == 3
+
+
+def test_stale_leases_are_discarded(monkeypatch, patch_runtime_folder):
+    """Tests that leases held by processes that are no longer running are discarded."""
+
+    lease = coordination.lease_ports(2)
+
+    def mock_is_process_running(pid):
+        return False
+
+    monkeypatch.setattr(coordination, 'is_process_running', mock_is_process_running)
+
+    assert coordination.lease_ports(2).start == lease.start
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='requires user ids')
+def test_create_runtime_folder(patch_runtime_folder, runtime_folder):
+    """Tests that the runtime folder is created accessible only to the current user, and that a runtime folder other users can write to is refused."""
+
+    coordination.lease_ports(1)
+
+    assert runtime_folder.stat().st_mode & 0o777 == 0o700
+    assert (runtime_folder / coordination.PORT_REGISTRY_FILENAME).stat().st_mode & 0o022 == 0
+
+    os.chmod(runtime_folder, 0o777)
+    with pytest.raises(CoordinationError):
+        coordination.lease_ports(1)
+
+
+def test_find_free_range():
+    """Tests finding the lowest free range of ports between existing leases."""
+
+    leases = [
+        PortLease(start=5005, count=2, pid=0, token='a'),
+        PortLease(start=5008, count=4, pid=0, token='b'),
+    ]
+
+    assert coordination.find_free_range(1, 5005, leases) == 5007
+    assert coordination.find_free_range(2, 5005, leases) == 5012
+    assert coordination.find_free_range(2, 6000, leases) == 6000
+
+    with pytest.raises(CoordinationError):
+        coordination.find_free_range(2, 65535, leases)
+
+
+def test_find_free_range_probes_ports(monkeypatch):
+    """Tests that ranges containing ports in use outside of the registry are skipped when probing."""
+
+    def mock_is_port_available(port):
+        return port not in [5006, 5009]
+
+    monkeypatch.setattr(coordination, 'is_port_available', mock_is_port_available)
+
+    assert coordination.find_free_range(2, 5005, [], probe=True) == 5007
+    assert coordination.find_free_range(3, 5005, [], probe=True) == 5010
+    assert coordination.find_free_range(3, 5005, [], probe=False) == 5005
+
+
+def test_is_port_available():
+    """Tests that a port bound by another socket is reported as unavailable."""
+
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as bound:
+        bound.bind(('', 0))
+        bound.listen()
+        port = bound.getsockname()[1]
+
+        assert coordination.is_port_available(port) is False
+
+
+def test_is_process_running():
+    """Tests that the current process is reported as running."""
+
+    assert coordination.is_process_running(os.getpid())
+
+
+def test_get_scratch_path():
+    """Tests that scratch paths are unique and placed next to the original file."""
+
+    file_path = Path('config/search_config.yaml')
+
+    first = coordination.get_scratch_path(file_path)
+    second = coordination.get_scratch_path(file_path)
+
+    assert first != second
+    assert first.parent == file_path.parent
+    assert first.name.startswith(f'search_config_{os.getpid()}_')
+    assert first.suffix == '.yaml'
+
+
+def get_registered_leases():
+    with coordination.open_port_registry() as leases:
+        return list(leases)
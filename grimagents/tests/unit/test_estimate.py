@@ -0,0 +1,146 @@
+import pytest
+
+import grimagents.estimate as estimate
+import grimagents.results
+
+from grimagents.estimate import DurationModel
+
+
+@pytest.fixture
+def summaries():
+    return [
+        {'step': 10000, 'time_elapsed': 100.0, 'duration': 130.0, 'arguments': ['--env', 'A']},
+        {'step': 30000, 'time_elapsed': 100.0, 'duration': 110.0, 'arguments': ['--env', 'B']},
+        {'step': 20000, 'time_elapsed': 100.0, 'duration': 120.0, 'arguments': ['--env', 'A']},
+        {'step': 0, 'time_elapsed': 0.0, 'duration': 30.0, 'arguments': ['--env', 'A']},
+    ]
+
+
+def trainer_config(*max_steps):
+    return {
+        'behaviors': {
+            f'Behavior{i}': {'max_steps': steps, 'time_horizon': 64}
+            for i, steps in enumerate(max_steps)
+        }
+    }
+
+
+def test_duration_model(summaries):
+    """Tests that training run durations are predicted from the median step rate and startup time. Ensures:
+
+    - Training runs that never reported a step are ignored
+    - No prediction is made without history
+    """
+
+    model = DurationModel(summaries)
+
+    assert model.has_history()
+    assert model.get_steps_per_second() == 200
+    assert model.get_startup_time() == 20
+    assert model.estimate(trainer_config(50000)) == 270
+
+    assert DurationModel().estimate(trainer_config(50000)) is None
+
+
+def test_create_duration_model(monkeypatch, summaries):
+    """Tests that earlier training runs of the same environment are preferred."""
+
+    def mock_load_run_summaries():
+        return summaries
+
+    monkeypatch.setattr(grimagents.results, 'load_run_summaries', mock_load_run_summaries)
+
+    assert estimate.create_duration_model('A').get_steps_per_second() == 150
+    assert estimate.create_duration_model('C').get_steps_per_second() == 200
+    assert estimate.create_duration_model().get_steps_per_second() == 200
+
+
+def test_get_trainer_max_steps():
+    """Tests that the longest behavior determines a trainer configuration's max steps."""
+
+    assert estimate.get_trainer_max_steps(trainer_config(5.0e5, 2000)) == 500000
+    assert estimate.get_trainer_max_steps({'behaviors': {}}) == 0
+
+
+def test_estimate_makespan():
+    """Tests estimating the duration of training runs started in order on the first free worker."""
+
+    assert estimate.estimate_makespan([]) == 0
+    assert estimate.estimate_makespan([10, 20, 30]) == 60
+    assert estimate.estimate_makespan([10, 20, 30], workers=2) == 40
+    assert estimate.estimate_makespan([30, 20, 10], workers=2) == 30
+    assert estimate.estimate_makespan([10], workers=2, busy=[5, 50]) == 50
+    assert estimate.estimate_makespan([], workers=1, busy=[5, 50]) == 50
+
+
+def test_predict_steps_per_second():
+    """Tests that step rates are predicted from the search parameters of recorded search training runs. Ensures:
+
+    - Predictions fall back on the median step rate until two search training runs are recorded
+    - Parameters that only some training runs were recorded with are not predicted from
+    """
+
+    model = DurationModel()
+
+    # Step rates halve each time 'hidden_units' doubles
+    for hidden_units in [64, 128, 256, 512]:
+        model.record(
+            {'step': 100 * 51200 // hidden_units, 'time_elapsed': 100.0, 'duration': 100.0},
+            {'network_settings.hidden_units': hidden_units, 'max_steps': 50000},
+        )
+
+    low = model.get_steps_per_second({'network_settings.hidden_units': 64})
+    high = model.get_steps_per_second({'network_settings.hidden_units': 512})
+
+    assert high < model.get_steps_per_second() < low
+    assert low == pytest.approx(800, rel=0.1)
+    assert high == pytest.approx(100, rel=0.1)
+
+    assert model.get_steps_per_second({'time_horizon': 64}) == model.get_steps_per_second()
+    assert model.estimate(trainer_config(10000), {'network_settings.hidden_units': 512}) == (
+        pytest.approx(100, rel=0.1)
+    )
+
+
+def test_get_parameter_features():
+    """Tests that only positive numeric parameters other than 'max_steps' are used to predict step rates."""
+
+    features = estimate.get_parameter_features(
+        {
+            'network_settings.hidden_units': 128,
+            'hyperparameters.learning_rate_schedule': 'linear',
+            'max_steps': 50000,
+            'hyperparameters.beta': 0.0,
+            'network_settings.normalize': True,
+        }
+    )
+
+    assert list(features) == ['network_settings.hidden_units']
+
+
+def test_order_longest_first(summaries):
+    """Tests ordering training runs by expected duration, and by 'max_steps' without history."""
+
+    trials = [
+        (0, {}, trainer_config(1000)),
+        (1, {}, trainer_config(5000)),
+        (2, {}, trainer_config(3000)),
+    ]
+
+    ordered = estimate.order_longest_first(trials, DurationModel())
+    assert [index for index, _, _ in ordered] == [1, 2, 0]
+
+    model = DurationModel()
+    for hidden_units in [64, 256]:
+        model.record(
+            {'step': 100 * 25600 // hidden_units, 'time_elapsed': 100.0, 'duration': 100.0},
+            {'hidden_units': hidden_units},
+        )
+
+    # The slow network is expected to take longer despite fewer steps
+    trials = [
+        (0, {'hidden_units': 64}, trainer_config(4000)),
+        (1, {'hidden_units': 256}, trainer_config(2000)),
+    ]
+    ordered = estimate.order_longest_first(trials, model)
+    assert [index for index, _, _ in ordered] == [1, 0]
@@ -0,0 +1,226 @@
+import argparse
+import json
+import os
+import pytest
+import sys
+import threading
+import urllib.error
+import urllib.request
+
+import grimagents.command_util
+import grimagents.job_server as job_server
+import grimagents.settings
+
+from grimagents.job_server import JobQueue, JobServerError
+
+
+class MockExecuteCommand:
+    """Records the commands executed and how many execute at once, and returns the run id as the return code."""
+
+    def __init__(self, release):
+        self.release = release
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+        self.executed = []
+
+    def __call__(self, command, cwd=None, show_command=True, dry_run=False):
+        with self.lock:
+            self.executed.append((command, cwd))
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+
+        self.release.wait(timeout=5)
+
+        with self.lock:
+            self.running -= 1
+
+        if command[-1] == 'raise':
+            raise OSError('Unable to start training')
+
+        return int(command[-1])
+
+
+@pytest.fixture
+def release():
+    return threading.Event()
+
+
+@pytest.fixture
+def execute_command(monkeypatch, release):
+    mock_execute_command = MockExecuteCommand(release)
+    monkeypatch.setattr(grimagents.command_util, 'execute_command', mock_execute_command)
+
+    return mock_execute_command
+
+
+@pytest.fixture
+def runtime_folder(monkeypatch, tmp_path):
+    runtime_folder = tmp_path / 'runtime'
+    monkeypatch.setattr(grimagents.settings, 'get_runtime_folder', lambda: runtime_folder)
+
+    return runtime_folder
+
+
+@pytest.fixture
+def job_types():
+    def parse_args(argv):
+        parser = argparse.ArgumentParser()
+        parser.add_argument('run_id')
+        return parser.parse_args(argv)
+
+    return {job_server.TRAINING_JOB: (parse_args, 'grimagents')}
+
+
+def test_job_queue(job_types, release, execute_command, tmp_path):
+    """Tests that queued jobs are executed in order without exceeding the concurrency limit. Ensures:
+
+    - Jobs are executed by running their CLI application's module in the folder they were submitted from
+    - Return codes are recorded and non-zero return codes fail the job
+    - Exceptions raised while executing a job fail the job
+    """
+
+    job_queue = JobQueue(job_types, max_jobs=2)
+    job_queue.start()
+
+    jobs = [
+        job_queue.submit('training', [run_id], cwd=str(tmp_path))
+        for run_id in ['0', '1', 'raise', '0']
+    ]
+    assert [job.job_id for job in job_queue.get_jobs()] == [1, 2, 3, 4]
+
+    release.set()
+    job_queue.stop(cancel_queued=False)
+
+    assert execute_command.max_running <= 2
+    assert ([sys.executable, '-m', 'grimagents', '1'], str(tmp_path)) in execute_command.executed
+    assert [job.status for job in jobs] == ['finished', 'failed', 'failed', 'finished']
+    assert jobs[1].return_code == 1
+    assert jobs[2].error == 'Unable to start training'
+    assert all(job.finished >= job.started >= job.submitted for job in jobs)
+
+
+def test_job_queue_rejects_invalid_jobs(job_types):
+    """Tests that unknown job kinds and unparseable arguments are rejected when submitted."""
+
+    job_queue = JobQueue(job_types)
+
+    with pytest.raises(JobServerError):
+        job_queue.submit('search', ['0'])
+
+    with pytest.raises(JobServerError):
+        job_queue.submit('training', [])
+
+    with pytest.raises(JobServerError, match='is not an absolute path'):
+        job_queue.submit('training', ['0'], cwd='relative/folder')
+
+    assert job_queue.submit('training', ['0']).cwd == os.getcwd()
+
+    with pytest.raises(JobServerError):
+        JobQueue(job_types, max_jobs=0)
+
+
+def test_job_server(job_types, release, execute_command, runtime_folder):
+    """Tests submitting jobs and requesting their status over HTTP. Ensures:
+
+    - Jobs are executed in the folder they were submitted from
+    - The server's token file is readable only by the current user
+    """
+
+    job_queue = JobQueue(job_types)
+    server = job_server.create_server(job_queue, port=0)
+    port = server.server_address[1]
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    try:
+        token_file = job_server.get_token_file_path(port)
+        if hasattr(os, 'getuid'):
+            assert token_file.stat().st_mode & 0o777 == 0o600
+
+        job = job_server.submit_job('training', ['0'], port=port)
+        assert job['id'] == 1
+        assert job['status'] == 'queued'
+        assert job['cwd'] == os.getcwd()
+
+        with pytest.raises(JobServerError, match='Unknown job kind'):
+            job_server.submit_job('unknown', ['0'], port=port)
+
+        job_queue.start()
+        release.set()
+        job_queue.stop(cancel_queued=False)
+
+        jobs = job_server.get_jobs(port=port)
+        assert len(jobs) == 1
+        assert jobs[0]['status'] == 'finished'
+        assert execute_command.executed[0][1] == os.getcwd()
+
+        assert job_server.request('GET', '/jobs/1', port=port)['return_code'] == 0
+
+        with pytest.raises(JobServerError):
+            job_server.request('GET', '/jobs/2', port=port)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_job_server_rejects_unauthorized_requests(job_types, runtime_folder):
+    """Tests that the job server rejects requests without its token and job submissions that aren't sent as JSON, such as a cross-site form post from a browser."""
+
+    job_queue = JobQueue(job_types)
+    server = job_server.create_server(job_queue, port=0)
+    port = server.server_address[1]
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def send(headers, data):
+        http_request = urllib.request.Request(
+            f'http://{grimagents.settings.JOB_SERVER_HOST}:{port}/jobs',
+            data=data,
+            method='POST',
+            headers=headers,
+        )
+        with pytest.raises(urllib.error.HTTPError) as error_info:
+            urllib.request.urlopen(http_request)
+        return error_info.value.code
+
+    body = json.dumps({'kind': 'training', 'argv': ['0']}).encode('utf-8')
+    authorization = job_server.get_authorization(job_server.load_token(port)).decode('utf-8')
+
+    try:
+        assert send({'Content-Type': 'application/json'}, body) == 401
+        assert send({'Content-Type': 'application/json', 'Authorization': 'Bearer 0'}, body) == 401
+        assert send({'Content-Type': 'text/plain', 'Authorization': authorization}, body) == 415
+        assert job_queue.get_jobs() == []
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    job_server.remove_token_file(port)
+    with pytest.raises(JobServerError, match='No job server token found'):
+        job_server.get_jobs(port=port)
+
+
+def test_get_submitted_argv():
+    """Tests that the arguments used to submit a job are not forwarded to the job server."""
+
+    argv = ['config.json', '--submit', '--server-port', '6000', '--run-id', 'A', '--server-port=7']
+
+    assert job_server.get_submitted_argv(argv) == ['config.json', '--run-id', 'A']
+
+
+def test_job_queue_stop_cancels_queued_jobs(job_types, release, execute_command):
+    """Tests that stopping the queue waits for running jobs but does not start queued jobs."""
+
+    job_queue = JobQueue(job_types)
+    job_queue.start()
+
+    jobs = [job_queue.submit('training', ['0']) for _ in range(3)]
+
+    # Release the running job only once stop() has started waiting on it
+    threading.Timer(0.1, release.set).start()
+    job_queue.stop()
+
+    assert jobs[-1].status == 'queued'
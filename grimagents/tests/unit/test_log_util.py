@@ -0,0 +1,134 @@
+import logging
+import pytest
+import shutil
+
+from pathlib import Path
+
+import grimagents.log_util as log_util
+import grimagents.settings
+
+from grimagents.log_util import QueuedFileHandler, SharedRotatingFileHandler
+
+
+@pytest.fixture
+def log_folder():
+    return Path(__file__).parent / 'test_logs'
+
+
+@pytest.fixture
+def fixture_cleanup_log_folder(log_folder):
+    if log_folder.exists():
+        shutil.rmtree(log_folder)
+    log_folder.mkdir()
+    yield 'fixture_cleanup_log_folder'
+    if log_folder.exists():
+        shutil.rmtree(log_folder)
+
+
+def create_logger(name, handler):
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.addHandler(handler)
+    return logger
+
+
+def test_queued_file_handler(log_folder, fixture_cleanup_log_folder):
+    """Tests that records are written into the combined and per-run log files by the time the handler is closed. Ensures records are formatted with the handler's formatter."""
+
+    combined_log = log_folder / 'grimagents.log'
+    run_log = log_folder / '3DBall.log'
+
+    handler = QueuedFileHandler(combined_log, run_filename=run_log)
+    handler.setFormatter(logging.Formatter('[{levelname}] {message}', style='{'))
+    logger = create_logger('grimagents.tests.queued_file_handler', handler)
+
+    for i in range(100):
+        logger.info(f'Line {i}')
+
+    logger.removeHandler(handler)
+    handler.close()
+
+    for log_file in [combined_log, run_log]:
+        lines = log_file.read_text().splitlines()
+        assert len(lines) == 100
+        assert lines[-1] == '[INFO] Line 99'
+
+
+def test_queued_file_handler_rotation(log_folder, fixture_cleanup_log_folder):
+    """Tests that the combined and per-run log files are rotated once they reach their size cap."""
+
+    combined_log = log_folder / 'grimagents.log'
+    run_log = log_folder / '3DBall.log'
+
+    handler = QueuedFileHandler(combined_log, run_filename=run_log, max_bytes=200, backup_count=2)
+    logger = create_logger('grimagents.tests.queued_file_handler_rotation', handler)
+
+    for i in range(100):
+        logger.info(f'Line {i}')
+
+    logger.removeHandler(handler)
+    handler.close()
+
+    for log_file in [combined_log, run_log]:
+        assert log_file.stat().st_size <= 200
+        assert log_file.with_name(f'{log_file.name}.1').exists()
+        assert log_file.with_name(f'{log_file.name}.2').exists()
+        assert not log_file.with_name(f'{log_file.name}.3').exists()
+        assert log_file.read_text().splitlines()[-1] == 'Line 99'
+
+
+def test_shared_rotating_file_handler(log_folder, fixture_cleanup_log_folder):
+    """Tests that handlers sharing a log file, as concurrent processes do, rotate it without losing records. Ensures:
+
+    - Every record is written into the log file or one of its rotated files
+    - The log file written after rotation is the one the handlers reopen, not the renamed file
+    """
+
+    combined_log = log_folder / 'grimagents.log'
+
+    handlers = [SharedRotatingFileHandler(combined_log, 100, 20) for _ in range(2)]
+    loggers = [
+        create_logger(f'grimagents.tests.shared_rotating_file_handler_{i}', handler)
+        for i, handler in enumerate(handlers)
+    ]
+
+    for i in range(50):
+        for n, logger in enumerate(loggers):
+            logger.info(f'Handler {n} line {i}')
+
+    for logger, handler in zip(loggers, handlers):
+        logger.removeHandler(handler)
+        handler.close()
+
+    log_files = [combined_log] + [log_folder / f'grimagents.log.{i}' for i in range(1, 21)]
+    lines = []
+    for log_file in log_files:
+        if log_file.exists():
+            assert log_file.stat().st_size <= 100
+            lines += log_file.read_text().splitlines()
+
+    assert len(lines) == 100
+    assert combined_log.read_text().splitlines()[-1] == 'Handler 1 line 49'
+    assert (log_folder / 'grimagents.log.lock').exists()
+
+
+def test_get_file_handler_config(monkeypatch, log_folder, fixture_cleanup_log_folder):
+    """Tests that per-run log files are only configured when a run log name is provided."""
+
+    def mock_get_log_file_path():
+        return log_folder / 'grimagents.log'
+
+    def mock_get_run_log_folder():
+        return log_folder / 'runs'
+
+    monkeypatch.setattr(grimagents.settings, 'get_log_file_path', mock_get_log_file_path)
+    monkeypatch.setattr(grimagents.settings, 'get_run_log_folder', mock_get_run_log_folder)
+
+    config = log_util.get_file_handler_config()
+    assert config['filename'] == str(log_folder / 'grimagents.log')
+    assert 'run_filename' not in config
+
+    config = log_util.get_file_handler_config('3DBall-2019-09-13_03-41-44')
+    assert config['run_filename'] == str(log_folder / 'runs' / '3DBall-2019-09-13_03-41-44.log')
+    assert (log_folder / 'runs').exists()
@@ -5,6 +5,8 @@ from argparse import Namespace
 
 import grimagents.__main__
 import grimagents.common
+import grimagents.job_server
+import grimagents.settings
 
 from grimagents.training_commands import (
     ListTrainingOptions,
@@ -12,6 +14,7 @@ from grimagents.training_commands import (
     EditTrainerConfigFile,
     StartTensorboard,
     PerformTraining,
+    PerformBatchTraining,
 )
 
 
@@ -24,22 +27,31 @@ def arguments():
 def namespace_args():
     return Namespace(
         additional_args=[],
+        auto_port=False,
         base_port=None,
         configuration_file='config/3DBall_grimagents.json',
+        configuration_files=['config/3DBall_grimagents.json'],
         dry_run=False,
         edit_config=None,
         edit_trainer_config=None,
         env=None,
         graphics=False,
         inference=False,
+        jobs=False,
         list=False,
+        max_jobs=1,
         multi_gpu=False,
         no_graphics=False,
         no_multi_gpu=False,
         no_timestamp=False,
         num_envs=None,
+        seed=None,
+        parallel=1,
         resume=False,
         run_id=None,
+        serve=False,
+        server_port=grimagents.settings.JOB_SERVER_PORT,
+        submit=False,
         tensorboard_start=False,
         timestamp=False,
         trainer_config=None,
@@ -68,7 +80,7 @@ def patch_main(monkeypatch, arguments, namespace_args):
 
 @pytest.fixture
 def patch_training_commands(monkeypatch):
-    """Patches all training commands to assert False if their execute method is called. """
+    """Patches all training commands to assert False if their execute method is called."""
 
     def mock_init(self, args):
         pass
@@ -96,12 +108,14 @@ def patch_training_commands(monkeypatch):
     monkeypatch.setattr(EditTrainerConfigFile, '__init__', mock_init)
     monkeypatch.setattr(StartTensorboard, '__init__', mock_init)
     monkeypatch.setattr(PerformTraining, '__init__', mock_init)
+    monkeypatch.setattr(PerformBatchTraining, '__init__', mock_init)
 
     monkeypatch.setattr(ListTrainingOptions, 'execute', mock_execute_list_options)
     monkeypatch.setattr(EditGrimConfigFile, 'execute', mock_execute_edit_grim_config)
     monkeypatch.setattr(EditTrainerConfigFile, 'execute', mock_execute_edit_trainer_config)
     monkeypatch.setattr(StartTensorboard, 'execute', mock_execute_start_tensorboard)
     monkeypatch.setattr(PerformTraining, 'execute', mock_execute_perform_training)
+    monkeypatch.setattr(PerformBatchTraining, 'execute', mock_execute_perform_training)
 
 
 def test_parse_args(arguments, namespace_args):
@@ -190,3 +204,77 @@ def test_perform_training(monkeypatch, patch_main, patch_training_commands):
     monkeypatch.setattr(PerformTraining, 'execute', mock_execute)
 
     grimagents.__main__.main()
+
+
+def test_perform_batch_training(monkeypatch, patch_main, patch_training_commands):
+    """Tests that PerformBatchTraining is executed when several configuration files are provided."""
+
+    def mock_get_argvs():
+        return ['config/3DBall_grimagents.json', 'config/Basic_grimagents.json', '--parallel', '2']
+
+    def mock_execute(self):
+        return 0
+
+    monkeypatch.setattr(grimagents.__main__, 'get_argvs', mock_get_argvs)
+    monkeypatch.setattr(PerformBatchTraining, 'execute', mock_execute)
+
+    grimagents.__main__.main()
+
+    # A batch exits with the return code of its first failed training run
+    monkeypatch.setattr(PerformBatchTraining, 'execute', lambda self: 2)
+
+    with pytest.raises(SystemExit) as exit_info:
+        grimagents.__main__.main()
+
+    assert exit_info.value.code == 2
+
+
+def test_serve(monkeypatch, patch_main, namespace_args, patch_training_commands):
+    """Tests that the job server is started with training and search job types."""
+
+    namespace_args.serve = True
+    namespace_args.max_jobs = 3
+
+    def mock_parse_args(argvs):
+        return namespace_args
+
+    def mock_serve(job_types, max_jobs, port):
+        assert set(job_types) == {'training', 'search'}
+        assert max_jobs == 3
+        assert port == grimagents.settings.JOB_SERVER_PORT
+
+    monkeypatch.setattr(grimagents.__main__, 'parse_args', mock_parse_args)
+    monkeypatch.setattr(grimagents.job_server, 'serve', mock_serve)
+
+    grimagents.__main__.main()
+
+
+def test_submit(monkeypatch, patch_main, patch_training_commands):
+    """Tests that '--submit' sends the remaining arguments to the job server instead of executing training."""
+
+    arguments = [
+        'config/3DBall_grimagents.json',
+        '--submit',
+        '--server-port',
+        '6000',
+        '--num-envs',
+        '4',
+    ]
+
+    def mock_get_argvs():
+        return arguments
+
+    def mock_submit_job(kind, argv, port):
+        assert kind == 'training'
+        assert argv == ['config/3DBall_grimagents.json', '--num-envs', '4']
+        assert port == 6000
+        return {'id': 1}
+
+    def mock_is_pipenv_present():
+        assert False
+
+    monkeypatch.setattr(grimagents.__main__, 'get_argvs', mock_get_argvs)
+    monkeypatch.setattr(grimagents.job_server, 'submit_job', mock_submit_job)
+    monkeypatch.setattr(grimagents.common, 'is_pipenv_present', mock_is_pipenv_present)
+
+    grimagents.__main__.main()
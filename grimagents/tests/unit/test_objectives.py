@@ -0,0 +1,120 @@
+import pytest
+
+import grimagents.objectives as objectives
+
+from grimagents.objectives import TrialObjectives
+
+
+def test_get_trial_objectives():
+    """Tests reading a training run's objectives from its summary. Ensures:
+
+    - The step rate is calculated from the step and time elapsed if it wasn't recorded
+    - The reward is the last point of the reward curve when one was recorded
+    - Training runs with several behaviors are scored on the named behavior's reward curve
+    - Summaries without a reward have no objectives
+    """
+
+    summary = {'mean_reward': 1.5, 'step': 1000, 'time_elapsed': 50.0, 'duration': 80.0}
+
+    assert objectives.get_trial_objectives(summary) == TrialObjectives(1.5, 20.0, 80.0)
+
+    summary['reward_curves'] = {'3DBall': [[500, 0.25], [1000, 1.5432]]}
+    assert objectives.get_trial_objectives(summary).reward == 1.5432
+    assert objectives.get_trial_objectives(summary, '3DBall').reward == 1.5432
+
+    summary['reward_curves']['Walker'] = [[500, -2.0], [1500, -0.75]]
+    assert objectives.get_trial_objectives(summary, '3DBall').reward == 1.5432
+    assert objectives.get_trial_objectives(summary, 'Walker').reward == -0.75
+    assert objectives.get_trial_objectives(summary).reward == 1.5
+    assert objectives.get_trial_objectives(summary, 'Crawler').reward == 1.5
+
+    assert objectives.get_trial_objectives({'mean_reward': None, 'reward_curves': {}}) is None
+    assert objectives.get_trial_objectives({'mean_reward': None}) is None
+    assert objectives.get_trial_objectives(None) is None
+
+
+def test_get_score():
+    """Tests scoring training runs on reward alone and on reward scalarized with wall-clock time."""
+
+    trial = TrialObjectives(reward=2.0, steps_per_second=100.0, wall_time=7200.0)
+    negative = TrialObjectives(reward=-2.0, steps_per_second=100.0, wall_time=7200.0)
+
+    assert objectives.get_score(trial) == 2.0
+    assert objectives.get_score(trial, 'reward_per_hour') == 1.0
+    assert objectives.get_score(negative, 'reward_per_hour') == -4.0
+    assert objectives.get_score(trial, 'cost_weighted') == 0.0
+    assert objectives.get_score(trial, 'cost_weighted', cost_weight=0.5) == 1.0
+
+    with pytest.raises(ValueError):
+        objectives.get_score(trial, 'steps')
+
+
+def test_get_pareto_front():
+    """Tests that training runs beaten on both reward and wall-clock time, or identical to an earlier training run, are left off the front."""
+
+    trials = [
+        TrialObjectives(reward=1.0, steps_per_second=0, wall_time=100.0),
+        TrialObjectives(reward=0.5, steps_per_second=0, wall_time=200.0),
+        TrialObjectives(reward=2.0, steps_per_second=0, wall_time=400.0),
+        TrialObjectives(reward=1.0, steps_per_second=0, wall_time=100.0),
+        TrialObjectives(reward=1.9, steps_per_second=0, wall_time=150.0),
+        TrialObjectives(reward=2.0, steps_per_second=0, wall_time=500.0),
+    ]
+
+    assert objectives.get_pareto_front(trials) == [0, 4, 2]
+    assert objectives.get_pareto_front([]) == []
+
+
+def test_get_knee_point():
+    """Tests choosing the training run that gives up the least reward for the time it saves."""
+
+    trials = [
+        TrialObjectives(reward=1.0, steps_per_second=0, wall_time=100.0),
+        TrialObjectives(reward=2.0, steps_per_second=0, wall_time=400.0),
+        TrialObjectives(reward=1.9, steps_per_second=0, wall_time=150.0),
+        TrialObjectives(reward=1.95, steps_per_second=0, wall_time=300.0),
+    ]
+
+    assert objectives.get_knee_point(trials) == 2
+
+    # Fronts of two training runs favour the higher reward when neither is closer to the ideal
+    assert objectives.get_knee_point(trials[:2]) == 1
+    assert objectives.get_knee_point(trials[:1]) == 0
+    assert objectives.get_knee_point([]) is None
+
+
+def test_get_replicate_score():
+    """Tests aggregating the scores of a search configuration's replicates."""
+
+    scores = [1.0, 2.0, 6.0]
+
+    assert objectives.get_standard_error(scores) == pytest.approx(7**0.5 / 3**0.5)
+    assert objectives.get_standard_error([1.0]) == 0.0
+    assert objectives.get_replicate_score(scores) == 3.0
+    assert objectives.get_replicate_score(scores, 'median') == 2.0
+    assert objectives.get_replicate_score(scores, 'lcb') == pytest.approx(3.0 - 7**0.5 / 3**0.5)
+
+    with pytest.raises(ValueError):
+        objectives.get_replicate_score(scores, 'max')
+
+
+def test_get_replicate_objectives():
+    """Tests that replicates are ranked on the aggregate of their rewards and the wall-clock time of the slowest replicate."""
+
+    replicates = [
+        TrialObjectives(reward=1.0, steps_per_second=10.0, wall_time=100.0),
+        None,
+        TrialObjectives(reward=3.0, steps_per_second=20.0, wall_time=120.0),
+    ]
+
+    assert objectives.get_replicate_objectives(replicates) == TrialObjectives(2.0, 15.0, 120.0)
+    assert objectives.get_replicate_objectives([None]) is None
+
+
+def test_get_observation_noise():
+    """Tests that the variance of each observation's score is normalized by the variance of the observed scores, and never falls below the optimizer's default noise."""
+
+    noise = objectives.get_observation_noise([1.0, 3.0], [0.0, 2.0])
+    assert noise.tolist() == [objectives.MIN_OBSERVATION_NOISE, 2.0]
+
+    assert objectives.get_observation_noise([1.0], [0.5]).tolist() == [0.5]
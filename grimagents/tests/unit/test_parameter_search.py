@@ -1,12 +1,18 @@
 import numpy
 import pytest
 
+import grimagents.parameter_search as parameter_search
+
 from grimagents.parameter_search import (
     GridSearch,
     RandomSearch,
     BayesianSearch,
     InvalidGridSearchIndex,
+    InvalidSearchDesign,
+    InvalidSearchParameter,
+    SearchParameter,
 )
+from grimagents.search_constraints import InvalidSearchConstraint
 
 
 @pytest.fixture
@@ -135,6 +141,31 @@ def test_get_grid_search_count(search_config, trainer_config):
     assert search.get_grid_search_count() == 32
 
 
+def test_grid_search_constraints(search_config, trainer_config):
+    """Tests that grid search indexes violating the search constraints are marked invalid, using the 'buffer_size' set from 'buffer_size_multiple' and settings that are not searched."""
+
+    search_config['search_parameters']['hyperparameters.buffer_size_multiple'] = [4, 10]
+    search_config['constraints'] = [
+        'network_settings.hidden_units * network_settings.num_layers < 512',
+        'hyperparameters.buffer_size >= hyperparameters.batch_size * 8',
+    ]
+
+    search = GridSearch(search_config, trainer_config)
+
+    assert search.get_grid_search_count() == 64
+    assert search.get_valid_search_count() == 16
+    assert not search.is_valid_index(64)
+
+    for index in range(search.get_grid_search_count()):
+        search_config = search.get_search_configuration(index)
+        expected = (
+            search_config['network_settings.hidden_units'] == 32
+            and search_config['hyperparameters.buffer_size_multiple'] == 10
+        )
+        assert search.is_valid_index(index) == expected
+        assert (search.get_violated_constraints(search_config) == []) == expected
+
+
 def test_invalid_grid_search_index(search_config, trainer_config):
     """Tests that InvalidGridSearchIndex exceptions are raised."""
 
@@ -217,13 +248,6 @@ def test_buffer_size_multiple(search_config, trainer_config):
     }
 
 
-def test_get_random_value():
-    """Test for the correct randomization of ints and floats."""
-
-    assert RandomSearch.get_random_value([1, 5, 8], seed=10) == 1
-    assert RandomSearch.get_random_value([0.01, 0.0001, 1], seed=5) == 0.6229394047202129
-
-
 def test_get_random_search(search_config, trainer_config):
     """Tests for the correct generation of a randomized search configuration."""
 
@@ -231,33 +255,241 @@ def test_get_random_search(search_config, trainer_config):
     random_search_config = search.get_randomized_search_configuration(seed=9871237)
 
     assert random_search_config == {
-        'hyperparameters.beta': 0.008715030393329336,
-        'hyperparameters.learning_rate': 0.0008715030393329336,
-        'hyperparameters.num_epoch': 4,
-        'network_settings.hidden_units': 477,
+        'hyperparameters.beta': 0.00020093706557920498,
+        'hyperparameters.learning_rate': 0.0004563620653556618,
+        'hyperparameters.num_epoch': 10,
+        'network_settings.hidden_units': 228,
         'network_settings.num_layers': 1,
     }
 
 
-def test_get_parameter_bounds():
-    """Tests for the correct construction of a parameter bounds dictionary."""
+@pytest.mark.parametrize('design', [None, 'lhs'])
+def test_random_search_constraints(search_config, trainer_config, design):
+    """Tests that random search configurations violating the search constraints are redrawn, and left out when no valid configuration can be drawn."""
+
+    search_config['constraints'] = ['network_settings.hidden_units <= 64']
+    search = RandomSearch(search_config, trainer_config)
+
+    search_configs = search.get_search_configurations(20, design=design, seed=5)
+    assert len(search_configs) == 20
+    assert all(config['network_settings.hidden_units'] <= 64 for config in search_configs)
+
+    search_config['constraints'] = ['hyperparameters.num_epoch > 10']
+    search = RandomSearch(search_config, trainer_config)
+
+    assert search.get_search_configurations(5, design=design, seed=5) == []
+
+    with pytest.raises(InvalidSearchConstraint):
+        search.get_randomized_search_configuration(seed=5)
+
+
+@pytest.mark.parametrize('design', ['lhs', 'sobol', 'halton', 'orthogonal'])
+def test_get_design_samples(design):
+    """Tests that space-filling designs place exactly one point in each of 'count' equal intervals of every dimension, and that orthogonal designs of q * q points also cover every pair of dimensions evenly."""
+
+    # Sobol points are only evenly stratified at powers of two
+    count = 16 if design == 'sobol' else 9
+    samples = parameter_search.get_design_samples(design, count, 3, seed=3)
+
+    assert samples.shape == (count, 3)
+    assert numpy.all((samples >= 0) & (samples < 1))
+
+    if design != 'halton':
+        intervals = numpy.sort(numpy.floor(samples * count), axis=0)
+        assert numpy.all(intervals == numpy.arange(count)[:, numpy.newaxis])
+
+    if design == 'orthogonal':
+        levels = numpy.floor(samples * 3).astype(int)
+        pairs = {(row[0], row[1]) for row in levels}
+        assert len(pairs) == 9
+
+    with pytest.raises(InvalidSearchDesign):
+        parameter_search.get_design_samples('unknown', count, 3)
+
+
+def test_get_sobol_samples():
+    """Tests that unshifted Sobol points match the start of the Sobol sequence."""
+
+    points = parameter_search.get_sobol_points(4, 3) / 2**parameter_search.SOBOL_BITS
+
+    assert points.tolist() == [
+        [0.0, 0.0, 0.0],
+        [0.5, 0.5, 0.5],
+        [0.25, 0.75, 0.75],
+        [0.75, 0.25, 0.25],
+    ]
+
+    with pytest.raises(InvalidSearchDesign):
+        parameter_search.get_design_samples('sobol', 4, 22)
+
+
+def test_search_parameter_distributions():
+    """Tests that positions between 0 and 1 are converted into values of each distribution."""
+
+    positions = [0.0, 0.5, 0.999]
+
+    assert SearchParameter('beta', [0.1, 0.3]).get_values([0.5]) == [pytest.approx(0.2)]
+    assert SearchParameter('num_layers', [1, 3]).get_values(positions) == [1, 2, 3]
+    assert SearchParameter('schedule', ['linear', 'constant']).get_values([0.25, 0.75]) == [
+        'linear',
+        'constant',
+    ]
+    assert SearchParameter('normalize', [True, False]).get_values([0.25]) == [True]
+
+    learning_rate = SearchParameter(
+        'learning_rate', {'distribution': 'log', 'values': [1e-5, 1e-3]}
+    )
+    assert learning_rate.get_values([0.0, 0.5, 1.0]) == [
+        pytest.approx(1e-5),
+        pytest.approx(1e-4),
+        pytest.approx(1e-3),
+    ]
+
+    hidden_units = SearchParameter('hidden_units', {'distribution': 'log', 'values': [32, 512]})
+    assert hidden_units.get_values([0.0, 0.5, 1.0]) == [32, 128, 512]
+
+    batch_size = SearchParameter(
+        'batch_size', {'distribution': 'quantized', 'values': [64, 256], 'step': 64}
+    )
+    assert batch_size.get_values(positions) == [64, 192, 256]
+
+    strength = SearchParameter(
+        'strength', {'distribution': 'quantized', 'values': [0.1, 0.5], 'step': 0.1}
+    )
+    assert strength.get_values([0.5]) == [0.3]
+
+
+def test_search_parameter_grid_values():
+    """Tests that grid searches try the listed values, or 'count' values spread across the distribution."""
+
+    assert SearchParameter('beta', [0.1, 0.2, 0.3]).get_grid_values() == [0.1, 0.2, 0.3]
+
+    learning_rate = SearchParameter(
+        'learning_rate', {'distribution': 'log', 'values': [1e-5, 1e-3], 'count': 3}
+    )
+    assert learning_rate.get_grid_values() == [
+        pytest.approx(1e-5),
+        pytest.approx(1e-4),
+        pytest.approx(1e-3),
+    ]
+
+    num_layers = SearchParameter(
+        'num_layers', {'distribution': 'int', 'values': [1, 2], 'count': 5}
+    )
+    assert num_layers.get_grid_values() == [1, 2]
+
+
+def test_search_parameter_trainer_types():
+    """Tests that search parameter values are converted to the type of their trainer setting."""
+
+    summary_freq = SearchParameter('summary_freq', [1000.0, 5000.0])
+    assert summary_freq.get_values([0.0, 0.2501]) == [1000, 2000]
+    assert summary_freq.get_grid_values() == [1000, 5000]
+
+    memory_size = SearchParameter(
+        'network_settings.memory.memory_size', {'distribution': 'log', 'values': [16, 256]}
+    )
+    assert all(value % 4 == 0 for value in memory_size.get_values(numpy.linspace(0, 1, 7)))
+
+
+@pytest.mark.parametrize(
+    'name, definition',
+    [
+        ('hyperparameters.learning_rate_schedule', ['linear', 'cosine']),
+        ('hyperparameters.batch_size', [0, 256]),
+        ('network_settings.normalize', [0.1, 0.9]),
+    ],
+)
+def test_search_parameter_invalid_trainer_values(name, definition):
+    """Tests that search parameters with values their trainer setting does not accept are rejected."""
+
+    with pytest.raises(InvalidSearchParameter):
+        SearchParameter(name, definition)
+
+
+@pytest.mark.parametrize(
+    'definition',
+    [
+        {'distribution': 'normal', 'values': [0, 1]},
+        {'distribution': 'log', 'values': [0, 1]},
+        {'distribution': 'quantized', 'values': [0, 1]},
+        {'distribution': 'int', 'values': ['a', 'b']},
+        {'distribution': 'uniform'},
+    ],
+)
+def test_invalid_search_parameter(definition):
+    """Tests that malformed search parameter definitions are rejected."""
+
+    with pytest.raises(InvalidSearchParameter):
+        SearchParameter('parameter', definition)
+
+
+def test_get_search_config_from_point():
+    """Tests that points chosen by the Bayesian optimizer are converted through each parameter's distribution."""
+
+    search_config = {
+        'behavior_name': 'BEHAVIOR_NAME',
+        'search_parameters': {
+            'hyperparameters.learning_rate': {'distribution': 'log', 'values': [1e-5, 1e-3]},
+            'hyperparameters.learning_rate_schedule': ['linear', 'constant'],
+            'network_settings.hidden_units': [32, 512],
+        },
+    }
+    search = BayesianSearch(search_config, {'behaviors': {}})
+
+    bounds = search.get_optimizer_bounds()
+    assert bounds['hyperparameters.learning_rate'] == [
+        pytest.approx(numpy.log(1e-5)),
+        pytest.approx(numpy.log(1e-3)),
+    ]
+    assert bounds['hyperparameters.learning_rate_schedule'] == [0, 2]
+
+    point = {
+        'hyperparameters.learning_rate': numpy.log(1e-4),
+        'hyperparameters.learning_rate_schedule': numpy.float64(1.5),
+        'network_settings.hidden_units': numpy.float64(120.7),
+    }
+    result = search.get_search_config_from_point(point)
 
-    parameter_names = ['batch_size', 'buffer_size_multiple', 'beta']
-    parameter_values = [[64, 128], [4], [0.001, 0.0001]]
+    assert result['hyperparameters.learning_rate'] == pytest.approx(1e-4)
+    assert result['hyperparameters.learning_rate_schedule'] == 'constant'
+    assert type(result['network_settings.hidden_units']) is int
 
-    result = BayesianSearch.get_parameter_bounds(parameter_names, parameter_values)
 
-    # Test for a dictionary return type
-    assert type(result) is dict
+def test_get_design_search_configurations(search_config, trainer_config):
+    """Tests that design search configurations stay within each hyperparameter's range and keep its value type."""
 
-    # Test for a second value inserted for any parameter that only contains one value
-    assert result == {
-        'batch_size': [64, 128],
-        'buffer_size_multiple': [4, 4],
-        'beta': [0.001, 0.0001],
+    search = RandomSearch(search_config, trainer_config)
+    configurations = search.get_search_configurations(8, design='lhs')
+
+    assert len(configurations) == 8
+    for configuration in configurations:
+        assert 1e-4 <= configuration['hyperparameters.beta'] <= 1e-2
+        assert isinstance(configuration['network_settings.hidden_units'], int)
+        assert 32 <= configuration['network_settings.hidden_units'] <= 512
+
+    # Every value of a small int range is used
+    assert {configuration['network_settings.num_layers'] for configuration in configurations} == {
+        1,
+        2,
+        3,
     }
 
 
+def test_get_design_points():
+    """Tests that Bayesian design points are scaled into the parameter bounds."""
+
+    points = BayesianSearch.get_design_points(
+        'halton', 5, {'batch_size': [64, 128], 'beta': [0.001, 0.0001]}, seed=1
+    )
+
+    assert len(points) == 5
+    for point in points:
+        assert 64 <= point['batch_size'] <= 128
+        assert 0.0001 <= point['beta'] <= 0.001
+        assert type(point['beta']) is float
+
+
 def test_get_search_config_from_bounds():
     """Tests that
     - Only standard Python value types are returned
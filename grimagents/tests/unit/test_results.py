@@ -0,0 +1,101 @@
+import os
+import pytest
+import shutil
+
+from pathlib import Path
+
+import grimagents.results as results
+import grimagents.settings
+
+
+@pytest.fixture
+def summaries_folder():
+    return Path(__file__).parent / 'test_results'
+
+
+@pytest.fixture
+def patch_summaries_folder(monkeypatch, summaries_folder):
+    def mock_get_summaries_folder():
+        return summaries_folder
+
+    monkeypatch.setattr(grimagents.settings, 'get_summaries_folder', mock_get_summaries_folder)
+
+
+@pytest.fixture
+def fixture_cleanup_summaries_folder(summaries_folder):
+    if summaries_folder.exists():
+        shutil.rmtree(summaries_folder)
+    yield 'fixture_cleanup_summaries_folder'
+    if summaries_folder.exists():
+        shutil.rmtree(summaries_folder)
+
+
+def test_write_and_load_run_summary(patch_summaries_folder, fixture_cleanup_summaries_folder):
+    """Tests that run summaries are written into and loaded from the run's 'run_logs' folder."""
+
+    assert results.load_run_summary('3DBall_00') is None
+
+    results.write_run_summary('3DBall_00', {'mean_reward': 1.5})
+
+    assert results.get_run_summary_path('3DBall_00').exists()
+    assert results.load_run_summary('3DBall_00') == {'mean_reward': 1.5}
+
+
+def test_find_run_summary(patch_summaries_folder, fixture_cleanup_summaries_folder):
+    """Tests that the most recent summary is found for timestamped run ids and that run ids sharing a prefix are ignored."""
+
+    assert results.find_run_summary('3DBall_00') is None
+
+    results.write_run_summary('3DBall_00-2019-09-13_03-41-44', {'mean_reward': 1.0})
+    results.write_run_summary('3DBall_00-2019-09-14_03-41-44', {'mean_reward': 2.0})
+    results.write_run_summary('3DBall_001', {'mean_reward': 3.0})
+
+    older_summary = results.get_run_summary_path('3DBall_00-2019-09-13_03-41-44')
+    os.utime(older_summary, (0, 0))
+
+    assert results.find_run_summary('3DBall_00') == {'mean_reward': 2.0}
+    assert results.find_run_summary('3DBall_001') == {'mean_reward': 3.0}
+
+
+def test_search_results(summaries_folder, fixture_cleanup_summaries_folder):
+    """Tests that search results are appended and loaded, and that unreadable lines are skipped."""
+
+    results_path = summaries_folder / '3DBall_search.jsonl'
+
+    assert results.load_search_results(results_path) == []
+
+    results.append_search_result(results_path, {'run_id': '3DBall_00'})
+    with results_path.open('a') as f:
+        f.write('{"run_id": \n')
+    results.append_search_result(results_path, {'run_id': '3DBall_01'})
+
+    assert results.load_search_results(results_path) == [
+        {'run_id': '3DBall_00'},
+        {'run_id': '3DBall_01'},
+    ]
+
+
+def test_run_progress(patch_summaries_folder, fixture_cleanup_summaries_folder):
+    """Tests that run progress is replaced on each write and found for timestamped run ids."""
+
+    assert results.find_run_progress('3DBall_00') is None
+
+    results.write_run_progress('3DBall_00-2019-09-13_03-41-44', {'step': 1000})
+    results.write_run_progress('3DBall_00-2019-09-13_03-41-44', {'step': 2000})
+
+    progress_path = results.get_run_progress_path('3DBall_00-2019-09-13_03-41-44')
+    assert [path.name for path in progress_path.parent.iterdir()] == [progress_path.name]
+    assert results.find_run_progress('3DBall_00') == {'step': 2000}
+
+
+def test_load_run_summaries(patch_summaries_folder, fixture_cleanup_summaries_folder):
+    """Tests that the summaries of every training run are loaded."""
+
+    assert results.load_run_summaries() == []
+
+    results.write_run_summary('3DBall_00', {'mean_reward': 1.0})
+    results.write_run_summary('3DBall_01', {'mean_reward': 2.0})
+    results.write_run_progress('3DBall_02', {'step': 1000})
+
+    rewards = sorted(summary['mean_reward'] for summary in results.load_run_summaries())
+    assert rewards == [1.0, 2.0]
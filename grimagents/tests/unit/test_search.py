@@ -4,10 +4,12 @@ import pytest
 from argparse import Namespace
 
 import grimagents.search
+import grimagents.settings
 
 from grimagents.search_commands import (
     EditGrimConfigFile,
     OutputGridSearchCount,
+    OutputSearchProfile,
     PerformGridSearch,
     ExportGridSearchConfiguration,
     PerformRandomSearch,
@@ -28,16 +30,32 @@ def namespace_args():
         bayesian=None,
         configuration_file='config/3DBall_grimagents.json',
         edit_config=None,
+        estimate=False,
         export_index=None,
+        parallel=1,
+        adaptive_parallel=False,
+        profile_report=False,
         random=None,
         resume=None,
+        schedule='longest',
+        pipeline=True,
+        design=None,
+        objective='reward',
+        cost_weight=None,
+        replicates=1,
+        replicate_score='mean',
         search_count=False,
+        step_budget=None,
+        server_port=grimagents.settings.JOB_SERVER_PORT,
+        submit=False,
+        time_budget=None,
+        trial_timeout=None,
     )
 
 
 @pytest.fixture
 def patch_main(monkeypatch, arguments, namespace_args):
-    def mock_configure_logging():
+    def mock_configure_logging(run_log_name=None):
         pass
 
     def mock_is_pipenv_present():
@@ -57,7 +75,7 @@ def patch_main(monkeypatch, arguments, namespace_args):
 
 @pytest.fixture
 def patch_search_commands(monkeypatch):
-    """Patches all training commands to assert False if their execute method is called. """
+    """Patches all training commands to assert False if their execute method is called."""
 
     def mock_init(self, args):
         pass
@@ -68,6 +86,9 @@ def patch_search_commands(monkeypatch):
     def mock_execute_output_search_count(self):
         assert False
 
+    def mock_execute_output_search_profile(self):
+        assert False
+
     def mock_execute_perform_grid_search(self):
         assert False
 
@@ -82,6 +103,7 @@ def patch_search_commands(monkeypatch):
 
     monkeypatch.setattr(EditGrimConfigFile, '__init__', mock_init)
     monkeypatch.setattr(OutputGridSearchCount, '__init__', mock_init)
+    monkeypatch.setattr(OutputSearchProfile, '__init__', mock_init)
     monkeypatch.setattr(PerformGridSearch, '__init__', mock_init)
     monkeypatch.setattr(ExportGridSearchConfiguration, '__init__', mock_init)
     monkeypatch.setattr(PerformRandomSearch, '__init__', mock_init)
@@ -89,6 +111,7 @@ def patch_search_commands(monkeypatch):
 
     monkeypatch.setattr(EditGrimConfigFile, 'execute', mock_execute_edit_grim_config)
     monkeypatch.setattr(OutputGridSearchCount, 'execute', mock_execute_output_search_count)
+    monkeypatch.setattr(OutputSearchProfile, 'execute', mock_execute_output_search_profile)
     monkeypatch.setattr(PerformGridSearch, 'execute', mock_execute_perform_grid_search)
     monkeypatch.setattr(
         ExportGridSearchConfiguration, 'execute', mock_execute_export_grid_search_config
@@ -97,6 +120,23 @@ def patch_search_commands(monkeypatch):
     monkeypatch.setattr(PerformBayesianSearch, 'execute', mock_execute_perform_bayesian_search)
 
 
+def test_get_run_log_name(monkeypatch, namespace_args):
+    """Tests that searches are given a timestamped log file name and that other commands are not."""
+
+    def mock_get_timestamp():
+        return '2019-09-13_03-41-44'
+
+    monkeypatch.setattr(grimagents.common, 'get_timestamp', mock_get_timestamp)
+
+    assert (
+        grimagents.search.get_run_log_name(namespace_args)
+        == '3DBall_grimagents_search-2019-09-13_03-41-44'
+    )
+
+    namespace_args.search_count = True
+    assert grimagents.search.get_run_log_name(namespace_args) is None
+
+
 def test_parse_args(arguments, namespace_args):
     """Tests that parse_arges() produces a Namespace object with the required attributes."""
 
@@ -138,6 +178,23 @@ def test_output_grid_search_count(monkeypatch, patch_main, namespace_args, patch
     grimagents.search.main()
 
 
+def test_output_search_profile(monkeypatch, patch_main, namespace_args, patch_search_commands):
+    """Tests that OutputSearchProfile is executed."""
+
+    namespace_args.profile_report = True
+
+    def mock_parse_args(argvs):
+        return namespace_args
+
+    def mock_execute(self):
+        assert True
+
+    monkeypatch.setattr(grimagents.search, 'parse_args', mock_parse_args)
+    monkeypatch.setattr(OutputSearchProfile, 'execute', mock_execute)
+
+    grimagents.search.main()
+
+
 def test_perform_grid_search(monkeypatch, patch_main, namespace_args, patch_search_commands):
     """Tests that PerformGridSearch is executed."""
 
@@ -1,7 +1,10 @@
 import bayes_opt.util
+import os
 import pytest
 import shutil
 import subprocess
+import time
+import threading
 
 from argparse import Namespace
 from bayes_opt import BayesianOptimization
@@ -9,17 +12,25 @@ from pathlib import Path
 
 import grimagents.command_util
 import grimagents.common
+import grimagents.concurrency
 import grimagents.config
+import grimagents.coordination
+import grimagents.results
 import grimagents.settings
+import grimagents.tensorboard_events
 
 from grimagents.search_commands import (
+    SearchBudget,
+    SearchBudgetExhausted,
     SearchCommand,
+    OutputSearchProfile,
     PerformGridSearch,
     ExportGridSearchConfiguration,
     PerformRandomSearch,
     PerformBayesianSearch,
 )
 
+from grimagents.objectives import TrialObjectives
 from grimagents.parameter_search import ParameterSearch, GridSearch, BayesianSearch
 
 
@@ -53,7 +64,7 @@ def grim_config():
         '--seed': '',
         '--timestamp': True,
         'search': {
-            'behavior_name': '3DBallLearning',
+            'behavior_name': '3DBall',
             'search_parameters': {
                 'hyperparameters.batch_size': [64, 256],
                 'hyperparameters.buffer_size_multiple': [50, 200],
@@ -127,10 +138,24 @@ def namespace_args():
         bayesian=None,
         configuration_file='config/3DBall_grimagents.json',
         edit_config=None,
+        estimate=False,
         export_index=None,
+        parallel=1,
+        adaptive_parallel=False,
+        profile_report=False,
         random=None,
         resume=None,
+        schedule='longest',
+        pipeline=True,
+        design=None,
+        objective='reward',
+        cost_weight=None,
+        replicates=1,
+        replicate_score='mean',
         search_count=False,
+        step_budget=None,
+        time_budget=None,
+        trial_timeout=None,
     )
 
 
@@ -161,7 +186,27 @@ def patch_search_command(monkeypatch, grim_config, trainer_config):
     def mock_run(command):
         pass
 
+    def mock_find_run_summary(run_id):
+        return None
+
+    def mock_append_search_result(file_path, record):
+        pass
+
+    def mock_load_run_summaries():
+        return []
+
+    def mock_find_run_progress(run_id):
+        return None
+
+    def mock_get_scratch_path(file_path):
+        return file_path.with_name(f'{file_path.stem}_1234{file_path.suffix}')
+
     monkeypatch.setattr(grimagents.config, 'load_grim_configuration_file', mock_load_grim_config)
+    monkeypatch.setattr(grimagents.coordination, 'get_scratch_path', mock_get_scratch_path)
+    monkeypatch.setattr(grimagents.results, 'find_run_summary', mock_find_run_summary)
+    monkeypatch.setattr(grimagents.results, 'append_search_result', mock_append_search_result)
+    monkeypatch.setattr(grimagents.results, 'load_run_summaries', mock_load_run_summaries)
+    monkeypatch.setattr(grimagents.results, 'find_run_progress', mock_find_run_progress)
 
     monkeypatch.setattr(
         grimagents.config, 'load_trainer_configuration_file', mock_load_trainer_configuration
@@ -175,7 +220,7 @@ def patch_search_command(monkeypatch, grim_config, trainer_config):
 def patch_perform_search_with_configuration(monkeypatch):
     """Patches SearchCommand.perform_search_with_configuration()."""
 
-    def mock_perform_search_with_configuration(self, trainer_config):
+    def mock_perform_search_with_configuration(self, trainer_config, run_id=None, config_path=None):
         pass
 
     monkeypatch.setattr(
@@ -196,8 +241,12 @@ def patch_perform_grid_search(monkeypatch, trainer_config, search_overrides):
     def mock_get_trainer_config_with_overrides(self, search_overrides):
         return trainer_config
 
+    def mock_is_valid_index(self, index):
+        return True
+
     monkeypatch.setattr(GridSearch, 'get_grid_search_count', mock_get_grid_search_count)
     monkeypatch.setattr(GridSearch, 'get_search_configuration', mock_get_search_configuration)
+    monkeypatch.setattr(GridSearch, 'is_valid_index', mock_is_valid_index)
 
     monkeypatch.setattr(
         ParameterSearch, 'get_trainer_config_with_overrides', mock_get_trainer_config_with_overrides
@@ -208,10 +257,10 @@ def patch_perform_grid_search(monkeypatch, trainer_config, search_overrides):
 def patch_perform_bayesian_search(monkeypatch, bounds, trainer_config):
     """Patches all external calls used by PerformBayesianSearch objects."""
 
-    def mock_get_parameter_bounds(self, names, values):
+    def mock_get_optimizer_bounds(self):
         return bounds
 
-    def mock_get_search_config_from_bounds(self, dict):
+    def mock_get_search_config_from_point(self, point):
         return {}
 
     def mock_get_trainer_config_with_overrides(self, search_overrides):
@@ -226,10 +275,10 @@ def patch_perform_bayesian_search(monkeypatch, bounds, trainer_config):
     def mock_optimizer_maximize(self, init_points, n_iter):
         pass
 
-    monkeypatch.setattr(BayesianSearch, 'get_parameter_bounds', mock_get_parameter_bounds)
+    monkeypatch.setattr(BayesianSearch, 'get_optimizer_bounds', mock_get_optimizer_bounds)
 
     monkeypatch.setattr(
-        BayesianSearch, 'get_search_config_from_bounds', mock_get_search_config_from_bounds
+        BayesianSearch, 'get_search_config_from_point', mock_get_search_config_from_point
     )
 
     monkeypatch.setattr(
@@ -310,10 +359,30 @@ def test_search_command_init(patch_search_command, namespace_args, grim_config,
     assert search_command.search_config_path == search_command.trainer_config_path.with_name(
         'search_config.yaml'
     )
+    assert search_command.scratch_config_path == search_command.trainer_config_path.with_name(
+        'search_config_1234.yaml'
+    )
 
     assert search_command.search_counter == 0
 
 
+def test_search_command_rejects_invalid_configuration(
+    patch_search_command, namespace_args, grim_config, trainer_config
+):
+    """Tests that searches are not created from configurations with misspelled behaviors or invalid values."""
+
+    grim_config['search']['behavior_name'] = '3DBal'
+
+    with pytest.raises(grimagents.config.InvalidConfigurationError):
+        PerformGridSearch(namespace_args)
+
+    grim_config['search']['behavior_name'] = '3DBall'
+    trainer_config['behaviors']['3DBall']['network_settings']['hidden_units'] = 0
+
+    with pytest.raises(grimagents.config.InvalidConfigurationError):
+        PerformGridSearch(namespace_args)
+
+
 def test_search_command_get_run_id(patch_search_command, namespace_args):
     """Tests for the correct construction of a search run_id."""
 
@@ -346,7 +415,7 @@ def test_perform_search_with_configuration(
             'grimagents',
             str(Path(namespace_args.configuration_file)),
             '--trainer-config',
-            str(Path('config/search_config.yaml')),
+            str(Path('config/search_config_1234.yaml')),
             '--run-id',
             '3DBall_00',
         ]
@@ -375,7 +444,7 @@ def test_perform_grid_search(
 
     search = PerformGridSearch(namespace_args)
 
-    search.search_config_path = test_file
+    search.scratch_config_path = test_file
     with test_file.open('w') as f:
         f.write('Test search configuration')
 
@@ -406,7 +475,7 @@ def test_resume_perform_grid_search(
 
     search_counter = Counter()
 
-    def mock_perform_search_with_configuration(self, trainer_config):
+    def mock_perform_search_with_configuration(self, trainer_config, run_id=None, config_path=None):
         search_counter.increment_counter()
 
     monkeypatch.setattr(
@@ -422,6 +491,74 @@ def test_resume_perform_grid_search(
     assert search_counter.count == 7
 
 
+def test_record_search_result(monkeypatch, patch_search_command, namespace_args):
+    """Tests that a search result record contains the search configuration and the training run's summary."""
+
+    records = []
+
+    def mock_find_run_summary(run_id):
+        assert run_id == '3DBall_02'
+        return {'run_id': '3DBall_02-2019-09-13_03-41-44', 'mean_reward': 1.5}
+
+    def mock_append_search_result(file_path, record):
+        assert file_path == Path('config/3DBall_search.jsonl')
+        records.append(record)
+
+    monkeypatch.setattr(grimagents.results, 'find_run_summary', mock_find_run_summary)
+    monkeypatch.setattr(grimagents.results, 'append_search_result', mock_append_search_result)
+
+    search = SearchCommand(namespace_args)
+    summary = search.record_search_result('3DBall_02', {'hyperparameters.batch_size': 64})
+
+    assert summary['mean_reward'] == 1.5
+    assert records[0]['run_id'] == '3DBall_02'
+    assert records[0]['search_config'] == {'hyperparameters.batch_size': 64}
+    assert records[0]['summary'] == summary
+    assert records[0]['objectives'] == {'reward': 1.5, 'steps_per_second': 0.0, 'wall_time': 0.0}
+    assert search.trial_objectives[0][0] == '3DBall_02'
+
+
+def test_output_search_profile(monkeypatch, patch_search_command, namespace_args, caplog):
+    """Tests that recorded trainer profiles are reported, including records without a profile."""
+
+    def mock_load_search_results(file_path):
+        return [
+            {
+                'timestamp': '2019-09-13_03-41-44',
+                'run_id': '3DBall_00',
+                'search_config': {'hyperparameters.batch_size': 64},
+                'summary': {
+                    'profile': {
+                        'env_step_share': 0.25,
+                        'update_share': 0.6,
+                        'bound': 'update',
+                        'hot_path': [
+                            {
+                                'block': 'TrainerController.start_learning',
+                                'self_share': 0.6,
+                                'mean': 0.5,
+                            }
+                        ],
+                    }
+                },
+            },
+            {
+                'timestamp': '2019-09-13_03-41-44',
+                'run_id': '3DBall_01',
+                'search_config': {'hyperparameters.batch_size': 256},
+                'summary': None,
+            },
+        ]
+
+    monkeypatch.setattr(grimagents.results, 'load_search_results', mock_load_search_results)
+
+    with caplog.at_level('INFO', logger='grimagents.search'):
+        OutputSearchProfile(namespace_args).execute()
+
+    assert 'Environment step: 25.0%, Policy update: 60.0% (update bound)' in caplog.text
+    assert 'No trainer profile recorded' in caplog.text
+
+
 def test_export_grid_search_configuration(
     monkeypatch,
     patch_search_command,
@@ -480,7 +617,7 @@ def test_perform_random_search(
     namespace_args.random = 4
     search = PerformRandomSearch(namespace_args)
 
-    search.search_config_path = test_file
+    search.scratch_config_path = test_file
     with test_file.open('w') as f:
         f.write('Test search configuration')
 
@@ -490,6 +627,30 @@ def test_perform_random_search(
     assert not test_file.exists()
 
 
+def test_random_search_design(monkeypatch, patch_search_command, namespace_args, trainer_config):
+    """Tests that random search training runs are spread over the search space when a design is used."""
+
+    def mock_get_trainer_config_with_overrides(self, search_overrides):
+        return trainer_config
+
+    monkeypatch.setattr(
+        grimagents.parameter_search.ParameterSearch,
+        'get_trainer_config_with_overrides',
+        mock_get_trainer_config_with_overrides,
+    )
+
+    namespace_args.random = 4
+    namespace_args.design = 'lhs'
+    trials = PerformRandomSearch(namespace_args).get_trials(4)
+
+    # Each quarter of every search parameter's range holds one training run
+    batch_sizes = sorted(
+        search_config['hyperparameters.batch_size'] for _, search_config, _ in trials
+    )
+    for i, batch_size in enumerate(batch_sizes):
+        assert i / 4 - 0.01 <= (batch_size - 64) / 193 < (i + 1) / 4
+
+
 def test_perform_bayesian_search_init(patch_search_command, namespace_args):
     """Tests for the correct construction of a bayesian search trainer config output path."""
 
@@ -592,7 +753,7 @@ def test_perform_bayes_search(
             'grimagents',
             str(Path(namespace_args.configuration_file)),
             '--trainer-config',
-            str(Path('config/search_config.yaml')),
+            str(Path('config/search_config_1234.yaml')),
             '--run-id',
             '3DBall_00',
         ]
@@ -605,6 +766,48 @@ def test_perform_bayes_search(
     search.perform_bayes_search(batch_size=84, beta=0.002, buffer_size_multiple=88)
 
 
+def test_perform_bayes_search_uses_run_summary(
+    monkeypatch,
+    patch_search_command,
+    patch_perform_bayesian_search,
+    patch_get_last_mean_reward_from_log,
+    namespace_args,
+):
+    """Tests that a Bayesian search scores a training run with the mean reward from its summary, when one was written."""
+
+    def mock_find_run_summary(run_id):
+        return {'mean_reward': 2.5}
+
+    monkeypatch.setattr(grimagents.results, 'find_run_summary', mock_find_run_summary)
+
+    namespace_args.bayesian = [1, 3]
+    search = PerformBayesianSearch(namespace_args)
+    assert search.perform_bayes_search(batch_size=84) == 2.5
+    assert search.search_counter == 1
+
+
+def test_perform_bayes_search_uses_event_files(
+    monkeypatch,
+    patch_search_command,
+    patch_perform_bayesian_search,
+    patch_get_last_mean_reward_from_log,
+    namespace_args,
+):
+    """Tests that a Bayesian search scores a training run that did not write a summary with the last reward in its event files, before falling back to the log file."""
+
+    def mock_load_scalar_curve(run_folder, behavior_name=None):
+        assert behavior_name == '3DBall'
+        return [(1000, 0.5), (2000, 2.125)] if run_folder.name == '3DBall_00' else []
+
+    monkeypatch.setattr(grimagents.results, 'find_run_summary', lambda run_id: None)
+    monkeypatch.setattr(grimagents.tensorboard_events, 'load_scalar_curve', mock_load_scalar_curve)
+
+    namespace_args.bayesian = [1, 3]
+    search = PerformBayesianSearch(namespace_args)
+    assert search.perform_bayes_search(batch_size=84) == 2.125
+    assert search.perform_bayes_search(batch_size=84) == 1.358
+
+
 @pytest.mark.parametrize('reward', [0, 1, -1, 1.358, -1.358])
 def test_get_last_mean_reward_from_log(monkeypatch, reward):
     """Tests for retrieval of the final mean reward of the last training run."""
@@ -664,6 +867,73 @@ def test_save_max_to_file(
     search.save_max_to_file(max)
 
 
+def test_save_max_to_file_exports_knee(
+    monkeypatch, patch_search_command, patch_perform_bayesian_search, namespace_args, caplog
+):
+    """Tests that the configuration at the knee of the Pareto front is saved along with the best configuration, and that the front is reported."""
+
+    written = {}
+    overrides = []
+
+    def mock_write_yaml_file(yaml_data, file_path):
+        written[file_path] = yaml_data
+
+    def mock_get_trainer_config_with_overrides(self, search_config):
+        overrides.append(search_config)
+        return {'overrides': search_config}
+
+    monkeypatch.setattr(grimagents.command_util, 'write_yaml_file', mock_write_yaml_file)
+    monkeypatch.setattr(
+        BayesianSearch, 'get_trainer_config_with_overrides', mock_get_trainer_config_with_overrides
+    )
+
+    search = PerformBayesianSearch(namespace_args)
+    search.save_max_to_file({'target': 2.0, 'params': {}})
+    assert list(written) == [Path('config/3DBall_bayes.yaml')]
+
+    search.trial_objectives = [
+        ('3DBall_00', {'index': 0}, TrialObjectives(1.0, 100.0, 100.0)),
+        ('3DBall_01', {'index': 1}, TrialObjectives(2.0, 25.0, 400.0)),
+        ('3DBall_02', {'index': 2}, TrialObjectives(1.9, 80.0, 150.0)),
+    ]
+    search.save_max_to_file({'target': 2.0, 'params': {}})
+    assert written[Path('config/3DBall_bayes_knee.yaml')] == {'overrides': {'index': 2}}
+
+    with caplog.at_level('INFO', logger='grimagents.search'):
+        search.output_pareto_front()
+
+    assert '3DBall_02: reward 1.9, 2 minutes, 30 seconds, 80.0 steps/s (knee)' in caplog.text
+
+
+@pytest.mark.parametrize(
+    'objective, cost_weight, score',
+    [('reward', None, 2.5), ('reward_per_hour', None, 5.0), ('cost_weighted', 2.0, 1.5)],
+)
+def test_perform_bayes_search_objective(
+    monkeypatch,
+    patch_search_command,
+    patch_perform_bayesian_search,
+    namespace_args,
+    objective,
+    cost_weight,
+    score,
+):
+    """Tests that Bayesian search training runs are scored on the search's objective."""
+
+    def mock_find_run_summary(run_id):
+        return {'mean_reward': 2.5, 'steps_per_second': 50.0, 'duration': 1800.0}
+
+    monkeypatch.setattr(grimagents.results, 'find_run_summary', mock_find_run_summary)
+
+    namespace_args.bayesian = [1, 3]
+    namespace_args.objective = objective
+    namespace_args.cost_weight = cost_weight
+    search = PerformBayesianSearch(namespace_args)
+
+    assert search.perform_bayes_search(batch_size=84) == score
+    assert search.scores == [score]
+
+
 def test_get_log_folder_path(
     monkeypatch,
     patch_search_command,
@@ -739,3 +1009,612 @@ def test_get_load_log_paths(
     for path in retrieved_log_paths:
         assert path.suffix == '.json'
         assert path in log_paths
+
+
+def test_search_budget(monkeypatch):
+    """Tests that a search budget estimates whether training runs fit from the measured step rate. Ensures:
+
+    - Training runs are assumed to fit until a step rate is measured
+    - The trial timeout caps the steps a training run is expected to take
+    - Spent budgets end the search
+    """
+
+    now = [1000.0]
+
+    def mock_monotonic():
+        return now[0]
+
+    monkeypatch.setattr(time, 'monotonic', mock_monotonic)
+
+    budget = SearchBudget(time_budget=600, step_budget=25000)
+    assert budget.get_exhausted_reason(max_steps=20000) is None
+    assert budget.get_trial_time_limit() == 600
+
+    # 10000 steps in 100 seconds
+    budget.record_trial({'step': 10000, 'duration': 100})
+    now[0] += 100
+    assert budget.get_steps_per_second() == 100
+    assert budget.get_steps_remaining() == 15000
+    assert budget.get_exhausted_reason(max_steps=10000) is None
+    assert 'steps' in budget.get_exhausted_reason(max_steps=20000)
+    assert 'steps' in budget.get_exhausted_reason(max_steps=10000, replicates=2)
+
+    now[0] += 450
+    assert 'remain' in budget.get_exhausted_reason(max_steps=10000)
+    assert budget.get_trial_time_limit() == 50
+
+    budget.trial_timeout = 40
+    assert budget.get_exhausted_reason(max_steps=10000) is None
+    assert budget.get_trial_time_limit() == 40
+
+    now[0] += 50
+    assert budget.get_exhausted_reason(max_steps=10000) == 'the time budget is spent'
+
+    budget = SearchBudget(step_budget=10000)
+    budget.record_trial({'step': 10000, 'duration': 0})
+    assert budget.get_steps_per_second() == 0
+    assert budget.get_exhausted_reason() == 'the step budget is spent'
+    assert budget.get_trial_time_limit() is None
+
+
+def test_get_training_command_time_limit(patch_search_command, namespace_args):
+    """Tests that search training runs are given a time limit when the search has a trial timeout."""
+
+    namespace_args.trial_timeout = 3600
+    search_command = SearchCommand(namespace_args)
+
+    assert search_command.get_training_command('3DBall_00')[-2:] == ['--time-limit', '3600']
+
+
+def test_grid_search_stops_at_step_budget(
+    monkeypatch,
+    patch_search_command,
+    patch_perform_grid_search,
+    patch_perform_search_with_configuration,
+    namespace_args,
+):
+    """Tests that a grid search stops launching training runs that would exceed its step budget."""
+
+    def mock_find_run_summary(run_id):
+        return {'step': 50000, 'duration': 100}
+
+    monkeypatch.setattr(grimagents.results, 'find_run_summary', mock_find_run_summary)
+
+    # Each training run is configured for 50000 steps
+    namespace_args.step_budget = 120000
+    search = PerformGridSearch(namespace_args)
+    search.execute()
+
+    assert search.search_counter == 1
+    assert search.budget.steps_used == 100000
+
+
+def test_grid_search_skips_constraint_violations(
+    monkeypatch, patch_search_command, namespace_args, grim_config
+):
+    """Tests that a grid search only trains the indexes that satisfy the search constraints and that the search count excludes the rest."""
+
+    grim_config['search']['constraints'] = ['hyperparameters.buffer_size >= 12800']
+
+    search = PerformGridSearch(namespace_args)
+    trials = search.get_trials()
+
+    assert [index for index, _, _ in trials] == [2, 3, 4, 5, 6, 7]
+    assert all(
+        trainer_config['behaviors']['3DBall']['hyperparameters']['buffer_size'] >= 12800
+        for _, _, trainer_config in trials
+    )
+    assert search.grid_search.get_valid_search_count() == 6
+
+
+def test_output_search_estimate_skips_constraint_violations(
+    patch_search_command, namespace_args, grim_config
+):
+    """Tests that a grid search estimate only counts the indexes the grid search would train."""
+
+    grim_config['search']['constraints'] = ['hyperparameters.buffer_size >= 12800']
+
+    namespace_args.estimate = True
+    trials = grimagents.search_commands.OutputSearchEstimate(namespace_args).get_trials()
+
+    assert [index for index, _, _ in trials] == [2, 3, 4, 5, 6, 7]
+
+
+def test_perform_bayes_search_constraint_penalty(
+    monkeypatch, patch_search_command, patch_perform_bayesian_search, namespace_args, grim_config
+):
+    """Tests that Bayesian suggestions violating the search constraints are scored below the scores observed without being trained."""
+
+    def mock_get_search_config_from_point(self, point):
+        return dict(point)
+
+    def mock_run(command):
+        raise AssertionError('Training should not be performed')
+
+    monkeypatch.setattr(
+        BayesianSearch, 'get_search_config_from_point', mock_get_search_config_from_point
+    )
+    monkeypatch.setattr(subprocess, 'run', mock_run)
+
+    grim_config['search']['constraints'] = ['hyperparameters.batch_size <= 128']
+
+    namespace_args.bayesian = [1, 3]
+    search = PerformBayesianSearch(namespace_args)
+
+    assert search.perform_bayes_search(**{'hyperparameters.batch_size': 200}) == -1.0
+
+    search.scores = [0.5, 2.5]
+    assert search.perform_bayes_search(**{'hyperparameters.batch_size': 200}) == -1.5
+    assert search.search_counter == 0
+
+    assert PerformBayesianSearch.get_constraint_penalty([0.25, 0.5]) == -0.75
+
+
+def test_perform_bayes_search_budget_exhausted(
+    patch_search_command, patch_perform_bayesian_search, namespace_args
+):
+    """Tests that a Bayesian search training run that would exceed the step budget ends the optimization."""
+
+    namespace_args.bayesian = [1, 3]
+    namespace_args.step_budget = 1000
+    search = PerformBayesianSearch(namespace_args)
+
+    with pytest.raises(SearchBudgetExhausted):
+        search.perform_bayes_search(batch_size=84)
+
+    assert search.search_counter == 0
+
+
+def test_parallel_grid_search(
+    monkeypatch, patch_search_command, patch_perform_grid_search, namespace_args
+):
+    """Tests that a grid search executes training runs at the same time. Ensures:
+
+    - Every training run is executed with its own run id and trainer config file
+    - Trainer config files written for a single training run are deleted
+    """
+
+    scratch_paths = []
+    run_ids = []
+
+    def mock_get_scratch_path(file_path):
+        scratch_paths.append(file_path.with_name(f'{file_path.stem}_{len(scratch_paths)}.yaml'))
+        return scratch_paths[-1]
+
+    def mock_perform_search_with_configuration(self, trainer_config, run_id=None, config_path=None):
+        run_ids.append((run_id, config_path))
+
+    monkeypatch.setattr(grimagents.coordination, 'get_scratch_path', mock_get_scratch_path)
+    monkeypatch.setattr(
+        SearchCommand, 'perform_search_with_configuration', mock_perform_search_with_configuration
+    )
+
+    namespace_args.parallel = 3
+    search = PerformGridSearch(namespace_args)
+    search.execute()
+
+    assert sorted(run_id for run_id, _ in run_ids) == [f'3DBall_{i:02d}' for i in range(10)]
+    assert len({config_path for _, config_path in run_ids}) == 10
+    assert search.scratch_config_path not in [config_path for _, config_path in run_ids]
+    assert search.trials_finished == 10
+
+
+def test_get_search_eta(monkeypatch, patch_search_command, namespace_args, trainer_config):
+    """Tests that a search's expected time remaining combines the progress reported by training runs in progress with estimates for pending training runs."""
+
+    now = 10000.0
+
+    def mock_time():
+        return now
+
+    def mock_find_run_progress(run_id):
+        if run_id == '3DBall_00':
+            return {'step': 1000, 'time_remaining': 100.0, 'updated': now - 10}
+        # A progress file left behind by an earlier training run with the same run id
+        return {'step': 1000, 'time_remaining': 5.0, 'updated': now - 1000}
+
+    monkeypatch.setattr(time, 'time', mock_time)
+    monkeypatch.setattr(grimagents.results, 'find_run_progress', mock_find_run_progress)
+
+    search = SearchCommand(namespace_args)
+    assert search.get_search_eta([], [(0, {}, trainer_config)]) is None
+
+    # 100 steps per second and a 50 second startup, 550 seconds for a 50000 step training run
+    search.duration_model = grimagents.estimate.DurationModel(
+        [{'step': 10000, 'time_elapsed': 100.0, 'duration': 150.0}]
+    )
+
+    running = [
+        grimagents.search_commands.RunningTrial('3DBall_00', {}, trainer_config, now - 60, None),
+        grimagents.search_commands.RunningTrial('3DBall_01', {}, trainer_config, now - 50, None),
+    ]
+    pending = [(2, {}, trainer_config)]
+
+    assert search.get_search_eta(running, [], workers=2) == 500
+    assert search.get_search_eta(running, pending, workers=2) == 640
+
+    running[1] = running[1]._replace(time_limit=100)
+    assert search.get_search_eta(running, pending, workers=2) == 600
+
+
+def test_output_search_estimate(
+    monkeypatch, patch_search_command, patch_perform_grid_search, namespace_args, caplog
+):
+    """Tests that the expected duration of a grid search accounts for the training runs executed at the same time."""
+
+    def mock_load_run_summaries():
+        return [
+            {
+                'step': 10000,
+                'time_elapsed': 100.0,
+                'duration': 150.0,
+                'arguments': ['--env', 'builds/3DBall/3DBall.exe'],
+            }
+        ]
+
+    monkeypatch.setattr(grimagents.results, 'load_run_summaries', mock_load_run_summaries)
+
+    namespace_args.estimate = True
+    namespace_args.parallel = 4
+
+    caplog.set_level('INFO', logger='grimagents.search')
+    grimagents.search_commands.OutputSearchEstimate(namespace_args).execute()
+
+    # 10 training runs of 550 seconds on 4 workers
+    assert 'will perform 10 training runs' in caplog.text
+    assert '100.0 steps per second' in caplog.text
+    assert (
+        'Estimated search duration: 27 minutes, 30 seconds running 4 training runs' in caplog.text
+    )
+
+
+@pytest.mark.parametrize(
+    'schedule, expected_order',
+    [
+        ('longest', ['3DBall_01', '3DBall_03', '3DBall_00']),
+        ('index', ['3DBall_00', '3DBall_01', '3DBall_03']),
+    ],
+)
+def test_run_trials_schedule(
+    patch_search_command,
+    patch_perform_search_with_configuration,
+    namespace_args,
+    caplog,
+    schedule,
+    expected_order,
+):
+    """Tests the order parallel training runs are launched in. Ensures:
+
+    - Training runs are launched longest first unless '--schedule index' is used
+    - Training runs that would exceed the step budget are skipped rather than ending the search
+    """
+
+    def get_trial(index, max_steps):
+        trainer_config = {'behaviors': {'3DBall': {'max_steps': max_steps}}}
+        return (index, {'max_steps': max_steps}, trainer_config)
+
+    namespace_args.parallel = 2
+    namespace_args.schedule = schedule
+    namespace_args.step_budget = 7000
+    search = SearchCommand(namespace_args)
+
+    caplog.set_level('INFO', logger='grimagents.search')
+    search.run_trials(
+        [get_trial(0, 1000), get_trial(1, 5000), get_trial(2, 8000), get_trial(3, 3000)]
+    )
+
+    launched = [
+        record.getMessage()[len('Search: ') :]
+        for record in caplog.records
+        if record.getMessage().startswith('Search: ')
+    ]
+    assert launched == expected_order
+    assert 'Skipping search 3DBall_02' in caplog.text
+    assert search.trials_finished == 3
+
+
+def test_has_free_worker(monkeypatch, patch_search_command, namespace_args):
+    """Tests that training runs shutting down don't occupy a worker when pipelining. Ensures:
+
+    - Progress left behind by earlier training runs with the same run id is ignored
+    - No more than one training run per worker is shutting down at a time
+    """
+
+    now = 10000.0
+
+    def mock_find_run_progress(run_id):
+        if run_id == '3DBall_00':
+            return {'step': 50000, 'phase': 'finishing', 'updated': now}
+        return {'step': 50000, 'phase': 'finishing', 'updated': now - 1000}
+
+    monkeypatch.setattr(grimagents.results, 'find_run_progress', mock_find_run_progress)
+
+    def get_trial(run_id):
+        return grimagents.search_commands.RunningTrial(run_id, {}, {}, now - 100, None)
+
+    search = SearchCommand(namespace_args)
+
+    assert search.has_free_worker([], workers=1)
+    assert search.has_free_worker([get_trial('3DBall_00')], workers=1)
+    assert not search.has_free_worker([get_trial('3DBall_01')], workers=1)
+    assert not search.has_free_worker([get_trial('3DBall_00'), get_trial('3DBall_00')], workers=1)
+
+    namespace_args.pipeline = False
+    assert not search.has_free_worker([get_trial('3DBall_00')], workers=1)
+
+
+def test_pipelined_grid_search(
+    monkeypatch, patch_search_command, patch_perform_grid_search, namespace_args
+):
+    """Tests that a sequential grid search launches its next training run once the last one finishes training, using a trainer config file of its own."""
+
+    finishing = threading.Event()
+    release = threading.Event()
+    launched = []
+    scratch_paths = []
+
+    def mock_get_scratch_path(file_path):
+        scratch_paths.append(file_path.with_name(f'{file_path.stem}_{len(scratch_paths)}.yaml'))
+        return scratch_paths[-1]
+
+    def mock_perform_search_with_configuration(self, trainer_config, run_id=None, config_path=None):
+        launched.append((run_id, config_path))
+
+        # The first training run reports that it finished training, then waits to be released
+        if run_id == '3DBall_00':
+            finishing.set()
+            release.wait(timeout=5)
+
+    def mock_find_run_progress(run_id):
+        if run_id == '3DBall_00' and finishing.is_set():
+            return {
+                'step': 50000,
+                'time_remaining': 0.0,
+                'phase': 'finishing',
+                'updated': time.time(),
+            }
+        return None
+
+    def mock_record_search_result(self, run_id, search_config):
+        # Only the second training run was launched while the first shut down
+        if run_id == '3DBall_01':
+            release.set()
+
+    monkeypatch.setattr(grimagents.search_commands, 'PIPELINE_INTERVAL', 0.01)
+    monkeypatch.setattr(grimagents.coordination, 'get_scratch_path', mock_get_scratch_path)
+    monkeypatch.setattr(grimagents.results, 'find_run_progress', mock_find_run_progress)
+    monkeypatch.setattr(
+        SearchCommand, 'perform_search_with_configuration', mock_perform_search_with_configuration
+    )
+    monkeypatch.setattr(SearchCommand, 'record_search_result', mock_record_search_result)
+
+    search = PerformGridSearch(namespace_args)
+    search.execute()
+
+    assert [run_id for run_id, _ in launched][:2] == ['3DBall_00', '3DBall_01']
+    assert len(launched) == 10
+    assert search.scratch_config_path not in [config_path for _, config_path in launched]
+    assert release.is_set()
+
+
+def test_perform_search_with_replicates(monkeypatch, patch_search_command, namespace_args):
+    """Tests that each replicate of a search training run is launched at the same time with a seed of its own, counting up from the configuration's '--seed'."""
+
+    commands = []
+
+    class MockPopen:
+        def __init__(self, command):
+            commands.append(command)
+
+        def wait(self):
+            assert len(commands) == 3
+
+    monkeypatch.setattr(subprocess, 'Popen', MockPopen)
+
+    namespace_args.replicates = 3
+    search = SearchCommand(namespace_args)
+    search.grim_config['--seed'] = 7
+    search.perform_search_with_configuration({}, run_id='3DBall_04')
+
+    assert [command[-4:] for command in commands] == [
+        ['3DBall_04_r0', '--seed', '7', '--auto-port'],
+        ['3DBall_04_r1', '--seed', '8', '--auto-port'],
+        ['3DBall_04_r2', '--seed', '9', '--auto-port'],
+    ]
+
+    search.grim_config['--seed'] = ''
+    assert search.get_replicates('3DBall_04')[0] == ('3DBall_04_r0', 0)
+
+
+def test_concurrent_training_base_ports(
+    monkeypatch, tmp_path, patch_search_command, namespace_args
+):
+    """Tests that training runs executing at the same time lease their ports, and are given ranges of ports of their own when the grimagents configuration sets '--base-port'."""
+
+    commands = []
+
+    class MockPopen:
+        def __init__(self, command):
+            commands.append(command)
+
+        def wait(self):
+            pass
+
+    monkeypatch.setattr(subprocess, 'Popen', MockPopen)
+    monkeypatch.setattr(grimagents.settings, 'get_runtime_folder', lambda: tmp_path)
+    monkeypatch.setattr(grimagents.coordination, 'is_port_available', lambda port: True)
+
+    namespace_args.replicates = 2
+    search = SearchCommand(namespace_args)
+    search.grim_config['--base-port'] = 5010
+    search.grim_config['--num-envs'] = 2
+    search.perform_search_with_configuration({}, run_id='3DBall_04')
+
+    assert [command[-3:] for command in commands] == [
+        ['--base-port', '5010', '--auto-port'],
+        ['--base-port', '5012', '--auto-port'],
+    ]
+    assert search.trial_ports == {}
+
+    # Ports are still kept apart when the port registry can't be used
+    def mock_open_port_registry():
+        raise grimagents.coordination.CoordinationError('Runtime folder is not private')
+
+    monkeypatch.setattr(grimagents.coordination, 'open_port_registry', mock_open_port_registry)
+    assert search.get_trial_port_arguments('3DBall_05_r0')[:2] == ['--base-port', 5010]
+    assert search.get_trial_port_arguments('3DBall_05_r1')[:2] == ['--base-port', 5012]
+
+    # A single training run at a time uses the configuration's ports
+    namespace_args.replicates = 1
+    search = SearchCommand(namespace_args)
+    search.grim_config['--base-port'] = 5010
+    assert search.get_trial_port_arguments('3DBall_00') == []
+
+
+def test_record_replicate_results(monkeypatch, patch_search_command, namespace_args):
+    """Tests that the replicates of a search training run are recorded individually, and ranked by their aggregate."""
+
+    records = []
+    rewards = {'3DBall_02_r0': 1.0, '3DBall_02_r1': 3.0, '3DBall_02_r2': 2.0}
+
+    def mock_find_run_summary(run_id):
+        return {'mean_reward': rewards[run_id], 'steps_per_second': 10.0, 'duration': 60.0}
+
+    def mock_append_search_result(file_path, record):
+        records.append(record)
+
+    monkeypatch.setattr(grimagents.results, 'find_run_summary', mock_find_run_summary)
+    monkeypatch.setattr(grimagents.results, 'append_search_result', mock_append_search_result)
+
+    namespace_args.replicates = 3
+    namespace_args.replicate_score = 'median'
+    search = SearchCommand(namespace_args)
+    summaries = search.record_trial('3DBall_02', {'hyperparameters.batch_size': 64})
+
+    assert [summary['mean_reward'] for summary in summaries] == [1.0, 3.0, 2.0]
+    assert [record.get('replicate_of') for record in records] == ['3DBall_02'] * 3 + [None]
+    assert records[3]['replicates']['seeds'] == [0, 1, 2]
+    assert records[3]['objectives']['reward'] == 2.0
+    assert search.trials_finished == 1
+    assert search.trial_objectives == [
+        ('3DBall_02', {'hyperparameters.batch_size': 64}, TrialObjectives(2.0, 10.0, 60.0))
+    ]
+
+
+def test_perform_bayes_search_replicates(
+    monkeypatch, patch_search_command, patch_perform_bayesian_search, namespace_args
+):
+    """Tests that a Bayesian search scores a search configuration on its replicates, and passes the spread of their scores to the optimizer as observation noise."""
+
+    rewards = {'3DBall_00_r0': 1.0, '3DBall_00_r1': 3.0}
+
+    class MockPopen:
+        def __init__(self, command):
+            pass
+
+        def wait(self):
+            pass
+
+    class MockOptimizer:
+        def __init__(self):
+            self.space = Namespace(target=[0.0])
+            self.gp_params = {}
+
+        def set_gp_params(self, **params):
+            self.gp_params.update(params)
+
+    def mock_find_run_summary(run_id):
+        return {'mean_reward': rewards[run_id]}
+
+    monkeypatch.setattr(subprocess, 'Popen', MockPopen)
+    monkeypatch.setattr(grimagents.results, 'find_run_summary', mock_find_run_summary)
+
+    namespace_args.bayesian = [1, 3]
+    namespace_args.replicates = 2
+    namespace_args.replicate_score = 'lcb'
+    search = PerformBayesianSearch(namespace_args)
+    search.optimizer = MockOptimizer()
+    search.scores = [0.0]
+    search.variances = [0.0]
+
+    assert search.perform_bayes_search(batch_size=84) == 1.0
+    assert search.variances == [0.0, 1.0]
+
+    # The variance of the observed scores [0, 1] is 0.25
+    assert list(search.optimizer.gp_params['alpha']) == [1e-6, 4.0]
+
+
+def test_get_throughput(monkeypatch, patch_search_command, namespace_args):
+    """Tests that the throughput of training runs in progress is measured from the steps between their progress updates. Ensures:
+
+    - Training runs count once their progress has been read twice since they started
+    - Training runs that are finishing, or left progress behind before they started, do not count
+    """
+
+    now = 10000.0
+    progress = {
+        '3DBall_00': {'step': 1000, 'phase': 'training', 'updated': now},
+        '3DBall_01': {'step': 5000, 'phase': 'finishing', 'updated': now},
+        '3DBall_02': {'step': 5000, 'phase': 'training', 'updated': now - 1000},
+    }
+
+    def mock_find_run_progress(run_id):
+        return progress[run_id]
+
+    monkeypatch.setattr(grimagents.results, 'find_run_progress', mock_find_run_progress)
+
+    running = [
+        grimagents.search_commands.RunningTrial(f'3DBall_{i:02d}', {}, {}, now - 100, None)
+        for i in range(3)
+    ]
+
+    search = SearchCommand(namespace_args)
+    assert search.get_throughput(running) == (0.0, 0)
+
+    progress['3DBall_00'] = {'step': 3000, 'phase': 'training', 'updated': now + 10}
+    assert search.get_throughput(running) == (200.0, 1)
+
+    # The rate is kept until the next progress update
+    assert search.get_throughput(running) == (200.0, 1)
+
+
+def test_adaptive_parallel_grid_search(
+    monkeypatch, patch_search_command, patch_perform_grid_search, namespace_args, caplog
+):
+    """Tests that a grid search with '--adaptive-parallel' starts at the level an earlier search settled on, and saves the throughput measured at each level."""
+
+    saved = {}
+
+    def mock_load_level(file_path):
+        assert file_path == Path('config/3DBall_concurrency.json')
+        return 2
+
+    def mock_save_record(file_path, controller):
+        saved[file_path] = controller.get_record()
+
+    def mock_get_throughput(self, running):
+        return 100.0 * len(running), len(running)
+
+    def mock_perform_search_with_configuration(self, trainer_config, run_id=None, config_path=None):
+        time.sleep(0.05)
+
+    monkeypatch.setattr(grimagents.search_commands, 'THROUGHPUT_INTERVAL', 0.01)
+    monkeypatch.setattr(os, 'cpu_count', lambda: 4)
+    monkeypatch.setattr(grimagents.concurrency, 'load_level', mock_load_level)
+    monkeypatch.setattr(grimagents.concurrency, 'save_record', mock_save_record)
+    monkeypatch.setattr(grimagents.concurrency, 'MEASUREMENT_WINDOW', 0.0)
+    monkeypatch.setattr(grimagents.concurrency, 'get_host_load', lambda: None)
+    monkeypatch.setattr(SearchCommand, 'get_throughput', mock_get_throughput)
+    monkeypatch.setattr(
+        SearchCommand, 'perform_search_with_configuration', mock_perform_search_with_configuration
+    )
+
+    namespace_args.adaptive_parallel = True
+    search = PerformGridSearch(namespace_args)
+
+    with caplog.at_level('INFO', logger='grimagents.search'):
+        search.execute()
+
+    assert search.trials_finished == 10
+    assert 'starting at 2' in caplog.text
+    assert saved[Path('config/3DBall_concurrency.json')]['curve']['2'] == 200.0
@@ -0,0 +1,84 @@
+import numpy
+import pytest
+
+import grimagents.search_constraints as search_constraints
+
+from grimagents.search_constraints import InvalidSearchConstraint, SearchConstraint
+
+
+def test_search_constraint_keys():
+    """Tests that the settings a constraint references are recorded once each, in order."""
+
+    constraint = SearchConstraint(
+        'hyperparameters.batch_size * 2 <= hyperparameters.buffer_size and hyperparameters.batch_size >= 32'
+    )
+
+    assert constraint.keys == ['hyperparameters.batch_size', 'hyperparameters.buffer_size']
+    assert str(constraint) == (
+        'hyperparameters.batch_size * 2 <= hyperparameters.buffer_size and hyperparameters.batch_size >= 32'
+    )
+
+
+def test_search_constraint_evaluate():
+    """Tests evaluating constraints over a batch of search configurations. Ensures:
+
+    - Arithmetic, chained comparisons and boolean operators are supported
+    - Search configurations missing a setting satisfy the constraint
+    """
+
+    columns = {
+        'batch_size': numpy.array([64.0, 512.0, 1024.0, numpy.nan]),
+        'buffer_size': numpy.array([1024.0, 512.0, 512.0, 512.0]),
+        'memory_size': numpy.array([128.0, 130.0, 0.0, 64.0]),
+    }
+
+    def evaluate(expression):
+        return SearchConstraint(expression).evaluate(columns).tolist()
+
+    assert evaluate('batch_size <= buffer_size') == [True, True, False, True]
+    assert evaluate('memory_size % 4 == 0') == [True, False, True, True]
+    assert evaluate('0 < memory_size <= 128') == [True, False, False, True]
+    assert evaluate('buffer_size / batch_size >= 2 or not memory_size > 0') == [
+        True,
+        False,
+        True,
+        True,
+    ]
+    assert evaluate('-batch_size > -100') == [True, False, False, True]
+
+
+@pytest.mark.parametrize(
+    'expression',
+    [
+        'batch_size',
+        'batch_size + 1',
+        'batch_size in [1, 2]',
+        'batch_size <= max(buffer_size)',
+        'trainer_type == "ppo"',
+        'batch_size <=',
+        'batch_size ** 2 < buffer_size',
+        4,
+    ],
+)
+def test_invalid_search_constraint(expression):
+    """Tests that expressions other than comparisons of settings, numbers and arithmetic are rejected."""
+
+    with pytest.raises(InvalidSearchConstraint):
+        SearchConstraint(expression)
+
+
+def test_get_constraints():
+    """Tests reading constraints from a single expression, a list of expressions or nothing."""
+
+    assert search_constraints.get_constraints(None) == []
+    assert len(search_constraints.get_constraints('time_horizon >= 32')) == 1
+    assert len(search_constraints.get_constraints(['time_horizon >= 32', 'max_steps > 0'])) == 2
+
+
+def test_get_float_column():
+    """Tests that unset and non-numeric values become NaN."""
+
+    column = search_constraints.get_float_column([4, 0.5, None, 'linear', True])
+
+    assert column[:2].tolist() == [4.0, 0.5]
+    assert numpy.isnan(column[2:]).all()
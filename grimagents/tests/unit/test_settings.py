@@ -1,3 +1,7 @@
+import tempfile
+
+from pathlib import Path
+
 import grimagents.settings as settings
 
 
@@ -6,3 +10,19 @@ def test_training_wrapper_path():
 
     assert settings.get_training_wrapper_path().parts[-1] == ('training_wrapper.py')
     assert settings.get_training_wrapper_path().exists()
+
+
+def test_get_runtime_folder(monkeypatch):
+    """Tests that the runtime folder is unique to the current user unless it is set explicitly."""
+
+    monkeypatch.delenv('GRIMAGENTS_RUNTIME_DIR', raising=False)
+    monkeypatch.delenv('XDG_RUNTIME_DIR', raising=False)
+    assert settings.get_runtime_folder() == (
+        Path(tempfile.gettempdir()) / f'grimagents-{settings.get_user_id()}'
+    )
+
+    monkeypatch.setenv('XDG_RUNTIME_DIR', '/run/user/1000')
+    assert settings.get_runtime_folder() == Path('/run/user/1000/grimagents')
+
+    monkeypatch.setenv('GRIMAGENTS_RUNTIME_DIR', str(Path(tempfile.gettempdir()) / 'team'))
+    assert settings.get_runtime_folder() == (Path(tempfile.gettempdir()) / 'team').resolve()
@@ -0,0 +1,154 @@
+import os
+import pytest
+import time
+
+import grimagents.telemetry as telemetry
+
+from grimagents.telemetry import ResourceMonitor
+
+
+def write_process(proc_path, pid, ppid, ticks, threads, pages, io=None, name='python'):
+    """Writes the /proc files of a fake process."""
+
+    process_path = proc_path / str(pid)
+    process_path.mkdir(parents=True, exist_ok=True)
+
+    # utime and stime are fields 14 and 15, num_threads is field 20 and rss is field 24
+    fields = ['S', ppid, 0, 0, 0, 0, 0, 0, 0, 0, 0, ticks, 0, 0, 0, 20, 0, threads, 0, 0, 0, pages]
+    (process_path / 'stat').write_text(f'{pid} ({name}) {" ".join(str(field) for field in fields)}')
+
+    if io is not None:
+        (process_path / 'io').write_text(
+            f'rchar: 0\nwchar: 0\nread_bytes: {io[0]}\nwrite_bytes: {io[1]}\n'
+        )
+
+
+@pytest.fixture
+def proc_path(tmp_path, monkeypatch):
+    """A fake /proc with a training process (10), its Unity environment (11) and an unrelated process (20)."""
+
+    monkeypatch.setattr(telemetry, 'CLOCK_TICKS', 100)
+    monkeypatch.setattr(telemetry, 'PAGE_SIZE', 4096)
+
+    (tmp_path / 'self').mkdir()
+    (tmp_path / 'self' / 'stat').write_text('')
+
+    write_process(tmp_path, 10, 1, 100, 4, 1000, io=(0, 4096), name='mlagents learn')
+    write_process(tmp_path, 11, 10, 300, 20, 2000)
+    write_process(tmp_path, 20, 1, 500, 1, 500)
+
+    return tmp_path
+
+
+def test_read_process_tree(proc_path):
+    """Tests that a process tree holds the training process and its descendants only, and that process names containing spaces are parsed."""
+
+    tree = telemetry.read_process_tree(10, proc_path)
+
+    assert sorted(tree) == [10, 11]
+    assert tree[10].ppid == 1
+    assert tree[10].cpu_time == 1.0
+    assert tree[10].rss == 1000 * 4096
+    assert tree[10].write_bytes == 4096
+    assert tree[11].read_bytes is None
+    assert telemetry.read_process_tree(99, proc_path) == {}
+
+
+def test_create_sample(proc_path):
+    """Tests that CPU usage and I/O are measured between samples. Ensures:
+
+    - The first sample has no CPU usage or I/O
+    - Processes that started since the previous sample count all of their CPU time
+    - Processes that exited since the previous sample are left out
+    """
+
+    previous = telemetry.read_process_tree(10, proc_path)
+    first = telemetry.create_sample(previous, None, 0.0)
+
+    assert first['processes'] == 2
+    assert first['threads'] == 24
+    assert first['rss_bytes'] == 3000 * 4096
+    assert first['cpu_percent'] is None
+
+    # Over 2 seconds the training process uses 1 second of CPU time and writes 4096 bytes, its
+    # environment exits and a new environment uses 0.5 seconds.
+    write_process(proc_path, 10, 1, 200, 4, 1000, io=(0, 8192))
+    (proc_path / '11' / 'stat').unlink()
+    write_process(proc_path, 12, 10, 50, 10, 1500)
+
+    current = telemetry.read_process_tree(10, proc_path)
+    second = telemetry.create_sample(current, previous, 2.0)
+
+    assert second['processes'] == 2
+    assert second['cpu_percent'] == pytest.approx(75.0)
+    assert second['write_bytes'] == 4096
+    assert second['read_bytes'] == 0
+
+
+def test_summarize_samples():
+    """Tests that samples are summarized by their mean and peak values, and their total I/O."""
+
+    samples = [
+        {'cpu_percent': None, 'rss_bytes': 100, 'threads': 4, 'processes': 2},
+        {'cpu_percent': 100.0, 'rss_bytes': 300, 'threads': 8, 'processes': 2, 'write_bytes': 10},
+        {'cpu_percent': 300.0, 'rss_bytes': 200, 'threads': 6, 'processes': 2, 'read_bytes': 5},
+    ]
+
+    summary = telemetry.summarize_samples(samples, interval=5.0)
+
+    assert summary['samples'] == 3
+    assert summary['cpu_percent'] == {'mean': 200.0, 'peak': 300.0}
+    assert summary['rss_bytes'] == {'mean': 200.0, 'peak': 300}
+    assert summary['threads']['peak'] == 8
+    assert summary['read_bytes'] == 5
+    assert summary['write_bytes'] == 10
+    assert telemetry.summarize_samples([]) is None
+
+    assert telemetry.get_summary_description(summary) == (
+        'CPU: 200% mean, 300% peak, Memory: 200 bytes mean, 300 bytes peak, Threads: 8 peak, Disk: 5 bytes read, 10 bytes written'
+    )
+
+
+def test_get_human_readable_size():
+
+    assert telemetry.get_human_readable_size(512) == '512 bytes'
+    assert telemetry.get_human_readable_size(1536) == '1.5 KB'
+    assert telemetry.get_human_readable_size(3 * 1024**3) == '3.0 GB'
+
+
+def test_resource_monitor_writes_samples(proc_path, tmp_path):
+    """Tests that a resource monitor only samples while a process is watched, and appends each sample to its samples file once the file's folder has been created."""
+
+    samples_path = tmp_path / 'run_logs' / 'grimagents_telemetry.jsonl'
+    monitor = ResourceMonitor(interval=5.0, samples_path=samples_path, proc_path=proc_path)
+
+    assert monitor.sample() is None
+
+    monitor.watch(10)
+    monitor.sample()
+    assert not samples_path.parent.exists()
+
+    samples_path.parent.mkdir()
+    monitor.sample()
+    monitor.unwatch()
+    assert monitor.sample() is None
+
+    assert len(samples_path.read_text().splitlines()) == 2
+    assert monitor.get_summary()['samples'] == 2
+
+
+@pytest.mark.skipif(not telemetry.is_supported(), reason='requires /proc')
+def test_resource_monitor_samples_process():
+    """Tests sampling a running process from the real /proc filesystem."""
+
+    monitor = ResourceMonitor(interval=0.05)
+    monitor.watch(os.getpid())
+    monitor.start()
+
+    time.sleep(0.3)
+    monitor.close()
+
+    summary = monitor.get_summary()
+    assert summary['samples'] > 0
+    assert summary['rss_bytes']['peak'] > 0
+    assert summary['threads']['peak'] >= 1
@@ -0,0 +1,238 @@
+import pytest
+import shutil
+import struct
+
+from pathlib import Path
+
+import grimagents.tensorboard_events as tensorboard_events
+
+from grimagents.tensorboard_events import (
+    EventFileReader,
+    RunEventReader,
+    ScalarEvent,
+    CorruptRecordError,
+)
+
+
+def encode_varint(value):
+    result = b''
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            result += bytes([byte | 0x80])
+        else:
+            return result + bytes([byte])
+
+
+def encode_field(field_number, wire_type, payload):
+    key = encode_varint((field_number << 3) | wire_type)
+    if wire_type == 2:
+        return key + encode_varint(len(payload)) + payload
+    return key + payload
+
+
+def encode_simple_value_event(wall_time, step, tag, value):
+    summary_value = encode_field(1, 2, tag.encode('utf-8')) + encode_field(
+        2, 5, struct.pack('<f', value)
+    )
+    summary = encode_field(1, 2, summary_value)
+    return (
+        encode_field(1, 1, struct.pack('<d', wall_time))
+        + encode_field(2, 0, encode_varint(step))
+        + encode_field(5, 2, summary)
+    )
+
+
+def encode_tensor_event(wall_time, step, tag, value):
+    tensor = encode_field(1, 0, encode_varint(1)) + encode_field(5, 2, struct.pack('<f', value))
+    summary_value = encode_field(1, 2, tag.encode('utf-8')) + encode_field(8, 2, tensor)
+    summary = encode_field(1, 2, summary_value)
+    return (
+        encode_field(1, 1, struct.pack('<d', wall_time))
+        + encode_field(2, 0, encode_varint(step))
+        + encode_field(5, 2, summary)
+    )
+
+
+def encode_record(data):
+    length = struct.pack('<Q', len(data))
+    return (
+        length
+        + struct.pack('<I', tensorboard_events.masked_crc32c(length))
+        + data
+        + struct.pack('<I', tensorboard_events.masked_crc32c(data))
+    )
+
+
+@pytest.fixture
+def run_folder():
+    return Path(__file__).parent / 'test_run_folder'
+
+
+@pytest.fixture
+def event_file(run_folder):
+    return run_folder / '3DBall' / 'events.out.tfevents.1600000000.host'
+
+
+@pytest.fixture
+def fixture_cleanup_run_folder(run_folder):
+    if run_folder.exists():
+        shutil.rmtree(run_folder)
+    yield 'fixture_cleanup_run_folder'
+    if run_folder.exists():
+        shutil.rmtree(run_folder)
+
+
+def write_records(file_path, records, mode='ab'):
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    with file_path.open(mode) as f:
+        for record in records:
+            f.write(record)
+
+
+def test_crc32c():
+    """Tests the CRC32C implementation against the standard check value."""
+
+    assert tensorboard_events.crc32c(b'123456789') == 0xE3069283
+
+
+def test_parse_scalar_events():
+    """Tests that simple value and tensor scalar summaries are decoded."""
+
+    events = tensorboard_events.parse_scalar_events(
+        encode_simple_value_event(10.5, 1000, 'Environment/Cumulative Reward', 1.5)
+    )
+    assert events == [ScalarEvent(10.5, 1000, 'Environment/Cumulative Reward', 1.5)]
+
+    events = tensorboard_events.parse_scalar_events(
+        encode_tensor_event(11.0, 2000, 'Losses/Value Loss', 0.25)
+    )
+    assert events == [ScalarEvent(11.0, 2000, 'Losses/Value Loss', 0.25)]
+
+    # Events without summaries (for example the file version header) produce no scalars
+    assert tensorboard_events.parse_scalar_events(encode_field(3, 2, b'brain.Event:2')) == []
+
+
+def test_event_file_reader_incremental(event_file, fixture_cleanup_run_folder):
+    """Tests that EventFileReader resumes from its stored offset and waits on partially written records."""
+
+    write_records(
+        event_file,
+        [
+            encode_record(encode_field(3, 2, b'brain.Event:2')),
+            encode_record(
+                encode_simple_value_event(1.0, 1000, 'Environment/Cumulative Reward', 1.0)
+            ),
+        ],
+    )
+
+    reader = EventFileReader(event_file)
+    assert [event.step for event in reader.read_scalars()] == [1000]
+    assert list(reader.read_scalars()) == []
+
+    # Write a record in two halves to simulate mlagents-learn flushing mid-record
+    record = encode_record(
+        encode_simple_value_event(2.0, 2000, 'Environment/Cumulative Reward', 2.0)
+    )
+    write_records(event_file, [record[:10]])
+    assert list(reader.read_scalars()) == []
+
+    write_records(event_file, [record[10:]])
+    assert [event.value for event in reader.read_scalars()] == [2.0]
+    assert reader.offset == event_file.stat().st_size
+
+    # A new reader can continue from a stored offset
+    resumed_reader = EventFileReader(event_file, offset=reader.offset)
+    assert list(resumed_reader.read_scalars()) == []
+
+
+def test_event_file_reader_corrupt_record(event_file, fixture_cleanup_run_folder):
+    """Tests that CorruptRecordError is raised when a record fails checksum validation."""
+
+    record = bytearray(
+        encode_record(encode_simple_value_event(1.0, 1000, 'Environment/Cumulative Reward', 1.0))
+    )
+    record[-1] ^= 0xFF
+    write_records(event_file, [bytes(record)])
+
+    with pytest.raises(CorruptRecordError):
+        list(EventFileReader(event_file).read_scalars())
+
+    assert len(list(EventFileReader(event_file, verify_checksums=False).read_scalars())) == 1
+
+
+def test_run_event_reader(run_folder, event_file, fixture_cleanup_run_folder):
+    """Tests that RunEventReader discovers new event files, filters tags and can be resumed from offsets."""
+
+    write_records(
+        event_file,
+        [
+            encode_record(
+                encode_simple_value_event(1.0, 1000, 'Environment/Cumulative Reward', 1.0)
+            ),
+            encode_record(encode_simple_value_event(1.0, 1000, 'Losses/Value Loss', 0.5)),
+        ],
+    )
+
+    reader = RunEventReader(run_folder)
+    events = reader.read_scalars(tags={'Environment/Cumulative Reward'})
+    assert [event.tag for event in events] == ['Environment/Cumulative Reward']
+
+    other_event_file = run_folder / '3DBallHard' / 'events.out.tfevents.1600000001.host'
+    write_records(
+        other_event_file,
+        [encode_record(encode_simple_value_event(2.0, 1000, 'Environment/Cumulative Reward', 3.0))],
+    )
+
+    events = reader.read_scalars()
+    assert [event.value for event in events] == [3.0]
+
+    resumed_reader = RunEventReader(run_folder, offsets=reader.get_offsets())
+    assert resumed_reader.read_scalars() == []
+
+
+def test_load_scalar_curve(run_folder, event_file, fixture_cleanup_run_folder):
+    """Tests that a reward curve is returned sorted by step."""
+
+    write_records(
+        event_file,
+        [
+            encode_record(
+                encode_simple_value_event(2.0, 2000, 'Environment/Cumulative Reward', 2.0)
+            ),
+            encode_record(
+                encode_simple_value_event(1.0, 1000, 'Environment/Cumulative Reward', 1.0)
+            ),
+        ],
+    )
+
+    assert tensorboard_events.load_scalar_curve(run_folder) == [(1000, 1.0), (2000, 2.0)]
+    assert tensorboard_events.load_scalar_curve(run_folder / 'missing') == []
+
+
+def test_load_scalar_curves(run_folder, fixture_cleanup_run_folder):
+    """Tests that the reward curves of a training run's behaviors are read separately. Ensures:
+
+    - Each curve is keyed by the subfolder its event files were written into
+    - A behavior's curve can be read alone, without another behavior's rewards at the same steps
+    """
+
+    for behavior_name, reward in [('3DBall', 1.5), ('Walker', -0.5)]:
+        write_records(
+            run_folder / behavior_name / 'events.out.tfevents.1.host',
+            [
+                encode_record(
+                    encode_simple_value_event(1.0, 1000, 'Environment/Cumulative Reward', reward)
+                )
+            ],
+        )
+
+    assert tensorboard_events.load_scalar_curves(run_folder) == {
+        '3DBall': [(1000, 1.5)],
+        'Walker': [(1000, -0.5)],
+    }
+    assert tensorboard_events.load_scalar_curve(run_folder, behavior_name='3DBall') == [(1000, 1.5)]
+    assert tensorboard_events.load_scalar_curve(run_folder, behavior_name='Walker') == [
+        (1000, -0.5)
+    ]
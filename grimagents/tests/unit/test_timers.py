@@ -0,0 +1,85 @@
+import pytest
+
+import grimagents.timers as timers
+
+
+@pytest.fixture
+def timers_data():
+    return {
+        'name': 'root',
+        'total': 100.0,
+        'count': 1,
+        'self': 1.0,
+        'children': {
+            'TrainerController.start_learning': {
+                'total': 99.0,
+                'count': 1,
+                'self': 4.0,
+                'children': {
+                    'TrainerController.advance': {
+                        'total': 95.0,
+                        'count': 100,
+                        'self': 5.0,
+                        'children': {
+                            'env_step': {
+                                'total': 30.0,
+                                'count': 100,
+                                'self': 30.0,
+                            },
+                            'trainer_advance': {
+                                'total': 60.0,
+                                'count': 100,
+                                'self': 10.0,
+                                'children': {
+                                    '_update_policy': {
+                                        'total': 50.0,
+                                        'count': 10,
+                                        'self': 5.0,
+                                        'children': {
+                                            '_update_policy': {
+                                                'total': 45.0,
+                                                'count': 10,
+                                                'self': 45.0,
+                                            }
+                                        },
+                                    }
+                                },
+                            },
+                        },
+                    }
+                },
+            }
+        },
+    }
+
+
+def test_flatten_timer_tree(timers_data):
+    """Tests that timer trees are flattened into period separated block paths with shares and per-call averages."""
+
+    blocks = timers.flatten_timer_tree(timers_data)
+    blocks_by_path = {block.path: block for block in blocks}
+
+    assert len(blocks) == 6
+
+    env_step = blocks_by_path['TrainerController.start_learning.TrainerController.advance.env_step']
+    assert env_step.name == 'env_step'
+    assert env_step.share == 0.3
+    assert env_step.mean == 0.3
+
+    assert timers.flatten_timer_tree({}) == []
+
+
+def test_get_profile_summary(timers_data):
+    """Tests the environment step versus update split. Ensures nested blocks with the same name are not counted twice."""
+
+    summary = timers.get_profile_summary(timers_data, hot_path_count=2)
+
+    assert summary['total'] == 100.0
+    assert summary['env_step_time'] == 30.0
+    assert summary['update_time'] == 50.0
+    assert summary['env_step_share'] == 0.3
+    assert summary['update_share'] == 0.5
+    assert summary['bound'] == timers.BOUND_UPDATE
+
+    assert [block['self'] for block in summary['hot_path']] == [45.0, 30.0]
+    assert summary['hot_path'][0]['mean'] == 4.5
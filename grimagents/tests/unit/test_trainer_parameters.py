@@ -0,0 +1,76 @@
+import numpy
+import pytest
+
+import grimagents.trainer_parameters as trainer_parameters
+
+
+def test_get_trainer_parameter():
+    """Tests looking up settings by path, by reward signal pattern and by final name."""
+
+    assert trainer_parameters.get_trainer_parameter('summary_freq').type is int
+    assert trainer_parameters.get_trainer_parameter('reward_signals.curiosity.gamma').maximum == 1.0
+    assert trainer_parameters.get_trainer_parameter('reward_signal.gail.encoding_size').type is int
+    assert trainer_parameters.get_trainer_parameter('hyperparameters.unknown') is None
+
+
+def test_is_known_setting():
+    """Tests that settings are only known by their full path or a reward signal pattern."""
+
+    assert trainer_parameters.is_known_setting('hyperparameters.batch_size')
+    assert trainer_parameters.is_known_setting('reward_signals.gail.encoding_size')
+    assert not trainer_parameters.is_known_setting('hyperparameter.batch_size')
+    assert not trainer_parameters.is_known_setting('batch_size')
+
+
+def test_get_similar_settings():
+    """Tests suggesting registered settings for misspelled settings."""
+
+    assert trainer_parameters.get_similar_settings('hyperparameters.bach_size')[0] == (
+        'hyperparameters.batch_size'
+    )
+    assert trainer_parameters.get_similar_settings('reward_signals.curiosity.gama')[0] == (
+        'reward_signals.curiosity.gamma'
+    )
+    assert trainer_parameters.get_similar_settings('unrelated') == []
+
+
+def test_convert_values():
+    """Tests that values are converted to the setting's type, step and range. Ensures:
+
+    - Single values and arrays are both accepted
+    - Values of unknown and non-numeric settings are unchanged
+    """
+
+    assert trainer_parameters.convert_values('keep_checkpoints', numpy.float64(4.6)) == 5
+    assert trainer_parameters.convert_values('summary_freq', [999.7, -3.0]) == [1000, 1]
+    assert trainer_parameters.convert_values(
+        'network_settings.memory.memory_size', numpy.array([154.9, 2.0, 64.0])
+    ) == [152, 4, 64]
+    assert trainer_parameters.convert_values('hyperparameters.lambd', [1.2, 0.95]) == [1.0, 0.95]
+
+    assert trainer_parameters.convert_values('unknown', 4.6) == 4.6
+    assert trainer_parameters.convert_values(
+        'hyperparameters.learning_rate_schedule', 'linear'
+    ) == ('linear')
+
+
+@pytest.mark.parametrize(
+    'key, value, valid',
+    [
+        ('hyperparameters.batch_size', 64, True),
+        ('hyperparameters.batch_size', 0, False),
+        ('hyperparameters.batch_size', 'large', False),
+        ('hyperparameters.epsilon', 1.5, False),
+        ('hyperparameters.learning_rate_schedule', 'constant', True),
+        ('hyperparameters.learning_rate_schedule', 'cosine', False),
+        ('network_settings.normalize', True, True),
+        ('network_settings.normalize', 1, False),
+        ('network_settings.memory.memory_size', 30, False),
+        ('unknown', 'anything', True),
+        ('trainer_type', 'custom_ppo', True),
+    ],
+)
+def test_validate_value(key, value, valid):
+    """Tests that values are checked against each setting's type, choices, range and step."""
+
+    assert (trainer_parameters.validate_value(key, value) is None) == valid
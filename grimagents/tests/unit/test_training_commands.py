@@ -4,12 +4,19 @@ from argparse import Namespace
 
 import grimagents.command_util
 import grimagents.common
+import grimagents.config
+import grimagents.coordination
+import grimagents.results
+import grimagents.settings
+
+from grimagents.coordination import PortLease
 
 from grimagents.training_commands import (
     Command,
     ListTrainingOptions,
     StartTensorboard,
     PerformTraining,
+    PerformBatchTraining,
 )
 
 
@@ -33,8 +40,10 @@ def namespace_args():
         sampler=None,
         lesson=None,
         run_id='3DBall',
+        auto_port=False,
         base_port=None,
         num_envs=None,
+        seed=None,
         inference=None,
         graphics=None,
         no_graphics=None,
@@ -47,6 +56,42 @@ def namespace_args():
     )
 
 
+@pytest.fixture
+def port_leases(monkeypatch):
+    """Replaces the host port registry with a dictionary of leases held by the test."""
+
+    leases = {}
+
+    def mock_lease_ports(count, start=5005, exact=False):
+        if not exact:
+            while any(
+                lease.start <= start < lease.start + lease.count for lease in leases.values()
+            ):
+                start += 1
+
+        lease = PortLease(start=start, count=count, pid=0, token=str(len(leases)))
+        leases[lease.token] = lease
+        return lease
+
+    def mock_release_ports(lease):
+        del leases[lease.token]
+
+    monkeypatch.setattr(grimagents.coordination, 'lease_ports', mock_lease_ports)
+    monkeypatch.setattr(grimagents.coordination, 'release_ports', mock_release_ports)
+
+    return leases
+
+
+@pytest.fixture
+def history_file(monkeypatch, tmp_path):
+    """Keeps the training commands a test saves to history out of the user's history file."""
+
+    history_file = tmp_path / 'history'
+    monkeypatch.setattr(grimagents.settings, 'get_history_file_path', lambda: history_file)
+
+    return history_file
+
+
 @pytest.fixture
 def training_command_arguments():
     return [
@@ -106,22 +151,28 @@ def test_perform_training_create_command(
     assert result == training_command_arguments
 
 
-def test_perform_training_execute(monkeypatch, namespace_args, training_command_arguments):
+def test_perform_training_execute(
+    monkeypatch, namespace_args, training_command_arguments, port_leases
+):
     """Tests that PerformTraining.execute() initiates training.
 
     Ensures:
         - The training command is saved to history
-        - The training command is sent to command_util for execution
+        - The training command is sent to command_util for execution with leased ports when '--auto-port' is set
+        - Leased ports are released once training completes
     """
 
+    namespace_args.auto_port = True
+
     def mock_create_command(self):
-        return training_command_arguments
+        return list(training_command_arguments)
 
     def mock_save_to_history(command):
         assert command == training_command_arguments
 
     def mock_execute_command(command, show_command, dry_run):
-        assert command == training_command_arguments
+        assert command == training_command_arguments + ['--base-port', 5005]
+        assert len(port_leases) == 1
 
     monkeypatch.setattr(PerformTraining, 'create_command', mock_create_command)
     monkeypatch.setattr(grimagents.command_util, 'save_to_history', mock_save_to_history)
@@ -130,8 +181,72 @@ def test_perform_training_execute(monkeypatch, namespace_args, training_command_
     perform_training = PerformTraining(namespace_args)
     perform_training.execute()
 
+    assert len(port_leases) == 0
+
+
+def test_perform_training_without_auto_port(
+    monkeypatch, namespace_args, training_command_arguments, port_leases
+):
+    """Tests that training commands keep their configured ports unless '--auto-port' is set."""
 
-def test_perform_training_command_dry_run(monkeypatch, namespace_args, grim_config):
+    def mock_execute_command(command, show_command, dry_run):
+        assert command == training_command_arguments
+        assert len(port_leases) == 0
+
+    monkeypatch.setattr(
+        PerformTraining, 'create_command', lambda self: list(training_command_arguments)
+    )
+    monkeypatch.setattr(grimagents.command_util, 'save_to_history', lambda command: None)
+    monkeypatch.setattr(grimagents.command_util, 'execute_command', mock_execute_command)
+
+    PerformTraining(namespace_args).execute()
+
+
+def test_perform_training_lease_ports_failure(monkeypatch):
+    """Tests that training falls back on its configured ports when the port registry can't be used."""
+
+    def mock_lease_ports(count, start=5005, exact=False):
+        raise grimagents.coordination.CoordinationError('Runtime folder is not private')
+
+    monkeypatch.setattr(grimagents.coordination, 'lease_ports', mock_lease_ports)
+
+    command = ['python', 'config.yaml']
+    assert PerformTraining.lease_ports(command) is None
+    assert command == ['python', 'config.yaml']
+
+
+def test_perform_training_lease_ports(port_leases):
+    """Tests that training commands lease the ports they use. Ensures:
+
+    - Commands without a base port are given a free range of ports, inserted ahead of '--env-args'
+    - Commands with a base port lease the range they were given
+    """
+
+    port_leases['held'] = PortLease(start=5005, count=2, pid=0, token='held')
+
+    command = ['python', 'config.yaml', '--num-envs', '3', '--env-args', '--arg']
+    lease = PerformTraining.lease_ports(command)
+
+    assert (lease.start, lease.count) == (5007, 3)
+    assert command == [
+        'python',
+        'config.yaml',
+        '--num-envs',
+        '3',
+        '--base-port',
+        5007,
+        '--env-args',
+        '--arg',
+    ]
+
+    command = ['python', 'config.yaml', '--base-port', '6000']
+    lease = PerformTraining.lease_ports(command)
+
+    assert (lease.start, lease.count) == (6000, 1)
+    assert command == ['python', 'config.yaml', '--base-port', '6000']
+
+
+def test_perform_training_command_dry_run(monkeypatch, namespace_args, grim_config, history_file):
     """Tests for the correct creation of a PerformTraining command with dry_run enabled."""
 
     namespace_args.dry_run = True
@@ -148,6 +263,7 @@ def test_perform_training_command_dry_run(monkeypatch, namespace_args, grim_conf
     perform_training = PerformTraining(namespace_args)
     perform_training.execute()
     assert perform_training.dry_run is True
+    assert history_file.exists()
 
 
 def test_command_dry_run(monkeypatch):
@@ -174,3 +290,93 @@ def test_command_dry_run(monkeypatch):
     command = Command(dry_run_args)
     command.execute()
     assert command.dry_run is True
+
+
+def test_perform_batch_training_create_commands(
+    monkeypatch, namespace_args, grim_config, port_leases
+):
+    """Tests that each configuration file in a batch is given its own training command. Ensures:
+
+    - Every training run is timestamped
+    - Base ports are spaced by the number of environments of the preceding training runs
+    - Configurations sharing a run id are given distinct run ids
+    """
+
+    configs = {
+        'first.json': dict(grim_config, **{'--run-id': 'First', '--num-envs': 4}),
+        'second.json': dict(grim_config, **{'--run-id': 'Second'}),
+        'third.json': dict(grim_config, **{'--run-id': 'First'}),
+    }
+
+    def mock_load_config(config_path):
+        return configs[str(config_path)]
+
+    def mock_get_timestamp():
+        return '2019-09-13_03-41-44'
+
+    monkeypatch.setattr(grimagents.config, 'load_grim_configuration_file', mock_load_config)
+    monkeypatch.setattr(grimagents.common, 'get_timestamp', mock_get_timestamp)
+
+    namespace_args.configuration_files = list(configs)
+    namespace_args.run_id = None
+    namespace_args.base_port = 6000
+    namespace_args.parallel = 2
+    namespace_args.auto_port = True
+
+    commands = PerformBatchTraining(namespace_args).create_commands()
+
+    def get_value(command, key):
+        return command[command.index(key) + 1]
+
+    assert [get_value(command, '--run-id') for command in commands] == [
+        'First-2019-09-13_03-41-44',
+        'Second-2019-09-13_03-41-44',
+        'First_02-2019-09-13_03-41-44',
+    ]
+    assert [get_value(command, '--base-port') for command in commands] == [6000, 6004, 6005]
+    assert len(port_leases) == 3
+
+    # Without a base port, each training run leases a free range of ports
+    port_leases.clear()
+    port_leases['held'] = PortLease(start=5005, count=1, pid=0, token='held')
+    namespace_args.base_port = None
+
+    commands = PerformBatchTraining(namespace_args).create_commands()
+    assert [get_value(command, '--base-port') for command in commands] == [5006, 5010, 5011]
+
+    # Without '--auto-port', ports count up from the base port without being leased
+    port_leases.clear()
+    namespace_args.auto_port = False
+
+    commands = PerformBatchTraining(namespace_args).create_commands()
+    assert [get_value(command, '--base-port') for command in commands] == [5005, 5009, 5010]
+    assert len(port_leases) == 0
+
+
+def test_perform_batch_training_execute(monkeypatch, namespace_args, grim_config, port_leases):
+    """Tests that every training run in a batch is executed and the first failing return code is returned."""
+
+    executed = []
+
+    def mock_create_commands(self):
+        return [['python', '--run-id', f'Run{i}'] for i in range(4)]
+
+    def mock_save_to_history(command):
+        pass
+
+    def mock_execute_command(command, show_command, dry_run):
+        executed.append(command[2])
+        return 1 if command[2] == 'Run2' else 0
+
+    def mock_find_run_summary(run_id):
+        return {'mean_reward': 1.0}
+
+    monkeypatch.setattr(PerformBatchTraining, 'create_commands', mock_create_commands)
+    monkeypatch.setattr(grimagents.command_util, 'save_to_history', mock_save_to_history)
+    monkeypatch.setattr(grimagents.command_util, 'execute_command', mock_execute_command)
+    monkeypatch.setattr(grimagents.results, 'find_run_summary', mock_find_run_summary)
+
+    namespace_args.parallel = 2
+
+    assert PerformBatchTraining(namespace_args).execute() == 1
+    assert sorted(executed) == ['Run0', 'Run1', 'Run2', 'Run3']
@@ -1,12 +1,20 @@
+import os
 import pytest
 import shutil
+import subprocess
+import sys
+import threading
+import time
 
 from argparse import Namespace
 from pathlib import Path
 
+import grimagents.coordination
+import grimagents.results
 import grimagents.training_wrapper
 
-from grimagents.training_wrapper import TrainingRunInfo
+from grimagents.coordination import PortLease
+from grimagents.training_wrapper import TrainingRunInfo, BrainExporter
 
 
 @pytest.fixture
@@ -25,7 +33,13 @@ def namespace_args():
     return Namespace(
         args=['--env', 'builds/3DBall/3DBall.exe'],
         export_path=None,
+        export_link=False,
+        max_restarts=3,
+        port_retries=3,
         run_id='3DBall',
+        stall_timeout=0,
+        telemetry_interval=5.0,
+        time_limit=0,
         trainer_config_path='config/3DBall_config.yaml',
     )
 
@@ -56,11 +70,19 @@ def export_brains_destination():
 
 
 @pytest.fixture
-def fixture_export_brains(export_brains, export_brains_destination):
-    """Fixture that creates test brains to export then deletes them and the export folder upon test completion."""
+def export_brains_second_destination():
+    return Path(__file__).parent / 'second_export_folder'
 
-    if export_brains_destination.exists():
-        shutil.rmtree(export_brains_destination)
+
+@pytest.fixture
+def fixture_export_brains(
+    export_brains, export_brains_destination, export_brains_second_destination
+):
+    """Fixture that creates test brains to export then deletes them and the export folders upon test completion."""
+
+    for destination in [export_brains_destination, export_brains_second_destination]:
+        if destination.exists():
+            shutil.rmtree(destination)
 
     for brain in export_brains:
         with brain.open('w') as f:
@@ -72,8 +94,9 @@ def fixture_export_brains(export_brains, export_brains_destination):
         if brain.exists():
             brain.unlink()
 
-    if export_brains_destination.exists():
-        shutil.rmtree(export_brains_destination)
+    for destination in [export_brains_destination, export_brains_second_destination]:
+        if destination.exists():
+            shutil.rmtree(destination)
 
 
 def test_parse_args(arguments, namespace_args):
@@ -166,6 +189,12 @@ def test_parse_exported_brains(training_output):
         Path('./models/3DBall_00/3DBallHardLearning.nn'),
     ]
 
+    info.update_from_training_output(
+        'INFO:mlagents.trainers:Exported ./models/3DBall_00/3DBallLearning.onnx'
+    )
+
+    assert info.exported_brains[-1] == Path('./models/3DBall_00/3DBallLearning.onnx')
+
 
 def test_time_remaining():
     """Test that TrainingRunInfo can calculate steps_remaining and time_remaining as well as handle edge cases.
@@ -224,7 +253,566 @@ def test_line_has_time_elapsed():
 def test_export_brains(export_brains, export_brains_destination, fixture_export_brains):
     """Tests that training_wrapper correctly copies brain files into a destination folder. This also implicitly tests that the destination folder is created if it does not already exist."""
 
-    grimagents.training_wrapper.export_brains(export_brains, export_brains_destination)
+    grimagents.training_wrapper.export_brains(export_brains, [export_brains_destination])
 
     for brain in export_brains:
         assert (export_brains_destination / brain.name).exists()
+        assert (export_brains_destination / brain.name).read_text() == 'Test brain'
+
+
+def test_export_brains_to_several_folders(
+    export_brains,
+    export_brains_destination,
+    export_brains_second_destination,
+    fixture_export_brains,
+):
+    """Tests that brains are exported into every destination folder, with and without hard links."""
+
+    grimagents.training_wrapper.export_brains(
+        export_brains, [export_brains_destination, export_brains_second_destination], link=True
+    )
+
+    for brain in export_brains:
+        assert (export_brains_destination / brain.name).read_text() == 'Test brain'
+        assert (export_brains_second_destination / brain.name).read_text() == 'Test brain'
+
+    # No temporary files are left behind
+    assert len(list(export_brains_destination.iterdir())) == len(export_brains)
+
+
+def test_export_brains_skips_unchanged(
+    monkeypatch, export_brains, export_brains_destination, fixture_export_brains
+):
+    """Tests that brains are only copied when their contents have changed."""
+
+    grimagents.training_wrapper.export_brains(export_brains, [export_brains_destination])
+
+    copied = []
+
+    def mock_export_file(source, destination, link=False):
+        copied.append(source)
+
+    monkeypatch.setattr(grimagents.training_wrapper, 'export_file', mock_export_file)
+
+    grimagents.training_wrapper.export_brains(export_brains, [export_brains_destination])
+    assert copied == []
+
+    export_brains[0].write_text('Test brain, but better')
+    grimagents.training_wrapper.export_brains(export_brains, [export_brains_destination])
+    assert copied == [export_brains[0]]
+
+
+def test_brain_exporter(
+    export_brains,
+    export_brains_destination,
+    export_brains_second_destination,
+    fixture_export_brains,
+):
+    """Tests that BrainExporter exports submitted brains in the background and that close() waits for queued exports. Brains that no longer exist are ignored."""
+
+    exporter = BrainExporter([export_brains_destination, export_brains_second_destination])
+    exporter.start()
+
+    for brain in export_brains:
+        exporter.submit(brain)
+    exporter.submit(Path(__file__).parent / 'missing_brain.nn')
+
+    exporter.close()
+
+    assert not exporter.thread.is_alive()
+    for brain in export_brains:
+        assert (export_brains_destination / brain.name).exists()
+        assert (export_brains_second_destination / brain.name).exists()
+
+    assert not (export_brains_destination / 'missing_brain.nn').exists()
+
+
+def test_brain_exporter_batches(monkeypatch, export_brains, export_brains_destination):
+    """Tests that brains queued together are exported as a single batch, and that a brain queued more than once is only exported once."""
+
+    batches = []
+
+    def mock_export_brains(brain_paths, export_paths, link=False, digests=None):
+        batches.append(brain_paths)
+
+    monkeypatch.setattr(grimagents.training_wrapper, 'export_brains', mock_export_brains)
+
+    exporter = BrainExporter([export_brains_destination])
+    for brain in export_brains + export_brains:
+        exporter.submit(brain)
+
+    exporter.start()
+    assert exporter.close() is True
+
+    assert batches == [export_brains]
+
+
+def test_brain_exporter_close_timeout(monkeypatch, export_brains, export_brains_destination):
+    """Tests that closing an exporter does not wait longer than its timeout for exports in progress."""
+
+    release = threading.Event()
+
+    def mock_export_brains(brain_paths, export_paths, link=False, digests=None):
+        release.wait()
+
+    monkeypatch.setattr(grimagents.training_wrapper, 'export_brains', mock_export_brains)
+
+    exporter = BrainExporter([export_brains_destination])
+    exporter.start()
+    exporter.submit(export_brains[0])
+
+    assert exporter.close(timeout=0.1) is False
+    release.set()
+    exporter.thread.join()
+
+
+def test_copy_file_fallback(monkeypatch, export_brains, fixture_export_brains):
+    """Tests that files are still copied when no kernel-side copy mechanism is available."""
+
+    def mock_kernel_copy(source_fd, destination_fd, size):
+        return False
+
+    monkeypatch.setattr(grimagents.training_wrapper, 'kernel_copy', mock_kernel_copy)
+
+    destination = export_brains[1].with_name('copied_brain.nn')
+    try:
+        grimagents.training_wrapper.copy_file(export_brains[0], destination)
+        assert destination.read_text() == 'Test brain'
+    finally:
+        if destination.exists():
+            destination.unlink()
+
+
+def test_create_run_summary(namespace_args, training_output):
+    """Tests that a run summary records the training run's outcome and its trainer profile."""
+
+    info = TrainingRunInfo()
+    for line in training_output:
+        info.update_from_training_output(line)
+
+    profile = {'bound': 'environment'}
+    summary = grimagents.training_wrapper.create_run_summary(
+        '3DBall', namespace_args, info, 0, 35.5, profile
+    )
+
+    assert summary['run_id'] == '3DBall'
+    assert summary['return_code'] == 0
+    assert summary['duration'] == 35.5
+    assert summary['step'] == 3000
+    assert summary['max_steps'] == 3000
+    assert summary['steps_per_second'] == 3000 / 30.652
+    assert summary['mean_reward'] == 1.763
+    assert summary['exported_brains'] == [str(Path('./models/3DBall_00/3DBallLearning.nn'))]
+    assert summary['profile'] == profile
+    assert summary['restarts'] == []
+    assert summary['resources'] is None
+    assert summary['reward_curves'] == {}
+
+    summary = grimagents.training_wrapper.create_run_summary(
+        '3DBall',
+        namespace_args,
+        info,
+        0,
+        35.5,
+        reward_curves={'3DBall': [(1000, 1.25), (2000, 1.7634)], 'Walker': [(1000, -0.5)]},
+    )
+    assert summary['reward_curves'] == {
+        '3DBall': [[1000, 1.25], [2000, 1.7634]],
+        'Walker': [[1000, -0.5]],
+    }
+
+
+def test_parse_port_conflict(training_output):
+    """Tests that a port conflict is only reported when the environment fails to connect before training has made progress."""
+
+    info = TrainingRunInfo()
+    info.update_from_training_output('OSError: [Errno 98] Address already in use')
+    assert info.has_port_conflict() is True
+
+    info = TrainingRunInfo()
+    info.update_from_training_output(
+        'mlagents_envs.exception.UnityTimeOutException: The Unity environment took too long to respond.'
+    )
+    assert info.has_port_conflict() is True
+
+    info = TrainingRunInfo()
+    for line in training_output:
+        info.update_from_training_output(line)
+    info.update_from_training_output('UnityTimeOutException')
+    assert info.has_port_conflict() is False
+
+
+def test_run_training():
+    """Tests that training output is read from the training process and its return code is returned."""
+
+    script = (
+        'import sys; '
+        'sys.stderr.write("Step: 1000. Time Elapsed: 10.0 s Mean Reward: 1.5. Std of Reward: 0.1.\\n"); '
+        'sys.exit(3)'
+    )
+
+    info = TrainingRunInfo()
+    info.port_conflict = True
+
+    return_code = grimagents.training_wrapper.run_training([sys.executable, '-c', script], info)
+
+    assert return_code == 3
+    assert info.step == 1000
+    assert info.mean_reward == 1.5
+    assert info.port_conflict is False
+
+
+def test_run_training_watches_process():
+    """Tests that a resource monitor watches the training process only while it runs."""
+
+    class MockMonitor:
+        def __init__(self):
+            self.pids = []
+
+        def watch(self, pid):
+            self.pids.append(pid)
+
+        def unwatch(self):
+            self.pids.append(None)
+
+    monitor = MockMonitor()
+    grimagents.training_wrapper.run_training(
+        [sys.executable, '-c', 'pass'], TrainingRunInfo(), monitor=monitor
+    )
+
+    assert len(monitor.pids) == 2
+    assert monitor.pids[0] > 0
+    assert monitor.pids[1] is None
+
+
+def test_get_port_retry_command(monkeypatch):
+    """Tests that a training command is moved onto a new range of ports. Ensures:
+
+    - The search for a new range begins above the command's current range
+    - '--force' is added unless the run is being resumed
+    - '--env-args' remain at the end of the command
+    """
+
+    def mock_lease_ports(count, start):
+        return PortLease(start=start, count=count, pid=0, token='lease')
+
+    monkeypatch.setattr(grimagents.coordination, 'lease_ports', mock_lease_ports)
+
+    command = ['mlagents-learn', 'config.yaml', '--base-port', '6000', '--num-envs', '2']
+    retry_command, lease = grimagents.training_wrapper.get_port_retry_command(command)
+
+    assert lease.start == 6002
+    assert retry_command == [
+        'mlagents-learn',
+        'config.yaml',
+        '--base-port',
+        '6002',
+        '--num-envs',
+        '2',
+        '--force',
+    ]
+    assert command[3] == '6000'
+
+    command = ['mlagents-learn', 'config.yaml', '--resume', '--env-args', '--arg']
+    retry_command, lease = grimagents.training_wrapper.get_port_retry_command(command)
+
+    assert retry_command == [
+        'mlagents-learn',
+        'config.yaml',
+        '--resume',
+        '--base-port',
+        '5006',
+        '--env-args',
+        '--arg',
+    ]
+
+
+def test_run_training_stall(monkeypatch):
+    """Tests that a training process that stops printing output is terminated along with the processes it started. Ensures:
+
+    - training_info.stalled is set
+    - A stall before the first step is not treated as a port conflict
+    """
+
+    monkeypatch.setattr(grimagents.training_wrapper, 'WATCHDOG_INTERVAL', 0.05)
+
+    # The training process starts a child process that would outlive it if only the parent were terminated
+    script = (
+        'import subprocess, sys, time; '
+        'child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"]); '
+        'sys.stderr.write(f"{child.pid}\\n"); sys.stderr.flush(); '
+        'sys.stderr.write("Step: 1000. Time Elapsed: 10.0 s Mean Reward: 1.5. Std of Reward: 0.1.\\n"); '
+        'sys.stderr.flush(); '
+        'time.sleep(60)'
+    )
+
+    child_pids = []
+
+    class RecordingInfo(TrainingRunInfo):
+        def update_from_training_output(self, line):
+            if line.isdigit():
+                child_pids.append(int(line))
+            super().update_from_training_output(line)
+
+    info = RecordingInfo()
+    start_time = time.monotonic()
+    return_code = grimagents.training_wrapper.run_training(
+        [sys.executable, '-c', script], info, stall_timeout=0.5
+    )
+
+    assert time.monotonic() - start_time < 30
+    assert return_code != 0
+    assert info.stalled is True
+    assert info.has_port_conflict() is False
+
+    if os.name != 'nt':
+        # The child is reaped by init once terminated, give it a moment to disappear
+        for _ in range(50):
+            if not grimagents.coordination.is_process_running(child_pids[0]):
+                break
+            time.sleep(0.1)
+        assert not grimagents.coordination.is_process_running(child_pids[0])
+
+    info = TrainingRunInfo()
+    grimagents.training_wrapper.run_training(
+        [sys.executable, '-c', 'import time; time.sleep(60)'], info, stall_timeout=0.5
+    )
+
+    assert info.stalled is True
+    assert info.has_port_conflict() is False
+
+
+def test_run_training_slow_steps(monkeypatch):
+    """Tests that the watchdog waits for steps at the interval they are reported at. Ensures:
+
+    - Training printing output before its first step is not terminated
+    - Training reporting steps less often than the stall timeout is not terminated
+    - Training that keeps printing output but stops reporting steps is terminated
+    """
+
+    monkeypatch.setattr(grimagents.training_wrapper, 'WATCHDOG_INTERVAL', 0.05)
+
+    script = (
+        'import sys, time\n'
+        'for _ in range(5):\n'
+        '    sys.stderr.write("Connecting to the environment\\n"); sys.stderr.flush()\n'
+        '    time.sleep(0.2)\n'
+        'for step in range(1, 4):\n'
+        '    sys.stderr.write(f"Step: {step}000. Time Elapsed: {step}.0 s \\n"); sys.stderr.flush()\n'
+        '    for _ in range(4):\n'
+        '        time.sleep(0.2)\n'
+        '        sys.stderr.write("Training\\n"); sys.stderr.flush()\n'
+    )
+
+    info = TrainingRunInfo()
+    return_code = grimagents.training_wrapper.run_training(
+        [sys.executable, '-c', script], info, stall_timeout=0.5
+    )
+
+    assert return_code == 0
+    assert info.stalled is False
+    assert info.step == 3000
+
+    script = (
+        'import sys, time\n'
+        'for step in range(1, 3):\n'
+        '    sys.stderr.write(f"Step: {step}000. Time Elapsed: {step}.0 s \\n"); sys.stderr.flush()\n'
+        '    time.sleep(0.2)\n'
+        'while True:\n'
+        '    sys.stderr.write("Training\\n"); sys.stderr.flush()\n'
+        '    time.sleep(0.1)\n'
+    )
+
+    info = TrainingRunInfo()
+    start_time = time.monotonic()
+    grimagents.training_wrapper.run_training(
+        [sys.executable, '-c', script], info, stall_timeout=0.5
+    )
+
+    assert time.monotonic() - start_time < 30
+    assert info.stalled is True
+
+
+def test_run_training_without_stall(monkeypatch):
+    """Tests that training which keeps reporting steps is not terminated by the watchdog."""
+
+    monkeypatch.setattr(grimagents.training_wrapper, 'WATCHDOG_INTERVAL', 0.05)
+
+    script = (
+        'import sys, time\n'
+        'for step in range(1, 6):\n'
+        '    sys.stderr.write(f"Step: {step}000. Time Elapsed: {step}.0 s \\n"); sys.stderr.flush()\n'
+        '    time.sleep(0.2)\n'
+    )
+
+    info = TrainingRunInfo()
+    return_code = grimagents.training_wrapper.run_training(
+        [sys.executable, '-c', script], info, stall_timeout=0.5
+    )
+
+    assert return_code == 0
+    assert info.stalled is False
+    assert info.step == 5000
+
+
+def test_get_resume_command():
+    """Tests that a training command is changed to resume its training run, without overwriting it."""
+
+    command = ['mlagents-learn', 'config.yaml', '--force', '--env-args', '--arg']
+
+    assert grimagents.training_wrapper.get_resume_command(command) == [
+        'mlagents-learn',
+        'config.yaml',
+        '--resume',
+        '--env-args',
+        '--arg',
+    ]
+
+    command = ['mlagents-learn', 'config.yaml', '--resume']
+    assert grimagents.training_wrapper.get_resume_command(command) == command
+
+
+def test_run_training_time_limit(monkeypatch):
+    """Tests that training reaching its deadline is interrupted and allowed to save its model before exiting."""
+
+    monkeypatch.setattr(grimagents.training_wrapper, 'WATCHDOG_INTERVAL', 0.05)
+
+    script = (
+        'import sys, time\n'
+        'try:\n'
+        '    for step in range(1, 600):\n'
+        '        sys.stderr.write(f"Step: {step}000. Time Elapsed: {step}.0 s Mean Reward: 0.{step}. \\n"); sys.stderr.flush()\n'
+        '        time.sleep(0.1)\n'
+        'except KeyboardInterrupt:\n'
+        '    sys.stderr.write("Saved Model\\n"); sys.stderr.flush()\n'
+    )
+
+    lines = []
+
+    class RecordingInfo(TrainingRunInfo):
+        def update_from_training_output(self, line):
+            lines.append(line)
+            super().update_from_training_output(line)
+
+    info = RecordingInfo()
+    return_code = grimagents.training_wrapper.run_training(
+        [sys.executable, '-c', script], info, deadline=time.monotonic() + 0.5
+    )
+
+    assert return_code == 0
+    assert info.time_limited is True
+    assert info.stalled is False
+    assert 0 < info.step < 100000
+    assert lines[-1] == 'Saved Model'
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='interrupts the process group with SIGINT')
+def test_run_training_keyboard_interrupt(monkeypatch):
+    """Tests that a KeyboardInterrupt is forwarded to the training process, which is allowed to save and export its model before the interrupt is raised."""
+
+    script = (
+        'import sys, time\n'
+        'try:\n'
+        '    sys.stderr.write("Step: 1000. Time Elapsed: 1.0 s \\n"); sys.stderr.flush()\n'
+        '    time.sleep(60)\n'
+        'except KeyboardInterrupt:\n'
+        '    sys.stderr.write("Exported results/3DBall/3DBall.onnx\\n"); sys.stderr.flush()\n'
+    )
+
+    relay_training_output = grimagents.training_wrapper.relay_training_output
+    lines = []
+
+    def mock_relay_training_output(line, training_info, exporter=None, output_time_remaining=True):
+        lines.append(line)
+        relay_training_output(line, training_info, exporter, output_time_remaining)
+        if len(lines) == 1:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(
+        grimagents.training_wrapper, 'relay_training_output', mock_relay_training_output
+    )
+
+    info = TrainingRunInfo()
+    with pytest.raises(KeyboardInterrupt):
+        grimagents.training_wrapper.run_training([sys.executable, '-c', script], info)
+
+    assert info.step == 1000
+    assert info.exported_brains == [Path('results/3DBall/3DBall.onnx')]
+
+
+def test_interrupt_process_group_windows(monkeypatch):
+    """Tests that on Windows, training is interrupted with Ctrl+C sent to its console by a helper process."""
+
+    class MockProcess:
+        pid = 1234
+
+        def poll(self):
+            return None
+
+    commands = []
+
+    def mock_run(command, **kwargs):
+        commands.append(command)
+        return subprocess.CompletedProcess(command, 0)
+
+    monkeypatch.setattr(os, 'name', 'nt')
+    monkeypatch.setattr(subprocess, 'run', mock_run)
+
+    grimagents.training_wrapper.interrupt_process_group(MockProcess())
+
+    assert commands == [
+        [sys.executable, '-c', grimagents.training_wrapper.CONSOLE_INTERRUPT_SCRIPT, '1234']
+    ]
+
+
+def test_run_training_writes_progress(monkeypatch):
+    """Tests that a training run's progress is written as training steps are reported."""
+
+    progress = []
+
+    def mock_write_run_progress(run_id, run_progress):
+        assert run_id == '3DBall'
+        progress.append(run_progress)
+
+    monkeypatch.setattr(grimagents.results, 'write_run_progress', mock_write_run_progress)
+    monkeypatch.setattr(grimagents.training_wrapper, 'PROGRESS_INTERVAL', 0)
+
+    script = (
+        'import sys\n'
+        'sys.stderr.write("\\tmax_steps:\\t4000\\n")\n'
+        'for step in range(1, 4):\n'
+        '    sys.stderr.write(f"Step: {step}000. Time Elapsed: {step}.0 s \\n")\n'
+    )
+
+    info = TrainingRunInfo()
+    grimagents.training_wrapper.run_training([sys.executable, '-c', script], info, run_id='3DBall')
+
+    assert [entry['step'] for entry in progress] == [1000, 2000, 3000]
+    assert progress[-1]['max_steps'] == 4000
+    assert progress[-1]['time_remaining'] == 1.0
+
+
+def test_run_training_reports_finishing(monkeypatch):
+    """Tests that progress reporting training has finished is written as soon as the last step is reported, even between regular progress writes."""
+
+    progress = []
+
+    def mock_write_run_progress(run_id, run_progress):
+        progress.append(run_progress)
+
+    monkeypatch.setattr(grimagents.results, 'write_run_progress', mock_write_run_progress)
+
+    script = (
+        'import sys\n'
+        'sys.stderr.write("\\tmax_steps:\\t2000\\n")\n'
+        'for step in range(1, 3):\n'
+        '    sys.stderr.write(f"Step: {step}000. Time Elapsed: {step}.0 s \\n")\n'
+        'sys.stderr.write("Exported results/3DBall/3DBall.onnx\\n")\n'
+    )
+
+    info = TrainingRunInfo()
+    grimagents.training_wrapper.run_training([sys.executable, '-c', script], info, run_id='3DBall')
+
+    assert [entry['step'] for entry in progress] == [1000, 2000]
+    assert [entry['phase'] for entry in progress] == ['training', 'finishing']
+    assert info.finishing is True
@@ -276,6 +276,30 @@ def test_training_arguments_handles_cpu(grim_config):
     assert '--cpu' not in arguments.get_arguments()
 
 
+def test_training_arguments_handles_several_export_paths(grim_config):
+    """Test that a list of export paths is passed to training_wrapper as separate arguments."""
+
+    grim_config['--export-path'] = ['UnitySDK/Assets/Models', '', 'OtherProject/Assets/Models']
+    arguments = TrainingWrapperArguments(grim_config)
+
+    result = arguments.get_arguments()
+    result[3] = 'grimagents/training_wrapper.py'
+
+    assert result == [
+        'pipenv',
+        'run',
+        'python',
+        'grimagents/training_wrapper.py',
+        'config/3DBall.yaml',
+        '--run-id',
+        '3DBall',
+        '--export-path',
+        'UnitySDK/Assets/Models',
+        '--export-path',
+        'OtherProject/Assets/Models',
+    ]
+
+
 def test_training_arguments_add_additional_args(grim_config):
     """Test that TrainingWrapperArguments correctly appends additional arguments."""
 
@@ -330,6 +354,7 @@ def test_override_configuration_values(grim_config):
         no_multi_gpu=True,
         no_timestamp=True,
         num_envs=4,
+        seed=None,
         resume=False,
         run_id='PushBlock',
         timestamp=None,
@@ -380,6 +405,7 @@ def test_inference_override_configuration_values(grim_config):
         run_id=None,
         base_port=None,
         num_envs=None,
+        seed=None,
         inference=True,
         graphics=None,
         no_graphics=None,
@@ -429,6 +455,7 @@ def test_resume_override_configuration_values(grim_config):
         run_id=None,
         base_port=None,
         num_envs=None,
+        seed=None,
         graphics=None,
         no_graphics=None,
         no_timestamp=None,
@@ -466,6 +493,7 @@ def test_training_arguments_set_methods(grim_config):
     arguments.set_env('builds/3DBall/3DBallHard.exe')
     arguments.set_run_id('ball')
     arguments.set_num_envs('4')
+    arguments.set_seed('0')
     arguments.set_no_graphics_enabled(True)
     arguments.set_timestamp_enabled(True)
     arguments.set_multi_gpu_enabled(True)
@@ -475,6 +503,7 @@ def test_training_arguments_set_methods(grim_config):
     assert '--env builds/3DBall/3DBallHard.exe' in arguments_string
     assert '--run-id ball' in arguments_string
     assert '--num-envs 4' in arguments_string
+    assert '--seed 0' in arguments_string
     assert '--no-graphics' in arguments_string
     assert '--run-id ball-' in arguments_string
     assert '--multi-gpu' in arguments_string
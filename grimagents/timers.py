@@ -0,0 +1,147 @@
+"""Summarizes the hierarchical timing information mlagents-learn writes into 'run_logs/timers.json'.
+
+Timer nodes take the form:
+    {"total": float, "count": int, "self": float, "children": {"<block name>": {...}}}
+
+Notes:
+- Blocks are identified by their period-separated path from the root node
+- Environment stepping and policy updates are found by block name wherever they appear in the tree
+"""
+
+import collections
+
+from pathlib import Path
+
+import grimagents.command_util as command_util
+import grimagents.settings as settings
+
+
+TIMERS_FILENAME = 'timers.json'
+HOT_PATH_COUNT = 10
+
+ENV_STEP_BLOCKS = {'env_step'}
+UPDATE_BLOCKS = {'_update_policy'}
+
+BOUND_ENVIRONMENT = 'environment'
+BOUND_UPDATE = 'update'
+
+
+TimerBlock = collections.namedtuple(
+    'TimerBlock', ['path', 'name', 'total', 'count', 'self_time', 'share', 'mean']
+)
+
+
+def get_timers_file_path(run_id):
+    """Returns the path mlagents-learn writes timing information into for a training run."""
+
+    return settings.get_run_logs_folder(run_id) / TIMERS_FILENAME
+
+
+def load_timers(file_path: Path):
+    """Loads a timers dictionary from file.
+
+    Raises:
+      FileNotFoundError:
+      JSONDecodeError: When the timers file can't be parsed
+    """
+
+    return command_util.load_json_file(file_path)
+
+
+def flatten_timer_tree(root: dict):
+    """Returns a list of TimerBlock tuples for every block in a timer tree, in depth first order.
+
+    Shares are expressed as a fraction of the root node's total time.
+    """
+
+    root_total = root.get('total', 0.0)
+    blocks = []
+
+    def visit(node, path, name):
+        total = node.get('total', 0.0)
+        count = node.get('count', 0)
+        blocks.append(
+            TimerBlock(
+                path=path,
+                name=name,
+                total=total,
+                count=count,
+                self_time=node.get('self', 0.0),
+                share=total / root_total if root_total else 0.0,
+                mean=total / count if count else 0.0,
+            )
+        )
+
+        for child_name, child in node.get('children', {}).items():
+            visit(child, f'{path}.{child_name}' if path else child_name, child_name)
+
+    for name, child in root.get('children', {}).items():
+        visit(child, name, name)
+
+    return blocks
+
+
+def get_outermost_total(blocks: list, names: set):
+    """Returns the summed total time of blocks with one of the given names, ignoring blocks nested inside another matching block."""
+
+    total = 0.0
+    matched_paths = []
+    for block in blocks:
+        if block.name not in names:
+            continue
+
+        if any(block.path.startswith(f'{path}.') for path in matched_paths):
+            continue
+
+        matched_paths.append(block.path)
+        total += block.total
+
+    return total
+
+
+def get_profile_summary(timers: dict, hot_path_count=HOT_PATH_COUNT):
+    """Returns a dictionary summarizing where a training run spent its time.
+
+    The summary contains the environment step versus policy update split and the blocks that
+    spent the most time in their own code (excluding children), along with their share of the
+    run and average time per call.
+    """
+
+    blocks = flatten_timer_tree(timers)
+    root_total = timers.get('total', 0.0)
+
+    env_step_time = get_outermost_total(blocks, ENV_STEP_BLOCKS)
+    update_time = get_outermost_total(blocks, UPDATE_BLOCKS)
+
+    hot_path = sorted(blocks, key=lambda block: block.self_time, reverse=True)[:hot_path_count]
+
+    return {
+        'total': root_total,
+        'env_step_time': env_step_time,
+        'update_time': update_time,
+        'env_step_share': env_step_time / root_total if root_total else 0.0,
+        'update_share': update_time / root_total if root_total else 0.0,
+        'bound': BOUND_UPDATE if update_time > env_step_time else BOUND_ENVIRONMENT,
+        'hot_path': [
+            {
+                'block': block.path,
+                'total': block.total,
+                'self': block.self_time,
+                'count': block.count,
+                'share': block.share,
+                'self_share': block.self_time / root_total if root_total else 0.0,
+                'mean': block.mean,
+            }
+            for block in hot_path
+        ],
+    }
+
+
+def load_profile_summary(run_id, hot_path_count=HOT_PATH_COUNT):
+    """Returns a profile summary for a training run, or None if mlagents-learn did not write a timers file."""
+
+    file_path = get_timers_file_path(run_id)
+    if not file_path.exists():
+        return None
+
+    return get_profile_summary(load_timers(file_path), hot_path_count=hot_path_count)
@@ -0,0 +1,217 @@
+"""A registry of the settings mlagents-learn accepts for each behavior in a trainer configuration, along with the type and valid values of each.
+
+- Settings are identified by period-separated paths relative to the behavior, as in grimsearch's 'search_parameters'. '*' matches any one name, such as the name of a reward signal.
+- Values suggested by a search are converted to a setting's type and clamped to its valid range before they reach mlagents-learn (see convert_values())
+- Search parameters are checked against the registry before any training run is launched (see validate_value())
+- Trainer configurations and search configurations are checked for settings missing from the registry, which are most often misspelled (see is_known_setting()). Unknown settings and trainer types are only warned about, as they may belong to custom trainers or newer versions of mlagents-learn.
+"""
+
+import collections
+import difflib
+import fnmatch
+import numpy
+
+
+TrainerParameter = collections.namedtuple(
+    'TrainerParameter', ['type', 'minimum', 'maximum', 'step', 'choices']
+)
+
+
+def parameter(value_type, minimum=None, maximum=None, step=None, choices=None):
+    """Returns a TrainerParameter.
+
+    Parameters:
+        value_type: type: int, float, bool or str
+        minimum: The smallest valid value, or None
+        maximum: The largest valid value, or None
+        step: Valid values are multiples of 'step', or None
+        choices: list: The only valid values, or None
+    """
+
+    return TrainerParameter(value_type, minimum, maximum, step, choices)
+
+
+# The trainer types built into mlagents-learn, custom trainers may register others
+TRAINER_TYPES = ['ppo', 'sac', 'poca']
+
+TRAINER_PARAMETERS = {
+    'trainer_type': parameter(str),
+    'hyperparameters.batch_size': parameter(int, minimum=1),
+    'hyperparameters.buffer_size': parameter(int, minimum=1),
+    # Consumed by grimsearch, which replaces it with a 'buffer_size' of 'batch_size' * 'buffer_size_multiple'
+    'hyperparameters.buffer_size_multiple': parameter(int, minimum=1),
+    'hyperparameters.learning_rate': parameter(float, minimum=0.0),
+    'hyperparameters.learning_rate_schedule': parameter(str, choices=['linear', 'constant']),
+    'hyperparameters.beta_schedule': parameter(str, choices=['linear', 'constant']),
+    'hyperparameters.epsilon_schedule': parameter(str, choices=['linear', 'constant']),
+    'hyperparameters.shared_critic': parameter(bool),
+    'hyperparameters.beta': parameter(float, minimum=0.0),
+    'hyperparameters.epsilon': parameter(float, minimum=0.0, maximum=1.0),
+    'hyperparameters.lambd': parameter(float, minimum=0.0, maximum=1.0),
+    'hyperparameters.num_epoch': parameter(int, minimum=1),
+    'hyperparameters.buffer_init_steps': parameter(int, minimum=0),
+    'hyperparameters.init_entcoef': parameter(float, minimum=0.0),
+    'hyperparameters.save_replay_buffer': parameter(bool),
+    'hyperparameters.tau': parameter(float, minimum=0.0, maximum=1.0),
+    'hyperparameters.steps_per_update': parameter(float, minimum=0.0),
+    'hyperparameters.reward_signal_steps_per_update': parameter(float, minimum=0.0),
+    'network_settings.normalize': parameter(bool),
+    'network_settings.hidden_units': parameter(int, minimum=1),
+    'network_settings.num_layers': parameter(int, minimum=1),
+    'network_settings.vis_encode_type': parameter(
+        str, choices=['simple', 'nature_cnn', 'resnet', 'match3', 'fully_connected']
+    ),
+    'network_settings.goal_conditioning_type': parameter(str, choices=['hyper', 'none']),
+    'network_settings.deterministic': parameter(bool),
+    'network_settings.memory.memory_size': parameter(int, minimum=4, step=4),
+    'network_settings.memory.sequence_length': parameter(int, minimum=1),
+    'max_steps': parameter(int, minimum=1),
+    'time_horizon': parameter(int, minimum=1),
+    'summary_freq': parameter(int, minimum=1),
+    'keep_checkpoints': parameter(int, minimum=1),
+    'checkpoint_interval': parameter(int, minimum=1),
+    'even_checkpoints': parameter(bool),
+    'threaded': parameter(bool),
+    'init_path': parameter(str),
+    'reward_signals.*.gamma': parameter(float, minimum=0.0, maximum=1.0),
+    'reward_signals.*.strength': parameter(float, minimum=0.0),
+    'reward_signals.*.encoding_size': parameter(int, minimum=1),
+    'reward_signals.*.learning_rate': parameter(float, minimum=0.0),
+    'reward_signals.*.use_actions': parameter(bool),
+    'reward_signals.*.use_vail': parameter(bool),
+    'reward_signals.*.demo_path': parameter(str),
+    'reward_signals.*.network_settings.normalize': parameter(bool),
+    'reward_signals.*.network_settings.hidden_units': parameter(int, minimum=1),
+    'reward_signals.*.network_settings.num_layers': parameter(int, minimum=1),
+    'behavioral_cloning.demo_path': parameter(str),
+    'behavioral_cloning.strength': parameter(float, minimum=0.0),
+    'behavioral_cloning.steps': parameter(int, minimum=0),
+    'behavioral_cloning.batch_size': parameter(int, minimum=1),
+    'behavioral_cloning.num_epoch': parameter(int, minimum=1),
+    'behavioral_cloning.samples_per_update': parameter(int, minimum=0),
+    'self_play.save_steps': parameter(int, minimum=1),
+    'self_play.team_change': parameter(int, minimum=1),
+    'self_play.swap_steps': parameter(int, minimum=1),
+    'self_play.window': parameter(int, minimum=1),
+    'self_play.play_against_latest_model_ratio': parameter(float, minimum=0.0, maximum=1.0),
+    'self_play.initial_elo': parameter(float),
+}
+
+
+def get_trainer_parameter(key):
+    """Returns the TrainerParameter for a period-separated setting path, or None if the setting is unknown.
+
+    Paths that match no registered setting fall back on the last setting registered with the same final name, so settings nested under misspelled or unregistered sections are still converted to the right type.
+    """
+
+    if key in TRAINER_PARAMETERS:
+        return TRAINER_PARAMETERS[key]
+
+    for pattern, trainer_parameter in TRAINER_PARAMETERS.items():
+        if '*' in pattern and fnmatch.fnmatchcase(key, pattern):
+            return trainer_parameter
+
+    name = key.rsplit('.', maxsplit=1)[-1]
+    matches = [
+        trainer_parameter
+        for pattern, trainer_parameter in TRAINER_PARAMETERS.items()
+        if pattern.rsplit('.', maxsplit=1)[-1] == name
+    ]
+
+    return matches[-1] if matches else None
+
+
+def is_known_setting(key):
+    """Returns True if a period-separated setting path is registered, without falling back on settings with the same final name (see get_trainer_parameter())."""
+
+    if key in TRAINER_PARAMETERS:
+        return True
+
+    return any(
+        '*' in pattern and fnmatch.fnmatchcase(key, pattern) for pattern in TRAINER_PARAMETERS
+    )
+
+
+def get_similar_settings(key, count=3):
+    """Returns up to 'count' registered setting paths that resemble 'key', most similar first, for suggesting corrections to misspelled settings."""
+
+    names = key.split('.')
+
+    candidates = []
+    for pattern in TRAINER_PARAMETERS:
+        # Wildcards are filled with the key's own names, so 'reward_signals.extrinsic.gama' resembles 'reward_signals.extrinsic.gamma'
+        parts = pattern.split('.')
+        candidates.append(
+            '.'.join(
+                names[i] if part == '*' and i < len(names) else part for i, part in enumerate(parts)
+            )
+        )
+
+    return difflib.get_close_matches(key, candidates, n=count)
+
+
+def convert_values(key, values):
+    """Converts values suggested for a setting to the setting's type, rounding them to a multiple of its step and clamping them to its valid range. Accepts a single value or an array-like of values and returns the same, as native Python types. Values of unknown or non-numeric settings are returned unchanged."""
+
+    trainer_parameter = get_trainer_parameter(key)
+    if trainer_parameter is None or trainer_parameter.type not in (int, float):
+        return values
+
+    array = numpy.asarray(values)
+    if array.dtype.kind not in 'iuf':
+        return values
+
+    array = array.astype(float)
+
+    if trainer_parameter.step is not None:
+        array = numpy.floor(array / trainer_parameter.step) * trainer_parameter.step
+
+    if trainer_parameter.type is int:
+        array = numpy.rint(array)
+
+    if trainer_parameter.minimum is not None or trainer_parameter.maximum is not None:
+        minimum = trainer_parameter.minimum
+        if minimum is not None and trainer_parameter.step is not None:
+            # The smallest multiple of the step that is valid
+            minimum = numpy.ceil(minimum / trainer_parameter.step) * trainer_parameter.step
+        array = numpy.clip(array, minimum, trainer_parameter.maximum)
+
+    if trainer_parameter.type is int:
+        array = array.astype(int)
+
+    return array.tolist()
+
+
+def validate_value(key, value):
+    """Returns a description of why a value is not valid for a setting, or None if it is valid or the setting is unknown. Floats are accepted for int settings, as suggested values are converted before training."""
+
+    trainer_parameter = get_trainer_parameter(key)
+    if trainer_parameter is None:
+        return None
+
+    if trainer_parameter.choices is not None and value not in trainer_parameter.choices:
+        return f'\'{key}\' must be one of {trainer_parameter.choices}, not {value!r}'
+
+    if trainer_parameter.type is bool:
+        if not isinstance(value, bool):
+            return f'\'{key}\' must be true or false, not {value!r}'
+        return None
+
+    if trainer_parameter.type is str:
+        if not isinstance(value, str):
+            return f'\'{key}\' must be a string, not {value!r}'
+        return None
+
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return f'\'{key}\' must be a number, not {value!r}'
+
+    if trainer_parameter.minimum is not None and value < trainer_parameter.minimum:
+        return f'\'{key}\' must be at least {trainer_parameter.minimum}, not {value!r}'
+
+    if trainer_parameter.maximum is not None and value > trainer_parameter.maximum:
+        return f'\'{key}\' must be at most {trainer_parameter.maximum}, not {value!r}'
+
+    if trainer_parameter.step is not None and value % trainer_parameter.step != 0:
+        return f'\'{key}\' must be a multiple of {trainer_parameter.step}, not {value!r}'
+
+    return None
@@ -1,3 +1,8 @@
+import concurrent.futures
+import copy
+import logging
+import time
+
 from argparse import Namespace
 from pathlib import Path
 
@@ -5,9 +10,14 @@ import grimagents.common as common
 import grimagents.command_util as command_util
 import grimagents.config as config_util
 import grimagents.constants as const
+import grimagents.coordination as coordination
+import grimagents.results as results
 import grimagents.settings as settings
 
 
+training_log = logging.getLogger('grimagents.training_commands')
+
+
 class Command:
     def __init__(self, args: Namespace):
         self.args = args
@@ -16,7 +26,9 @@ class Command:
 
     def execute(self):
         command = self.create_command()
-        command_util.execute_command(command, show_command=self.show_command, dry_run=self.dry_run)
+        return command_util.execute_command(
+            command, show_command=self.show_command, dry_run=self.dry_run
+        )
 
     def create_command(self):
         return ['cmd', '/K', 'echo', self.__class__.__name__, repr(self.args)]
@@ -71,10 +83,49 @@ class PerformTraining(Command):
 
         command = self.create_command()
         command_util.save_to_history(command)
-        command_util.execute_command(command, show_command=self.show_command, dry_run=self.dry_run)
+
+        lease = self.lease_ports(command) if self.args.auto_port and not self.dry_run else None
+        try:
+            return command_util.execute_command(
+                command, show_command=self.show_command, dry_run=self.dry_run
+            )
+        finally:
+            if lease:
+                coordination.release_ports(lease)
 
     def create_command(self):
 
+        return self.create_training_arguments().get_arguments()
+
+    @staticmethod
+    def lease_ports(command: list):
+        """Leases the ports a training command will use from the host's port registry, used with '--auto-port'.
+
+        Commands without a '--base-port' are given the lowest free range of ports, which is added to the command. Commands with a '--base-port' lease the range they were given so other training runs avoid it.
+
+        Returns:
+          A PortLease, or None if the registry can't be used, in which case the command keeps its configured ports.
+        """
+
+        num_envs = int(command_util.get_command_value(command, const.ML_NUM_ENVS) or 1)
+        base_port = command_util.get_command_value(command, const.ML_BASE_PORT)
+
+        try:
+            if base_port:
+                return coordination.lease_ports(num_envs, start=int(base_port), exact=True)
+
+            lease = coordination.lease_ports(num_envs)
+        except (coordination.CoordinationError, OSError) as exception:
+            training_log.warning(f'Unable to lease ports, using the configured ports. {exception}')
+            return None
+
+        command_util.insert_command_arguments(command, [const.ML_BASE_PORT, lease.start])
+
+        return lease
+
+    def create_training_arguments(self):
+        """Returns a TrainingWrapperArguments object built from the configuration file and command line overrides."""
+
         config_path = Path(self.args.configuration_file)
         config = config_util.load_grim_configuration_file(config_path)
 
@@ -82,7 +133,139 @@ class PerformTraining(Command):
         training_arguments.apply_argument_overrides(self.args)
         training_arguments.set_additional_arguments(self.args.additional_args)
 
-        return training_arguments.get_arguments()
+        return training_arguments
+
+
+class PerformBatchTraining(Command):
+    """Executes the training wrapper once for each of several configuration files, running up to '--parallel' training runs at the same time.
+
+    Every training run is given its own range of ports, counting up from '--base-port' or leased with '--auto-port', and a timestamped run id. A summary of all training runs is output once they have finished.
+    """
+
+    def __init__(self, args):
+        super().__init__(args)
+
+        self.show_command = False
+        self.port_leases = []
+
+    def execute(self):
+
+        commands = self.create_commands()
+        start_time = time.perf_counter()
+
+        try:
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(1, self.args.parallel)
+            ) as executor:
+                outcomes = list(executor.map(self.execute_training, commands))
+        finally:
+            for lease in self.port_leases:
+                coordination.release_ports(lease)
+            self.port_leases = []
+
+        if not self.dry_run:
+            self.output_summary(outcomes, time.perf_counter() - start_time)
+
+        return next((outcome['return_code'] for outcome in outcomes if outcome['return_code']), 0)
+
+    def create_commands(self):
+        """Returns a list of training commands, one for each configuration file.
+
+        With '--auto-port', unless this is a dry run, the ports of each training run are leased from the host's port registry and held until the batch completes.
+        """
+
+        explicit_ports = self.args.base_port is not None
+        base_port = self.args.base_port if explicit_ports else coordination.DEFAULT_BASE_PORT
+        run_ids = set()
+        commands = []
+
+        for index, configuration_file in enumerate(self.args.configuration_files):
+            run_args = copy.copy(self.args)
+            run_args.configuration_file = configuration_file
+
+            training_arguments = PerformTraining(run_args).create_training_arguments()
+
+            # Timestamps only differ by the second, so configurations sharing a run id are numbered
+            run_id = training_arguments.get_run_id()
+            if run_id in run_ids:
+                run_id = f'{run_id}_{index:02d}'
+                training_arguments.set_run_id(run_id)
+            run_ids.add(run_id)
+
+            if not self.args.resume:
+                training_arguments.set_timestamp_enabled(True)
+
+            # Each environment instance listens on its own port, counting up from the base port
+            num_envs = int(training_arguments.arguments.get(const.ML_NUM_ENVS) or 1)
+            if self.args.auto_port and not self.dry_run:
+                lease = self.lease_batch_ports(num_envs, base_port, explicit_ports)
+                if lease:
+                    self.port_leases.append(lease)
+                    base_port = lease.start
+
+            training_arguments.set_base_port(base_port)
+            base_port += num_envs
+
+            commands.append(training_arguments.get_arguments())
+
+        return commands
+
+    @staticmethod
+    def lease_batch_ports(num_envs, base_port, exact):
+        """Returns a PortLease for a training run in the batch, or None if the registry can't be used, in which case its ports count up from the last training run's."""
+
+        try:
+            return coordination.lease_ports(num_envs, start=base_port, exact=exact)
+        except (coordination.CoordinationError, OSError) as exception:
+            training_log.warning(
+                f'Unable to lease ports, counting up from port {base_port}. {exception}'
+            )
+            return None
+
+    def execute_training(self, command):
+        """Executes a training command and returns a dictionary describing its outcome."""
+
+        run_id = command_util.get_command_value(command, const.ML_RUN_ID)
+
+        if not self.dry_run:
+            command_util.save_to_history(command)
+            training_log.info(f'Starting training run \'{run_id}\'')
+
+        start_time = time.perf_counter()
+        return_code = command_util.execute_command(
+            command, show_command=self.show_command, dry_run=self.dry_run
+        )
+
+        return {
+            'run_id': run_id,
+            'return_code': return_code,
+            'duration': time.perf_counter() - start_time,
+            'summary': None if self.dry_run else results.find_run_summary(run_id),
+        }
+
+    @staticmethod
+    def output_summary(outcomes: list, duration):
+        """Outputs the result of each training run in a batch.
+
+        Parameters:
+            outcomes: list: Dictionaries returned by execute_training()
+            duration: float: The number of seconds the batch took to complete
+        """
+
+        training_log.info('-' * 63)
+        training_log.info(f'{"Run id":<40} {"Return":>6} {"Mean reward":>15}')
+
+        for outcome in outcomes:
+            summary = outcome['summary'] or {}
+            mean_reward = summary.get('mean_reward')
+            reward = f'{mean_reward:.3f}' if mean_reward is not None else '-'
+
+            training_log.info(f'{outcome["run_id"]:<40} {outcome["return_code"]:>6} {reward:>15}')
+
+        failed_count = sum(1 for outcome in outcomes if outcome['return_code'])
+        training_log.info(
+            f'{len(outcomes) - failed_count} of {len(outcomes)} training runs completed in {common.get_human_readable_duration(duration)}'
+        )
 
 
 class TrainingWrapperArguments:
@@ -114,6 +297,9 @@ class TrainingWrapperArguments:
         if args.num_envs is not None:
             self.set_num_envs(str(args.num_envs))
 
+        if args.seed is not None:
+            self.set_seed(str(args.seed))
+
         if args.graphics:
             # As the argument is 'no-graphics', false in this case means
             # graphics are used.
@@ -210,6 +396,14 @@ class TrainingWrapperArguments:
             if key == const.ML_ENV_ARGS:
                 continue
 
+            # Several export paths may be configured as a list, each of which
+            # is passed to training_wrapper as a separate argument.
+            if key == const.GA_EXPORT_PATH and isinstance(value, list):
+                for path in value:
+                    if path:
+                        result += [key, path]
+                continue
+
             # Additional arguments are serialized as a list and the key should
             # not be included.
             if key == const.GA_ADDITIONAL_ARGS:
@@ -291,6 +485,9 @@ class TrainingWrapperArguments:
     def set_num_envs(self, value):
         self.arguments[const.ML_NUM_ENVS] = value
 
+    def set_seed(self, value):
+        self.arguments[const.ML_SEED] = value
+
     def set_inference(self, value):
         self.arguments[const.GA_INFERENCE] = value
 
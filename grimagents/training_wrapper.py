@@ -3,24 +3,75 @@ CLI application that wraps 'mlagents-learn' with more automation.
 
 Features:
 - Displays estimated time remaining in training run
-- Optionally copies trained policies to another location after training finishes (for example, into a Unity project)
+- Optionally copies trained policies to another location as soon as they are exported (for example, into a Unity project)
+- Writes a summary of each training run, including a trainer profile built from mlagents' timers.json and the reward curve from its event files
+- Writes the progress of each training run while it is in progress, for estimating when searches will finish and for launching their next training run while the last one shuts down
+- Relaunches training on a new range of ports if the environment is unable to connect
+- Optionally terminates and resumes training that stops making progress
+- Optionally stops training gracefully once it reaches a time limit
+- Samples the CPU, memory, thread and disk usage of mlagents-learn and its environments, where /proc is available
 
 See readme.md for more information.
 """
 
 import argparse
+import hashlib
+import json
 import logging
 import logging.config
+import os
+import queue
 import re
+import shutil
+import signal
+import subprocess
 import sys
+import threading
 import time
 
+from concurrent.futures import ThreadPoolExecutor
+
 from pathlib import Path
 from subprocess import Popen, PIPE
 
-import grimagents.settings as settings
+import grimagents.command_util as command_util
 import grimagents.common as common
 import grimagents.constants as const
+import grimagents.coordination as coordination
+import grimagents.log_util as log_util
+import grimagents.results as results
+import grimagents.settings as settings
+import grimagents.telemetry as telemetry
+import grimagents.tensorboard_events as tensorboard_events
+import grimagents.timers as timers
+
+COPY_CHUNK_SIZE = 1024 * 1024
+PORT_RETRIES = 3
+MAX_RESTARTS = 3
+
+# Seconds between checks for stalled training, and to wait for a terminated process to exit
+WATCHDOG_INTERVAL = 1.0
+TERMINATE_TIMEOUT = 10.0
+# Seconds an interrupted training process is given to save its model before it is terminated
+INTERRUPT_TIMEOUT = 60.0
+# Minimum seconds between writes of a training run's progress file
+PROGRESS_INTERVAL = 10.0
+# Seconds the wrapper waits for brain exports still in progress once training has ended
+EXPORT_TIMEOUT = 60.0
+
+# Run by a helper process on Windows to send Ctrl+C to every process attached to a training process' console, see interrupt_process_group()
+CONSOLE_INTERRUPT_SCRIPT = '''
+import ctypes, sys
+kernel32 = ctypes.windll.kernel32
+kernel32.FreeConsole()
+if not kernel32.AttachConsole(int(sys.argv[1])):
+    sys.exit(1)
+kernel32.SetConsoleCtrlHandler(None, True)
+sys.exit(0 if kernel32.GenerateConsoleCtrlEvent(0, 0) else 1)
+'''
+
+RESTART_PORT_CONFLICT = 'port_conflict'
+RESTART_STALL = 'stall'
 
 
 training_log = logging.getLogger('grimagents.training_wrapper')
@@ -41,7 +92,19 @@ class TrainingRunInfo:
         self.time_regex = re.compile(r'Time Elapsed: ([\.\d]+) s')
         self.max_steps_regex = re.compile(r'max_steps:\t(.+)$')
         self.mean_reward_regex = re.compile(r'(Mean Reward: )([^ ]+)\. ')
-        self.exported_brain_regex = re.compile(r'Exported (.*\.nn) file')
+        self.exported_brain_regex = re.compile(r'Exported (.*\.(?:nn|onnx))\b')
+
+        # Raised when the trainer can't bind its port, or the environment never connects to it
+        self.port_conflict = False
+        # Raised when the watchdog terminates a training process that stopped making progress
+        self.stalled = False
+        # Raised when training is interrupted for reaching its time limit
+        self.time_limited = False
+        # Raised once training has stopped and only exporting and shutting down remain
+        self.finishing = False
+        self.port_conflict_regex = re.compile(
+            r'Address already in use|Only one usage of each socket address|\[Errno 98\]|\[WinError 10048\]|UnityTimeOutException|took too long to respond'
+        )
 
     def update_from_training_output(self, line):
 
@@ -67,10 +130,42 @@ class TrainingRunInfo:
         if match:
             self.exported_brains.append(Path(match.group(1)))
 
+        if self.port_conflict_regex.search(line):
+            self.port_conflict = True
+
+        if self.max_steps != 0 and self.step >= self.max_steps:
+            self.finishing = True
+
         if self.max_steps != 0 and self.step != 0:
             self.time_remaining = (self.time_elapsed / self.step) * self.steps_remaining
             self.time_remaining = max(self.time_remaining, 0.0)
 
+    def get_steps_per_second(self):
+
+        if self.time_elapsed == 0:
+            return 0.0
+
+        return self.step / self.time_elapsed
+
+    def get_progress(self):
+        """Returns a dictionary describing how far training has progressed."""
+
+        return {
+            'step': self.step,
+            'max_steps': self.max_steps,
+            'time_elapsed': self.time_elapsed,
+            'time_remaining': self.time_remaining,
+            'steps_per_second': self.get_steps_per_second(),
+            'mean_reward': self.mean_reward,
+            'phase': results.RUN_PHASE_FINISHING if self.finishing else results.RUN_PHASE_TRAINING,
+            'updated': time.time(),
+        }
+
+    def has_port_conflict(self):
+        """Returns True if the environment failed to connect before training made any progress."""
+
+        return self.port_conflict and self.step == 0
+
     def line_has_time_elapsed(self, line):
 
         return self.time_regex.search(line) is not None
@@ -78,7 +173,10 @@ class TrainingRunInfo:
 
 def main():
 
-    configure_logging()
+    argv = get_argvs()
+    args = parse_args(argv)
+
+    configure_logging(args.run_id)
 
     if not common.is_pipenv_present():
         training_log.error(
@@ -86,11 +184,22 @@ def main():
         )
         sys.exit(1)
 
-    argv = get_argvs()
-    args = parse_args(argv)
-
     run_id = args.run_id
     training_info = TrainingRunInfo()
+    restarts = []
+    port_lease = None
+
+    exporter = None
+    if args.export_path:
+        exporter = BrainExporter([Path(path) for path in args.export_path], link=args.export_link)
+        exporter.start()
+
+    monitor = None
+    if args.telemetry_interval > 0:
+        monitor = telemetry.ResourceMonitor(
+            args.telemetry_interval, results.get_run_telemetry_path(run_id)
+        )
+        monitor.start()
 
     command = [
         'pipenv',
@@ -101,56 +210,498 @@ def main():
         run_id,
     ] + args.args
 
-    try:
-        with Popen(
-            command, stdout=sys.stderr, stderr=PIPE, bufsize=2, universal_newlines=True
-        ) as p:
-
-            training_log.info(f'{" ".join(command[2:])}')
-            training_log.info('-' * 63)
-            training_log.info(f'Initiating \'{run_id}\'')
-
-            start_time = time.perf_counter()
-            output_time_remaining = const.GA_INFERENCE not in args.args
+    return_code = None
+    start_time = time.perf_counter()
+    deadline = time.monotonic() + args.time_limit if args.time_limit else None
 
-            for line in p.stderr:
-                # Print intercepted line so it is visible in the console
-                line = line.rstrip()
-                print(line)
-
-                training_info.update_from_training_output(line)
+    try:
+        training_log.info(f'{" ".join(command[2:])}')
+        training_log.info('-' * 63)
+        training_log.info(f'Initiating \'{run_id}\'')
+
+        output_time_remaining = const.GA_INFERENCE not in args.args
+
+        while True:
+            return_code = run_training(
+                command,
+                training_info,
+                exporter,
+                output_time_remaining,
+                stall_timeout=args.stall_timeout,
+                deadline=deadline,
+                run_id=run_id,
+                monitor=monitor,
+            )
 
-                if output_time_remaining and training_info.line_has_time_elapsed(line):
-                    print(
-                        f'Estimated time remaining: {common.get_human_readable_duration(training_info.time_remaining)}'
+            if training_info.time_limited:
+                break
+
+            # Training that stalls while shutting down has already saved its model
+            if (
+                training_info.stalled
+                and not training_info.finishing
+                and not training_info.has_port_conflict()
+            ):
+                # Training that stalled before its first step has no checkpoint to resume from
+                if training_info.step == 0:
+                    training_log.warning('Training stalled before reporting a step, giving up')
+                    break
+
+                if count_restarts(restarts, RESTART_STALL) >= args.max_restarts:
+                    training_log.warning(
+                        f'Training stalled after {args.max_restarts} restarts, giving up'
                     )
+                    break
+
+                command = get_resume_command(command)
+                restarts.append(
+                    {
+                        'reason': RESTART_STALL,
+                        'step': training_info.step,
+                        'return_code': return_code,
+                        'time': common.get_timestamp(),
+                    }
+                )
+                training_log.warning(
+                    f'No training progress for {args.stall_timeout} seconds, resuming from step {training_info.step}'
+                )
+                continue
+
+            if return_code == 0 or not training_info.has_port_conflict():
+                break
+
+            port_retries = count_restarts(restarts, RESTART_PORT_CONFLICT)
+            if port_retries >= args.port_retries:
+                training_log.warning(
+                    f'The environment was unable to connect after {port_retries} port changes, giving up'
+                )
+                break
+
+            if port_lease:
+                coordination.release_ports(port_lease)
+                port_lease = None
+
+            try:
+                command, port_lease = get_port_retry_command(command)
+            except (coordination.CoordinationError, OSError) as exception:
+                training_log.warning(f'Unable to lease new ports, giving up. {exception}')
+                break
+
+            restarts.append(
+                {
+                    'reason': RESTART_PORT_CONFLICT,
+                    'step': training_info.step,
+                    'return_code': return_code,
+                    'time': common.get_timestamp(),
+                    'base_port': port_lease.start,
+                }
+            )
+            training_log.warning(
+                f'The environment was unable to connect, relaunching on port {port_lease.start}'
+            )
 
     except KeyboardInterrupt:
         training_log.warning('KeyboardInterrupt, aborting')
         raise
 
     finally:
+        training_info.finishing = True
+        write_run_progress(run_id, training_info)
+
         training_log.info('-' * 63)
-        if args.export_path:
-            export_brains(training_info.exported_brains, Path(args.export_path))
+        if exporter:
+            # Brains are exported while training runs, so only exports still in progress are waited on,
+            # and not for longer than EXPORT_TIMEOUT.
+            exporter.close()
+
+        if port_lease:
+            coordination.release_ports(port_lease)
+
+        resources = None
+        if monitor:
+            monitor.close()
+            resources = monitor.get_summary()
 
         end_time = time.perf_counter()
         training_duration = common.get_human_readable_duration(end_time - start_time)
 
         training_log.info(f'Training run \'{run_id}\' ended after {training_duration}')
 
-        if p.returncode == 0:
+        if training_info.time_limited:
+            training_log.info(
+                f'Training was stopped at step {training_info.step} after reaching its time limit'
+            )
+        elif return_code == 0:
             training_log.info('Training completed successfully')
         else:
             training_log.warning(
-                f'Training was not completed successfully (error code {p.returncode})'
+                f'Training was not completed successfully (error code {return_code})'
             )
 
         training_log.info(f'Final Mean Reward: {training_info.mean_reward}')
+
+        if resources:
+            training_log.info(telemetry.get_summary_description(resources))
+
+        profile = load_profile_summary(run_id)
+        if profile:
+            training_log.info(
+                f'Environment step: {profile["env_step_share"]:.1%}, Policy update: {profile["update_share"]:.1%} ({profile["bound"]} bound)'
+            )
+
+        summary = create_run_summary(
+            run_id,
+            args,
+            training_info,
+            return_code,
+            end_time - start_time,
+            profile,
+            restarts,
+            resources,
+            load_reward_curves(run_id),
+        )
+        results.write_run_summary(run_id, summary)
+
         training_log.info('-' * 63)
         logging.shutdown()
 
 
+def run_training(
+    command: list,
+    training_info: TrainingRunInfo,
+    exporter=None,
+    output_time_remaining=True,
+    stall_timeout=0,
+    deadline=None,
+    run_id=None,
+    monitor=None,
+):
+    """Executes mlagents-learn, relaying its output to the console and updating training_info from it.
+
+    Output is read on a separate thread so a training process that stops printing can't block the
+    wrapper. If stall_timeout is set and training prints no output for that many seconds, or reports
+    no training step for that many seconds past the interval steps have been reported at, the
+    training process and its children are terminated and training_info.stalled is set. If a deadline
+    (a time.monotonic() value) is set and reached, training is interrupted so mlagents-learn saves
+    its model and exits, and training_info.time_limited is set. If a run_id is set, the training
+    run's progress is written into its progress file as training steps are reported, and as soon as
+    training reaches its last step or time limit. If a monitor (a telemetry.ResourceMonitor) is set,
+    it samples the training process and its children until the training process exits.
+
+    Returns:
+      The return code of the training process.
+    """
+
+    training_info.port_conflict = False
+    training_info.stalled = False
+    training_info.time_limited = False
+
+    output = queue.Queue()
+
+    with Popen(
+        command,
+        stdout=sys.stderr,
+        stderr=PIPE,
+        bufsize=2,
+        universal_newlines=True,
+        **get_process_group_arguments(),
+    ) as p:
+
+        def read_output():
+            for line in p.stderr:
+                output.put(line)
+            output.put(None)
+
+        reader = threading.Thread(
+            target=read_output, name='grimagents-training-output', daemon=True
+        )
+        reader.start()
+
+        if monitor:
+            monitor.watch(p.pid)
+
+        last_step = training_info.step
+        last_progress_time = time.monotonic()
+        last_output_time = last_progress_time
+        # The seconds between the last two training steps reported, mlagents-learn reports one every summary_freq steps
+        step_interval = None
+        step_reported = False
+        interrupt_time = None
+        progress_time = None
+        watch = stall_timeout or deadline is not None
+
+        try:
+            while True:
+                try:
+                    line = output.get(timeout=WATCHDOG_INTERVAL if watch else None)
+                except queue.Empty:
+                    line = ''
+                else:
+                    if line is None:
+                        break
+
+                    last_output_time = time.monotonic()
+                    relay_training_output(line, training_info, exporter, output_time_remaining)
+
+                if training_info.step != last_step:
+                    now = time.monotonic()
+                    if step_reported:
+                        step_interval = now - last_progress_time
+
+                    step_reported = True
+                    last_step = training_info.step
+                    last_progress_time = now
+
+                    # Progress is written as soon as training finishes, so searches can launch their next training run
+                    if run_id and (
+                        progress_time is None
+                        or last_progress_time - progress_time >= PROGRESS_INTERVAL
+                        or training_info.finishing
+                    ):
+                        progress_time = last_progress_time
+                        write_run_progress(run_id, training_info)
+
+                now = time.monotonic()
+
+                if interrupt_time is not None:
+                    # Output is relayed until the interrupted process exits, unless saving takes too long
+                    if now - interrupt_time > INTERRUPT_TIMEOUT:
+                        training_log.warning(
+                            f'Training did not exit within {INTERRUPT_TIMEOUT} seconds of being interrupted, terminating training'
+                        )
+                        terminate_process_group(p)
+                        break
+                    continue
+
+                if deadline is not None and now >= deadline:
+                    training_log.info('Time limit reached, stopping training')
+                    training_info.time_limited = True
+                    training_info.finishing = True
+                    interrupt_time = now
+                    interrupt_process_group(p)
+                    if run_id:
+                        write_run_progress(run_id, training_info)
+                    continue
+
+                # Unity environments can take longer to start than a step takes to be reported, so only output is expected before the first step
+                no_output = now - last_output_time > stall_timeout
+                no_progress = (
+                    step_interval is not None
+                    and now - last_progress_time > stall_timeout + step_interval
+                )
+
+                if stall_timeout and (no_output or no_progress):
+                    reason = 'output' if no_output else 'training progress'
+                    training_log.warning(
+                        f'No {reason} reported for {stall_timeout} seconds, terminating training'
+                    )
+                    training_info.stalled = True
+                    terminate_process_group(p)
+                    break
+
+        except KeyboardInterrupt:
+            # The training process runs in its own process group, so it does not receive the
+            # interrupt. It is forwarded so mlagents-learn saves its model before exiting.
+            training_log.warning('KeyboardInterrupt, waiting for training to save its model')
+            try:
+                # Training already interrupted at its time limit is saving its model, and is left to finish
+                if not wait_for_interrupted_training(
+                    p, output, training_info, exporter, interrupt=interrupt_time is None
+                ):
+                    training_log.warning(
+                        f'Training did not exit within {INTERRUPT_TIMEOUT} seconds of being interrupted, terminating training'
+                    )
+            finally:
+                terminate_process_group(p)
+            raise
+
+        finally:
+            if monitor:
+                monitor.unwatch()
+
+        reader.join(timeout=WATCHDOG_INTERVAL)
+
+    return p.returncode
+
+
+def relay_training_output(
+    line, training_info: TrainingRunInfo, exporter=None, output_time_remaining=True
+):
+    """Prints a line of mlagents-learn output, updates training_info from it and queues any brains it reports as exported."""
+
+    # Print intercepted line so it is visible in the console
+    line = line.rstrip()
+    print(line)
+
+    brain_count = len(training_info.exported_brains)
+    training_info.update_from_training_output(line)
+
+    if exporter:
+        for brain in training_info.exported_brains[brain_count:]:
+            exporter.submit(brain)
+
+    if output_time_remaining and training_info.line_has_time_elapsed(line):
+        print(
+            f'Estimated time remaining: {common.get_human_readable_duration(training_info.time_remaining)}'
+        )
+
+
+def wait_for_interrupted_training(
+    process: Popen,
+    output: queue.Queue,
+    training_info,
+    exporter=None,
+    timeout=INTERRUPT_TIMEOUT,
+    interrupt=True,
+):
+    """Interrupts a training process so mlagents-learn saves its model, and relays its output until it exits.
+
+    Parameters:
+        output: queue.Queue: The queue the training process' output lines are read into, ending with None once the output is closed
+        interrupt: bool: Interrupt the training process, False if it has already been interrupted
+
+    Returns:
+      True if the training process exited within the timeout, otherwise False.
+    """
+
+    if interrupt:
+        interrupt_process_group(process)
+    deadline = time.monotonic() + timeout
+
+    while True:
+        try:
+            line = output.get(timeout=max(deadline - time.monotonic(), 0))
+        except queue.Empty:
+            return False
+
+        if line is None:
+            break
+
+        relay_training_output(line, training_info, exporter, output_time_remaining=False)
+
+    try:
+        process.wait(timeout=max(deadline - time.monotonic(), 0))
+    except subprocess.TimeoutExpired:
+        return False
+
+    return True
+
+
+def write_run_progress(run_id, training_info: TrainingRunInfo):
+    """Writes a training run's progress file. Failing to write progress does not interrupt training."""
+
+    try:
+        results.write_run_progress(run_id, training_info.get_progress())
+    except OSError as exception:
+        training_log.debug(f'Unable to write progress for \'{run_id}\', {exception}')
+
+
+def get_process_group_arguments():
+    """Returns Popen arguments that start a process in a new process group, so it can be interrupted or terminated along with any processes it starts (such as Unity environments).
+
+    On Windows the process is given a hidden console of its own instead, as Ctrl+C can't be sent to a new process group and CTRL_BREAK_EVENT stops mlagents-learn without saving its model.
+    """
+
+    if os.name == 'nt':
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        startupinfo.wShowWindow = subprocess.SW_HIDE
+        return {'creationflags': subprocess.CREATE_NEW_CONSOLE, 'startupinfo': startupinfo}
+
+    return {'start_new_session': True}
+
+
+def interrupt_process_group(process: Popen):
+    """Interrupts a process started with get_process_group_arguments() and every process in its group, as if Ctrl+C were pressed in the console. mlagents-learn saves its model before exiting when interrupted."""
+
+    if process.poll() is not None:
+        return
+
+    if os.name == 'nt':
+        # A helper process attaches to the training process' console, as a process can only send Ctrl+C to its own console
+        result = subprocess.run(
+            [sys.executable, '-c', CONSOLE_INTERRUPT_SCRIPT, str(process.pid)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        if result.returncode != 0:
+            training_log.warning(f'Unable to interrupt training process {process.pid}')
+        return
+
+    try:
+        os.killpg(process.pid, signal.SIGINT)
+    except ProcessLookupError:
+        pass
+
+
+def terminate_process_group(process: Popen, timeout=TERMINATE_TIMEOUT):
+    """Terminates a process started with get_process_group_arguments() and every process in its group. Processes that do not exit within the timeout are killed."""
+
+    if process.poll() is not None:
+        return
+
+    if os.name == 'nt':
+        # taskkill terminates the whole process tree
+        subprocess.run(
+            ['taskkill', '/F', '/T', '/PID', str(process.pid)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        process.wait()
+        return
+
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+    except ProcessLookupError:
+        process.wait()
+
+
+def count_restarts(restarts: list, reason):
+    """Returns the number of restarts made for a given reason."""
+
+    return sum(1 for restart in restarts if restart['reason'] == reason)
+
+
+def get_resume_command(command: list):
+    """Returns a copy of a training command that resumes the training run from its last checkpoint."""
+
+    command = [argument for argument in command if argument != const.ML_FORCE]
+    if const.ML_RESUME not in command:
+        command_util.insert_command_arguments(command, [const.ML_RESUME])
+
+    return command
+
+
+def get_port_retry_command(command: list):
+    """Returns a copy of a training command moved onto a new range of free ports, along with the PortLease for the new range.
+
+    The new range begins above the range the command was using. As mlagents-learn may have created the run's results folder before failing, '--force' is added unless the command resumes a run.
+    """
+
+    command = list(command)
+    num_envs = int(command_util.get_command_value(command, const.ML_NUM_ENVS) or 1)
+    base_port = int(
+        command_util.get_command_value(command, const.ML_BASE_PORT)
+        or coordination.DEFAULT_BASE_PORT
+    )
+
+    lease = coordination.lease_ports(num_envs, start=base_port + num_envs)
+
+    if const.ML_BASE_PORT in command:
+        command[command.index(const.ML_BASE_PORT) + 1] = str(lease.start)
+    else:
+        command_util.insert_command_arguments(command, [const.ML_BASE_PORT, str(lease.start)])
+
+    if const.ML_RESUME not in command and const.ML_FORCE not in command:
+        command_util.insert_command_arguments(command, [const.ML_FORCE])
+
+    return command, lease
+
+
 def get_argvs():
 
     return sys.argv[1:]
@@ -168,7 +719,50 @@ def parse_args(argv):
         help='Run id for the training session',
     )
     wrapper_parser.add_argument(
-        '--export-path', type=str, help='Export trained policies to this path'
+        '--export-path',
+        type=str,
+        action='append',
+        help='Export trained policies to this path. May be used more than once.',
+    )
+    wrapper_parser.add_argument(
+        '--port-retries',
+        metavar='<n>',
+        type=int,
+        default=PORT_RETRIES,
+        help='Relaunch training on a new range of ports up to <n> times if the environment is unable to connect',
+    )
+    wrapper_parser.add_argument(
+        '--stall-timeout',
+        metavar='<seconds>',
+        type=float,
+        default=0,
+        help='Terminate and resume training if it prints no output, or reports no training step, for <seconds>. Disabled by default.',
+    )
+    wrapper_parser.add_argument(
+        '--max-restarts',
+        metavar='<n>',
+        type=int,
+        default=MAX_RESTARTS,
+        help='The number of times stalled training is resumed before giving up',
+    )
+    wrapper_parser.add_argument(
+        '--time-limit',
+        metavar='<seconds>',
+        type=float,
+        default=0,
+        help='Stop training gracefully after <seconds>, saving the model trained so far. Disabled by default.',
+    )
+    wrapper_parser.add_argument(
+        '--telemetry-interval',
+        metavar='<seconds>',
+        type=float,
+        default=telemetry.SAMPLE_INTERVAL,
+        help=f'Sample the CPU, memory, thread and disk usage of mlagents-learn and its environments every <seconds>, where /proc is available. 0 disables sampling. (default {telemetry.SAMPLE_INTERVAL})',
+    )
+    wrapper_parser.add_argument(
+        '--export-link',
+        action='store_true',
+        help='Export trained policies as hard links when the export path is on the same filesystem',
     )
 
     parser = argparse.ArgumentParser(
@@ -190,8 +784,12 @@ def parse_args(argv):
     return parser.parse_args(extra_args, wrapper_args)
 
 
-def configure_logging():
-    """Configures logging for a training session."""
+def configure_logging(run_id=None):
+    """Configures logging for a training session. Training sessions log into the combined log file and into a log file named after their run id.
+
+    Parameters:
+        run_id: str: The run id of the training session
+    """
 
     log_config = {
         'version': 1,
@@ -206,43 +804,336 @@ def configure_logging():
                 'stream': 'ext://sys.stdout',
                 'formatter': 'display',
             },
-            'file': {'class': 'logging.FileHandler', 'filename': '', 'formatter': 'timestamp'},
+            'file': log_util.get_file_handler_config(run_id),
         },
         'loggers': {'grimagents.training_wrapper': {'handlers': ['console', 'file']}},
         'root': {'level': 'INFO'},
     }
 
-    log_file = settings.get_log_file_path()
+    logging.config.dictConfig(log_config)
 
-    if not log_file.parent.exists():
-        log_file.parent.mkdir(parents=True, exist_ok=True)
 
-    log_config['handlers']['file']['filename'] = log_file
-    logging.config.dictConfig(log_config)
+def load_profile_summary(run_id):
+    """Returns a profile summary built from the training run's timers.json file, or None if it is not available."""
+
+    try:
+        return timers.load_profile_summary(run_id)
+    except json.decoder.JSONDecodeError:
+        training_log.warning(f'Unable to read timers file for \'{run_id}\'')
+        return None
 
 
-def export_brains(brain_paths: list, export_path: Path):
-    """Copies a list of brain files into a target folder.
+def load_reward_curves(run_id):
+    """Returns the reward curves mlagents-learn wrote into the training run's event files as a dictionary of (step, reward) tuple lists keyed by behavior name, or an empty dictionary if they are not available."""
+
+    try:
+        return tensorboard_events.load_scalar_curves(settings.get_run_folder(run_id))
+    except (tensorboard_events.EventFileError, OSError) as exception:
+        training_log.warning(f'Unable to read event files for \'{run_id}\', {exception}')
+        return {}
+
+
+def create_run_summary(
+    run_id,
+    args,
+    training_info,
+    return_code,
+    duration,
+    profile=None,
+    restarts=None,
+    resources=None,
+    reward_curves=None,
+):
+    """Returns a dictionary recording the outcome of a training run.
+
+    Parameters:
+        restarts: list: Dictionaries describing each time mlagents-learn was relaunched
+        resources: dict: The mean and peak resource usage of the training process tree, see telemetry.summarize_samples()
+        reward_curves: dict: (step, reward) tuple lists read from the training run's event files for each behavior, see load_reward_curves()
+    """
+
+    return {
+        'run_id': run_id,
+        'trainer_config_path': args.trainer_config_path,
+        'arguments': args.args,
+        'return_code': return_code,
+        'duration': duration,
+        'step': training_info.step,
+        'max_steps': training_info.max_steps,
+        'time_elapsed': training_info.time_elapsed,
+        'steps_per_second': training_info.get_steps_per_second(),
+        'mean_reward': training_info.mean_reward,
+        'time_limited': training_info.time_limited,
+        'exported_brains': [str(brain) for brain in training_info.exported_brains],
+        'profile': profile,
+        'restarts': restarts or [],
+        'resources': resources,
+        'reward_curves': {
+            behavior_name: [[step, reward] for step, reward in reward_curve]
+            for behavior_name, reward_curve in (reward_curves or {}).items()
+        },
+    }
+
+
+class BrainExporter:
+    """Exports brains on a background thread as soon as mlagents-learn reports them, so policies reach their export paths while training is still running."""
+
+    def __init__(self, export_paths: list, link=False):
+        """
+        Parameters:
+            export_paths: list: A list of folders to export brains files into
+            link: bool: Hard link brains into target folders on the same filesystem instead of copying them
+        """
+
+        self.export_paths = export_paths
+        self.link = link
+        self.digests = BrainDigests()
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.process_queue, daemon=True)
+
+    def start(self):
+
+        self.thread.start()
+
+    def submit(self, brain_path: Path):
+        """Queues a brain file for export."""
+
+        self.queue.put(brain_path)
+
+    def close(self, timeout=EXPORT_TIMEOUT):
+        """Waits up to 'timeout' seconds for queued brains to be exported and stops the background thread.
+
+        Returns:
+          True if every queued brain was exported, False if exports were still in progress when the timeout passed.
+        """
+
+        self.queue.put(None)
+        self.thread.join(timeout)
+
+        if self.thread.is_alive():
+            training_log.warning(
+                f'Brains were still being exported {timeout} seconds after training ended, not waiting for them'
+            )
+            return False
+
+        return True
+
+    def process_queue(self):
+
+        while True:
+            brains = self.get_batch()
+            if brains is None:
+                return
+
+            try:
+                export_brains(brains, self.export_paths, link=self.link, digests=self.digests)
+            except OSError as exception:
+                training_log.warning(
+                    f'Unable to export {[str(brain) for brain in brains]}, {exception}'
+                )
+
+    def get_batch(self):
+        """Waits for a brain to be queued and returns it along with every other brain already queued, or None once the exporter is closed.
+
+        mlagents-learn reports each of its brains in turn when it exports, so brains queued together are exported as one batch. A brain queued more than once is only exported once, as its file already holds its latest version.
+        """
+
+        brain = self.queue.get()
+        if brain is None:
+            return None
+
+        brains = [brain]
+        while True:
+            try:
+                brain = self.queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if brain is None:
+                # Brains queued before the exporter was closed are still exported
+                self.queue.put(None)
+                break
+
+            if brain not in brains:
+                brains.append(brain)
+
+        return brains
+
+
+def export_brains(brain_paths: list, export_paths: list, link=False, digests=None):
+    """Copies a list of brain files into one or more target folders.
+
+    Each target folder is exported to in parallel. Brains whose contents already match the file
+    in a target folder are skipped.
 
     Parameters:
         brain_paths: list: A list of Path objects pointing each brain files that should be exported
-        export_path: Path: A folder to export brains files into
+        export_paths: list: A list of folders to export brains files into
+        link: bool: Hard link brains into target folders on the same filesystem instead of copying them
+        digests: BrainDigests: A digest cache to share between several calls
     """
 
     training_log.info('Exporting brains:')
 
+    brain_paths = [brain for brain in brain_paths if brain.exists()]
+    digests = digests or BrainDigests()
+
+    with ThreadPoolExecutor(max_workers=max(len(export_paths), 1)) as executor:
+        futures = [
+            executor.submit(export_brains_to_folder, brain_paths, export_path, digests, link)
+            for export_path in export_paths
+        ]
+        for future in futures:
+            future.result()
+
+
+def export_brains_to_folder(brain_paths: list, export_path: Path, digests=None, link=False):
+    """Exports a list of brain files into a single target folder, skipping brains that are already up to date."""
+
     if not export_path.exists():
         export_path.mkdir(parents=True, exist_ok=True)
 
-    for brain in brain_paths:
-        if not brain.exists():
-            continue
+    digests = digests or BrainDigests()
 
+    for brain in brain_paths:
         destination = export_path / brain.name
-        destination.write_bytes(brain.read_bytes())
 
+        if files_match(brain, destination, digests):
+            training_log.info(f'\t{destination} (unchanged)')
+            continue
+
+        export_file(brain, destination, link=link)
         training_log.info(f'\t{destination}')
 
 
+class BrainDigests:
+    """Thread safe cache of file content digests, so a brain is only hashed once when exported to several folders."""
+
+    def __init__(self):
+
+        self.digests = {}
+        self.lock = threading.Lock()
+
+    def get_digest(self, file_path: Path):
+
+        key = (file_path.resolve(), file_path.stat().st_mtime_ns)
+        with self.lock:
+            if key not in self.digests:
+                self.digests[key] = get_file_digest(file_path)
+
+            return self.digests[key]
+
+
+def get_file_digest(file_path: Path):
+    """Returns the SHA-256 hex digest of a file's contents, read in chunks."""
+
+    digest = hashlib.sha256()
+    with file_path.open('rb') as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK_SIZE), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def files_match(source: Path, destination: Path, digests=None):
+    """Returns True if the destination file exists and has the same contents as the source file."""
+
+    if not destination.exists():
+        return False
+
+    if source.stat().st_size != destination.stat().st_size:
+        return False
+
+    if digests is None:
+        return get_file_digest(source) == get_file_digest(destination)
+
+    return digests.get_digest(source) == get_file_digest(destination)
+
+
+def export_file(source: Path, destination: Path, link=False):
+    """Exports a file into place atomically, so a Unity project never imports a partially written brain.
+
+    The file is hard linked when requested and possible, otherwise it is copied using kernel-side copying where the platform supports it.
+    """
+
+    temporary_path = destination.with_name(f'.{destination.name}.{os.getpid()}.tmp')
+    if temporary_path.exists():
+        temporary_path.unlink()
+
+    try:
+        if not (link and link_file(source, temporary_path)):
+            copy_file(source, temporary_path)
+
+        os.replace(str(temporary_path), str(destination))
+
+    finally:
+        if temporary_path.exists():
+            temporary_path.unlink()
+
+
+def link_file(source: Path, destination: Path):
+    """Hard links a file. Returns False if the link could not be created (for example, across filesystems)."""
+
+    try:
+        os.link(str(source), str(destination))
+    except (AttributeError, OSError):
+        return False
+
+    return True
+
+
+def copy_file(source: Path, destination: Path):
+    """Copies a file without reading its contents into memory.
+
+    Uses copy_file_range() or sendfile() to copy inside the kernel where available and falls back to a chunked copy.
+    """
+
+    with source.open('rb') as source_file, destination.open('wb') as destination_file:
+        size = os.fstat(source_file.fileno()).st_size
+
+        if kernel_copy(source_file.fileno(), destination_file.fileno(), size):
+            return
+
+        source_file.seek(0)
+        destination_file.seek(0)
+        destination_file.truncate()
+        shutil.copyfileobj(source_file, destination_file, COPY_CHUNK_SIZE)
+
+
+def kernel_copy(source_fd, destination_fd, size):
+    """Copies size bytes between two file descriptors inside the kernel.
+
+    Returns:
+      True if the copy completed and False if no kernel-side copy mechanism was usable.
+    """
+
+    for copy_function in (getattr(os, 'copy_file_range', None), getattr(os, 'sendfile', None)):
+        if copy_function is None:
+            continue
+
+        offset = 0
+        try:
+            while offset < size:
+                if copy_function is os.sendfile:
+                    copied = os.sendfile(destination_fd, source_fd, offset, size - offset)
+                else:
+                    copied = os.copy_file_range(
+                        source_fd, destination_fd, size - offset, offset, offset
+                    )
+
+                if copied == 0:
+                    break
+
+                offset += copied
+
+        except OSError:
+            continue
+
+        if offset == size:
+            return True
+
+    return False
+
+
 if __name__ == '__main__':
     main()